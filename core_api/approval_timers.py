@@ -0,0 +1,13 @@
+"""
+Due times of approval steps. Both procurement.ApprovalStep and workflows.ApprovalStep default
+their due_at to approval_step_due_at(); procurement.approval_escalation acts on overdue steps.
+"""
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def approval_step_due_at():
+    """When a step created now becomes overdue (settings.APPROVAL_STEP_DUE_HOURS)."""
+    return timezone.now() + datetime.timedelta(hours=settings.APPROVAL_STEP_DUE_HOURS)
@@ -0,0 +1,67 @@
+"""
+Dirty-field tracking for models: knowing what a field was when the row was loaded
+without reading the row again.
+
+    class GenericIOM(FieldTrackerMixin, models.Model):
+        tracked_fields = ('status',)
+
+    iom.previous('status')     # value as loaded from the database (None for a new object)
+    iom.has_changed('status')  # True if it differs from that, or the object is new
+
+Instances loaded from the database (Model.from_db, so querysets, get(), refresh_from_db)
+snapshot their tracked fields; only fields actually loaded are recorded, so tracking adds
+no queries. After save() the snapshot moves to the saved values (only the update_fields
+ones when given), which means save() overrides and pre_save/post_save receivers still see
+the values from before this save. A tracked field that was deferred when the row was
+loaded is fetched on first use of previous()/has_changed(). Values are kept as loaded,
+not copied, so track scalar fields rather than JSON ones mutated in place.
+"""
+
+
+class FieldTrackerMixin:
+    tracked_fields = ()  # Field names (FKs as the field name, e.g. 'assigned_to')
+
+    @classmethod
+    def _tracked_attnames(cls):
+        return {name: cls._meta.get_field(name).attname for name in cls.tracked_fields}
+
+    def _snapshot_tracked_fields(self, names=None):
+        loaded = self.__dict__
+        snapshot = self.__dict__.setdefault('_tracked_initial', {})
+        for name, attname in self._tracked_attnames().items():
+            if (names is None or name in names) and attname in loaded:
+                snapshot[name] = loaded[attname]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_tracked_fields(set(fields) if fields is not None else None)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        self._snapshot_tracked_fields(set(update_fields) if update_fields is not None else None)
+
+    def previous(self, name):
+        """Value of tracked field `name` as last loaded from / saved to the database; None for new objects."""
+        attname = self._tracked_attnames()[name]
+        if self._state.adding or self.pk is None:
+            return None
+        snapshot = self.__dict__.setdefault('_tracked_initial', {})
+        if name not in snapshot:
+            # Deferred when loaded: one query, then remembered.
+            snapshot[name] = type(self)._base_manager.using(self._state.db).filter(pk=self.pk).values_list(
+                attname, flat=True
+            ).first()
+        return snapshot[name]
+
+    def has_changed(self, name):
+        """True if tracked field `name` differs from its database value (always True for new objects)."""
+        if self._state.adding or self.pk is None:
+            return True
+        return getattr(self, self._tracked_attnames()[name]) != self.previous(name)
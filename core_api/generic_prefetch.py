@@ -0,0 +1,53 @@
+"""
+Batch loading of GenericForeignKey targets.
+
+Rendering `obj.content_object` (or any other GFK) row by row costs one query per row,
+plus whatever the target's __str__ touches. These helpers group the rows by content
+type and load each target model with a single query, optionally with select_related()
+for the relations the caller renders:
+
+    related = {'procurement.PurchaseRequestMemo': ('requested_by',)}
+    queryset.prefetch_related(generic_prefetch('content_object', related))
+    prefetch_generic_objects(steps, 'content_object', related)  # already-fetched rows
+
+Models missing from `related` are still loaded in one query per content type, just
+without select_related(). Serializers can declare their GFKs in Meta.generic_prefetch
+and use core_api.serializers.GenericPrefetchListSerializer to get this for list output.
+"""
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.db.models import prefetch_related_objects
+
+
+def generic_prefetch(gfk_name, related=None):
+    """
+    Returns a prefetch_related() lookup for the GFK `gfk_name`, loading the models in `related`
+    ({'app_label.ModelName': (select_related fields, ...)}) with their related fields.
+    """
+    if not related:
+        return gfk_name
+    querysets = [
+        apps.get_model(label)._base_manager.select_related(*fields)
+        for label, fields in related.items()
+    ]
+    return GenericPrefetch(gfk_name, querysets)
+
+
+def prefetch_generic_objects(instances, gfk_name, related=None):
+    """Loads the GFK `gfk_name` of already-fetched `instances` with one query per content type."""
+    instances = [instance for instance in instances if instance is not None]
+    if not instances:
+        return instances
+    if related:
+        # Only build querysets for the models actually referenced (saves their content type lookups).
+        opts = instances[0]._meta
+        ct_attname = opts.get_field(opts.get_field(gfk_name).ct_field).attname
+        labels = set()
+        for ct_id in {getattr(instance, ct_attname) for instance in instances} - {None}:
+            model = ContentType.objects.get_for_id(ct_id).model_class()
+            if model is not None:
+                labels.add(model._meta.label)
+        related = {label: fields for label, fields in related.items() if label in labels}
+    prefetch_related_objects(instances, generic_prefetch(gfk_name, related))
+    return instances
@@ -0,0 +1,144 @@
+"""
+Shared alpha/numeric sequence service for system-generated IDs (SR-AA-0001, PO-AA-0001, ...).
+
+Sequence rows store the last issued value as two alpha characters plus a numeric part
+(AA-0001 .. ZZ-9999). This module turns that into a single integer position, so that
+reserving n IDs is one locked read and one UPDATE regardless of n.
+
+The standard format is exhausted at ZZ-9999. Prefixes listed in settings.SEQUENCE_WIDENED_PREFIXES
+(or calls made with widened=True) keep going after that with a longer alpha part:
+ZZ-9999 -> AAA-0001 ... ZZZ-9999 -> AAAA-0001.
+"""
+from django.conf import settings
+from django.db import transaction
+
+NUMERIC_SPAN = 9999  # 0001-9999 per alpha pair
+ALPHA_SPAN = 26 * 26  # AA-ZZ
+STANDARD_CAPACITY = ALPHA_SPAN * NUMERIC_SPAN
+
+# Sequence models register themselves here (see AlphaNumericSequenceMixin.__init_subclass__).
+_sequence_models = {}
+
+
+def _letters(value, width=None):
+    """Bijective base-26 letters for value >= 1 (1 -> A, 26 -> Z, 27 -> AA), or fixed-width base 26."""
+    if width is not None:
+        chars = []
+        for _ in range(width):
+            value, rem = divmod(value, 26)
+            chars.append(chr(ord("A") + rem))
+        return "".join(reversed(chars))
+    chars = []
+    while value > 0:
+        value, rem = divmod(value - 1, 26)
+        chars.append(chr(ord("A") + rem))
+    return "".join(reversed(chars))
+
+
+def is_widened(prefix):
+    return prefix in getattr(settings, 'SEQUENCE_WIDENED_PREFIXES', ())
+
+
+def format_id(prefix, position, widened=None):
+    """Formats a 1-based sequence position as PREFIX-AA-0001 (or PREFIX-AAA-0001 past ZZ-9999 when widened)."""
+    if widened is None:
+        widened = is_widened(prefix)
+    if position < 1 or (position > STANDARD_CAPACITY and not widened):
+        raise ValueError(f"Position {position} is outside the {prefix} ID sequence.")
+    alpha_index, numeric = divmod(position - 1, NUMERIC_SPAN)
+    overflow, pair_index = divmod(alpha_index, ALPHA_SPAN)
+    return f"{prefix}-{_letters(overflow)}{_letters(pair_index, width=2)}-{numeric + 1:04d}"
+
+
+class AlphaNumericSequenceMixin:
+    """
+    Mixin for sequence models with current_alpha_part_char1/char2, current_numeric_part
+    and current_alpha_overflow fields.
+
+    Subclasses set `sequence_prefixes` to the prefixes they own (None for "any other prefix").
+    `sequence_row_lookup(prefix)` returns the get_or_create lookup for a prefix's row; by default
+    the model holds a single row (pk 1), and models keeping one row per prefix override it.
+    """
+    sequence_prefixes = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Only classes declaring their own prefixes register (not migration state models).
+        if 'sequence_prefixes' not in cls.__dict__:
+            return
+        if cls.sequence_prefixes is None:
+            _sequence_models[None] = cls
+        else:
+            for prefix in cls.sequence_prefixes:
+                _sequence_models[prefix] = cls
+
+    @classmethod
+    def sequence_row_lookup(cls, prefix):
+        return {"pk": 1}
+
+    @property
+    def current_position(self):
+        """Position of the last issued/reserved ID (0 = nothing issued yet)."""
+        pair_index = (ord(self.current_alpha_part_char1) - ord("A")) * 26 + (ord(self.current_alpha_part_char2) - ord("A"))
+        alpha_index = self.current_alpha_overflow * ALPHA_SPAN + pair_index
+        return alpha_index * NUMERIC_SPAN + self.current_numeric_part
+
+    def set_position(self, position):
+        alpha_index, numeric = divmod(position - 1, NUMERIC_SPAN)
+        overflow, pair_index = divmod(alpha_index, ALPHA_SPAN)
+        self.current_alpha_overflow = overflow
+        self.current_alpha_part_char1 = chr(ord("A") + pair_index // 26)
+        self.current_alpha_part_char2 = chr(ord("A") + pair_index % 26)
+        self.current_numeric_part = numeric + 1
+
+    @classmethod
+    def reserve_positions(cls, prefix, n=1, widened=None):
+        """
+        Atomically advances the sequence for `prefix` by n and returns the (first, last)
+        positions reserved. Costs one locked SELECT and one UPDATE whatever the size of n.
+        """
+        if n < 1:
+            raise ValueError("Number of IDs to reserve must be at least 1.")
+        if widened is None:
+            widened = is_widened(prefix)
+
+        with transaction.atomic():
+            seq_instance, created = cls.objects.select_for_update().get_or_create(
+                **cls.sequence_row_lookup(prefix),
+                defaults={
+                    "current_alpha_part_char1": "A",
+                    "current_alpha_part_char2": "A",
+                    "current_numeric_part": 0, # Start at 0, so first ID is 0001
+                    "current_alpha_overflow": 0,
+                },
+            )
+
+            first = seq_instance.current_position + 1
+            last = seq_instance.current_position + n
+            if last > STANDARD_CAPACITY and not widened:
+                raise ValueError(
+                    f"{prefix} ID sequence exhausted (ZZ-9999 reached). Please implement a larger sequence or reset."
+                )
+
+            seq_instance.set_position(last)
+            seq_instance.save(update_fields=[
+                'current_alpha_part_char1', 'current_alpha_part_char2',
+                'current_numeric_part', 'current_alpha_overflow',
+            ])
+            return first, last
+
+
+def reserve(prefix, n=1, widened=None):
+    """
+    Reserves n consecutive IDs for `prefix` and returns them formatted, e.g.
+    reserve('PO', 3) -> ['PO-AA-0001', 'PO-AA-0002', 'PO-AA-0003'].
+
+    Intended for bulk creates: reserve once, then assign the IDs before bulk_create.
+    """
+    model = _sequence_models.get(prefix) or _sequence_models.get(None)
+    if model is None:
+        raise LookupError(f"No sequence model is registered for prefix '{prefix}'.")
+    if widened is None:
+        widened = is_widened(prefix)
+    first, last = model.reserve_positions(prefix, n, widened=widened)
+    return [format_id(prefix, position, widened=widened) for position in range(first, last + 1)]
@@ -1,7 +1,24 @@
+from django.db import models
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import Group
 
+from .generic_prefetch import prefetch_generic_objects
+
+
+class GenericPrefetchListSerializer(serializers.ListSerializer):
+    """
+    List serializer that batch-loads the child's GenericForeignKeys before rendering.
+    The child declares them in Meta.generic_prefetch as {gfk_name: {'app_label.ModelName': (select_related, ...)}}.
+    """
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        instances = list(iterable)
+        for gfk_name, related in getattr(self.child.Meta, 'generic_prefetch', {}).items():
+            prefetch_generic_objects(instances, gfk_name, related)
+        return super().to_representation(instances)
+
+
 class ContentTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContentType
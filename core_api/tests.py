@@ -3,6 +3,13 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from core_api import sequences
+from procurement.sequence_models import ProcurementIDSequence
+from service_requests.models import ServiceRequest, ServiceRequestSequence
 
 User = get_user_model()
 
@@ -87,3 +94,103 @@ class ContentTypeLookupViewTest(APITestCase):
             self.assertEqual(response_asset.data['id'], self.asset_content_type.id)
             self.assertEqual(response_asset.data['app_label'], 'assets')
             self.assertEqual(response_asset.data['model'], 'asset')
+
+
+class SequenceServiceTest(TestCase):
+    def test_format_id(self):
+        self.assertEqual(sequences.format_id('PO', 1, widened=False), 'PO-AA-0001')
+        self.assertEqual(sequences.format_id('PO', 10000, widened=False), 'PO-AB-0001')
+        self.assertEqual(sequences.format_id('PO', sequences.STANDARD_CAPACITY, widened=False), 'PO-ZZ-9999')
+        with self.assertRaises(ValueError):
+            sequences.format_id('PO', sequences.STANDARD_CAPACITY + 1, widened=False)
+
+    def test_widened_format_continues_past_zz_9999(self):
+        capacity = sequences.STANDARD_CAPACITY
+        self.assertEqual(sequences.format_id('PO', capacity + 1, widened=True), 'PO-AAA-0001')
+        self.assertEqual(sequences.format_id('PO', 2 * capacity, widened=True), 'PO-AZZ-9999')
+        self.assertEqual(sequences.format_id('PO', 2 * capacity + 1, widened=True), 'PO-BAA-0001')
+        self.assertEqual(sequences.format_id('PO', 27 * capacity + 1, widened=True), 'PO-AAAA-0001')
+
+    def test_reserve_returns_consecutive_ids_in_constant_queries(self):
+        sequences.reserve('BQ', 1)  # create the row
+        with self.assertNumQueries(4):  # savepoint, locked SELECT, UPDATE, release
+            ids = sequences.reserve('BQ', 1000)
+        self.assertEqual(len(ids), 1000)
+        self.assertEqual(ids[0], 'BQ-AA-0002')
+        self.assertEqual(ids[-1], 'BQ-AA-1001')
+        self.assertEqual(ProcurementIDSequence.objects.get(prefix='BQ').current_numeric_part, 1001)
+
+    def test_reserve_routes_sr_prefix_to_service_request_sequence(self):
+        self.assertEqual(sequences.reserve('SR', 2), ['SR-AA-0001', 'SR-AA-0002'])
+        self.assertEqual(ServiceRequestSequence.get_next_sequence(), 'SR-AA-0003')
+        self.assertFalse(ProcurementIDSequence.objects.filter(prefix='SR').exists())
+
+    def test_reserve_past_end_raises_unless_widened(self):
+        ServiceRequestSequence.objects.create(pk=1, current_alpha_part_char1='Z', current_alpha_part_char2='Z', current_numeric_part=9998)
+        with self.assertRaises(ValueError):
+            sequences.reserve('SR', 2)
+        self.assertEqual(sequences.reserve('SR', 2, widened=True), ['SR-ZZ-9999', 'SR-AAA-0001'])
+        self.assertEqual(ServiceRequestSequence.objects.get(pk=1).current_alpha_overflow, 1)
+
+    @override_settings(SEQUENCE_WIDENED_PREFIXES=['SR'])
+    def test_widened_prefixes_setting(self):
+        ServiceRequestSequence.objects.create(pk=1, current_alpha_part_char1='Z', current_alpha_part_char2='Z', current_numeric_part=9999)
+        self.assertEqual(ServiceRequestSequence.get_next_sequence(), 'SR-AAA-0001')
+
+
+class FieldTrackerMixinTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.requester = User.objects.create_user(username='tracker_requester', password='password123')
+        cls.agent = User.objects.create_user(username='tracker_agent', password='password123', email='agent@example.com')
+
+    def _create_request(self, **kwargs):
+        return ServiceRequest.objects.create(
+            title='Tracked request', description='Laptop', requested_by=self.requester, category='hardware', **kwargs
+        )
+
+    def test_loaded_instance_reports_changes_without_queries(self):
+        service_request = ServiceRequest.objects.get(pk=self._create_request().pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(service_request.has_changed('status'))
+            service_request.status = 'in_progress'
+            self.assertTrue(service_request.has_changed('status'))
+            self.assertEqual(service_request.previous('status'), 'new')
+
+        service_request.save(update_fields=['status'])
+        self.assertFalse(service_request.has_changed('status'))
+        self.assertEqual(service_request.previous('status'), 'in_progress')
+
+    def test_new_instance_and_deferred_field(self):
+        service_request = ServiceRequest(title='Unsaved', requested_by=self.requester, category='software')
+        self.assertIsNone(service_request.previous('status'))
+        self.assertTrue(service_request.has_changed('status'))
+
+        pk = self._create_request(status='resolved').pk
+        deferred = ServiceRequest.objects.only('pk', 'title').get(pk=pk)
+        with self.assertNumQueries(1):  # The deferred value is read once, then remembered
+            self.assertEqual(deferred.previous('status'), 'resolved')
+            self.assertEqual(deferred.previous('status'), 'resolved')
+
+    def test_refresh_from_db_resets_snapshot(self):
+        service_request = ServiceRequest.objects.get(pk=self._create_request().pk)
+        ServiceRequest.objects.filter(pk=service_request.pk).update(status='closed')
+        service_request.refresh_from_db()
+        self.assertEqual(service_request.previous('status'), 'closed')
+        self.assertFalse(service_request.has_changed('status'))
+
+    @patch('service_requests.signals.send_notification_email')
+    def test_assignment_notification_only_when_assignee_changes(self, mock_send):
+        service_request = self._create_request(assigned_to=self.agent)
+        self.assertEqual(mock_send.call_count, 1)
+
+        service_request = ServiceRequest.objects.get(pk=service_request.pk)
+        service_request.status = 'in_progress'
+        service_request.save()
+        self.assertEqual(mock_send.call_count, 1)  # Same assignee: no new notification
+
+        service_request.assigned_to = None
+        service_request.save()
+        service_request.assigned_to = self.agent
+        service_request.save()
+        self.assertEqual(mock_send.call_count, 2)
@@ -18,6 +18,11 @@ class GenericIomConfig(AppConfig):
             # Rename the actual handler to avoid conflict if signals.py is re-imported by Django multiple times
 
             post_save.connect(handle_approval_step_created_for_generic_iom_actual, sender=ApprovalStep)
+
+            # Workflow triggers bulk-create steps and notify once per IOM through this signal instead
+            from procurement.signals import approval_steps_created
+            from .signals import handle_approval_steps_created_for_generic_iom
+            approval_steps_created.connect(handle_approval_steps_created_for_generic_iom, sender=ApprovalStep)
         except ImportError:
             # This might happen if procurement app is not installed or during certain management commands
             # where apps are not fully loaded.
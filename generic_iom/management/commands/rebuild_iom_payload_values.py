@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from generic_iom.payload_projection import REBUILD_BATCH_SIZE, rebuild_payload_values
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-projects the filterable payload fields of every Generic IOM into its typed payload values. "
+        "Use to backfill after deployment, after flagging or unflagging template fields as filterable, "
+        "or after bulk edits that bypass the application."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help="IOMs re-projected per transaction.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        written = rebuild_payload_values(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"IOM payload values rebuilt: {written} values."))
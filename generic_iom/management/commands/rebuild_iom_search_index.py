@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from generic_iom.search_index import REBUILD_BATCH_SIZE, rebuild_search_documents
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrites the full-text search document of every Generic IOM. Use to backfill after "
+        "deployment, after changing a template's fields or search weights, or after bulk edits "
+        "that bypass the application."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help="IOMs rewritten per statement.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        written = rebuild_search_documents(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"IOM search index rebuilt: {written} IOMs."))
@@ -0,0 +1,127 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from generic_iom.search_index import REBUILD_BATCH_SIZE, _field_plan, document_texts
+
+# Full-text index over generic_iom_genericiomsearchdocument (see generic_iom/search_index.py).
+# Existing IOMs are indexed here, after the index is created, since the list's search no longer
+# reads data_payload.
+
+POSTGRESQL_INDEX = [
+    """
+    ALTER TABLE generic_iom_genericiomsearchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, text_a), 'A') ||
+        setweight(to_tsvector('english'::regconfig, text_b), 'B') ||
+        setweight(to_tsvector('english'::regconfig, text_c), 'C') ||
+        setweight(to_tsvector('english'::regconfig, text_d), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX generic_iom_search_vector_idx ON generic_iom_genericiomsearchdocument USING gin (search_vector)",
+]
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS generic_iom_search_vector_idx",
+    "ALTER TABLE generic_iom_genericiomsearchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE generic_iom_search_fts USING fts5(
+        text_a, text_b, text_c, text_d,
+        content='generic_iom_genericiomsearchdocument', content_rowid='iom_id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER generic_iom_search_fts_insert AFTER INSERT ON generic_iom_genericiomsearchdocument BEGIN
+        INSERT INTO generic_iom_search_fts (rowid, text_a, text_b, text_c, text_d)
+        VALUES (new.iom_id, new.text_a, new.text_b, new.text_c, new.text_d);
+    END
+    """,
+    """
+    CREATE TRIGGER generic_iom_search_fts_delete AFTER DELETE ON generic_iom_genericiomsearchdocument BEGIN
+        INSERT INTO generic_iom_search_fts (generic_iom_search_fts, rowid, text_a, text_b, text_c, text_d)
+        VALUES ('delete', old.iom_id, old.text_a, old.text_b, old.text_c, old.text_d);
+    END
+    """,
+    """
+    CREATE TRIGGER generic_iom_search_fts_update AFTER UPDATE ON generic_iom_genericiomsearchdocument BEGIN
+        INSERT INTO generic_iom_search_fts (generic_iom_search_fts, rowid, text_a, text_b, text_c, text_d)
+        VALUES ('delete', old.iom_id, old.text_a, old.text_b, old.text_c, old.text_d);
+        INSERT INTO generic_iom_search_fts (rowid, text_a, text_b, text_c, text_d)
+        VALUES (new.iom_id, new.text_a, new.text_b, new.text_c, new.text_d);
+    END
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS generic_iom_search_fts_insert",
+    "DROP TRIGGER IF EXISTS generic_iom_search_fts_delete",
+    "DROP TRIGGER IF EXISTS generic_iom_search_fts_update",
+    "DROP TABLE IF EXISTS generic_iom_search_fts",
+]
+
+
+def _run(schema_editor, statements_by_vendor):
+    for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRESQL_INDEX, 'sqlite': SQLITE_INDEX})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRESQL_DROP, 'sqlite': SQLITE_DROP})
+
+
+def index_existing_ioms(apps, schema_editor):
+    IOMTemplate = apps.get_model('generic_iom', 'IOMTemplate')
+    GenericIOM = apps.get_model('generic_iom', 'GenericIOM')
+    GenericIOMSearchDocument = apps.get_model('generic_iom', 'GenericIOMSearchDocument')
+    db_alias = schema_editor.connection.alias
+    plans = {}
+    last_pk = 0
+    while True:
+        batch = list(
+            GenericIOM.objects.using(db_alias).filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'subject', 'data_payload', 'iom_template_id')[:REBUILD_BATCH_SIZE]
+        )
+        if not batch:
+            return
+        new_template_ids = {template_id for _, _, _, template_id in batch} - plans.keys()
+        for template_id, fields_definition in IOMTemplate.objects.using(db_alias).filter(
+            pk__in=new_template_ids
+        ).values_list('pk', 'fields_definition'):
+            plans[template_id] = _field_plan(fields_definition)
+        documents = [
+            GenericIOMSearchDocument(iom_id=pk, **document_texts(subject, data_payload, plans[template_id]))
+            for pk, subject, data_payload, template_id in batch
+        ]
+        GenericIOMSearchDocument.objects.using(db_alias).bulk_create(documents)
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generic_iom', '0003_load_sample_iom_templates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenericIOMSearchDocument',
+            fields=[
+                ('iom', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='generic_iom.genericiom', verbose_name='Generic IOM')),
+                ('text_a', models.TextField(blank=True, help_text='Subject.', verbose_name='Weight A Text')),
+                ('text_b', models.TextField(blank=True, verbose_name='Weight B Text')),
+                ('text_c', models.TextField(blank=True, verbose_name='Weight C Text')),
+                ('text_d', models.TextField(blank=True, verbose_name='Weight D Text')),
+            ],
+            options={
+                'verbose_name': 'Generic IOM Search Document',
+                'verbose_name_plural': 'Generic IOM Search Documents',
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_ioms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generic_iom', '0004_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenericIOMPayloadValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_name', models.CharField(max_length=100, verbose_name='Field Name')),
+                ('value_number', models.DecimalField(blank=True, decimal_places=6, max_digits=24, null=True, verbose_name='Number Value')),
+                ('value_date', models.DateField(blank=True, null=True, verbose_name='Date Value')),
+                ('value_datetime', models.DateTimeField(blank=True, null=True, verbose_name='Date/Time Value')),
+                ('value_text', models.CharField(blank=True, max_length=255, null=True, verbose_name='Text Value')),
+                ('iom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payload_values', to='generic_iom.genericiom', verbose_name='Generic IOM')),
+            ],
+            options={
+                'verbose_name': 'Generic IOM Payload Value',
+                'verbose_name_plural': 'Generic IOM Payload Values',
+                'indexes': [models.Index(fields=['field_name', 'value_number', 'iom'], name='generic_iom_payload_num_idx'), models.Index(fields=['field_name', 'value_date', 'iom'], name='generic_iom_payload_date_idx'), models.Index(fields=['field_name', 'value_datetime', 'iom'], name='generic_iom_payload_dt_idx'), models.Index(fields=['field_name', 'value_text', 'iom'], name='generic_iom_payload_text_idx')],
+                'constraints': [models.UniqueConstraint(fields=('iom', 'field_name'), name='generic_iom_payload_value_unique')],
+            },
+        ),
+    ]
@@ -4,7 +4,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
-from django.db.models import Q
+from core_api.field_tracking import FieldTrackerMixin
 
 # Attempt to import ProcurementIDSequence.
 try:
@@ -16,6 +16,7 @@ except ImportError:
 # This creates a dependency. Ensure procurement app is correctly set up.
 try:
     from procurement.models import ApprovalRule, ApprovalStep
+    from procurement.approval_rule_index import get_approval_rule_index
 except ImportError as e:
     # This is a critical dependency for the advanced workflow.
     # If it fails, the advanced workflow part cannot function.
@@ -142,7 +143,9 @@ class IOMTemplate(models.Model):
         self.full_clean() # Call full_clean before saving
         super().save(*args, **kwargs)
 
-class GenericIOM(models.Model):
+class GenericIOM(FieldTrackerMixin, models.Model):
+    tracked_fields = ('status',)
+
     STATUS_CHOICES = [
         ('draft', _('Draft')),
         ('pending_approval', _('Pending Approval')),
@@ -210,6 +213,12 @@ class GenericIOM(models.Model):
         verbose_name=_("Parent Record ID")
     )
     parent_record = GenericForeignKey('parent_content_type', 'parent_object_id')
+    # Relations rendered with common parent records (their __str__); see core_api.generic_prefetch.
+    PARENT_RECORD_RELATED = {
+        'procurement.PurchaseRequestMemo': ('requested_by',),
+        'procurement.PurchaseOrder': ('vendor',),
+        'procurement.CheckRequest': ('purchase_order',),
+    }
 
     simple_approver_action_by = models.ForeignKey(
         User,
@@ -241,24 +250,7 @@ class GenericIOM(models.Model):
 
     def save(self, *args, **kwargs):
         is_new = self._state.adding
-        old_status = None
-        if not is_new and self.pk:
-            try:
-                old_status_instance = GenericIOM.objects.get(pk=self.pk)
-                old_status = old_status_instance.status
-            except GenericIOM.DoesNotExist:
-                pass
-
-        if not self.gim_id: # Ensure ID is generated only if not already set
-            if ProcurementIDSequence:
-                try:
-                    self.gim_id = ProcurementIDSequence.get_next_id("GIM")
-                except Exception as e:
-                    print(f"Error generating GIM ID via ProcurementIDSequence: {e}. Using fallback.")
-                    self.gim_id = f"GIM-FALLBACK-{timezone.now().strftime('%Y%m%d%H%M%S%f')}"
-            else:
-                 print("ProcurementIDSequence not available. Using fallback GIM ID (NOT FOR PRODUCTION).")
-                 self.gim_id = f"GIM-FALLBACK-{timezone.now().strftime('%Y%m%d%H%M%S%f')}"
+        old_status = self.previous('status') # As loaded; no re-fetch of the row
 
         if self.status == 'published' and not self.published_at:
             self.published_at = timezone.now()
@@ -266,8 +258,19 @@ class GenericIOM(models.Model):
         # Use transaction.atomic to ensure that if workflow triggering fails,
         # the main save operation can also be rolled back if desired,
         # though workflow trigger is often a post-save signal or action.
-        # For now, simple save then trigger.
-        super().save(*args, **kwargs)
+        # For now, the ID allocation and the save share a transaction, then trigger.
+        with transaction.atomic():
+            if not self.gim_id: # Ensure ID is generated only if not already set
+                if ProcurementIDSequence:
+                    try:
+                        self.gim_id = ProcurementIDSequence.get_next_id("GIM")
+                    except Exception as e:
+                        print(f"Error generating GIM ID via ProcurementIDSequence: {e}. Using fallback.")
+                        self.gim_id = f"GIM-FALLBACK-{timezone.now().strftime('%Y%m%d%H%M%S%f')}"
+                else:
+                     print("ProcurementIDSequence not available. Using fallback GIM ID (NOT FOR PRODUCTION).")
+                     self.gim_id = f"GIM-FALLBACK-{timezone.now().strftime('%Y%m%d%H%M%S%f')}"
+            super().save(*args, **kwargs)
 
         # Post-save logic for workflow triggering
         if self.status == 'draft' and (is_new or (old_status and old_status != 'draft')):
@@ -291,31 +294,17 @@ class GenericIOM(models.Model):
 
         # print(f"GIM {self.gim_id}: Triggering advanced approval workflow.")
 
-        current_content_type = ContentType.objects.get_for_model(self)
-
         # Delete existing 'pending' or 'delegated' approval steps for this GIM
-        ApprovalStep.objects.filter(
-            content_type=current_content_type,
-            object_id=self.pk,
-            status__in=['pending', 'delegated']
-        ).delete()
-
-        # Query applicable ApprovalRules
-        # Q object for template OR category matching.
-        # If category is null on template, it won't match by category.
-        template_q = Q(applicable_iom_templates=self.iom_template)
-        category_q = Q() # Empty Q object
-        if self.iom_template.category:
-            category_q = Q(applicable_iom_categories=self.iom_template.category)
-
-        applicable_rules = ApprovalRule.objects.filter(
-            Q(rule_type='generic_iom'),
-            (template_q | category_q), # Rule must apply to this template OR this template's category
-            Q(is_active=True)
-        ).distinct().order_by('order')
-        # distinct() is important if a rule matches both template and category.
-
-        created_steps_count = 0
+        ApprovalStep.delete_pending_for(self)
+
+        # Applicable ApprovalRules: active 'generic_iom' rules for this template OR this template's category.
+        # If category is null on template, it won't match by category. Resolved from the shared
+        # in-memory rule index; a rule matching both template and category is returned once.
+        applicable_rules = get_approval_rule_index().match_generic_iom(
+            self.iom_template_id, self.iom_template.category_id
+        )
+
+        new_steps = []
         for rule in applicable_rules:
             # Placeholder for data_payload based conditions on 'rule'
             # if rule.json_path_condition and rule.expected_value_condition:
@@ -331,16 +320,19 @@ class GenericIOM(models.Model):
             #     except: # Broad except for issues accessing path
             #         continue # Skip rule if path is invalid or value not found
 
-            ApprovalStep.objects.create(
+            new_steps.append(ApprovalStep(
                 content_object=self,
                 approval_rule=rule,
                 step_order=rule.order,
                 assigned_approver_user=rule.approver_user,
                 assigned_approver_group=rule.approver_group,
                 status='pending'
-                # rule_name_snapshot is handled by ApprovalStep's save method
-            )
-            created_steps_count += 1
+                # rule_name_snapshot is filled in by bulk_create_for_workflow
+            ))
+
+        # Single bulk insert; one batched "approval steps assigned" notification follows on commit.
+        created_steps = ApprovalStep.bulk_create_for_workflow(self, new_steps)
+        created_steps_count = len(created_steps)
 
         if created_steps_count > 0:
             if self.status == 'draft': # Only change status if it was draft
@@ -355,3 +347,58 @@ class GenericIOM(models.Model):
         # else:
             # print(f"GIM {self.gim_id} - no 'advanced' approval rules applied. Status remains '{self.status}'.")
             # pass
+
+
+class GenericIOMSearchDocument(models.Model):
+    """
+    The searchable text of a GenericIOM, split by weight (see generic_iom/search_index.py).
+    Kept in sync on save; the full-text index over it (PostgreSQL tsvector/GIN or SQLite FTS5)
+    is created by migration 0004 and maintained by the database.
+    """
+    iom = models.OneToOneField(
+        GenericIOM, on_delete=models.CASCADE, primary_key=True,
+        related_name='search_document', verbose_name=_("Generic IOM")
+    )
+    text_a = models.TextField(_("Weight A Text"), blank=True, help_text=_("Subject."))
+    text_b = models.TextField(_("Weight B Text"), blank=True)
+    text_c = models.TextField(_("Weight C Text"), blank=True)
+    text_d = models.TextField(_("Weight D Text"), blank=True)
+
+    class Meta:
+        verbose_name = _("Generic IOM Search Document")
+        verbose_name_plural = _("Generic IOM Search Documents")
+
+    def __str__(self):
+        return f"Search document of GenericIOM {self.iom_id}"
+
+
+class GenericIOMPayloadValue(models.Model):
+    """
+    One payload value of a GenericIOM for a template field flagged "filterable", stored in the
+    typed column of its field type (see generic_iom/payload_projection.py). Kept in sync on save;
+    the list endpoint filters and sorts on these through the (field_name, value) indexes.
+    """
+    iom = models.ForeignKey(
+        GenericIOM, on_delete=models.CASCADE, related_name='payload_values', verbose_name=_("Generic IOM")
+    )
+    field_name = models.CharField(_("Field Name"), max_length=100)
+    value_number = models.DecimalField(_("Number Value"), max_digits=24, decimal_places=6, null=True, blank=True)
+    value_date = models.DateField(_("Date Value"), null=True, blank=True)
+    value_datetime = models.DateTimeField(_("Date/Time Value"), null=True, blank=True)
+    value_text = models.CharField(_("Text Value"), max_length=255, null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Generic IOM Payload Value")
+        verbose_name_plural = _("Generic IOM Payload Values")
+        constraints = [
+            models.UniqueConstraint(fields=['iom', 'field_name'], name='generic_iom_payload_value_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['field_name', 'value_number', 'iom'], name='generic_iom_payload_num_idx'),
+            models.Index(fields=['field_name', 'value_date', 'iom'], name='generic_iom_payload_date_idx'),
+            models.Index(fields=['field_name', 'value_datetime', 'iom'], name='generic_iom_payload_dt_idx'),
+            models.Index(fields=['field_name', 'value_text', 'iom'], name='generic_iom_payload_text_idx'),
+        ]
+
+    def __str__(self):
+        return f"GenericIOM {self.iom_id}: {self.field_name}"
@@ -0,0 +1,206 @@
+"""
+Typed projection of selected GenericIOM payload fields, for filtering and sorting.
+
+A field of a template's fields_definition flagged "filterable": true is copied on every save of
+an IOM into a GenericIOMPayloadValue row (see signals.py). The row stores the value in the
+typed column of the field's type:
+
+    number                       value_number
+    date                         value_date
+    datetime                     value_datetime
+    text_short, choice_single    value_text (first 255 characters)
+
+Each column has a (field_name, value) index. A filter such as ?payload__estimated_cost__gte=5000
+therefore becomes an index range scan that returns IOM ids, without reading any data_payload:
+
+    GenericIOM.pk IN (SELECT iom_id FROM ... WHERE field_name = 'estimated_cost' AND value_number >= 5000)
+
+Filters take the lookups in FILTER_LOOKUPS. ?ordering=payload__<field> sorts on the value, with
+IOMs lacking it last. A field name may be filterable in several templates with different types;
+filters then cover every type the value parses as, and sorting on it is refused. Values that
+don't parse as their field's type (payloads saved before payload validation) are not projected.
+
+Existing IOMs, and IOMs whose template gained or lost filterable fields, are re-projected by
+the rebuild_iom_payload_values command.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from .payload_validation import _parse_date, _parse_datetime, _parse_number
+
+PROJECTED_COLUMNS = {
+    'number': 'value_number',
+    'date': 'value_date',
+    'datetime': 'value_datetime',
+    'text_short': 'value_text',
+    'choice_single': 'value_text',
+}
+FILTER_LOOKUPS = ('exact', 'gt', 'gte', 'lt', 'lte')
+FILTER_PREFIX = 'payload__'
+REBUILD_BATCH_SIZE = 1000  # IOMs re-projected per transaction
+
+_NUMBER_LIMIT = 10 ** 18  # value_number holds 18 integer digits
+_NUMBER_STEP = Decimal('0.000001')
+
+
+def _number(value):
+    number = _parse_number(value)
+    if abs(number) >= _NUMBER_LIMIT:
+        raise ValueError("Number out of range.")
+    return number.quantize(_NUMBER_STEP)
+
+
+def _text(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("Must be text.")
+    return value.strip()[:255]
+
+
+# Column value of a payload (or query parameter) value, by column; raises ValueError.
+_CONVERTERS = {
+    'value_number': _number,
+    'value_date': _parse_date,
+    'value_datetime': _parse_datetime,
+    'value_text': _text,
+}
+
+
+def projection_plan(fields_definition):
+    """{field name: column} for the filterable fields of a definition. ValueError for unsupported types."""
+    plan = {}
+    for field_def in fields_definition or []:
+        if not isinstance(field_def, dict) or not field_def.get('filterable'):
+            continue
+        column = PROJECTED_COLUMNS.get(field_def.get('type'))
+        if column is None:
+            raise ValueError(
+                f"Field '{field_def.get('name')}': only {', '.join(PROJECTED_COLUMNS)} fields can be filterable."
+            )
+        plan[field_def['name']] = column
+    return plan
+
+
+def _payload_values(iom, plan):
+    from .models import GenericIOMPayloadValue
+    payload = iom.data_payload if isinstance(iom.data_payload, dict) else {}
+    values = []
+    for name, column in plan.items():
+        if payload.get(name) in (None, '', []):
+            continue
+        try:
+            value = _CONVERTERS[column](payload[name])
+        except ValueError:
+            continue
+        values.append(GenericIOMPayloadValue(iom_id=iom.pk, field_name=name, **{column: value}))
+    return values
+
+
+def update_payload_values(ioms, replace=True):
+    """
+    Writes the projected values of saved IOMs: one DELETE (skipped with replace=False, for new
+    IOMs) and one INSERT, none for IOMs whose template has no filterable field. Returns the
+    number of values written.
+    """
+    from .models import GenericIOMPayloadValue
+    plans = {}
+    projected_ids = []
+    values = []
+    for iom in ioms:
+        if iom.iom_template_id not in plans:
+            try:
+                plans[iom.iom_template_id] = projection_plan(iom.iom_template.fields_definition)
+            except ValueError:
+                plans[iom.iom_template_id] = {} # Stored before definitions were checked
+        if plans[iom.iom_template_id]:
+            projected_ids.append(iom.pk)
+            values.extend(_payload_values(iom, plans[iom.iom_template_id]))
+    if replace and projected_ids:
+        GenericIOMPayloadValue.objects.filter(iom__in=projected_ids).delete()
+    if values:
+        GenericIOMPayloadValue.objects.bulk_create(values)
+    return len(values)
+
+
+def rebuild_payload_values(batch_size=REBUILD_BATCH_SIZE):
+    """Re-projects every GenericIOM, `batch_size` IOMs per transaction. Returns the number of values written."""
+    from .models import GenericIOM, GenericIOMPayloadValue
+    written = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            GenericIOM.objects.filter(pk__gt=last_pk).order_by('pk')
+            .select_related('iom_template').only('data_payload', 'iom_template__fields_definition')[:batch_size]
+        )
+        if not batch:
+            return written
+        with transaction.atomic():
+            # Also clears IOMs whose template no longer has filterable fields.
+            GenericIOMPayloadValue.objects.filter(iom__in=batch).delete()
+            written += update_payload_values(batch, replace=False)
+        last_pk = batch[-1].pk
+
+
+def filterable_fields():
+    """{field name: {columns}} over all templates: one query on the (small) template table."""
+    from .models import IOMTemplate
+    fields = {}
+    for definition in IOMTemplate.objects.values_list('fields_definition', flat=True):
+        try:
+            plan = projection_plan(definition)
+        except ValueError:
+            continue
+        for name, column in plan.items():
+            fields.setdefault(name, set()).add(column)
+    return fields
+
+
+def payload_filters(params, fields=None):
+    """
+    Q objects for the payload__<field>[__<lookup>] entries of `params` (a QueryDict or dict), to
+    AND onto a GenericIOM queryset. Raises ValueError with a message for the client.
+    """
+    from .models import GenericIOMPayloadValue
+    filters = []
+    for key in params:
+        if not key.startswith(FILTER_PREFIX):
+            continue
+        if fields is None:
+            fields = filterable_fields()
+        name, _, lookup = key[len(FILTER_PREFIX):].partition('__')
+        lookup = lookup or 'exact'
+        if name not in fields:
+            raise ValueError(f"'{name}' is not a filterable payload field.")
+        if lookup not in FILTER_LOOKUPS:
+            raise ValueError(f"Unsupported lookup '{lookup}' for {key}; use one of {', '.join(FILTER_LOOKUPS)}.")
+        raw = params[key]
+        matches = Q()
+        for column in sorted(fields[name]):
+            try:
+                value = _CONVERTERS[column](raw)
+            except ValueError:
+                continue
+            matches |= Q(field_name=name, **{f'{column}__{lookup}': value})
+        if not matches:
+            raise ValueError(f"{key}: '{raw}' is not a valid value for this field.")
+        filters.append(Q(pk__in=GenericIOMPayloadValue.objects.filter(matches).values('iom_id')))
+    return filters
+
+
+def payload_ordering(queryset, name, descending, fields):
+    """
+    `queryset` annotated with field `name`'s value, and the order_by() term sorting on it with
+    missing values last. Raises ValueError with a message for the client.
+    """
+    from .models import GenericIOMPayloadValue
+    if name not in fields:
+        raise ValueError(f"'{name}' is not a filterable payload field.")
+    if len(fields[name]) > 1:
+        raise ValueError(f"Cannot sort on '{name}': its type differs between templates.")
+    (column,) = fields[name]
+    annotation = f'payload_{name}'
+    queryset = queryset.annotate(**{annotation: Subquery(
+        GenericIOMPayloadValue.objects.filter(iom=OuterRef('pk'), field_name=name).values(column)[:1]
+    )})
+    return queryset, (F(annotation).desc(nulls_last=True) if descending else F(annotation).asc(nulls_last=True))
@@ -0,0 +1,340 @@
+"""
+Compiled validators for GenericIOM.data_payload.
+
+An IOMTemplate's fields_definition is compiled once into a PayloadValidator. Each field
+becomes a _CompiledField holding its type conversion, range/length limits, choice set,
+default, readonly flag and auto_populate source. Validating a payload is then one loop over
+those fields, with no parsing of the definition. Validators are kept in a per-process LRU
+cache keyed by template id and updated_at, so a template is recompiled only after it is
+saved again (updated_at is auto_now). settings.IOM_PAYLOAD_VALIDATOR_CACHE_SIZE bounds the
+cache. Many payloads of one template (bulk submissions) can be checked by calling validate()
+in a loop on the validator from get_payload_validator().
+
+Field types:
+
+    text_short, text_area (text, textarea)  strings; attributes minLength / maxLength
+    number                                  ints/floats or numeric strings; attributes min / max
+    date, datetime                          ISO 8601 strings, stored normalized; attributes min / max
+                                            (a date may be sent as a datetime; its local date is kept)
+    boolean                                 true/false (also "true"/"false", "1"/"0", "yes"/"no")
+    choice_single, choice_multiple          option values (a list of them for choice_multiple)
+
+Other types are stored as given, and so are payload keys the definition doesn't name.
+Missing fields take their defaultValue (or default), else their auto_populate value
+(current_date, current_datetime, current_user). Readonly fields with one of those can't be set
+by the client: on updates they keep their previous value, otherwise they take the default or
+auto-populated value. Readonly fields without either are only read-only in the form (totals the
+front end computes, for example), so the client's value is validated and stored like any other;
+on updates that omit it the previous value is kept.
+"""
+import datetime
+import threading
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+TEXT_TYPES = ('text_short', 'text_area', 'text', 'textarea')
+CHOICE_TYPES = ('choice_single', 'choice_multiple')
+
+_MISSING = object()
+
+_TRUE_STRINGS = ('true', '1', 'yes')
+_FALSE_STRINGS = ('false', '0', 'no')
+
+
+class PayloadValidationError(ValueError):
+    """Raised by PayloadValidator.validate(); `errors` maps field names to messages."""
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _is_blank(value):
+    return value is None or value == [] or (isinstance(value, str) and not value.strip())
+
+
+# --- converters --------------------------------------------------------------------------
+# Built once per field; each takes a non-blank value and returns the value to store, or raises
+# ValueError with a message for the client.
+
+def _limits(attributes, parse):
+    """Parsed (min, max) attributes; a definition error (ValueError) if they don't parse."""
+    bounds = []
+    for name in ('min', 'max'):
+        raw = attributes.get(name)
+        if raw is None or raw == '':
+            bounds.append(None)
+            continue
+        try:
+            bounds.append(parse(raw))
+        except (TypeError, ValueError, InvalidOperation):
+            raise ValueError(f"attribute '{name}' is not valid: {raw!r}")
+    return bounds
+
+
+def _check_limits(value, minimum, maximum, display=str):
+    if minimum is not None and value < minimum:
+        raise ValueError(f"Must be at least {display(minimum)}.")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"Must be at most {display(maximum)}.")
+
+
+def _parse_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, Decimal, str)):
+        raise ValueError("Must be a number.")
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError("Must be a number.")
+    if not number.is_finite():
+        raise ValueError("Must be a number.")
+    return number
+
+
+def _number_converter(attributes):
+    minimum, maximum = _limits(attributes, _parse_number)
+
+    def convert(value):
+        number = _parse_number(value)
+        _check_limits(number, minimum, maximum)
+        if isinstance(value, (int, float)):
+            return value
+        # Numeric strings (and Decimals, which JSON can't hold) are stored as numbers.
+        return int(number) if number == number.to_integral_value() else float(number)
+    return convert
+
+
+def _parse_date(value):
+    if isinstance(value, datetime.datetime):
+        raise ValueError("Must be a date (YYYY-MM-DD).")
+    if isinstance(value, datetime.date):
+        return value
+    if not isinstance(value, str):
+        raise ValueError("Must be a date (YYYY-MM-DD).")
+    try:
+        return datetime.date.fromisoformat(value.strip())
+    except ValueError:
+        pass
+    # The form sends dates as Date.toISOString(), e.g. 2025-06-25T04:00:00.000Z.
+    try:
+        parsed = parse_datetime(value.strip())
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError("Must be a date (YYYY-MM-DD).")
+    if timezone.is_aware(parsed):
+        parsed = timezone.localtime(parsed)
+    return parsed.date()
+
+
+def _date_converter(attributes):
+    minimum, maximum = _limits(attributes, _parse_date)
+
+    def convert(value):
+        date = _parse_date(value)
+        _check_limits(date, minimum, maximum, display=datetime.date.isoformat)
+        return date.isoformat()
+    return convert
+
+
+def _parse_datetime(value):
+    if not isinstance(value, (str, datetime.datetime)):
+        raise ValueError("Must be a date and time (ISO 8601).")
+    parsed = value if isinstance(value, datetime.datetime) else parse_datetime(value.strip())
+    if parsed is None:
+        raise ValueError("Must be a date and time (ISO 8601).")
+    if settings.USE_TZ and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _datetime_converter(attributes):
+    minimum, maximum = _limits(attributes, _parse_datetime)
+
+    def convert(value):
+        parsed = _parse_datetime(value)
+        _check_limits(parsed, minimum, maximum, display=datetime.datetime.isoformat)
+        return parsed.isoformat()
+    return convert
+
+
+def _text_converter(attributes):
+    min_length, max_length = _limits(
+        {'min': attributes.get('minLength'), 'max': attributes.get('maxLength')}, int
+    )
+
+    def convert(value):
+        if not isinstance(value, str):
+            raise ValueError("Must be text.")
+        if min_length is not None and len(value) < min_length:
+            raise ValueError(f"Must be at least {min_length} characters.")
+        if max_length is not None and len(value) > max_length:
+            raise ValueError(f"Must be at most {max_length} characters.")
+        return value
+    return convert
+
+
+def _boolean_converter(attributes):
+    def convert(value):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int) and value in (0, 1):
+            return bool(value)
+        if isinstance(value, str) and value.strip().lower() in _TRUE_STRINGS + _FALSE_STRINGS:
+            return value.strip().lower() in _TRUE_STRINGS
+        raise ValueError("Must be true or false.")
+    return convert
+
+
+def _choice_converter(field_def):
+    options = field_def.get('options')
+    if not isinstance(options, list) or not options:
+        raise ValueError("'options' must be a non-empty list")
+    allowed = frozenset(option.get('value') if isinstance(option, dict) else option for option in options)
+    multiple = field_def.get('type') == 'choice_multiple'
+
+    def convert(value):
+        values = value if multiple else [value]
+        if multiple and not isinstance(value, list):
+            raise ValueError("Must be a list of options.")
+        invalid = [item for item in values if not isinstance(item, (str, int, float, bool)) or item not in allowed]
+        if invalid:
+            raise ValueError(f"Not a valid option: {invalid[0]!r}.")
+        return value
+    return convert
+
+
+def _any(value):
+    return value
+
+
+_CONVERTER_FACTORIES = {
+    'number': _number_converter,
+    'date': _date_converter,
+    'datetime': _datetime_converter,
+    'boolean': _boolean_converter,
+    **{text_type: _text_converter for text_type in TEXT_TYPES},
+}
+
+AUTO_POPULATE_SOURCES = {
+    'current_date': lambda user: timezone.localdate().isoformat(),
+    'current_datetime': lambda user: timezone.now().isoformat(),
+    'current_user': lambda user: user.get_username() if user is not None and user.is_authenticated else None,
+}
+
+
+# --- compiled validator --------------------------------------------------------------------
+
+class _CompiledField:
+    __slots__ = ('name', 'label', 'required', 'readonly', 'default', 'auto_populate', 'server_sourced', 'convert')
+
+    def __init__(self, field_def):
+        self.name = field_def['name']
+        self.label = field_def.get('label') or self.name
+        self.required = bool(field_def.get('required', False))
+        self.readonly = bool(field_def.get('readonly', False))
+        self.default = field_def.get('defaultValue', field_def.get('default', _MISSING))
+        # Unknown sources are front-end hints only.
+        self.auto_populate = AUTO_POPULATE_SOURCES.get(field_def.get('auto_populate'))
+        self.server_sourced = self.default is not _MISSING or self.auto_populate is not None
+        field_type = field_def.get('type')
+        attributes = field_def.get('attributes') or {}
+        if not isinstance(attributes, dict):
+            raise ValueError("'attributes' must be a dictionary")
+        if field_type in CHOICE_TYPES:
+            self.convert = _choice_converter(field_def)
+        elif field_type in _CONVERTER_FACTORIES:
+            self.convert = _CONVERTER_FACTORIES[field_type](attributes)
+        else:
+            self.convert = _any
+
+    def initial(self, user):
+        if self.default is not _MISSING:
+            return self.default
+        if self.auto_populate is not None:
+            return self.auto_populate(user)
+        return _MISSING
+
+
+class PayloadValidator:
+    """The fields_definition of a template, compiled. Raises ValueError if the definition is invalid."""
+
+    def __init__(self, fields_definition):
+        if not isinstance(fields_definition, list):
+            raise ValueError("Fields definition must be a list.")
+        self.fields = []
+        for position, field_def in enumerate(fields_definition):
+            if not isinstance(field_def, dict) or not field_def.get('name'):
+                raise ValueError(f"Field {position + 1}: each field definition must be a dictionary with a 'name'.")
+            try:
+                self.fields.append(_CompiledField(field_def))
+            except ValueError as exc:
+                raise ValueError(f"Field '{field_def['name']}': {exc}.")
+
+    def validate(self, payload, previous=None, user=None):
+        """
+        Returns the payload to store: values converted, defaults and auto-populated values filled
+        in, server-sourced readonly fields kept from `previous` (the stored payload, on updates).
+        Raises PayloadValidationError listing every invalid field.
+        """
+        if not isinstance(payload, dict):
+            raise PayloadValidationError({'non_field_errors': "Data payload must be a dictionary."})
+        cleaned = dict(payload)
+        errors = {}
+        for field in self.fields:
+            if field.readonly and field.server_sourced:
+                value = previous.get(field.name, _MISSING) if previous is not None else _MISSING
+            else:
+                value = payload.get(field.name, _MISSING)
+                if value is _MISSING and field.readonly and previous is not None:
+                    value = previous.get(field.name, _MISSING)
+            if value is _MISSING:
+                value = field.initial(user)
+
+            if value is _MISSING or _is_blank(value):
+                if field.required:
+                    errors[field.name] = f"Required field '{field.label}' is missing or empty."
+                elif value is _MISSING:
+                    cleaned.pop(field.name, None)
+                else:
+                    cleaned[field.name] = value
+                continue
+            try:
+                cleaned[field.name] = field.convert(value)
+            except ValueError as exc:
+                errors[field.name] = f"{field.label}: {exc}"
+        if errors:
+            raise PayloadValidationError(errors)
+        return cleaned
+
+
+# --- cache ---------------------------------------------------------------------------------
+
+_validators = OrderedDict()  # template id -> (updated_at, PayloadValidator), least recently used first
+_lock = threading.Lock()
+
+
+def get_payload_validator(template):
+    """The compiled validator of an IOMTemplate, from the cache unless the template changed since."""
+    if template.pk is None:
+        return PayloadValidator(template.fields_definition)
+    with _lock:
+        entry = _validators.get(template.pk)
+        if entry is not None and entry[0] == template.updated_at:
+            _validators.move_to_end(template.pk)
+            return entry[1]
+    validator = PayloadValidator(template.fields_definition)
+    with _lock:
+        _validators[template.pk] = (template.updated_at, validator)
+        _validators.move_to_end(template.pk)
+        while len(_validators) > settings.IOM_PAYLOAD_VALIDATOR_CACHE_SIZE:
+            _validators.popitem(last=False)
+    return validator
+
+
+def clear_payload_validator_cache():
+    with _lock:
+        _validators.clear()
@@ -0,0 +1,186 @@
+"""
+Full-text search over GenericIOM subjects and payloads.
+
+Every GenericIOM has a GenericIOMSearchDocument holding its searchable text in four weight
+classes. Only text is indexed; payload keys and non-text values (numbers, dates, booleans) are not:
+
+    A  the subject
+    B  text_short and choice fields (choices by option label)
+    C  text_area fields
+    D  other text values, including values under payload keys the template does not define
+
+A field of the template's fields_definition can override its class with "search_weight"
+("A"-"D"), or leave the index with "search_weight": "none".
+
+The document is rewritten when the IOM is saved (see signals.py). The database maintains the
+full-text index over it. Migration 0004 creates that index and indexes the existing IOMs:
+
+- PostgreSQL: a generated tsvector column, setweight() per class, with a GIN index; ranked
+  with ts_rank.
+- SQLite: an external-content FTS5 table with one column per class, kept in sync by
+  triggers; ranked with bm25 weighted 10/5/2/1.
+
+A search is one index lookup returning at most IOM_SEARCH_MAX_RESULTS ranked ids, whatever the
+size of the IOM table. The caller's visibility rules go into the same statement (`within`, a
+GenericIOM queryset, as a subquery on iom_id), so the limit counts only IOMs the user can see.
+Other databases fall back to substring matching on the documents.
+
+Template changes, and bulk edits that bypass save(), are picked up by the
+rebuild_iom_search_index command.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+
+SEARCH_WEIGHTS = ('A', 'B', 'C', 'D')
+TYPE_WEIGHTS = {
+    'text_short': 'B', 'choice_single': 'B', 'choice_multiple': 'B',
+    'text_area': 'C', 'text': 'C', 'textarea': 'C',
+}
+NON_TEXT_TYPES = ('number', 'date', 'datetime', 'boolean')
+REBUILD_BATCH_SIZE = 1000  # IOMs whose documents are rewritten per statement
+
+SEARCH_TABLE = 'generic_iom_genericiomsearchdocument'
+FTS_TABLE = 'generic_iom_search_fts'  # SQLite only
+BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0)  # SQLite: columns text_a..text_d
+MAX_QUERY_TERMS = 16
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def _text_values(value):
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, str) and item.strip()]
+    return []
+
+
+def _field_plan(fields_definition):
+    """{field name: (weight, option labels by value)} for the indexed fields of a definition."""
+    plan = {}
+    for field_def in fields_definition or []:
+        if not isinstance(field_def, dict) or not field_def.get('name'):
+            continue
+        field_type = field_def.get('type')
+        weight = field_def.get('search_weight') or TYPE_WEIGHTS.get(field_type, 'D')
+        if weight not in SEARCH_WEIGHTS or (field_type in NON_TEXT_TYPES and not field_def.get('search_weight')):
+            plan[field_def['name']] = None
+            continue
+        labels = {
+            option['value']: option.get('label') or option['value']
+            for option in field_def.get('options') or []
+            if isinstance(option, dict) and isinstance(option.get('value'), str)
+        }
+        plan[field_def['name']] = (weight, labels)
+    return plan
+
+
+def document_texts(subject, data_payload, plan):
+    """{'text_a': ..., 'text_d': ...} for an IOM's subject and payload; `plan` is its template's _field_plan()."""
+    texts = {weight: [] for weight in SEARCH_WEIGHTS}
+    texts['A'].append(subject or '')
+    payload = data_payload if isinstance(data_payload, dict) else {}
+    for name, value in payload.items():
+        indexed = plan.get(name, ('D', {}))
+        if indexed is None:
+            continue
+        weight, labels = indexed
+        texts[weight].extend(labels.get(item, item) for item in _text_values(value))
+    return {f'text_{weight.lower()}': '\n'.join(texts[weight]) for weight in SEARCH_WEIGHTS}
+
+
+def build_search_document(iom, plan=None):
+    """The unsaved GenericIOMSearchDocument of an IOM; `plan` is its template's _field_plan()."""
+    from .models import GenericIOMSearchDocument
+    if plan is None:
+        plan = _field_plan(iom.iom_template.fields_definition)
+    return GenericIOMSearchDocument(iom_id=iom.pk, **document_texts(iom.subject, iom.data_payload, plan))
+
+
+def update_search_documents(ioms):
+    """Writes the search documents of saved IOMs in one upsert. Returns the number written."""
+    from .models import GenericIOMSearchDocument
+    plans = {}
+    documents = []
+    for iom in ioms:
+        if iom.iom_template_id not in plans:
+            plans[iom.iom_template_id] = _field_plan(iom.iom_template.fields_definition)
+        documents.append(build_search_document(iom, plans[iom.iom_template_id]))
+    GenericIOMSearchDocument.objects.bulk_create(
+        documents, update_conflicts=True, unique_fields=['iom'],
+        update_fields=[f'text_{weight.lower()}' for weight in SEARCH_WEIGHTS],
+    )
+    return len(documents)
+
+
+def rebuild_search_documents(batch_size=REBUILD_BATCH_SIZE):
+    """Rewrites the search document of every GenericIOM, `batch_size` IOMs at a time. Returns the count."""
+    from .models import GenericIOM
+    written = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            GenericIOM.objects.filter(pk__gt=last_pk).order_by('pk')
+            .select_related('iom_template').only('subject', 'data_payload', 'iom_template__fields_definition')[:batch_size]
+        )
+        if not batch:
+            return written
+        written += update_search_documents(batch)
+        last_pk = batch[-1].pk
+
+
+def search_terms(query):
+    """The words of a user's query (no operators; at most MAX_QUERY_TERMS)."""
+    return _TERM_RE.findall(query)[:MAX_QUERY_TERMS]
+
+
+def search_ioms(query, limit, within=None):
+    """
+    Ids of the IOMs matching every word of `query`, as [(iom_id, rank)], best match first, at
+    most `limit`. With `within` (a GenericIOM queryset, e.g. the ones a user may see) only
+    those IOMs are ranked; without it permissions are not checked.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        return _search_without_index(terms, limit, within)
+    restriction, restriction_params = '', []
+    if within is not None:
+        subquery, restriction_params = within.order_by().values('pk').query.get_compiler(connection=connection).as_sql()
+        restriction = f" AND {'iom_id' if connection.vendor == 'postgresql' else 'rowid'} IN ({subquery})"
+    if connection.vendor == 'postgresql':
+        sql = (
+            f"SELECT iom_id, ts_rank(search_vector, query) AS rank "
+            f"FROM {SEARCH_TABLE}, plainto_tsquery('english', %s) query "
+            f"WHERE search_vector @@ query{restriction} ORDER BY rank DESC, iom_id DESC LIMIT %s"
+        )
+        params = [' '.join(terms), *restriction_params, limit]
+    else:
+        # Quoted terms are matched as plain words; bm25() is lower for better matches.
+        sql = (
+            f"SELECT rowid, -bm25({FTS_TABLE}, {', '.join(map(str, BM25_WEIGHTS))}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s{restriction} ORDER BY rank DESC, rowid DESC LIMIT %s"
+        )
+        params = [' '.join('"%s"' % term for term in terms), *restriction_params, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(iom_id, float(rank)) for iom_id, rank in cursor.fetchall()]
+
+
+def _search_without_index(terms, limit, within=None):
+    """Substring matching on the documents, ranked by the best weight class containing the first term."""
+    from .models import GenericIOMSearchDocument
+    columns = [f'text_{weight.lower()}' for weight in SEARCH_WEIGHTS]
+    documents = GenericIOMSearchDocument.objects.all()
+    if within is not None:
+        documents = documents.filter(iom__in=within.order_by().values('pk'))
+    for term in terms:
+        documents = documents.filter(Q(*[Q(**{f'{column}__icontains': term}) for column in columns], _connector=Q.OR))
+    rank = Case(
+        *[When(**{f'{column}__icontains': terms[0]}, then=Value(weight)) for column, weight in zip(columns, BM25_WEIGHTS)],
+        default=Value(0.0), output_field=FloatField(),
+    )
+    return list(documents.annotate(rank=rank).order_by('-rank', '-iom_id').values_list('iom_id', 'rank')[:limit])
@@ -2,7 +2,10 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from .models import IOMCategory, IOMTemplate, GenericIOM
+from .payload_projection import projection_plan
+from .payload_validation import PayloadValidationError, PayloadValidator, get_payload_validator
 from django.contrib.contenttypes.models import ContentType
+from core_api.serializers import GenericPrefetchListSerializer
 
 User = get_user_model()
 
@@ -39,7 +42,11 @@ class IOMTemplateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Each item in fields definition must be a dictionary.")
             if not all(k in field_def for k in ('name', 'label', 'type')):
                 raise serializers.ValidationError("Each field definition must contain 'name', 'label', and 'type'.")
-            # TODO: Validate field types, options for choice, etc.
+        try:
+            PayloadValidator(value) # Types, limits and choice options must compile
+            projection_plan(value) # Only typed fields can be "filterable"
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
         return value
 
     def validate(self, data):
@@ -116,6 +123,9 @@ class GenericIOMSerializer(serializers.ModelSerializer):
             'simple_approver_action_by', 'simple_approver_action_by_username',
             'simple_approval_action_at', 'simple_approval_comments'
         ]
+        # Load the parent records of a page with one query per content type
+        list_serializer_class = GenericPrefetchListSerializer
+        generic_prefetch = {'parent_record': GenericIOM.PARENT_RECORD_RELATED}
         read_only_fields = (
             'gim_id', 'created_by_username', 'status_display',
             'created_at', 'updated_at', 'published_at', 'iom_template_name',
@@ -156,21 +166,20 @@ class GenericIOMSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"iom_template": "IOM Template is required."})
 
         if iom_template and 'data_payload' in data:
-            payload = data['data_payload']
-            definitions = iom_template.fields_definition
-
-            for field_def in definitions:
-                field_name = field_def.get('name')
-                is_required = field_def.get('required', False)
-
-                if is_required and field_name not in payload: # Or payload.get(field_name) is empty
-                    # Check if field_name allows empty value based on type if not required
-                    if payload.get(field_name) is None or str(payload.get(field_name)).strip() == "":
-                         raise serializers.ValidationError({
-                            'data_payload': f"Required field '{field_def.get('label', field_name)}' is missing or empty."
-                        })
-                # TODO: Add more specific type validation based on field_def.get('type')
-                # e.g., for 'number', 'date', 'boolean', 'choice_single' options etc.
+            # Compiled once per template version (see payload_validation.py)
+            try:
+                validator = get_payload_validator(iom_template)
+            except ValueError as exc:
+                raise serializers.ValidationError({'iom_template': f"Template fields definition is invalid: {exc}"})
+            request = self.context.get('request')
+            try:
+                data['data_payload'] = validator.validate(
+                    data['data_payload'],
+                    previous=self.instance.data_payload if self.instance else None,
+                    user=getattr(request, 'user', None),
+                )
+            except PayloadValidationError as exc:
+                raise serializers.ValidationError({'data_payload': exc.errors})
 
         parent_ct = data.get('parent_content_type') # This is the ContentType instance from validated_data
         parent_obj_id = data.get('parent_object_id')
@@ -1,10 +1,14 @@
-from django.db.models.signals import post_save, pre_save # Import pre_save
+from collections import defaultdict
+
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User, Group # Assuming User is from auth.User
 from django.urls import reverse # For generating URLs to IOMs
 from django.conf import settings # To get site domain for full URLs
 
 from .models import GenericIOM
+from .payload_projection import update_payload_values
+from .search_index import update_search_documents
 # Need to import ApprovalStep carefully due to potential circularity or app loading order
 # from procurement.models import ApprovalStep # This might be problematic if procurement depends on generic_iom
 # Instead, we can use sender=ApprovalStep in the receiver decorator if apps are loaded correctly.
@@ -34,15 +38,28 @@ def get_absolute_url(path):
     return path
 
 
+@receiver(post_save, sender=GenericIOM)
+def update_generic_iom_search_document(sender, instance: GenericIOM, created, update_fields=None, **kwargs):
+    # Status-only saves (e.g. the workflow trigger) leave the indexed text unchanged.
+    if update_fields is not None and not {'subject', 'data_payload'} & set(update_fields):
+        return
+    update_search_documents([instance])
+
+
+@receiver(post_save, sender=GenericIOM)
+def update_generic_iom_payload_values(sender, instance: GenericIOM, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'data_payload' not in update_fields:
+        return
+    update_payload_values([instance], replace=not created)
+
+
 @receiver(post_save, sender=GenericIOM)
 def handle_generic_iom_saved(sender, instance: GenericIOM, created, **kwargs):
     if not send_notification_email: # Corrected check
         return # Email utility not available
 
-    # Determine previous status if it's an update
-    previous_status = None
-    if not created and hasattr(instance, '_previous_status'): # Check if we attached it before saving
-        previous_status = instance._previous_status
+    # Previous status if it's an update (tracked by FieldTrackerMixin until save() returns)
+    previous_status = None if created else instance.previous('status')
 
     # Notification 1: Submitted for Simple Approval
     if instance.status == 'pending_approval' and \
@@ -138,15 +155,6 @@ def handle_generic_iom_saved(sender, instance: GenericIOM, created, **kwargs):
             send_notification_email(subject, message, recipients)
 
 # To get previous status for GenericIOM
-@receiver(pre_save, sender=GenericIOM) # Use imported pre_save
-def store_previous_generic_iom_status(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            instance._previous_status = GenericIOM.objects.get(pk=instance.pk).status
-        except GenericIOM.DoesNotExist:
-            instance._previous_status = None
-
-
 # Receiver for ApprovalStep creation (Notification 3)
 # This needs to be dynamically connected if ApprovalStep is in another app to avoid AppRegistryNotReady
 # or ensure generic_iom app is loaded after procurement.
@@ -198,3 +206,59 @@ def handle_approval_step_created_for_generic_iom_actual(sender, instance, create
                     f"Thank you."
                 )
                 send_notification_email(subject, message, recipients)
+
+
+# Receiver for approval_steps_created (Notification 3, batched).
+# Workflow triggers insert their steps with one bulk_create (no post_save per step) and send
+# this signal once after commit. Approvers get one email per IOM, even if they are assigned
+# to several steps directly or through groups. Connected in apps.py.
+def handle_approval_steps_created_for_generic_iom(sender, content_object, steps, **kwargs):
+    if not send_notification_email:
+        return
+
+    from .models import GenericIOM as GenericIOMModel
+    if not isinstance(content_object, GenericIOMModel):
+        return
+
+    pending_steps = [step for step in steps if step.status == 'pending']
+    if not pending_steps:
+        return
+
+    # Each recipient is told only about the steps assigned to them directly or through a group
+    steps_by_email = defaultdict(set)
+    steps_by_group = defaultdict(set)
+    for step in pending_steps:
+        if step.assigned_approver_user and step.assigned_approver_user.email:
+            steps_by_email[step.assigned_approver_user.email].add(step.pk)
+        if step.assigned_approver_group_id:
+            steps_by_group[step.assigned_approver_group_id].add(step.pk)
+    if steps_by_group:
+        # One query for the members of every group involved
+        members = User.objects.filter(groups__in=steps_by_group).exclude(email__isnull=True).exclude(email__exact='')
+        for email, group_id in members.values_list('email', 'groups'):
+            steps_by_email[email] |= steps_by_group[group_id]
+
+    # Recipients with the same steps share one email
+    recipients_by_steps = defaultdict(list)
+    for email, step_pks in steps_by_email.items():
+        recipients_by_steps[frozenset(step_pks)].append(email)
+
+    g_iom = content_object
+    subject = f"Action Required: Approval Step for IOM '{g_iom.subject}' (ID: {g_iom.gim_id})"
+    iom_url = get_absolute_url(f"/ioms/view/{g_iom.id}") # Placeholder
+    for step_pks, recipients in recipients_by_steps.items():
+        step_lines = "\n".join(
+            f"- {step.rule_name_snapshot or f'Step Order {step.step_order}'}"
+            for step in pending_steps if step.pk in step_pks
+        )
+        message = (
+            f"Dear Approver,\n\n"
+            f"Approval steps have been assigned to you (or your group) for the Internal Office Memo:\n"
+            f"Title: {g_iom.subject}\n"
+            f"ID: {g_iom.gim_id}\n"
+            f"Template: {g_iom.iom_template.name}\n"
+            f"Steps:\n{step_lines}\n\n"
+            f"Please review and take action here: {iom_url}\n\n"
+            f"Thank you."
+        )
+        send_notification_email(subject, message, sorted(recipients))
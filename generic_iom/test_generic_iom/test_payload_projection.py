@@ -0,0 +1,121 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from generic_iom.models import IOMCategory, IOMTemplate, GenericIOM, GenericIOMPayloadValue
+
+User = get_user_model()
+
+FIELDS = [
+    {"name": "estimated_cost", "label": "Estimated Cost", "type": "number", "filterable": True},
+    {"name": "required_by_date", "label": "Required By", "type": "date", "filterable": True},
+    {"name": "vendor", "label": "Vendor", "type": "text_short", "filterable": True},
+    {"name": "notes", "label": "Notes", "type": "text_area"},
+]
+
+
+class GenericIOMPayloadFilterTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='projection_user', password='password123')
+        self.admin = User.objects.create_superuser(username='projection_admin', email='projection_admin@example.com', password='password123')
+        self.category = IOMCategory.objects.create(name='Projection Category')
+        self.template = IOMTemplate.objects.create(
+            name='Projection Template', category=self.category, created_by=self.admin,
+            fields_definition=FIELDS, approval_type='none',
+        )
+        self.url = reverse('generic_iom:genericiom-list')
+        self.client.force_authenticate(user=self.user)
+
+    def _iom(self, payload, template=None):
+        return GenericIOM.objects.create(
+            iom_template=template or self.template, subject='Projected', data_payload=payload, created_by=self.user,
+        )
+
+    def _ids(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [result['id'] for result in response.data['results']]
+
+    def test_values_are_projected_on_save(self):
+        iom = self._iom({"estimated_cost": 7500.5, "required_by_date": "2026-05-01", "vendor": " Acme ", "notes": "n/a"})
+        self.assertEqual(
+            {value.field_name: (value.value_number, value.value_date, value.value_text) for value in iom.payload_values.all()},
+            {
+                "estimated_cost": (Decimal('7500.5'), None, None),
+                "required_by_date": (None, datetime.date(2026, 5, 1), None),
+                "vendor": (None, None, "Acme"),
+            },
+        )
+        iom.data_payload = {"estimated_cost": "not a number", "vendor": "Globex"}
+        iom.save()
+        self.assertEqual(list(iom.payload_values.values_list('field_name', 'value_text')), [("vendor", "Globex")])
+
+    def test_list_filters_and_sorts_on_payload_fields(self):
+        cheap = self._iom({"estimated_cost": 900, "required_by_date": "2026-01-15", "vendor": "Acme"})
+        mid = self._iom({"estimated_cost": 5000, "required_by_date": "2026-03-01", "vendor": "Globex"})
+        dear = self._iom({"estimated_cost": 12000.75, "required_by_date": "2026-06-30", "vendor": "Acme"})
+        no_cost = self._iom({"vendor": "Acme"})
+
+        self.assertEqual(set(self._ids({'payload__estimated_cost__gte': '5000'})), {mid.pk, dear.pk})
+        self.assertEqual(self._ids({'payload__estimated_cost__gt': '5000'}), [dear.pk])
+        self.assertEqual(self._ids({
+            'payload__required_by_date__gte': '2026-01-01', 'payload__required_by_date__lt': '2026-04-01',
+            'payload__vendor': 'Acme',
+        }), [cheap.pk])
+        self.assertEqual(self._ids({'ordering': '-payload__estimated_cost'}), [dear.pk, mid.pk, cheap.pk, no_cost.pk])
+        self.assertEqual(self._ids({'ordering': 'payload__estimated_cost,-created_at'})[-1], no_cost.pk)
+
+        for params in (
+            {'payload__notes': 'n/a'}, # Not filterable
+            {'payload__estimated_cost__contains': '5'},
+            {'payload__required_by_date__gte': 'March'},
+            {'ordering': 'payload__unknown'},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_filter_query_count_does_not_grow_with_matches(self):
+        def run(count):
+            for i in range(count):
+                self._iom({"estimated_cost": 6000 + i})
+            with CaptureQueriesContext(connection) as queries:
+                matches = self._ids({'payload__estimated_cost__gte': '6000', 'ordering': 'payload__estimated_cost'})
+            return len(matches), len(queries)
+
+        (first_matches, first_queries), (second_matches, second_queries) = run(1), run(5)
+        self.assertEqual((first_matches, second_matches), (1, 6))
+        self.assertEqual(first_queries, second_queries)
+
+    def test_only_typed_fields_can_be_filterable(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(reverse('generic_iom:iomtemplate-list'), {
+            "name": "Bad Filterable", "category": self.category.pk, "approval_type": "none",
+            "fields_definition": [{"name": "notes", "label": "Notes", "type": "text_area", "filterable": True}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields_definition", response.data)
+
+    def test_rebuild_command_backfills_newly_flagged_fields(self):
+        template = IOMTemplate.objects.create(
+            name='Unflagged Template', category=self.category, created_by=self.admin,
+            fields_definition=[{"name": "estimated_cost", "label": "Cost", "type": "number"}], approval_type='none',
+        )
+        iom = self._iom({"estimated_cost": 300}, template=template)
+        self._iom({"estimated_cost": 20})
+        self.assertFalse(iom.payload_values.exists())
+
+        template.fields_definition = [{"name": "estimated_cost", "label": "Cost", "type": "number", "filterable": True}]
+        template.save()
+        out = StringIO()
+        call_command('rebuild_iom_payload_values', '--batch-size', '1', stdout=out)
+        self.assertIn('2 values', out.getvalue())
+        self.assertEqual(self._ids({'payload__estimated_cost__gte': '100'}), [iom.pk])
+        self.assertEqual(GenericIOMPayloadValue.objects.count(), 2)
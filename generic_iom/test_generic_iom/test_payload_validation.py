@@ -0,0 +1,171 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from generic_iom.models import IOMCategory, IOMTemplate, GenericIOM
+from generic_iom import payload_validation
+from generic_iom.payload_validation import (
+    PayloadValidationError, PayloadValidator, clear_payload_validator_cache, get_payload_validator,
+)
+
+User = get_user_model()
+
+FIELDS = [
+    {"name": "request_date", "label": "Request Date", "type": "date", "required": True, "auto_populate": "current_date"},
+    {"name": "licenses", "label": "Licenses", "type": "number", "required": True, "attributes": {"min": 1, "max": 50}},
+    {"name": "quantity", "label": "Quantity", "type": "number", "defaultValue": 1, "attributes": {"min": 1}},
+    {"name": "starts_at", "label": "Starts At", "type": "datetime"},
+    {"name": "code", "label": "Code", "type": "text_short", "attributes": {"maxLength": 4}},
+    {"name": "urgent", "label": "Urgent", "type": "boolean", "defaultValue": False},
+    {"name": "reason", "label": "Reason", "type": "choice_single", "options": [{"value": "new", "label": "New"}, {"value": "renewal", "label": "Renewal"}]},
+    {"name": "requested_by", "label": "Requested By", "type": "text_short", "readonly": True, "auto_populate": "current_user"},
+    {"name": "total_cost", "label": "Total Cost", "type": "number", "readonly": True}, # Computed by the form
+]
+
+
+class PayloadValidatorTest(TestCase):
+    def test_converts_and_fills_in_defaults(self):
+        user = User.objects.create_user(username='payload_user', password='password123')
+        cleaned = PayloadValidator(FIELDS).validate(
+            {"licenses": "5", "starts_at": "2026-03-01T09:30:00+00:00", "urgent": "true", "reason": "new",
+             "requested_by": "someone_else", "extra": [1, 2]},
+            user=user,
+        )
+        self.assertEqual(cleaned, {
+            "request_date": timezone.localdate().isoformat(),
+            "licenses": 5,
+            "quantity": 1,
+            "starts_at": "2026-03-01T09:30:00+00:00",
+            "urgent": True,
+            "reason": "new",
+            "requested_by": "payload_user", # Readonly: the client's value is ignored
+            "extra": [1, 2],
+        })
+        # On updates readonly fields keep their stored value.
+        updated = PayloadValidator(FIELDS).validate(
+            {"licenses": 6, "requested_by": "someone_else"}, previous=cleaned, user=None,
+        )
+        self.assertEqual(updated["requested_by"], "payload_user")
+
+    def test_readonly_fields_without_a_server_value_keep_the_clients(self):
+        cleaned = PayloadValidator(FIELDS).validate({"licenses": 5, "total_cost": "1250.50"})
+        self.assertEqual(cleaned["total_cost"], 1250.5)
+        updated = PayloadValidator(FIELDS).validate({"licenses": 6, "total_cost": 1500}, previous=cleaned)
+        self.assertEqual(updated["total_cost"], 1500)
+        self.assertEqual(PayloadValidator(FIELDS).validate({"licenses": 6}, previous=cleaned)["total_cost"], 1250.5)
+        with self.assertRaises(PayloadValidationError):
+            PayloadValidator(FIELDS).validate({"licenses": 5, "total_cost": "a lot"})
+
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_accepts_dates_in_the_forms_iso_format(self):
+        # DynamicIomFormFieldRenderer sends Date.toISOString() for date and datetime fields.
+        cleaned = PayloadValidator(FIELDS).validate(
+            {"licenses": 1, "request_date": "2025-06-25T04:00:00.000Z", "starts_at": "2025-06-25T13:30:00.000Z"}
+        )
+        self.assertEqual(cleaned["request_date"], "2025-06-25")
+        self.assertEqual(datetime.datetime.fromisoformat(cleaned["starts_at"]),
+                         datetime.datetime(2025, 6, 25, 13, 30, tzinfo=datetime.timezone.utc))
+        with self.assertRaises(PayloadValidationError):
+            PayloadValidator(FIELDS).validate({"licenses": 1, "request_date": "2025-13-25T04:00:00.000Z"})
+
+    def test_reports_every_invalid_field(self):
+        with self.assertRaises(PayloadValidationError) as raised:
+            PayloadValidator(FIELDS).validate({
+                "request_date": "01/03/2026", "licenses": 51, "quantity": "many", "starts_at": "soon",
+                "code": "TOO-LONG", "urgent": "maybe", "reason": "other",
+            })
+        self.assertEqual(set(raised.exception.errors), {
+            "request_date", "licenses", "quantity", "starts_at", "code", "urgent", "reason",
+        })
+        self.assertIn("at most 50", raised.exception.errors["licenses"])
+
+        with self.assertRaises(PayloadValidationError) as raised:
+            PayloadValidator(FIELDS).validate({"licenses": "  "})
+        self.assertEqual(raised.exception.errors, {"licenses": "Required field 'Licenses' is missing or empty."})
+
+    def test_invalid_definitions_do_not_compile(self):
+        for definition in (
+            [{"name": "n", "type": "number", "attributes": {"min": "one"}}],
+            [{"name": "d", "type": "date", "attributes": {"max": "tomorrow"}}],
+            [{"name": "c", "type": "choice_single"}],
+            [{"type": "text_short"}],
+        ):
+            with self.assertRaises(ValueError):
+                PayloadValidator(definition)
+
+
+class PayloadValidatorCacheTest(TestCase):
+    def setUp(self):
+        clear_payload_validator_cache()
+        self.admin = User.objects.create_superuser(username='payload_admin', email='payload_admin@example.com', password='password123')
+        self.category = IOMCategory.objects.create(name='Payload Cache Category')
+
+    def tearDown(self):
+        clear_payload_validator_cache()
+
+    def _template(self, name):
+        return IOMTemplate.objects.create(name=name, category=self.category, created_by=self.admin, fields_definition=FIELDS)
+
+    def test_rebuilt_only_when_template_changes(self):
+        template = self._template('Payload Cache Template')
+        validator = get_payload_validator(template)
+        self.assertIs(get_payload_validator(IOMTemplate.objects.get(pk=template.pk)), validator)
+
+        template.fields_definition = FIELDS[:1]
+        template.save()
+        rebuilt = get_payload_validator(template)
+        self.assertIsNot(rebuilt, validator)
+        self.assertEqual([field.name for field in rebuilt.fields], ["request_date"])
+
+    @override_settings(IOM_PAYLOAD_VALIDATOR_CACHE_SIZE=2)
+    def test_least_recently_used_template_is_evicted(self):
+        first, second, third = (self._template(f'Payload LRU {i}') for i in range(3))
+        first_validator = get_payload_validator(first)
+        get_payload_validator(second)
+        self.assertIs(get_payload_validator(first), first_validator) # Now the most recently used
+        get_payload_validator(third)
+        self.assertEqual(list(payload_validation._validators), [first.pk, third.pk])
+
+
+class GenericIOMPayloadAPITest(APITestCase):
+    def setUp(self):
+        clear_payload_validator_cache()
+        self.user = User.objects.create_user(username='payload_api_user', password='password123')
+        self.admin = User.objects.create_superuser(username='payload_api_admin', email='payload_api_admin@example.com', password='password123')
+        self.template = IOMTemplate.objects.create(
+            name='Payload API Template', category=IOMCategory.objects.create(name='Payload API Category'),
+            created_by=self.admin, fields_definition=FIELDS, approval_type='none',
+        )
+
+    def tearDown(self):
+        clear_payload_validator_cache()
+
+    def test_payload_is_validated_and_normalized(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('generic_iom:genericiom-list')
+        data = {"iom_template": self.template.pk, "subject": "Licenses", "data_payload": {"licenses": 0}}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("licenses", response.data["data_payload"])
+
+        data["data_payload"] = {"licenses": "3", "request_date": "2026-02-01"}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        iom = GenericIOM.objects.get(pk=response.data["id"])
+        self.assertEqual(iom.data_payload["licenses"], 3)
+        self.assertEqual(iom.data_payload["requested_by"], "payload_api_user")
+        self.assertEqual(datetime.date.fromisoformat(iom.data_payload["request_date"]), datetime.date(2026, 2, 1))
+
+    def test_template_with_invalid_attributes_is_rejected(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(reverse('generic_iom:iomtemplate-list'), {
+            "name": "Broken Template", "category": self.template.category_id, "approval_type": "none",
+            "fields_definition": [{"name": "count", "label": "Count", "type": "number", "attributes": {"min": "one"}}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields_definition", response.data)
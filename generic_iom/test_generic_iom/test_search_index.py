@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from generic_iom.models import IOMCategory, IOMTemplate, GenericIOM, GenericIOMSearchDocument
+from generic_iom.search_index import search_ioms
+
+User = get_user_model()
+
+FIELDS = [
+    {"name": "location", "label": "Location", "type": "text_short"},
+    {"name": "details", "label": "Details", "type": "text_area"},
+    {"name": "reason", "label": "Reason", "type": "choice_single", "options": [{"value": "hw", "label": "Hardware Failure"}]},
+    {"name": "cost", "label": "Cost", "type": "number"},
+    {"name": "internal_note", "label": "Internal Note", "type": "text_short", "search_weight": "none"},
+]
+
+
+class GenericIOMSearchTest(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='search_owner', password='password123')
+        self.other = User.objects.create_user(username='search_other', password='password123')
+        self.template = IOMTemplate.objects.create(
+            name='Search Template', category=IOMCategory.objects.create(name='Search Category'),
+            created_by=self.owner, fields_definition=FIELDS, approval_type='none',
+        )
+        self.url = reverse('generic_iom:genericiom-search')
+
+    def _iom(self, subject, payload, created_by=None, status='draft'):
+        return GenericIOM.objects.create(
+            iom_template=self.template, subject=subject, data_payload=payload,
+            created_by=created_by or self.owner, status=status,
+        )
+
+    def test_document_holds_text_values_by_weight(self):
+        iom = self._iom('Server room outage', {
+            "location": "Basement", "details": "Cooling stopped", "reason": "hw", "cost": 12,
+            "internal_note": "secret", "extra": ["tagged", 5],
+        })
+        document = GenericIOMSearchDocument.objects.get(iom=iom)
+        self.assertEqual(
+            (document.text_a, document.text_b, document.text_c, document.text_d),
+            ('Server room outage', 'Basement\nHardware Failure', 'Cooling stopped', 'tagged'),
+        )
+
+    def test_ranked_search_matches_values_not_keys(self):
+        in_subject = self._iom('Printer replacement', {"details": "Old unit"})
+        in_details = self._iom('Office request', {"details": "The printer jams daily"})
+        self._iom('Unrelated', {"location": "Lobby"})
+
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(self.url, {'q': 'printers'}) # Stemmed
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([result['id'] for result in response.data['results']], [in_subject.pk, in_details.pk])
+        self.assertGreater(response.data['results'][0]['search_rank'], response.data['results'][1]['search_rank'])
+
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(self.client.get(self.url, {'q': 'details'}).data['count'], 0) # A payload key
+        self.assertEqual(self.client.get(self.url, {'q': 'printer: "jams" (daily*'}).data['count'], 1) # Operators are plain words
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_visible_ioms_are_returned(self):
+        self._iom('Budget draft', {})
+        published = self._iom('Budget published', {}, status='published')
+        self.client.force_authenticate(user=self.other)
+        response = self.client.get(self.url, {'q': 'budget'})
+        self.assertEqual([result['id'] for result in response.data['results']], [published.pk])
+
+    @override_settings(IOM_SEARCH_MAX_RESULTS=1)
+    def test_result_limit_counts_only_visible_ioms(self):
+        published = self._iom('Budget review', {}, status='published')
+        self._iom('Budget budget budget', {}) # Ranks higher, but is someone else's draft
+        self.client.force_authenticate(user=self.other)
+        response = self.client.get(self.url, {'q': 'budget'})
+        self.assertEqual([result['id'] for result in response.data['results']], [published.pk])
+
+    def test_index_follows_saves_and_deletes(self):
+        iom = self._iom('Laptop request', {"details": "Needs docking station"})
+        self.assertEqual([pk for pk, rank in search_ioms('docking', limit=10)], [iom.pk])
+
+        iom.data_payload = {"details": "Needs monitor"}
+        iom.save()
+        self.assertEqual(search_ioms('docking', limit=10), [])
+        self.assertEqual([pk for pk, rank in search_ioms('monitor', limit=10)], [iom.pk])
+
+        iom.delete()
+        self.assertEqual(search_ioms('monitor', limit=10), [])
+        self.assertFalse(GenericIOMSearchDocument.objects.exists())
+
+    def test_rebuild_command_reindexes_template_changes(self):
+        iom = self._iom('Badge access', {"internal_note": "turnstile"})
+        self.assertEqual(search_ioms('turnstile', limit=10), [])
+        self.template.fields_definition = FIELDS[:4]
+        self.template.save()
+
+        out = StringIO()
+        call_command('rebuild_iom_search_index', '--batch-size', '1', stdout=out)
+        self.assertIn('IOM search index rebuilt', out.getvalue())
+        self.assertEqual([pk for pk, rank in search_ioms('turnstile', limit=10)], [iom.pk])
@@ -79,6 +79,15 @@ class GenericIOMSignalTests(TestCase):
             )
              cls.adv_approval_rule.applicable_iom_templates.add(cls.template_advanced)
 
+    def tearDown(self):
+        # Workflow tests run on_commit callbacks, which share the approval rule index and GIM ID
+        # block built from rows that are then rolled back; drop them so they can't leak into other tests.
+        if PROCUREMENT_MODELS_AVAILABLE:
+            from procurement.approval_rule_index import invalidate_approval_rule_index
+            from procurement.id_allocator import id_allocator
+            invalidate_approval_rule_index()
+            id_allocator.reset()
+
 
     @patch(EMAIL_UTIL_PATH)
     def test_signal_iom_submitted_for_simple_approval_user(self, mock_send_email):
@@ -161,13 +170,14 @@ class GenericIOMSignalTests(TestCase):
         # which then triggers its own post_save signal handled by handle_approval_step_created_for_generic_iom_actual
 
         # Create the IOM, its save() will trigger workflow and create steps
-        iom = GenericIOM.objects.create(
-            iom_template=self.template_advanced,
-            subject="Test Adv Step Assigned",
-            created_by=self.creator,
-            status='draft' # This will transition to pending_approval and create steps
-        )
-        # The signal for ApprovalStep creation should have fired.
+        with self.captureOnCommitCallbacks(execute=True):
+            iom = GenericIOM.objects.create(
+                iom_template=self.template_advanced,
+                subject="Test Adv Step Assigned",
+                created_by=self.creator,
+                status='draft' # This will transition to pending_approval and create steps
+            )
+        # The batched approval_steps_created signal fires once the transaction commits.
         # Note: The mock is on generic_iom.signals.send_notification_email.
         # The handle_approval_step_created_for_generic_iom_actual calls this.
 
@@ -184,6 +194,58 @@ class GenericIOMSignalTests(TestCase):
                 break
         self.assertTrue(found_adv_step_email, "Advanced approval step assignment email not sent.")
 
+    @patch(EMAIL_UTIL_PATH)
+    @unittest.skipIf(not PROCUREMENT_MODELS_AVAILABLE, "Procurement models (ApprovalStep) not available for this test")
+    def test_signal_advanced_approval_steps_batched_into_one_email(self, mock_send_email):
+        # approver_user is assigned directly and again through approver_group
+        group_rule = ApprovalRule.objects.create(
+            name="Generic Advanced Group Rule", rule_type='generic_iom', order=2, approver_group=self.approver_group
+        )
+        group_rule.applicable_iom_templates.add(self.template_advanced)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            iom = GenericIOM.objects.create(
+                iom_template=self.template_advanced,
+                subject="Test Adv Steps Batched",
+                created_by=self.creator,
+                status='draft'
+            )
+        self.assertEqual(ApprovalStep.objects.filter(object_id=iom.pk, content_type=ContentType.objects.get_for_model(GenericIOM)).count(), 2)
+
+        step_emails = [c for c in mock_send_email.call_args_list if "Action Required: Approval Step" in c[0][0]]
+        self.assertEqual(len(step_emails), 1)
+        args, kwargs = step_emails[0]
+        self.assertEqual(args[2], [self.approver_user.email])
+        self.assertIn("Generic Advanced Rule", args[1])
+        self.assertIn("Generic Advanced Group Rule", args[1])
+
+    @patch(EMAIL_UTIL_PATH)
+    @unittest.skipIf(not PROCUREMENT_MODELS_AVAILABLE, "Procurement models (ApprovalStep) not available for this test")
+    def test_signal_advanced_approval_steps_listed_per_recipient(self, mock_send_email):
+        # recipient_user1 is only in approver_group, so only the group rule's step is theirs
+        self.recipient_user1.groups.add(self.approver_group)
+        group_rule = ApprovalRule.objects.create(
+            name="Generic Advanced Group Rule", rule_type='generic_iom', order=2, approver_group=self.approver_group
+        )
+        group_rule.applicable_iom_templates.add(self.template_advanced)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GenericIOM.objects.create(
+                iom_template=self.template_advanced,
+                subject="Test Adv Steps Per Recipient",
+                created_by=self.creator,
+                status='draft'
+            )
+
+        step_emails = {
+            tuple(c[0][2]): c[0][1] for c in mock_send_email.call_args_list if "Action Required: Approval Step" in c[0][0]
+        }
+        self.assertEqual(set(step_emails), {(self.approver_user.email,), (self.recipient_user1.email,)})
+        self.assertIn("Generic Advanced Rule", step_emails[(self.approver_user.email,)])
+        self.assertIn("Generic Advanced Group Rule", step_emails[(self.approver_user.email,)])
+        self.assertIn("Generic Advanced Group Rule", step_emails[(self.recipient_user1.email,)])
+        self.assertNotIn("Generic Advanced Rule\n", step_emails[(self.recipient_user1.email,)])
+
 
     @patch(EMAIL_UTIL_PATH)
     @unittest.skipIf(not PROCUREMENT_MODELS_AVAILABLE, "Procurement models not available for this test")
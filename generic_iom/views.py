@@ -2,10 +2,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated # IsAdminUser is used by IsTemplateAdmin
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q
 from rest_framework import serializers
-from rest_framework.filters import SearchFilter, OrderingFilter # Import SearchFilter
+from rest_framework.filters import BaseFilterBackend, SearchFilter, OrderingFilter # Import SearchFilter
 # from django.db import transaction # Not explicitly used here yet
 
 from .models import IOMCategory, IOMTemplate, GenericIOM
@@ -16,6 +17,8 @@ from .serializers import (
     GenericIOMSimpleActionSerializer,
     GenericIOMPublishSerializer
 )
+from .payload_projection import FILTER_PREFIX, filterable_fields, payload_filters, payload_ordering
+from .search_index import search_ioms
 from .permissions import (
     IsTemplateAdmin,
     CanReadIOMTemplate,
@@ -37,6 +40,40 @@ from .permissions import (
 #     ApprovalStepSerializer = None
 
 
+class PayloadFieldFilter(BaseFilterBackend):
+    """?payload__<field>[__<lookup>]=value filters on template fields flagged "filterable" (see payload_projection.py)."""
+
+    def filter_queryset(self, request, queryset, view):
+        try:
+            filters = payload_filters(request.query_params)
+        except ValueError as exc:
+            raise serializers.ValidationError({'error': str(exc)})
+        return queryset.filter(*filters) if filters else queryset
+
+
+class PayloadOrderingFilter(OrderingFilter):
+    """OrderingFilter that also sorts on filterable payload fields: ?ordering=-payload__estimated_cost,created_at"""
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param, '')
+        if FILTER_PREFIX not in params:
+            return super().filter_queryset(request, queryset, view)
+        fields = filterable_fields()
+        valid_fields = {name for name, label in self.get_valid_fields(queryset, view, {'request': request})}
+        ordering = []
+        for term in (term.strip() for term in params.split(',')):
+            name = term.lstrip('-')
+            if name.startswith(FILTER_PREFIX):
+                try:
+                    queryset, order = payload_ordering(queryset, name[len(FILTER_PREFIX):], term.startswith('-'), fields)
+                except ValueError as exc:
+                    raise serializers.ValidationError({'error': str(exc)})
+                ordering.append(order)
+            elif name in valid_fields:
+                ordering.append(term)
+        return queryset.order_by(*ordering)
+
+
 class IOMCategoryViewSet(viewsets.ModelViewSet):
     queryset = IOMCategory.objects.all().order_by('name')
     serializer_class = IOMCategorySerializer
@@ -75,13 +112,13 @@ class GenericIOMViewSet(viewsets.ModelViewSet):
         'parent_content_type', 'simple_approver_action_by'
     ).prefetch_related('to_users', 'to_groups').order_by('-created_at')
     serializer_class = GenericIOMSerializer
-    filter_backends = [SearchFilter, OrderingFilter] # Add SearchFilter and OrderingFilter
+    filter_backends = [SearchFilter, PayloadOrderingFilter, PayloadFieldFilter]
     search_fields = [
         'gim_id',
         'subject',
         'created_by__username',
         'iom_template__name',
-        'data_payload' # For basic text search within JSONField (behavior is DB dependent)
+        # Payload text is searched through the full-text index: see the search action
     ]
     ordering_fields = ['gim_id', 'subject', 'iom_template__name', 'status', 'created_by__username', 'created_at', 'published_at']
 
@@ -172,6 +209,29 @@ class GenericIOMViewSet(viewsets.ModelViewSet):
         # The GenericIOM.save() method handles workflow trigger on status change to 'draft'.
         serializer.save()
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked full-text search over subjects and payload text (?q=words), best match first.
+        The index ranks only the IOMs this user can see and returns at most IOM_SEARCH_MAX_RESULTS
+        of them, which are paginated.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+        ranks = dict(search_ioms(query, limit=settings.IOM_SEARCH_MAX_RESULTS, within=self.get_queryset()))
+        ranked_ids = list(ranks) # Best match first
+
+        page_ids = self.paginate_queryset(ranked_ids)
+        ids = page_ids if page_ids is not None else ranked_ids
+        ioms = self.get_queryset().in_bulk(ids)
+        results = self.get_serializer([ioms[pk] for pk in ids], many=True).data
+        for result in results:
+            result['search_rank'] = ranks[result['id']]
+        if page_ids is not None:
+            return self.get_paginated_response(results)
+        return Response(results)
+
     @action(detail=True, methods=['post'], serializer_class=GenericIOMSimpleActionSerializer)
     def submit_for_simple_approval(self, request, pk=None):
         iom = self.get_object() # get_object will apply object-level permissions
@@ -6,11 +6,14 @@ from datetime import timedelta # Add this import
 from simple_history.models import HistoricalRecords # Added for model history
 from assets.models import Asset  # Link to assets
 from configs.models import ConfigurationItem  # Link to configuration items
+from core_api.field_tracking import FieldTrackerMixin
 
 User = get_user_model()
 
 
-class Incident(models.Model):
+class Incident(FieldTrackerMixin, models.Model):
+    tracked_fields = ('status', 'assigned_to')
+
     INCIDENT_STATUS_CHOICES = [
         ("new", "New"),
         ("in_progress", "In Progress"),
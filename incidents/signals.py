@@ -13,31 +13,15 @@ def send_incident_assignment_notification(sender, instance, created, **kwargs):
     """
     Send a notification when an incident is assigned or re-assigned.
     """
-    # Check if 'assigned_to' field was changed or if it's a new assignment
-    # This basic check doesn't perfectly detect if only 'assigned_to' changed on an update.
-    # For more robust change detection, you might need to compare old and new values,
-    # often done by storing the original state or using a library like django-simple-history.
-    # For this initial implementation, we'll notify if 'assigned_to' is set.
+    # Only a new assignment or a change of assignee is notified; other updates are not.
+    # has_changed() compares with the value the incident was loaded with (FieldTrackerMixin).
+    if not instance.assigned_to_id or not (created or instance.has_changed('assigned_to')):
+        return
 
-    if instance.assigned_to and instance.assigned_to.email:
-        # Determine if this is a new assignment or a change in assignment.
-        # A simple way: if it's just created and assigned, it's new.
-        # If updated, we need to know if assigned_to changed from a previous value.
-        # This signal fires *after* save.
-
-        # Let's assume we notify if assigned_to is present.
-        # A more refined logic would check if this field specifically changed.
-        # For now, this will notify on creation with assignment, and on any save where assigned_to is set.
-
-        subject = ""
+    if instance.assigned_to.email:
         if created:
             subject = f"New Incident Assigned to You: INC-{instance.id} - {instance.title}"
         else:
-            # To check if assigned_to actually changed, we'd need the old value.
-            # post_save doesn't give old values directly.
-            # A common pattern is to fetch the object from DB before save in the view/serializer
-            # or use a model field to track previous assignee if this specific notification is critical.
-            # For simplicity, we'll send a generic update if it's not created.
             subject = f"Incident Updated & Assigned to You: INC-{instance.id} - {instance.title}"
 
         message = (
@@ -70,6 +54,3 @@ def send_incident_assignment_notification(sender, instance, created, **kwargs):
         recipient_list = [instance.assigned_to.email]
 
         send_notification_email(subject, message, recipient_list, html_message=html_message)
-    elif not instance.assigned_to:
-        # Optional: Handle de-assignment notification to previous assignee if needed
-        pass
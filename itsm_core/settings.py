@@ -144,6 +144,57 @@ if not DEBUG and EMAIL_BACKEND != 'django.core.mail.backends.console.EmailBacken
     if not EMAIL_HOST or not EMAIL_HOST_USER or not DEFAULT_FROM_EMAIL:
         print("WARNING: Real email backend is configured, but EMAIL_HOST, EMAIL_HOST_USER, or DEFAULT_FROM_EMAIL may not be set. Emails might fail.")
 
+# Procurement ID allocation (see procurement/id_allocator.py)
+# Prefixes listed here are served from per-process blocks of pre-reserved IDs.
+PROCUREMENT_ID_BLOCK_SIZES = {
+    'IM': int(os.environ.get('PROCUREMENT_ID_BLOCK_SIZE', 20)),
+    'PO': int(os.environ.get('PROCUREMENT_ID_BLOCK_SIZE', 20)),
+    'GIM': int(os.environ.get('PROCUREMENT_ID_BLOCK_SIZE', 20)),
+}
+# Finance prefixes that must stay gapless; these always lock the sequence row per ID.
+PROCUREMENT_ID_GAPLESS_PREFIXES = [
+    prefix.strip() for prefix in os.environ.get('PROCUREMENT_ID_GAPLESS_PREFIXES', 'CR').split(',') if prefix.strip()
+]
+
+# Sequence prefixes that continue past ZZ-9999 with a longer alpha part (e.g. PO-AAA-0001)
+# instead of raising once exhausted (see core_api/sequences.py).
+SEQUENCE_WIDENED_PREFIXES = [
+    prefix.strip() for prefix in os.environ.get('SEQUENCE_WIDENED_PREFIXES', '').split(',') if prefix.strip()
+]
+
+# Seconds a process keeps its compiled approval rule index before rebuilding it, even if its
+# CacheVersion row did not change (see procurement.approval_rule_index)
+APPROVAL_RULE_INDEX_TTL = int(os.environ.get('APPROVAL_RULE_INDEX_TTL', 300))
+
+# Seconds a process keeps loaded approval delegations (see procurement.delegation_resolver)
+APPROVAL_DELEGATION_CACHE_TTL = int(os.environ.get('APPROVAL_DELEGATION_CACHE_TTL', 60))
+
+# Chunked attachment uploads (see procurement/chunked_uploads.py): where partial uploads are
+# assembled, the largest file accepted, and after how many hours an unfinished upload is purged.
+ATTACHMENT_UPLOAD_TEMP_DIR = os.environ.get('ATTACHMENT_UPLOAD_TEMP_DIR', str(BASE_DIR / 'procurement' / 'chunked_uploads'))
+ATTACHMENT_MAX_UPLOAD_SIZE = int(os.environ.get('ATTACHMENT_MAX_UPLOAD_SIZE', 200 * 1024 * 1024))
+ATTACHMENT_UPLOAD_EXPIRY_HOURS = int(os.environ.get('ATTACHMENT_UPLOAD_EXPIRY_HOURS', 48))
+
+# Three-way match (see procurement/three_way_match.py): invoiced amounts may exceed the ordered or
+# received amount by the larger of this absolute amount and this percentage before being flagged.
+THREE_WAY_MATCH_TOLERANCE_AMOUNT = os.environ.get('THREE_WAY_MATCH_TOLERANCE_AMOUNT', '1.00')
+THREE_WAY_MATCH_TOLERANCE_PERCENT = os.environ.get('THREE_WAY_MATCH_TOLERANCE_PERCENT', '2')
+
+# Approval step escalation (see procurement/approval_escalation.py): hours a new step may stay
+# pending, hours until the next reminder once escalated, escalations after which a step's timer
+# stops, and the auth group overdue procurement steps are reassigned to (empty: reminders only).
+APPROVAL_STEP_DUE_HOURS = int(os.environ.get('APPROVAL_STEP_DUE_HOURS', 72))
+APPROVAL_ESCALATION_REMINDER_HOURS = int(os.environ.get('APPROVAL_ESCALATION_REMINDER_HOURS', 24))
+APPROVAL_ESCALATION_MAX = int(os.environ.get('APPROVAL_ESCALATION_MAX', 3))
+APPROVAL_ESCALATION_GROUP = os.environ.get('APPROVAL_ESCALATION_GROUP', '')
+
+# IOM templates whose compiled payload validators a process keeps (see generic_iom/payload_validation.py)
+IOM_PAYLOAD_VALIDATOR_CACHE_SIZE = int(os.environ.get('IOM_PAYLOAD_VALIDATOR_CACHE_SIZE', 256))
+
+# Most ranked matches the IOM full-text search reads from its index. The index only ranks
+# IOMs the user can see; the matches are then paginated (see generic_iom/search_index.py)
+IOM_SEARCH_MAX_RESULTS = int(os.environ.get('IOM_SEARCH_MAX_RESULTS', 500))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -3,7 +3,8 @@ from .models import (
     PurchaseRequestMemo, PurchaseOrder, OrderItem, CheckRequest,
     Department, Project, Contract, GLAccount, ExpenseCategory, RecurringPayment,
     ProcurementIDSequence,
-    ApprovalRule, ApprovalStep, ApprovalDelegation
+    ApprovalRule, ApprovalStep, ApprovalDelegation,
+    AttachmentBlob, ChunkedUpload, SpendRollup, VendorScorecard, InvoiceMatch, ApprovalEscalation
 )
 from simple_history.admin import SimpleHistoryAdmin
 from django.utils.translation import gettext_lazy as _
@@ -11,13 +12,81 @@ from django.contrib.contenttypes.admin import GenericTabularInline # For GFK inl
 from django.urls import reverse
 from django.utils.html import format_html
 from django.contrib.contenttypes.models import ContentType
+from core_api.generic_prefetch import generic_prefetch
 
 
 @admin.register(ProcurementIDSequence)
 class ProcurementIDSequenceAdmin(admin.ModelAdmin):
-    list_display = ('prefix', 'current_alpha_part_char1', 'current_alpha_part_char2', 'current_numeric_part', '__str__')
+    list_display = ('prefix', 'current_alpha_part_char1', 'current_alpha_part_char2', 'current_numeric_part', 'current_alpha_overflow', '__str__')
     readonly_fields = ('prefix',)
 
+@admin.register(AttachmentBlob)
+class AttachmentBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'original_filename', 'size', 'content_type', 'created_at')
+    search_fields = ('sha256', 'original_filename')
+    readonly_fields = ('sha256', 'file', 'size', 'content_type', 'original_filename', 'created_at')
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'created_by', 'size', 'offset', 'status', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('filename', 'created_by__username')
+    readonly_fields = ('filename', 'content_type', 'size', 'offset', 'status', 'blob', 'created_by', 'created_at', 'updated_at')
+
+@admin.register(SpendRollup)
+class SpendRollupAdmin(admin.ModelAdmin):
+    # Maintained by procurement.spend_rollups; rebuild with the rebuild_spend_rollups command.
+    list_display = ('day', 'currency', 'department', 'project', 'gl_account', 'vendor', 'committed_amount', 'spend_amount', 'paid_amount')
+    list_filter = ('currency', 'day')
+    list_select_related = ('department', 'project', 'gl_account', 'vendor')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(VendorScorecard)
+class VendorScorecardAdmin(admin.ModelAdmin):
+    # Maintained by procurement.vendor_scorecards; rebuild with the rebuild_vendor_scorecards command.
+    list_display = ('vendor', 'purchase_order_count', 'spend_amount', 'fill_rate', 'on_time_rate', 'average_lead_time_days', 'price_variance_rate', 'refreshed_at')
+    list_select_related = ('vendor',)
+    search_fields = ('vendor__name',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(InvoiceMatch)
+class InvoiceMatchAdmin(admin.ModelAdmin):
+    # Written by the run_three_way_match command (procurement.three_way_match).
+    list_display = ('check_request', 'purchase_order', 'status', 'issues', 'ordered_amount', 'received_amount', 'invoiced_amount', 'matched_at')
+    list_filter = ('status',)
+    list_select_related = ('check_request', 'purchase_order')
+    search_fields = ('check_request__cr_id', 'check_request__invoice_number', 'purchase_order__po_number')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ApprovalEscalation)
+class ApprovalEscalationAdmin(admin.ModelAdmin):
+    # Written by the escalate_approval_steps command (procurement.approval_escalation).
+    list_display = ('step_type', 'step_id', 'action', 'level', 'approver_user', 'reassigned_to_group', 'due_at', 'escalated_at')
+    list_filter = ('action', 'step_type', 'escalated_at')
+    list_select_related = ('step_type', 'approver_user', 'reassigned_to_group')
+    search_fields = ('approver_user__username', 'reassigned_to_group__name')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # Generic Inline for ApprovalSteps to be used by any model that has approvals
 class GenericApprovalStepInline(GenericTabularInline):
     model = ApprovalStep
@@ -47,9 +116,10 @@ class PurchaseRequestMemoAdmin(SimpleHistoryAdmin):
             'fields': ('department', 'project', 'suggested_vendor')
         }),
         ('Status & Attachments', {
-            'fields': ('status', 'attachments')
+            'fields': ('status', 'attachments', 'attachment_blob')
         }),
     )
+    raw_id_fields = ('attachment_blob',)
     inlines = [GenericApprovalStepInline] # Use the Generic Inline
 
 class OrderItemInline(admin.TabularInline):
@@ -57,8 +127,8 @@ class OrderItemInline(admin.TabularInline):
     extra = 1
     fields = ('item_description', 'product_code', 'quantity', 'unit_price', 'gl_account',
               'received_quantity', 'line_item_status', 'tax_rate',
-              'discount_type', 'discount_value', 'total_price')
-    readonly_fields = ('total_price',)
+              'discount_type', 'discount_value', 'net_amount', 'discount_amount', 'tax_amount', 'gross_amount', 'source_memo')
+    readonly_fields = ('net_amount', 'discount_amount', 'tax_amount', 'gross_amount', 'source_memo')
 
 @admin.register(PurchaseOrder)
 class PurchaseOrderAdmin(SimpleHistoryAdmin):
@@ -85,9 +155,10 @@ class PurchaseOrderAdmin(SimpleHistoryAdmin):
             'fields': ('created_by', 'created_at', 'updated_at')
         }),
         ('Notes & Attachments', {
-            'fields': ('notes', 'attachments')
+            'fields': ('notes', 'attachments', 'attachment_blob')
         }),
     )
+    raw_id_fields = ('attachment_blob',)
 
     def save_model(self, request, obj, form, change):
         if not obj.pk:
@@ -107,7 +178,7 @@ class CheckRequestAdmin(SimpleHistoryAdmin):
     list_display = ('cr_id', 'payee_name', 'amount', 'currency', 'status', 'request_date', 'requested_by', 'purchase_order', 'is_urgent')
     list_filter = ('status', 'request_date', 'is_urgent', 'currency', 'payment_method', 'expense_category')
     search_fields = ('cr_id', 'payee_name', 'purchase_order__po_number', 'invoice_number', 'reason_for_payment')
-    readonly_fields = ('request_date', 'cr_id')
+    readonly_fields = ('request_date', 'cr_id', 'recurring_due_date')
     fieldsets = (
         (None, {
             'fields': ('cr_id', 'purchase_order', 'invoice_number', 'invoice_date', 'reason_for_payment')
@@ -116,7 +187,7 @@ class CheckRequestAdmin(SimpleHistoryAdmin):
             'fields': ('amount', 'currency', 'payee_name', 'payee_address', 'is_urgent')
         }),
         ('Categorization & Recurrence', {
-            'fields': ('expense_category', 'recurring_payment')
+            'fields': ('expense_category', 'recurring_payment', 'recurring_due_date')
         }),
         ('Requester & Status', {
             'fields': ('requested_by', 'request_date', 'status')
@@ -130,9 +201,10 @@ class CheckRequestAdmin(SimpleHistoryAdmin):
             'fields': ('payment_method', 'payment_date', 'transaction_id', 'payment_notes')
         }),
         ('Attachments', {
-            'fields': ('attachments',)
+            'fields': ('attachments', 'attachment_blob')
         }),
     )
+    raw_id_fields = ('attachment_blob',)
     def save_model(self, request, obj, form, change):
         if not obj.pk:
             obj.requested_by = request.user
@@ -154,6 +226,7 @@ class ContractAdmin(SimpleHistoryAdmin):
     list_filter = ('vendor', 'start_date', 'end_date')
     search_fields = ('contract_id', 'title', 'vendor__name')
     readonly_fields = ('contract_id',)
+    raw_id_fields = ('attachment_blob',)
 
 @admin.register(GLAccount)
 class GLAccountAdmin(SimpleHistoryAdmin):
@@ -217,9 +290,15 @@ class ApprovalStepAdmin(SimpleHistoryAdmin):
         'approval_rule', 'rule_name_snapshot', 'step_order',
         'assigned_approver_user', 'assigned_approver_group', 'status',
         'approved_by', 'decision_date', 'comments',
-        'created_at', 'updated_at'
+        'created_at', 'updated_at', 'due_at', 'escalation_count'
     )
 
+    def get_queryset(self, request):
+        # content_object_link renders each row's content object; load them per content type, not per row.
+        return super().get_queryset(request).select_related(
+            'content_type', 'assigned_approver_user', 'assigned_approver_group', 'approved_by'
+        ).prefetch_related(generic_prefetch('content_object', ApprovalStep.CONTENT_OBJECT_RELATED))
+
     def content_object_link(self, obj):
         if obj.content_object:
             # Get the admin URL for the content_object
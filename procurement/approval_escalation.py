@@ -0,0 +1,183 @@
+"""
+Escalation timer for approval steps left pending too long.
+
+Every procurement.ApprovalStep and workflows.ApprovalStep gets a due_at when it is created,
+settings.APPROVAL_STEP_DUE_HOURS ahead (core_api.approval_timers). Both tables have a partial
+index on due_at covering only the steps still awaiting a decision, so finding the overdue
+ones is an index range scan however many steps exist.
+
+escalate_overdue_steps() takes the overdue steps ESCALATION_BATCH_SIZE at a time, the longest
+overdue first. Each batch runs in its own transaction: the steps are locked (skipping rows
+another worker holds) and escalated with a fixed number of set-based statements:
+
+- The first time a procurement step is overdue and settings.APPROVAL_ESCALATION_GROUP names a
+  group, the step is reassigned to that group. A directly assigned approver is kept as
+  original_assigned_approver_user and can still decide it. Otherwise only the escalation group
+  can: a step assigned to a group leaves that group's members, and a delegated step (whose
+  original_assigned_approver_user is already the delegator) leaves the delegate.
+- Every other overdue step is reminded. workflows steps have one required approver and no
+  group, so they are only ever reminded.
+
+Either way the step's escalation_count goes up and its due_at moves
+APPROVAL_ESCALATION_REMINDER_HOURS ahead, or is cleared after APPROVAL_ESCALATION_MAX
+escalations. Each escalation is recorded as an ApprovalEscalation row. Notification emails
+are collected per recipient over the whole run and sent at the end, one message per user
+over one connection.
+
+Run it periodically with the escalate_approval_steps management command.
+"""
+import datetime
+import logging
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .approval_inbox import INBOX_STATUSES, refresh_approval_inbox
+
+logger = logging.getLogger(__name__)
+
+ESCALATION_BATCH_SIZE = 1000  # Overdue steps locked and escalated per transaction
+
+# Step tables the timer covers: model, statuses awaiting a decision, approver user / group fields
+# (no group field: reminders only).
+STEP_TABLES = (
+    ('procurement.ApprovalStep', INBOX_STATUSES, 'assigned_approver_user_id', 'assigned_approver_group_id'),
+    ('workflows.ApprovalStep', ('pending',), 'approver_id', None),
+)
+
+User = get_user_model()
+
+
+def _timer_update(now):
+    """UPDATE values for escalated steps: the next reminder, or no timer after the last escalation."""
+    next_due = now + datetime.timedelta(hours=settings.APPROVAL_ESCALATION_REMINDER_HOURS)
+    return {
+        # Listed before escalation_count, which is read here as it was before the update.
+        'due_at': Case(
+            When(escalation_count__gte=settings.APPROVAL_ESCALATION_MAX - 1, then=Value(None)),
+            default=Value(next_due), output_field=DateTimeField(),
+        ),
+        'escalation_count': F('escalation_count') + 1,
+    }
+
+
+def _escalate_batch(table, now, batch_size, fallback_group, notices):
+    """
+    Escalates one batch of overdue steps of a STEP_TABLES entry. Adds the users and groups to
+    notify to `notices`. Returns (reassigned, reminded), or None when nothing is overdue.
+    """
+    from .models import ApprovalEscalation
+    model_name, statuses, user_field, group_field = table
+    model = apps.get_model(model_name)
+    fields = ['pk', 'due_at', 'escalation_count', user_field] + ([group_field] if group_field else [])
+
+    with transaction.atomic():
+        steps = list(
+            model.objects.filter(status__in=statuses, due_at__lt=now)
+            .select_for_update(skip_locked=True)
+            .order_by('due_at', 'pk')
+            .values(*fields)[:batch_size]
+        )
+        if not steps:
+            return None
+
+        reassigned_ids = set()
+        if group_field and fallback_group is not None:
+            reassigned_ids = {
+                step['pk'] for step in steps
+                if step['escalation_count'] == 0 and step[group_field] != fallback_group.pk
+            }
+        model.objects.filter(pk__in=[step['pk'] for step in steps]).update(**_timer_update(now))
+        if reassigned_ids:
+            model.objects.filter(pk__in=reassigned_ids).update(
+                original_assigned_approver_user=Coalesce('original_assigned_approver_user', 'assigned_approver_user'),
+                assigned_approver_user=None,
+                assigned_approver_group=fallback_group,
+            )
+            refresh_approval_inbox(reassigned_ids)
+
+        step_type = ContentType.objects.get_for_model(model)
+        ApprovalEscalation.objects.bulk_create([
+            ApprovalEscalation(
+                step_type=step_type,
+                step_id=step['pk'],
+                action='reassigned' if step['pk'] in reassigned_ids else 'reminded',
+                level=step['escalation_count'] + 1,
+                approver_user_id=step[user_field],
+                reassigned_to_group=fallback_group if step['pk'] in reassigned_ids else None,
+                due_at=step['due_at'],
+                escalated_at=now,
+            )
+            for step in steps
+        ])
+
+    for step in steps:
+        if step['pk'] in reassigned_ids:
+            notices['groups'][fallback_group.pk] += 1
+            continue
+        if step[user_field]:
+            notices['users'][step[user_field]] += 1
+        if group_field and step[group_field]:
+            notices['groups'][step[group_field]] += 1
+    return len(reassigned_ids), len(steps) - len(reassigned_ids)
+
+
+def _send_notices(notices):
+    """Emails every user with overdue steps (directly or through a group) once. Returns the number of emails."""
+    counts = Counter(notices['users'])
+    if notices['groups']:
+        memberships = User.groups.through.objects.filter(group_id__in=notices['groups']).values_list('group_id', 'user_id')
+        for group_id, user_id in memberships:
+            counts[user_id] += notices['groups'][group_id]
+    if not counts:
+        return 0
+    emails = User.objects.filter(pk__in=counts, is_active=True).exclude(email='').values_list('pk', 'email')
+    messages = [
+        (
+            f"Overdue approvals: {counts[user_id]} step(s) awaiting your decision",
+            f"{counts[user_id]} approval step(s) assigned to you or your groups are past their due time.\n\n"
+            f"Please review them in your approval inbox.",
+            settings.DEFAULT_FROM_EMAIL,
+            [email],
+        )
+        for user_id, email in emails
+    ]
+    if messages:
+        send_mass_mail(messages, fail_silently=True)
+    return len(messages)
+
+
+def escalate_overdue_steps(now=None, batch_size=ESCALATION_BATCH_SIZE):
+    """
+    Escalates every step due before `now` (default: now) in all STEP_TABLES and emails
+    the approvers concerned. Returns the counts {'reassigned', 'reminded', 'notified'}.
+    """
+    if now is None:
+        now = timezone.now()
+    fallback_group = None
+    if settings.APPROVAL_ESCALATION_GROUP:
+        fallback_group = Group.objects.filter(name=settings.APPROVAL_ESCALATION_GROUP).first()
+        if fallback_group is None:
+            logger.warning("Approval escalation group '%s' does not exist; overdue steps are only reminded.",
+                           settings.APPROVAL_ESCALATION_GROUP)
+
+    totals = {'reassigned': 0, 'reminded': 0}
+    notices = {'users': Counter(), 'groups': Counter()}
+    for table in STEP_TABLES:
+        while True:
+            counts = _escalate_batch(table, now, batch_size, fallback_group, notices)
+            if counts is None:
+                break
+            totals['reassigned'] += counts[0]
+            totals['reminded'] += counts[1]
+    totals['notified'] = _send_notices(notices)
+    return totals
@@ -0,0 +1,157 @@
+"""
+Maintenance of the materialized approver inbox (ApprovalInboxEntry / ApprovalInboxCounter).
+
+A user's inbox holds every pending ApprovalStep they may action: steps assigned to them
+(possibly as a delegatee), to a group they belong to, or originally assigned to them before
+delegation. Reading it is an indexed lookup on (user, step) instead of the OR/distinct query
+over all steps, and the badge count is a single counter row.
+
+Entries are refreshed whenever steps are created, change status or are deleted, and when
+group memberships change (procurement.signals). Counters are moved with F() increments, so
+concurrent refreshes don't overwrite each other. rebuild_approval_inbox() recomputes
+everything (see the rebuild_approval_inbox management command).
+"""
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+INBOX_STATUSES = ('pending', 'delegated')
+
+_STEP_FIELDS = (
+    'pk', 'status', 'assigned_approver_user_id', 'original_assigned_approver_user_id', 'assigned_approver_group_id',
+)
+
+User = get_user_model()
+
+
+def _eligible_pairs(steps):
+    """Returns the (user_id, step_id) pairs the given steps (value dicts) should have in the inbox."""
+    group_ids = {step['assigned_approver_group_id'] for step in steps if step['assigned_approver_group_id']}
+    group_members = defaultdict(set)
+    if group_ids:
+        memberships = User.groups.through.objects.filter(group_id__in=group_ids).values_list('group_id', 'user_id')
+        for group_id, user_id in memberships:
+            group_members[group_id].add(user_id)
+
+    pairs = set()
+    for step in steps:
+        if step['status'] not in INBOX_STATUSES:
+            continue
+        user_ids = set(group_members.get(step['assigned_approver_group_id'], ()))
+        user_ids.update(
+            user_id for user_id in (step['assigned_approver_user_id'], step['original_assigned_approver_user_id'])
+            if user_id
+        )
+        pairs.update((user_id, step['pk']) for user_id in user_ids)
+    return pairs
+
+
+def _apply_counter_deltas(deltas):
+    from .models import ApprovalInboxCounter
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    ApprovalInboxCounter.objects.bulk_create(
+        [ApprovalInboxCounter(user_id=user_id) for user_id in deltas], ignore_conflicts=True
+    )
+    users_by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        users_by_delta[delta].append(user_id)
+    for delta, user_ids in users_by_delta.items():
+        ApprovalInboxCounter.objects.filter(user_id__in=user_ids).update(pending_count=F('pending_count') + delta)
+
+
+def _sync(steps, existing_entries, user_ids=None):
+    """
+    Adds/removes entries so that `existing_entries` ((pk, user_id, step_id) tuples) match what
+    `steps` call for, optionally only for the given users, and moves the counters accordingly.
+    """
+    from .models import ApprovalInboxEntry
+    desired = _eligible_pairs(steps)
+    if user_ids is not None:
+        desired = {pair for pair in desired if pair[0] in user_ids}
+    existing = {(user_id, step_id): pk for pk, user_id, step_id in existing_entries}
+
+    to_add = desired - existing.keys()
+    to_remove = {pair: pk for pair, pk in existing.items() if pair not in desired}
+    deltas = Counter(user_id for user_id, _ in to_add)
+    deltas.subtract(user_id for user_id, _ in to_remove)
+
+    with transaction.atomic():
+        if to_remove:
+            ApprovalInboxEntry.objects.filter(pk__in=to_remove.values()).delete()
+        if to_add:
+            ApprovalInboxEntry.objects.bulk_create(
+                [ApprovalInboxEntry(user_id=user_id, step_id=step_id) for user_id, step_id in to_add]
+            )
+        _apply_counter_deltas(deltas)
+
+
+def refresh_approval_inbox(step_ids):
+    """Brings the inbox entries of the given steps up to date (after they were created or changed status)."""
+    from .models import ApprovalInboxEntry, ApprovalStep
+    step_ids = list(step_ids)
+    if not step_ids:
+        return
+    steps = list(ApprovalStep.objects.filter(pk__in=step_ids).values(*_STEP_FIELDS))
+    existing = list(ApprovalInboxEntry.objects.filter(step_id__in=step_ids).values_list('pk', 'user_id', 'step_id'))
+    _sync(steps, existing)
+
+
+def refresh_user_inboxes(user_ids):
+    """Rebuilds the inboxes of the given users (after their group memberships changed)."""
+    from .models import ApprovalInboxEntry, ApprovalStep
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    user_group_ids = User.groups.through.objects.filter(user_id__in=user_ids).values('group_id')
+    steps = list(ApprovalStep.objects.filter(
+        Q(assigned_approver_user_id__in=user_ids) |
+        Q(original_assigned_approver_user_id__in=user_ids) |
+        Q(assigned_approver_group_id__in=user_group_ids),
+        status__in=INBOX_STATUSES,
+    ).values(*_STEP_FIELDS))
+    existing = list(ApprovalInboxEntry.objects.filter(user_id__in=user_ids).values_list('pk', 'user_id', 'step_id'))
+    _sync(steps, existing, user_ids=user_ids)
+
+
+def release_inbox_entries(steps):
+    """Deletes the inbox entries of steps (ids or a queryset) about to be deleted, taking them off the counters."""
+    from .models import ApprovalInboxEntry
+    entries = ApprovalInboxEntry.objects.filter(step__in=steps)
+    deltas = Counter()
+    for user_id in entries.values_list('user_id', flat=True):
+        deltas[user_id] -= 1
+    if deltas:
+        with transaction.atomic():
+            entries.delete()
+            _apply_counter_deltas(deltas)
+
+
+def delete_steps(queryset):
+    """
+    Deletes ApprovalSteps, releasing their inbox entries in one pass first. Steps deleted any
+    other way (cascades, the API, the admin) are released one by one by a pre_delete signal.
+    """
+    with transaction.atomic():
+        release_inbox_entries(queryset)
+        queryset.delete()
+
+
+def rebuild_approval_inbox():
+    """Recomputes every inbox entry and counter from the steps. Returns the number of entries."""
+    from .models import ApprovalInboxCounter, ApprovalInboxEntry, ApprovalStep
+    with transaction.atomic():
+        steps = list(ApprovalStep.objects.filter(status__in=INBOX_STATUSES).values(*_STEP_FIELDS))
+        existing = list(ApprovalInboxEntry.objects.values_list('pk', 'user_id', 'step_id'))
+        _sync(steps, existing)
+
+        ApprovalInboxCounter.objects.update(pending_count=0)
+        counts = ApprovalInboxEntry.objects.values('user_id').annotate(entries=Count('pk'))
+        ApprovalInboxCounter.objects.bulk_create(
+            [ApprovalInboxCounter(user_id=row['user_id'], pending_count=row['entries']) for row in counts],
+            update_conflicts=True, unique_fields=['user'], update_fields=['pending_count'],
+        )
+        return ApprovalInboxEntry.objects.count()
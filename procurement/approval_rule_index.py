@@ -0,0 +1,151 @@
+"""
+In-memory index of active ApprovalRules.
+
+Evaluating rules one by one costs a departments/projects query per rule on every
+memo. Instead, all active rules are loaded once (one query per relation) and
+compiled into:
+
+- for 'procurement_memo' rules: a list sorted by min_amount, so the rules whose
+  lower bound is <= the estimated cost are found with a bisect and then checked
+  against max_amount and the department/project membership sets;
+- for 'generic_iom' rules: template id -> rules and category id -> rules maps.
+
+Matching then costs no queries beyond one read of the index's CacheVersion row. The
+index is rebuilt when that version changes (procurement.signals bumps it whenever a rule
+or one of its M2M sets changes, in the same transaction), so every process sees a change
+made by any other. It is also rebuilt after settings.APPROVAL_RULE_INDEX_TTL seconds, as
+a backstop for changes that bypass the signals (queryset update(), raw SQL).
+"""
+import bisect
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+APPROVAL_RULE_INDEX_VERSION = 'procurement.approval_rule_index'  # CacheVersion name
+
+_NO_LOWER_BOUND = Decimal('-Infinity')
+
+
+def _sort_key(rule):
+    return (rule.order, rule.pk)
+
+
+class ApprovalRuleIndex:
+    def __init__(self, rules):
+        memo_rules = []
+        self._generic_by_template = {}
+        self._generic_by_category = {}
+
+        for rule in rules:
+            if rule.rule_type == 'procurement_memo':
+                department_ids = None if rule.applies_to_all_departments else frozenset(d.pk for d in rule.departments.all())
+                project_ids = None if rule.applies_to_all_projects else frozenset(p.pk for p in rule.projects.all())
+                lower = rule.min_amount if rule.min_amount is not None else _NO_LOWER_BOUND
+                memo_rules.append((lower, rule.max_amount, department_ids, project_ids, rule))
+            elif rule.rule_type == 'generic_iom':
+                for template in rule.applicable_iom_templates.all():
+                    self._generic_by_template.setdefault(template.pk, []).append(rule)
+                for category in rule.applicable_iom_categories.all():
+                    self._generic_by_category.setdefault(category.pk, []).append(rule)
+
+        memo_rules.sort(key=lambda entry: entry[0])
+        self._memo_rules = memo_rules
+        self._memo_lower_bounds = [entry[0] for entry in memo_rules]
+
+    def match_procurement_memo(self, estimated_cost, department_id, project_id):
+        """Returns the active 'procurement_memo' rules applying to a memo, ordered by rule order."""
+        if estimated_cost is None:
+            # Rules with any amount bound never apply to a memo without an estimated cost.
+            candidates = [entry for entry in self._memo_rules if entry[0] is _NO_LOWER_BOUND and entry[1] is None]
+        else:
+            estimated_cost = Decimal(estimated_cost)
+            candidates = self._memo_rules[:bisect.bisect_right(self._memo_lower_bounds, estimated_cost)]
+
+        matched = []
+        for lower, upper, department_ids, project_ids, rule in candidates:
+            if upper is not None and estimated_cost > upper:
+                continue
+            if department_ids is not None and department_id not in department_ids:
+                continue
+            if project_ids is not None and project_id not in project_ids:
+                continue
+            matched.append(rule)
+        return sorted(matched, key=_sort_key)
+
+    def procurement_memo_rules(self):
+        """
+        The compiled 'procurement_memo' rules as (lower, upper, department_ids, project_ids, rule),
+        ordered by rule order; lower is -Infinity when the rule has no minimum and the id sets are
+        None when the rule applies to all departments/projects.
+        """
+        return sorted(self._memo_rules, key=lambda entry: _sort_key(entry[4]))
+
+    def generic_iom_rules(self):
+        """The compiled 'generic_iom' rules as (template_ids, category_ids, rule), ordered by rule order."""
+        targets = {}
+        for index, key in ((self._generic_by_template, 0), (self._generic_by_category, 1)):
+            for target_id, rules in index.items():
+                for rule in rules:
+                    targets.setdefault(rule.pk, (set(), set(), rule))[key].add(target_id)
+        return sorted(
+            ((frozenset(templates), frozenset(categories), rule) for templates, categories, rule in targets.values()),
+            key=lambda entry: _sort_key(entry[2]),
+        )
+
+    def match_generic_iom(self, template_id, category_id):
+        """Returns the active 'generic_iom' rules for a template or its category, ordered by rule order."""
+        matched = {rule.pk: rule for rule in self._generic_by_template.get(template_id, ())}
+        if category_id is not None:
+            for rule in self._generic_by_category.get(category_id, ()):
+                matched.setdefault(rule.pk, rule)
+        return sorted(matched.values(), key=_sort_key)
+
+
+_lock = threading.Lock()
+_cached = {'index': None, 'version': None, 'built_at': 0.0}
+
+
+def _build_index():
+    from .models import ApprovalRule
+    rules = ApprovalRule.objects.filter(is_active=True).select_related(
+        'approver_user', 'approver_group'
+    ).prefetch_related(
+        'departments', 'projects', 'applicable_iom_templates', 'applicable_iom_categories'
+    )
+    return ApprovalRuleIndex(list(rules))
+
+
+def _store(index, version):
+    with _lock:
+        _cached.update(index=index, version=version, built_at=time.monotonic())
+
+
+def get_approval_rule_index():
+    """Returns the current ApprovalRuleIndex, rebuilding it if rules changed or it expired."""
+    from .models import CacheVersion
+    version = CacheVersion.current(APPROVAL_RULE_INDEX_VERSION)
+    ttl = getattr(settings, 'APPROVAL_RULE_INDEX_TTL', 300)
+    with _lock:
+        index = _cached['index']
+        if index is not None and _cached['version'] == version and time.monotonic() - _cached['built_at'] < ttl:
+            return index
+
+    index = _build_index()
+    # Inside a transaction the index may include uncommitted rule changes. Only
+    # share it once they are committed; on rollback it is simply dropped.
+    transaction.on_commit(lambda: _store(index, version))
+    return index
+
+
+def invalidate_approval_rule_index():
+    """
+    Forces every process to rebuild its index on next use. Called inside a transaction, the
+    other processes see the change when it commits.
+    """
+    from .models import CacheVersion
+    CacheVersion.bump(APPROVAL_RULE_INDEX_VERSION)
+    with _lock:
+        _cached['index'] = None
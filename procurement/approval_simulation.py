@@ -0,0 +1,280 @@
+"""
+What-if evaluation of approval rule changes ("how many memos would this threshold reroute?").
+
+A proposed rule set is the current active rules (from the shared ApprovalRuleIndex) with
+changes applied: a change carrying the id of a rule overrides those fields of it (is_active
+False drops it), a change without an id adds a rule. With replace=True the proposed set is
+just the given rules. Every rule is compared before and after over a population of objects,
+either historical (memos/IOMs in a date range) or hypothetical ones supplied by the caller.
+
+Nothing is evaluated per object and nothing is written. Procurement memos are loaded as counts
+per (department, project, estimated cost) with one grouped query; per (department, project)
+group the amounts are sorted with cumulative counts, so the memos a rule's amount band selects
+are a slice found with two bisects, and before/after differences are slice intersections.
+Generic IOMs are counted per (template, category) the same way.
+"""
+import bisect
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Count
+
+from .approval_rule_index import ApprovalRuleIndex, get_approval_rule_index
+
+class SimulationError(ValueError):
+    pass
+
+
+def _memo_spec(_lower, upper, department_ids, project_ids, rule):
+    return {
+        'id': rule.pk, 'name': rule.name, 'order': rule.order,
+        'min_amount': rule.min_amount, 'max_amount': upper,
+        'department_ids': department_ids, 'project_ids': project_ids,
+    }
+
+
+def _generic_iom_spec(template_ids, category_ids, rule):
+    return {'id': rule.pk, 'name': rule.name, 'order': rule.order, 'template_ids': template_ids, 'category_ids': category_ids}
+
+
+def _compiled_specs(index, rule_type):
+    if rule_type == 'procurement_memo':
+        return {entry[4].pk: _memo_spec(*entry) for entry in index.procurement_memo_rules()}
+    return {entry[2].pk: _generic_iom_spec(*entry) for entry in index.generic_iom_rules()}
+
+
+def _apply_change(spec, change, rule_type):
+    spec = dict(spec)
+    for name in ('name', 'order'):
+        if name in change:
+            spec[name] = change[name]
+    if rule_type == 'procurement_memo':
+        for name in ('min_amount', 'max_amount'):
+            if name in change:
+                spec[name] = change[name]
+        for scope, ids in (('departments', 'department_ids'), ('projects', 'project_ids')):
+            applies_to_all = change.get(f'applies_to_all_{scope}', spec[ids] is None)
+            selected = change[scope] if scope in change else (spec[ids] or ())
+            spec[ids] = None if applies_to_all else frozenset(selected)
+    else:
+        if 'applicable_iom_templates' in change:
+            spec['template_ids'] = frozenset(change['applicable_iom_templates'])
+        if 'applicable_iom_categories' in change:
+            spec['category_ids'] = frozenset(change['applicable_iom_categories'])
+    return spec
+
+
+def _blank_spec(rule_type):
+    if rule_type == 'procurement_memo':
+        return {'id': None, 'name': '', 'order': 10, 'min_amount': None, 'max_amount': None,
+                'department_ids': None, 'project_ids': None}
+    return {'id': None, 'name': '', 'order': 10, 'template_ids': frozenset(), 'category_ids': frozenset()}
+
+
+def proposed_rule_specs(rule_type, changes, replace=False):
+    """
+    Returns (current, proposed): dicts of rule key -> compiled rule spec. Keys are rule ids, or
+    'new-<n>' for added rules.
+    """
+    from .models import ApprovalRule
+    current = _compiled_specs(get_approval_rule_index(), rule_type)
+
+    # Changes may reactivate rules the index (active rules only) doesn't hold.
+    missing = {change['id'] for change in changes if change.get('id') is not None} - current.keys()
+    known = {}
+    if missing:
+        rules = list(ApprovalRule.objects.filter(pk__in=missing, rule_type=rule_type).prefetch_related(
+            'departments', 'projects', 'applicable_iom_templates', 'applicable_iom_categories'
+        ))
+        known = _compiled_specs(ApprovalRuleIndex(rules), rule_type)
+        for rule in rules:
+            # A rule of this type whose scope is empty is not in the index; start it from a blank scope.
+            known.setdefault(rule.pk, dict(_blank_spec(rule_type), id=rule.pk, name=rule.name, order=rule.order))
+        unknown = missing - known.keys()
+        if unknown:
+            raise SimulationError(f"No {rule_type} approval rule with id {sorted(unknown)}.")
+
+    proposed = {} if replace else dict(current)
+    for position, change in enumerate(changes):
+        rule_id = change.get('id')
+        key = rule_id if rule_id is not None else f'new-{position}'
+        if not change.get('is_active', True):
+            proposed.pop(key, None)
+            continue
+        base = current.get(rule_id) or known.get(rule_id) or _blank_spec(rule_type)
+        proposed[key] = _apply_change(base, change, rule_type)
+    return current, proposed
+
+
+# --- procurement memos ---------------------------------------------------------------------
+
+def _memo_groups(rows):
+    """rows: (department_id, project_id, estimated_cost, count) -> {(dept, project): (amounts, cumulative, null_count)}"""
+    by_group = defaultdict(lambda: [defaultdict(int), 0])
+    for department_id, project_id, cost, count in rows:
+        group = by_group[(department_id, project_id)]
+        if cost is None:
+            group[1] += count
+        else:
+            group[0][Decimal(cost)] += count
+    groups = {}
+    for key, (counts, null_count) in by_group.items():
+        amounts = sorted(counts)
+        cumulative = [0]
+        for amount in amounts:
+            cumulative.append(cumulative[-1] + counts[amount])
+        groups[key] = (amounts, cumulative, null_count)
+    return groups
+
+
+def _memo_selection(spec, group_key, group):
+    """(start, end, includes_null) of the group's memos a rule applies to, or None."""
+    department_id, project_id = group_key
+    if spec['department_ids'] is not None and department_id not in spec['department_ids']:
+        return None
+    if spec['project_ids'] is not None and project_id not in spec['project_ids']:
+        return None
+    amounts = group[0]
+    start = 0 if spec['min_amount'] is None else bisect.bisect_left(amounts, spec['min_amount'])
+    end = len(amounts) if spec['max_amount'] is None else bisect.bisect_right(amounts, spec['max_amount'])
+    includes_null = spec['min_amount'] is None and spec['max_amount'] is None
+    return start, max(start, end), includes_null
+
+
+def _memo_count(group, selection):
+    if selection is None:
+        return 0
+    start, end, includes_null = selection
+    return group[1][end] - group[1][start] + (group[2] if includes_null else 0)
+
+
+def _memo_overlap(group, first, second):
+    if first is None or second is None:
+        return 0
+    start, end = max(first[0], second[0]), min(first[1], second[1])
+    overlap = group[1][end] - group[1][start] if end > start else 0
+    return overlap + (group[2] if first[2] and second[2] else 0)
+
+
+def _memo_routed(group_key, group, specs):
+    """Memos of the group matched by at least one rule (union of the rules' amount slices)."""
+    selections = [selection for selection in (_memo_selection(spec, group_key, group) for spec in specs) if selection]
+    routed, reach = 0, 0
+    for start, end, _ in sorted(selections):
+        start = max(start, reach)
+        if end > start:
+            routed += group[1][end] - group[1][start]
+        reach = max(reach, end)
+    if any(selection[2] for selection in selections):
+        routed += group[2]
+    return routed
+
+
+# --- generic IOMs --------------------------------------------------------------------------
+
+def _generic_iom_matches(spec, group_key):
+    template_id, category_id = group_key
+    return template_id in spec['template_ids'] or (category_id is not None and category_id in spec['category_ids'])
+
+
+# --- entry point ---------------------------------------------------------------------------
+
+def _historical_rows(rule_type, date_from=None, date_to=None, statuses=None):
+    if rule_type == 'procurement_memo':
+        from .models import PurchaseRequestMemo
+        queryset, date_field = PurchaseRequestMemo.objects.all(), 'request_date'
+        columns = ('department', 'project', 'estimated_cost')
+    else:
+        from generic_iom.models import GenericIOM
+        queryset, date_field = GenericIOM.objects.all(), 'created_at'
+        columns = ('iom_template', 'iom_template__category')
+    if date_from:
+        queryset = queryset.filter(**{f'{date_field}__date__gte': date_from})
+    if date_to:
+        queryset = queryset.filter(**{f'{date_field}__date__lte': date_to})
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset.order_by().values_list(*columns).annotate(count=Count('pk'))
+
+
+def _hypothetical_rows(rule_type, objects):
+    counts = defaultdict(int)
+    if rule_type == 'procurement_memo':
+        for obj in objects:
+            counts[(obj.get('department'), obj.get('project'), obj.get('estimated_cost'))] += 1
+    else:
+        from generic_iom.models import IOMTemplate
+        template_ids = {obj['iom_template'] for obj in objects}
+        categories = dict(IOMTemplate.objects.filter(pk__in=template_ids).values_list('pk', 'category'))
+        for obj in objects:
+            counts[(obj['iom_template'], categories.get(obj['iom_template']))] += 1
+    return [key + (count,) for key, count in counts.items()]
+
+
+def simulate_approval_rules(rule_type, changes, replace=False, objects=None, date_from=None, date_to=None, statuses=None):
+    """
+    Compares the current and proposed rules (see proposed_rule_specs) over `objects` (hypothetical
+    dicts: estimated_cost/department/project for memos, iom_template for IOMs) or, when objects is
+    None, the historical memos/IOMs filtered by creation date and status. Returns a dict with the
+    object count, how many objects match no rule before/after, and per rule: matched_before,
+    matched_after, newly_matched and newly_unmatched.
+    """
+    current, proposed = proposed_rule_specs(rule_type, changes, replace=replace)
+    if objects is None:
+        rows = list(_historical_rows(rule_type, date_from, date_to, statuses))
+    else:
+        rows = _hypothetical_rows(rule_type, objects)
+
+    results = {}
+    for key in list(current) + [key for key in proposed if key not in current]:
+        before, after = current.get(key), proposed.get(key)
+        spec = after or before
+        if before is None:
+            change = 'added'
+        elif after is None:
+            change = 'removed'
+        else:
+            change = 'unchanged' if before == after else 'changed'
+        results[key] = {
+            'id': spec['id'], 'name': spec['name'], 'order': spec['order'], 'change': change,
+            'matched_before': 0, 'matched_after': 0, 'newly_matched': 0, 'newly_unmatched': 0,
+        }
+
+    if rule_type == 'procurement_memo':
+        groups = _memo_groups(rows)
+        total = sum(group[1][-1] + group[2] for group in groups.values())
+        unrouted_before = total - sum(_memo_routed(key, group, current.values()) for key, group in groups.items())
+        unrouted_after = total - sum(_memo_routed(key, group, proposed.values()) for key, group in groups.items())
+        for key, result in results.items():
+            for group_key, group in groups.items():
+                before = _memo_selection(current[key], group_key, group) if key in current else None
+                after = _memo_selection(proposed[key], group_key, group) if key in proposed else None
+                matched_before, matched_after = _memo_count(group, before), _memo_count(group, after)
+                overlap = _memo_overlap(group, before, after)
+                result['matched_before'] += matched_before
+                result['matched_after'] += matched_after
+                result['newly_matched'] += matched_after - overlap
+                result['newly_unmatched'] += matched_before - overlap
+    else:
+        groups = {(template_id, category_id): count for template_id, category_id, count in rows}
+        total = sum(groups.values())
+        unrouted_before = sum(count for group_key, count in groups.items()
+                              if not any(_generic_iom_matches(spec, group_key) for spec in current.values()))
+        unrouted_after = sum(count for group_key, count in groups.items()
+                             if not any(_generic_iom_matches(spec, group_key) for spec in proposed.values()))
+        for key, result in results.items():
+            for group_key, count in groups.items():
+                before = key in current and _generic_iom_matches(current[key], group_key)
+                after = key in proposed and _generic_iom_matches(proposed[key], group_key)
+                result['matched_before'] += count if before else 0
+                result['matched_after'] += count if after else 0
+                result['newly_matched'] += count if after and not before else 0
+                result['newly_unmatched'] += count if before and not after else 0
+
+    return {
+        'rule_type': rule_type,
+        'object_count': total,
+        'unrouted_before': unrouted_before,
+        'unrouted_after': unrouted_after,
+        'rules': sorted(results.values(), key=lambda result: (result['order'], result['id'] is None, result['id'] or 0)),
+    }
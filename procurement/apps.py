@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProcurementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'procurement'
+
+    def ready(self):
+        import procurement.signals  # noqa F401: Import signals
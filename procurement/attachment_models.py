@@ -0,0 +1,66 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+def attachment_blob_path(instance, filename):
+    # Content-addressed: the path is derived from the hash, fanned out to keep directories small.
+    return f"procurement/attachment_blobs/{instance.sha256[:2]}/{instance.sha256[2:4]}/{instance.sha256}"
+
+
+class AttachmentBlob(models.Model):
+    """
+    A stored attachment file, identified by the SHA-256 of its content. Each distinct file is
+    stored once; memos, POs, check requests and contracts reference it (attachment_blob).
+    """
+    sha256 = models.CharField(_("SHA-256"), max_length=64, unique=True, editable=False)
+    file = models.FileField(_("File"), upload_to=attachment_blob_path, max_length=255)
+    size = models.PositiveBigIntegerField(_("Size (bytes)"))
+    content_type = models.CharField(_("Content Type"), max_length=100, blank=True)
+    original_filename = models.CharField(
+        _("Original Filename"), max_length=255, blank=True,
+        help_text="Name the file was first uploaded under; used for downloads."
+    )
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Attachment Blob")
+        verbose_name_plural = _("Attachment Blobs")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.original_filename or self.sha256[:12]} ({self.size} bytes)"
+
+
+class ChunkedUpload(models.Model):
+    """A resumable upload in progress: chunks are appended to a part file until `offset` reaches `size`."""
+    STATUS_CHOICES = [
+        ('uploading', _('Uploading')),
+        ('complete', _('Complete')),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(_("Filename"), max_length=255)
+    content_type = models.CharField(_("Content Type"), max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(_("Size (bytes)"))
+    offset = models.PositiveBigIntegerField(_("Bytes Received"), default=0)
+    status = models.CharField(_("Status"), max_length=20, choices=STATUS_CHOICES, default='uploading')
+    blob = models.ForeignKey(
+        AttachmentBlob, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='uploads', verbose_name=_("Stored File")
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='chunked_uploads', verbose_name=_("Uploaded By")
+    )
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Chunked Upload")
+        verbose_name_plural = _("Chunked Uploads")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes, {self.status})"
@@ -0,0 +1,110 @@
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from rest_framework import mixins, permissions, status as http_status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .chunked_uploads import (
+    RangeNotSatisfiable, UploadError, UploadOffsetMismatch, UPLOAD_READ_SIZE,
+    append_chunk, complete_upload, iter_file_range, parse_range,
+)
+from .models import AttachmentBlob, CheckRequest, ChunkedUpload, PurchaseOrder, PurchaseRequestMemo
+from .serializers import AttachmentBlobSerializer, ChunkedUploadSerializer
+
+
+class ChunkedUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable attachment uploads (see procurement.chunked_uploads).
+
+    POST   attachment-uploads/                {filename, size[, content_type]} opens an upload
+    PUT    attachment-uploads/{id}/chunk/     raw bytes with Content-Range: bytes start-end/size
+    GET    attachment-uploads/{id}/           current offset, to resume after a failure
+    POST   attachment-uploads/{id}/complete/  stores (or reuses) the file, returns its blob
+    """
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return ChunkedUpload.objects.filter(created_by=self.request.user).select_related('blob')
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=['put'], parser_classes=[])
+    def chunk(self, request, pk=None):
+        upload = self.get_object()
+        stream = request.stream  # Read as it arrives; request.data is never parsed
+        if stream is None:
+            return Response({'error': 'Chunk body is empty.'}, status=http_status.HTTP_400_BAD_REQUEST)
+        try:
+            upload = append_chunk(upload, request.headers.get('Content-Range'), stream)
+        except UploadOffsetMismatch as exc:
+            upload.refresh_from_db()
+            return Response({'error': str(exc), 'offset': upload.offset}, status=http_status.HTTP_409_CONFLICT)
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=http_status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            upload = complete_upload(upload)
+        except UploadError as exc:
+            return Response({'error': str(exc), 'offset': upload.offset}, status=http_status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data)
+
+
+class AttachmentBlobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Stored attachment files, looked up by SHA-256. download/ supports single byte-range requests.
+
+    Users reach the blobs they uploaded and those attached to memos, purchase orders or check
+    requests they can see (the same rules as those endpoints). Only staff can list blobs.
+    """
+    serializer_class = AttachmentBlobSerializer
+    lookup_field = 'sha256'
+
+    def get_permissions(self):
+        if self.action == 'list':
+            return [permissions.IsAdminUser()]
+        return [permissions.IsAuthenticated()]
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_staff or user.is_superuser:
+            return AttachmentBlob.objects.all()
+        return AttachmentBlob.objects.filter(
+            Q(pk__in=ChunkedUpload.objects.filter(created_by=user).values('blob'))
+            | Q(pk__in=PurchaseRequestMemo.objects.filter(requested_by=user).values('attachment_blob'))
+            | Q(pk__in=PurchaseOrder.objects.values('attachment_blob'))  # Every user can read POs
+            | Q(pk__in=CheckRequest.objects.filter(requested_by=user).values('attachment_blob'))
+        )
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, sha256=None):
+        blob = self.get_object()
+        filename = blob.original_filename or blob.sha256
+        content_type = blob.content_type or 'application/octet-stream'
+        try:
+            byte_range = parse_range(request.headers.get('Range'), blob.size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=http_status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f"bytes */{blob.size}"
+            return response
+
+        if byte_range is None:
+            response = FileResponse(blob.file.open('rb'), as_attachment=True, filename=filename, content_type=content_type)
+            response.block_size = UPLOAD_READ_SIZE
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(blob.file.open('rb'), start, end),
+                status=http_status.HTTP_206_PARTIAL_CONTENT, content_type=content_type,
+            )
+            response['Content-Range'] = f"bytes {start}-{end}/{blob.size}"
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = f'"{blob.sha256}"'  # Content-addressed, so the hash never goes stale
+        return response
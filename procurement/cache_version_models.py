@@ -0,0 +1,36 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+
+class CacheVersion(models.Model):
+    """
+    A counter per in-process cache (the approval rule index, loaded delegations). Writers bump it
+    in the transaction that changes the cached data; every process compares it with the version
+    its copy was built from, so a change made by one process is seen by all of them.
+    """
+    name = models.CharField(_("Name"), max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(_("Version"), default=1)
+
+    class Meta:
+        verbose_name = _("Cache Version")
+        verbose_name_plural = _("Cache Versions")
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    @classmethod
+    def current(cls, name):
+        """The version of cache `name`; None until it is first bumped."""
+        return cls.objects.filter(name=name).values_list('version', flat=True).first()
+
+    @classmethod
+    def bump(cls, name):
+        if cls.objects.filter(name=name).update(version=F('version') + 1):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(name=name)
+        except IntegrityError:
+            # Created by a concurrent writer in between.
+            cls.objects.filter(name=name).update(version=F('version') + 1)
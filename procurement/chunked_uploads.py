@@ -0,0 +1,199 @@
+"""
+Resumable, content-addressed attachment uploads.
+
+A client opens an upload (filename, total size), then PUTs the file in chunks, each with a
+`Content-Range: bytes <start>-<end>/<size>` header. Chunks are streamed from the request
+straight into a part file under settings.ATTACHMENT_UPLOAD_TEMP_DIR, UPLOAD_READ_SIZE bytes
+at a time, so neither the request nor the file is ever held in memory and no worker is tied
+up for the whole file. A chunk must start at the upload's current offset; after a dropped
+connection the client reads the offset back and resumes from there.
+
+Completing the upload hashes the part file (SHA-256, read block by block) and looks the hash
+up: a file already stored is reused and the part file discarded, otherwise the part file
+becomes a new AttachmentBlob. Records point at blobs (attachment_blob), so the same quote
+attached to a memo, its PO and the check request is stored once.
+
+Downloads honour `Range: bytes=...` (one range) and stream the requested bytes.
+"""
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+UPLOAD_READ_SIZE = 64 * 1024  # Bytes read from the request / file per step
+
+_CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(ValueError):
+    """The chunk or upload can't be accepted as sent."""
+
+
+class UploadOffsetMismatch(UploadError):
+    """The chunk doesn't start where the upload currently ends (the client should resume from upload.offset)."""
+
+
+class RangeNotSatisfiable(ValueError):
+    """The Range header asks for bytes outside the file."""
+
+
+def part_file_path(upload):
+    return os.path.join(settings.ATTACHMENT_UPLOAD_TEMP_DIR, f"{upload.pk}.part")
+
+
+def parse_content_range(header):
+    """Returns (start, end, total) from a `bytes start-end/total` Content-Range header (end inclusive)."""
+    match = _CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        raise UploadError("Content-Range header must be 'bytes <start>-<end>/<size>'.")
+    start, end, total = (int(value) for value in match.groups())
+    if end < start:
+        raise UploadError("Content-Range end is before its start.")
+    return start, end, total
+
+
+def append_chunk(upload, content_range, stream):
+    """
+    Writes the chunk read from `stream` into the part file of `upload` (a ChunkedUpload) and
+    advances its offset. Raises UploadError / UploadOffsetMismatch without advancing otherwise.
+    """
+    from .models import ChunkedUpload
+    start, end, total = parse_content_range(content_range)
+    length = end - start + 1
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status != 'uploading':
+            raise UploadError("This upload is already complete.")
+        if total != upload.size or end >= upload.size:
+            raise UploadError(f"Content-Range does not fit the upload size of {upload.size} bytes.")
+        if start != upload.offset:
+            raise UploadOffsetMismatch(f"Expected a chunk starting at byte {upload.offset}.")
+
+        path = part_file_path(upload)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as part:
+            if part.seek(0, os.SEEK_END) < start:
+                raise UploadError("The partial upload was lost; start a new upload.")
+            part.truncate(start)  # Drop bytes of an earlier chunk that was never acknowledged
+            received = 0
+            while received < length:
+                block = stream.read(min(UPLOAD_READ_SIZE, length - received))
+                if not block:
+                    break
+                part.write(block)
+                received += len(block)
+            if received != length or stream.read(1):
+                part.truncate(start)
+                raise UploadError(f"Chunk body must be exactly {length} bytes as given by Content-Range.")
+
+        upload.offset = end + 1
+        upload.save(update_fields=['offset', 'updated_at'])
+    return upload
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(UPLOAD_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete_upload(upload):
+    """Hashes the finished upload and links it to its AttachmentBlob, storing the file only if it's new."""
+    from .models import AttachmentBlob, ChunkedUpload
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status == 'complete':
+            return upload
+        if upload.offset != upload.size:
+            raise UploadError(f"Upload incomplete: {upload.offset} of {upload.size} bytes received.")
+
+        path = part_file_path(upload)
+        if upload.size == 0:
+            open(path, 'ab').close()
+        sha256 = _hash_file(path)
+        blob = AttachmentBlob.objects.filter(sha256=sha256).first()
+        if blob is None:
+            blob = AttachmentBlob(
+                sha256=sha256, size=upload.size,
+                content_type=upload.content_type, original_filename=upload.filename,
+            )
+            with open(path, 'rb') as part:
+                blob.file.save(sha256, File(part), save=False)
+            try:
+                with transaction.atomic():
+                    blob.save()
+            except IntegrityError:
+                # Stored concurrently by another upload of the same content: use that one.
+                blob.file.delete(save=False)
+                blob = AttachmentBlob.objects.get(sha256=sha256)
+
+        upload.blob = blob
+        upload.status = 'complete'
+        upload.save(update_fields=['blob', 'status', 'updated_at'])
+        transaction.on_commit(lambda: _remove_part_file(path))
+    return upload
+
+
+def _remove_part_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def purge_stale_uploads(older_than_hours=None):
+    """Deletes unfinished uploads (and their part files) not touched for the given hours. Returns how many."""
+    from .models import ChunkedUpload
+    if older_than_hours is None:
+        older_than_hours = settings.ATTACHMENT_UPLOAD_EXPIRY_HOURS
+    cutoff = timezone.now() - timedelta(hours=older_than_hours)
+    stale = list(ChunkedUpload.objects.filter(status='uploading', updated_at__lt=cutoff))
+    for upload in stale:
+        _remove_part_file(part_file_path(upload))
+    ChunkedUpload.objects.filter(pk__in=[upload.pk for upload in stale]).delete()
+    return len(stale)
+
+
+def parse_range(header, size):
+    """
+    Returns the inclusive (start, end) byte range asked for by a `Range: bytes=...` header, or None
+    to send the whole file (no header, or a form this doesn't serve such as multiple ranges).
+    Raises RangeNotSatisfiable for ranges outside the file.
+    """
+    match = _RANGE_RE.match((header or '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':  # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def iter_file_range(file, start, end, block_size=UPLOAD_READ_SIZE):
+    """Yields bytes start..end (inclusive) of an open file, block by block, and closes it."""
+    try:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = file.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        file.close()
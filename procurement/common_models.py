@@ -40,6 +40,10 @@ class Contract(models.Model):
     # contract_value = models.DecimalField(_("Contract Value"), max_digits=15, decimal_places=2, null=True, blank=True)
     terms_and_conditions = models.TextField(_("Terms & Conditions"), blank=True)
     attachments = models.FileField(_("Attachments"), upload_to='procurement/contract_attachments/', null=True, blank=True)
+    attachment_blob = models.ForeignKey(
+        'procurement.AttachmentBlob', on_delete=models.PROTECT, null=True, blank=True,
+        related_name='+', verbose_name=_("Attachment (Chunked Upload)")
+    )
 
     class Meta:
         verbose_name = _("Contract")
@@ -101,6 +105,10 @@ class RecurringPayment(models.Model):
         verbose_name = _("Recurring Payment")
         verbose_name_plural = _("Recurring Payments")
         ordering = ['next_due_date']
+        indexes = [
+            # Due-payment scans of the scheduler (procurement.recurring_payments)
+            models.Index(fields=['is_active', 'next_due_date'], name='proc_recurring_due_idx'),
+        ]
 
     def __str__(self):
         return f"{self.payment_name} - {self.amount} {self.currency} ({self.get_frequency_display()})"
@@ -0,0 +1,141 @@
+"""
+Batch resolution of active ApprovalDelegations.
+
+resolve_active_delegates(users, at) answers "who acts for each of these users at time T"
+for any number of users with one query (on the delegator/is_active/start_date/end_date
+index), instead of one get_active_delegate() query per approver. Chains are followed in
+the same call: if A delegates to B and B to C, A resolves to C. Delegatees not seen yet
+cost one extra query per chain level; a chain that loops back (A -> B -> A) stops at the
+last user before the loop.
+
+For each delegator, the delegations that are active and have not ended yet are kept in a
+short-lived process cache, so they can be evaluated in memory for any later time. Each call
+reads the cache's CacheVersion row, which procurement.signals bumps whenever a delegation is
+saved or deleted, so every process drops its copy after a change by any of them. The cache
+is also dropped after settings.APPROVAL_DELEGATION_CACHE_TTL seconds.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+APPROVAL_DELEGATION_VERSION = 'procurement.approval_delegations'  # CacheVersion name
+
+MAX_DELEGATION_CHAIN = 10  # Guard against pathological chains
+
+_lock = threading.Lock()
+_cached = {'version': None, 'since': None, 'built_at': 0.0, 'windows': {}}
+
+
+def _user_id(user):
+    return user if isinstance(user, int) else user.pk
+
+
+def _load_windows(delegator_ids, since):
+    """Returns {delegator_id: [(start_date, end_date, delegatee), ...]} (latest start first)."""
+    from .models import ApprovalDelegation
+    windows = {delegator_id: [] for delegator_id in delegator_ids}
+    delegations = ApprovalDelegation.objects.filter(
+        delegator_id__in=delegator_ids,
+        is_active=True,
+        end_date__gte=since,
+    ).select_related('delegatee').order_by('delegator_id', '-start_date')
+    for delegation in delegations:
+        windows[delegation.delegator_id].append((delegation.start_date, delegation.end_date, delegation.delegatee))
+    return windows
+
+
+def _cached_windows(version, at):
+    """Returns a copy of the cached windows if they are current and cover time `at`, else {}."""
+    ttl = getattr(settings, 'APPROVAL_DELEGATION_CACHE_TTL', 60)
+    with _lock:
+        if (
+            _cached['version'] == version
+            and _cached['since'] is not None
+            and at >= _cached['since']  # Delegations that ended before `since` were not loaded
+            and time.monotonic() - _cached['built_at'] < ttl
+        ):
+            return dict(_cached['windows'])
+        return {}
+
+
+def _store(version, since, windows):
+    with _lock:
+        if _cached['version'] != version or _cached['since'] is None:
+            _cached.update(version=version, since=since, built_at=time.monotonic(), windows={})
+        else:
+            _cached['since'] = max(_cached['since'], since)
+        _cached['windows'].update(windows)
+
+
+def _delegate_at(windows, at):
+    for start_date, end_date, delegatee in windows:
+        if start_date <= at <= end_date:
+            return delegatee  # Latest start_date wins, as in get_active_delegate
+    return None
+
+
+def resolve_active_delegates(users, at=None):
+    """
+    Returns {user_id: final delegate User} for the given users (User instances or ids) that
+    have an active delegation at time `at` (default: now). Users without one are omitted.
+    """
+    from .models import CacheVersion
+    now = timezone.now()
+    if at is None:
+        at = now
+    since = min(at, now)
+    version = CacheVersion.current(APPROVAL_DELEGATION_VERSION)
+    windows = _cached_windows(version, at)
+    loaded = {}
+
+    # Direct delegate of every user on the chains, loading delegators level by level.
+    direct = {}
+    pending = {_user_id(user) for user in users}
+    while pending:
+        missing = [user_id for user_id in pending if user_id not in windows]
+        if missing:
+            fetched = _load_windows(missing, since)
+            windows.update(fetched)
+            loaded.update(fetched)
+        next_pending = set()
+        for user_id in pending:
+            delegate = _delegate_at(windows[user_id], at)
+            if delegate is not None:
+                direct[user_id] = delegate
+                if delegate.pk not in windows:
+                    next_pending.add(delegate.pk)
+        pending = next_pending
+
+    if loaded:
+        # Windows read inside a transaction may include uncommitted changes; share them after commit.
+        transaction.on_commit(lambda: _store(version, since, loaded))
+
+    resolved = {}
+    for user in users:
+        user_id = _user_id(user)
+        delegate = direct.get(user_id)
+        if delegate is None:
+            continue
+        seen = {user_id}
+        for _ in range(MAX_DELEGATION_CHAIN):
+            next_delegate = direct.get(delegate.pk)
+            if next_delegate is None or next_delegate.pk in seen:
+                break
+            seen.add(delegate.pk)
+            delegate = next_delegate
+        resolved[user_id] = delegate
+    return resolved
+
+
+def invalidate_delegation_cache():
+    """
+    Forces every process to reload delegations on next use. Called inside a transaction, the
+    other processes see the change when it commits.
+    """
+    from .models import CacheVersion
+    CacheVersion.bump(APPROVAL_DELEGATION_VERSION)
+    with _lock:
+        _cached.update(version=None, since=None, windows={})
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ApprovalEscalation(models.Model):
+    """
+    One escalation of an overdue approval step, written by procurement.approval_escalation.
+    The step is a procurement.ApprovalStep or a workflows.ApprovalStep (step_type/step_id).
+    """
+    ACTION_CHOICES = [
+        ('reassigned', _('Reassigned')),
+        ('reminded', _('Reminded')),
+    ]
+    step_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+', verbose_name=_("Step Type"))
+    step_id = models.PositiveBigIntegerField(_("Step ID"))
+    action = models.CharField(_("Action"), max_length=20, choices=ACTION_CHOICES)
+    level = models.PositiveIntegerField(_("Escalation Level"), help_text="1 for the first escalation of the step, 2 for the next, ...")
+    approver_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', verbose_name=_("Approver (when escalated)")
+    )
+    reassigned_to_group = models.ForeignKey(
+        'auth.Group', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', verbose_name=_("Reassigned To Group")
+    )
+    due_at = models.DateTimeField(_("Was Due At"))
+    escalated_at = models.DateTimeField(_("Escalated At"))
+
+    class Meta:
+        verbose_name = _("Approval Escalation")
+        verbose_name_plural = _("Approval Escalations")
+        ordering = ['-escalated_at']
+        indexes = [
+            models.Index(fields=['step_type', 'step_id'], name='proc_escalation_step_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.step_type.model} {self.step_id} (level {self.level})"
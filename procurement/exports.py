@@ -0,0 +1,77 @@
+"""
+Streaming export of purchase orders and their line items (CSV or NDJSON).
+
+Rows are flat: one per order line, the PO columns repeated on each, and one row with
+empty line columns for a PO without lines. They are read with a single LEFT JOIN
+values() query through .iterator() (a server-side cursor where the backend supports
+it) and written out as they arrive, so memory use does not grow with the export and
+the header goes out before the query runs.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched from the cursor at a time
+
+# (column name, lookup from PurchaseOrder)
+PURCHASE_ORDER_EXPORT_COLUMNS = [
+    ('po_id', 'pk'),
+    ('po_number', 'po_number'),
+    ('status', 'status'),
+    ('po_type', 'po_type'),
+    ('vendor', 'vendor__name'),
+    ('order_date', 'order_date'),
+    ('expected_delivery_date', 'expected_delivery_date'),
+    ('currency', 'currency'),
+    ('total_amount', 'total_amount'),
+    ('payment_terms', 'payment_terms'),
+    ('created_by', 'created_by__username'),
+    ('line_id', 'order_items__id'),
+    ('item_description', 'order_items__item_description'),
+    ('product_code', 'order_items__product_code'),
+    ('gl_account', 'order_items__gl_account__account_code'),
+    ('quantity', 'order_items__quantity'),
+    ('unit_price', 'order_items__unit_price'),
+    ('received_quantity', 'order_items__received_quantity'),
+    ('line_item_status', 'order_items__line_item_status'),
+    ('discount_type', 'order_items__discount_type'),
+    ('discount_value', 'order_items__discount_value'),
+    ('tax_rate', 'order_items__tax_rate'),
+    ('net_amount', 'order_items__net_amount'),
+    ('discount_amount', 'order_items__discount_amount'),
+    ('tax_amount', 'order_items__tax_amount'),
+    ('gross_amount', 'order_items__gross_amount'),
+]
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output."""
+    def write(self, value):
+        return value
+
+
+def purchase_order_export_rows(queryset):
+    """Yields one tuple per exported row (see PURCHASE_ORDER_EXPORT_COLUMNS) from a PurchaseOrder queryset."""
+    lookups = [lookup for _, lookup in PURCHASE_ORDER_EXPORT_COLUMNS]
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering) + ['pk', 'order_items__id']
+    rows = queryset.select_related(None).prefetch_related(None).order_by(*ordering).values_list(*lookups)
+    yield from rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_purchase_orders_csv(queryset):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in PURCHASE_ORDER_EXPORT_COLUMNS])
+    for row in purchase_order_export_rows(queryset):
+        yield writer.writerow(row)
+
+
+def stream_purchase_orders_ndjson(queryset):
+    names = [name for name, _ in PURCHASE_ORDER_EXPORT_COLUMNS]
+    for row in purchase_order_export_rows(queryset):
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
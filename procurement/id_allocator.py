@@ -0,0 +1,149 @@
+"""
+Block-reserving allocator for procurement IDs (IM-AA-0001, PO-AA-0001, ...).
+
+Reserving one ID at a time means every create takes the ProcurementIDSequence
+row lock, so concurrent creates queue behind each other. Instead, each worker
+process reserves a block of positions with a single locked UPDATE and hands IDs
+out of that block from memory. IDs stay unique but are no longer strictly
+consecutive across processes, and unused IDs are lost when a process exits.
+
+A block reserved inside a transaction first serves the later calls of that same
+transaction (bulk creates, nested saves, ATOMIC_REQUESTS). What is left of it is
+shared with the rest of the process when the transaction commits, and dropped
+if the transaction, or the savepoint that reserved it, rolls back.
+
+Prefixes that must stay gapless (e.g. finance documents) are listed in
+settings.PROCUREMENT_ID_GAPLESS_PREFIXES and always take the row lock. Callers
+should allocate those IDs inside the transaction that inserts the row, so a
+failed insert rolls the sequence back too.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import router, transaction
+
+from .sequence_models import ProcurementIDSequence
+
+
+class _Block:
+    __slots__ = ('next', 'last', 'on_commit')
+
+    def __init__(self, first, last):
+        self.next = first
+        self.last = last
+        self.on_commit = None  # Transaction-local blocks: the callback publishing the rest
+
+
+class ProcurementIDAllocator:
+    """
+    Hands out procurement IDs from per-process reserved blocks.
+
+    `block_sizes` maps prefix -> block size and `gapless_prefixes` lists prefixes
+    that must be allocated strictly; both default to the project settings.
+    """
+
+    def __init__(self, block_sizes=None, gapless_prefixes=None):
+        self._block_sizes = block_sizes
+        self._gapless_prefixes = gapless_prefixes
+        self._blocks = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._local = threading.local()  # Blocks of the thread's open transactions, by (alias, prefix)
+
+    def block_size(self, prefix):
+        if prefix in self.gapless_prefixes():
+            return 1
+        block_sizes = self._block_sizes
+        if block_sizes is None:
+            block_sizes = getattr(settings, 'PROCUREMENT_ID_BLOCK_SIZES', {})
+        return max(int(block_sizes.get(prefix, 1)), 1)
+
+    def gapless_prefixes(self):
+        if self._gapless_prefixes is not None:
+            return self._gapless_prefixes
+        return getattr(settings, 'PROCUREMENT_ID_GAPLESS_PREFIXES', ())
+
+    def next_id(self, prefix):
+        size = self.block_size(prefix)
+        if size == 1:
+            first, _ = ProcurementIDSequence.reserve_block(prefix, 1)
+            return ProcurementIDSequence.format_id(prefix, first)
+
+        alias = router.db_for_write(ProcurementIDSequence)
+        key = (alias, prefix)
+        connection = transaction.get_connection(alias)
+        if connection.in_atomic_block:
+            position = self._take_from_transaction_block(connection, key)
+            if position is not None:
+                return ProcurementIDSequence.format_id(prefix, position)
+
+        with self._lock:
+            self._discard_if_forked()
+            blocks = self._blocks.get(key, [])
+            while blocks and blocks[0].next > blocks[0].last:
+                blocks.pop(0)
+            if blocks:
+                position = blocks[0].next
+                blocks[0].next += 1
+                return ProcurementIDSequence.format_id(prefix, position)
+
+        first, last = ProcurementIDSequence.reserve_block(prefix, size)
+        if first == last:
+            return ProcurementIDSequence.format_id(prefix, first)
+        if not connection.in_atomic_block:
+            self._publish(key, first + 1, last)  # Autocommit: the reservation is already durable
+            return ProcurementIDSequence.format_id(prefix, first)
+
+        # The reservation only becomes durable when the surrounding transaction
+        # commits. Until then the rest of the block serves this transaction only,
+        # so a rollback can't leave the process handing out positions the database
+        # has forgotten.
+        block = _Block(first + 1, last)
+
+        def publish_rest():
+            if getattr(self._local, 'blocks', {}).get(key) is block:
+                del self._local.blocks[key]
+            if block.next <= block.last:
+                self._publish(key, block.next, block.last)
+
+        block.on_commit = publish_rest
+        transaction.on_commit(publish_rest, using=alias)
+        if not hasattr(self._local, 'blocks'):
+            self._local.blocks = {}
+        self._local.blocks[key] = block
+        return ProcurementIDSequence.format_id(prefix, first)
+
+    def _take_from_transaction_block(self, connection, key):
+        """Next position of the block this thread's open transaction reserved, or None."""
+        block = getattr(self._local, 'blocks', {}).get(key)
+        if block is None:
+            return None
+        # Rolling back the transaction or the savepoint that reserved the block discards
+        # its on_commit callback, and the reservation with it.
+        if block.next > block.last or not any(entry[1] is block.on_commit for entry in connection.run_on_commit):
+            del self._local.blocks[key]
+            return None
+        position = block.next
+        block.next += 1
+        return position
+
+    def _publish(self, key, first, last):
+        with self._lock:
+            self._discard_if_forked()
+            self._blocks.setdefault(key, []).append(_Block(first, last))
+
+    def _discard_if_forked(self):
+        # A forked worker must not share its parent's blocks.
+        pid = os.getpid()
+        if pid != self._pid:
+            self._blocks = {}
+            self._pid = pid
+
+    def reset(self):
+        """Drops all in-memory blocks (the reserved positions are not reused)."""
+        with self._lock:
+            self._blocks = {}
+
+
+id_allocator = ProcurementIDAllocator()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from procurement.approval_escalation import ESCALATION_BATCH_SIZE, escalate_overdue_steps
+
+
+class Command(BaseCommand):
+    help = (
+        "Escalates pending approval steps (procurement and workflows) that are past their due time: "
+        "reassigns them to the escalation group or reminds their approvers. Intended to run every few minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ESCALATION_BATCH_SIZE, help="Steps escalated per transaction.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        totals = escalate_overdue_steps(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Approval escalation: {totals['reassigned']} steps reassigned, {totals['reminded']} reminded, "
+            f"{totals['notified']} approvers notified."
+        ))
@@ -0,0 +1,42 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from procurement.recurring_payments import RECURRING_PAYMENT_BATCH_SIZE, generate_due_check_requests
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the check requests of every recurring payment occurrence that is due and advances "
+        "the payments' next due dates. Safe to re-run: occurrences that already have a check request "
+        "are skipped. Run it daily from cron, or keep it running with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help="Generate occurrences due on or before this date (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument('--batch-size', type=int, default=RECURRING_PAYMENT_BATCH_SIZE, help="Payments processed per transaction.")
+        parser.add_argument('--loop', action='store_true', help="Keep running, processing due payments every --interval seconds.")
+        parser.add_argument('--interval', type=int, default=3600, help="Seconds between runs with --loop (default 3600).")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            try:
+                as_of = datetime.date.fromisoformat(options['as_of'])
+            except ValueError:
+                raise CommandError("--as-of must be a YYYY-MM-DD date.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        while True:
+            totals = generate_due_check_requests(as_of=as_of, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Recurring payments processed: {totals['payments']} payments, {totals['created']} check requests "
+                f"created, {totals['skipped']} already existing, {totals['deactivated']} deactivated."
+            ))
+            if totals['failed']:
+                self.stderr.write(f"Skipped payments with an unknown frequency: {totals['failed']}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from procurement.chunked_uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes chunked attachment uploads that were never completed and have not received a chunk "
+        "for ATTACHMENT_UPLOAD_EXPIRY_HOURS (or --hours), together with their partial files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None, help="Age in hours after which an unfinished upload is purged.")
+
+    def handle(self, *args, **options):
+        purged = purge_stale_uploads(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} unfinished attachment uploads."))
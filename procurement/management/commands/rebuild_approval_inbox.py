@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from procurement.approval_inbox import rebuild_approval_inbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes every approver inbox entry and pending-approval counter from the pending "
+        "ApprovalSteps. Use after bulk edits that bypass the application (raw SQL, admin deletes "
+        "of steps or groups) or if badge counts look off."
+    )
+
+    def handle(self, *args, **options):
+        entries = rebuild_approval_inbox()
+        self.stdout.write(self.style.SUCCESS(f"Approval inbox rebuilt: {entries} pending entries."))
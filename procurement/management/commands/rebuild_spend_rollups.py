@@ -0,0 +1,31 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from procurement.spend_rollups import REBUILD_CHUNK_DAYS, rebuild_spend_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the daily spend rollups from purchase orders and check requests, a chunk of days "
+        "per transaction. Without dates the whole history is rebuilt. Use after bulk edits that bypass "
+        "the application (raw SQL, data imports) or to backfill after deployment."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--to', dest='date_to', help="Last day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--chunk-days', type=int, default=REBUILD_CHUNK_DAYS, help="Days recomputed per transaction.")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            if options[name]:
+                try:
+                    dates[name] = datetime.date.fromisoformat(options[name])
+                except ValueError:
+                    raise CommandError(f"--{name[5:]} must be a YYYY-MM-DD date.")
+        if options['chunk_days'] < 1:
+            raise CommandError("--chunk-days must be at least 1.")
+        days, rows = rebuild_spend_rollups(chunk_days=options['chunk_days'], **dates)
+        self.stdout.write(self.style.SUCCESS(f"Spend rollups rebuilt: {days} days, {rows} rollup rows."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from procurement.vendor_scorecards import REBUILD_BATCH_SIZE, rebuild_vendor_scorecards
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes every vendor's scorecard from its purchase orders, lines and check requests, "
+        "a batch of vendors per transaction. Use to backfill after deployment or after bulk edits "
+        "that bypass the application."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help="Vendors recomputed per transaction.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        written = rebuild_vendor_scorecards(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Vendor scorecards rebuilt: {written} vendors."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from procurement.three_way_match import MATCH_BATCH_SIZE, run_three_way_match
+
+
+class Command(BaseCommand):
+    help = (
+        "Matches the check requests (invoices) of every open purchase order against the ordered and "
+        "received line amounts and flags mismatches and duplicate invoices. Intended to run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=MATCH_BATCH_SIZE, help="Purchase orders matched per transaction.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        totals = run_three_way_match(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Three-way match: {totals['purchase_orders']} purchase orders, "
+            f"{totals['check_requests']} check requests, {totals['exceptions']} exceptions."
+        ))
@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class InvoiceMatch(models.Model):
+    """
+    Latest three-way match result of a check request (invoice) against its purchase order and
+    what was received on it, written by procurement.three_way_match. Amounts are PO-wide: the
+    PO's ordered and received line value and the total of its active check requests.
+    """
+    STATUS_CHOICES = [
+        ('matched', _('Matched')),
+        ('exception', _('Exception')),
+    ]
+    check_request = models.OneToOneField(
+        'procurement.CheckRequest', on_delete=models.CASCADE, primary_key=True,
+        related_name='invoice_match', verbose_name=_("Check Request")
+    )
+    purchase_order = models.ForeignKey(
+        'procurement.PurchaseOrder', on_delete=models.CASCADE, related_name='invoice_matches', verbose_name=_("Purchase Order")
+    )
+    status = models.CharField(_("Status"), max_length=20, choices=STATUS_CHOICES)
+    issues = models.JSONField(_("Issues"), default=list, blank=True, help_text="Codes of the checks that failed, e.g. over_received.")
+    ordered_amount = models.DecimalField(_("Ordered Amount"), max_digits=14, decimal_places=2, default=0)
+    received_amount = models.DecimalField(_("Received Amount"), max_digits=14, decimal_places=2, default=0)
+    invoiced_amount = models.DecimalField(_("Invoiced Amount"), max_digits=14, decimal_places=2, default=0)
+    duplicate_of = models.ForeignKey(
+        'procurement.CheckRequest', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', verbose_name=_("Duplicate Of")
+    )
+    matched_at = models.DateTimeField(_("Matched At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Invoice Match")
+        verbose_name_plural = _("Invoice Matches")
+        ordering = ['-matched_at']
+        indexes = [
+            models.Index(fields=['status', 'purchase_order'], name='proc_invoice_match_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Match of check request {self.check_request_id}: {self.status}"
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0011_approvalstep_original_assigned_approver_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='procurementidsequence',
+            name='current_alpha_overflow',
+            field=models.PositiveIntegerField(default=0, help_text='Times the two-letter alpha part has wrapped past ZZ (widened format only, e.g. 1 for IM-AAA-0001)'),
+        ),
+    ]
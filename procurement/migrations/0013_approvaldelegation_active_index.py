@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0012_procurementidsequence_current_alpha_overflow'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='approvaldelegation',
+            index=models.Index(fields=['delegator', 'is_active', 'start_date', 'end_date'], name='proc_delegation_active_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('procurement', '0013_approvaldelegation_active_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('pending_count', models.PositiveIntegerField(default=0, verbose_name='Pending Steps')),
+                ('approved_count', models.PositiveIntegerField(default=0, verbose_name='Approved Steps')),
+                ('rejected_count', models.PositiveIntegerField(default=0, verbose_name='Rejected Steps')),
+                ('skipped_count', models.PositiveIntegerField(default=0, verbose_name='Skipped Steps')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Approval Progress',
+                'verbose_name_plural': 'Approval Progress',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:04
+
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_approval_inbox(apps, schema_editor):
+    """Creates inbox entries and counters for the steps that are already pending."""
+    ApprovalStep = apps.get_model('procurement', 'ApprovalStep')
+    ApprovalInboxEntry = apps.get_model('procurement', 'ApprovalInboxEntry')
+    ApprovalInboxCounter = apps.get_model('procurement', 'ApprovalInboxCounter')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    group_members = defaultdict(set)
+    for group_id, user_id in User.groups.through.objects.values_list('group_id', 'user_id'):
+        group_members[group_id].add(user_id)
+
+    pairs = set()
+    pending_steps = ApprovalStep.objects.filter(status__in=['pending', 'delegated']).values_list(
+        'pk', 'assigned_approver_user_id', 'original_assigned_approver_user_id', 'assigned_approver_group_id'
+    )
+    for step_id, user_id, original_user_id, group_id in pending_steps:
+        user_ids = set(group_members.get(group_id, ())) | {uid for uid in (user_id, original_user_id) if uid}
+        pairs.update((uid, step_id) for uid in user_ids)
+
+    ApprovalInboxEntry.objects.bulk_create(
+        [ApprovalInboxEntry(user_id=user_id, step_id=step_id) for user_id, step_id in pairs], batch_size=1000
+    )
+    counts = Counter(user_id for user_id, _ in pairs)
+    ApprovalInboxCounter.objects.bulk_create(
+        [ApprovalInboxCounter(user_id=user_id, pending_count=count) for user_id, count in counts.items()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('procurement', '0014_approvalprogress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalInboxCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='approval_inbox_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('pending_count', models.IntegerField(default=0, verbose_name='Pending Approvals')),
+            ],
+            options={
+                'verbose_name': 'Approval Inbox Counter',
+                'verbose_name_plural': 'Approval Inbox Counters',
+            },
+        ),
+        migrations.CreateModel(
+            name='ApprovalInboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('step', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='procurement.approvalstep')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='approval_inbox_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Approval Inbox Entry',
+                'verbose_name_plural': 'Approval Inbox Entries',
+                'unique_together': {('user', 'step')},
+            },
+        ),
+        migrations.RunPython(build_approval_inbox, migrations.RunPython.noop),
+    ]
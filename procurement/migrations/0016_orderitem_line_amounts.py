@@ -0,0 +1,68 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:27
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+AMOUNT_FIELDS = ['net_amount', 'discount_amount', 'tax_amount', 'gross_amount']
+
+
+def _line_amounts(item):
+    """Frozen copy of OrderItem.compute_amounts() (historical models don't have model methods)."""
+    cent = Decimal('0.01')
+    net = Decimal(item.quantity or 0) * (item.unit_price if item.unit_price is not None else Decimal('0'))
+    discount = Decimal('0')
+    if item.discount_value is not None and item.discount_type:
+        if item.discount_type == 'fixed':
+            discount = item.discount_value
+        elif item.discount_type == 'percentage':
+            discount = net * item.discount_value / 100
+    tax = (net - discount) * item.tax_rate / 100 if item.tax_rate is not None else Decimal('0')
+    net, discount, tax = (amount.quantize(cent, rounding=ROUND_HALF_UP) for amount in (net, discount, tax))
+    return net, discount, tax, max(net - discount + tax, Decimal('0.00'))
+
+
+def backfill_line_amounts(apps, schema_editor):
+    """Computes the stored amounts of existing order items, BATCH_SIZE rows at a time."""
+    OrderItem = apps.get_model('procurement', 'OrderItem')
+    last_pk = 0
+    while True:
+        batch = list(OrderItem.objects.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            break
+        for item in batch:
+            item.net_amount, item.discount_amount, item.tax_amount, item.gross_amount = _line_amounts(item)
+        OrderItem.objects.bulk_update(batch, AMOUNT_FIELDS)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0015_approval_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='discount_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Discount Amount'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='gross_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Gross Amount'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='net_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Net Amount'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='tax_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Tax Amount'),
+        ),
+        migrations.RunPython(backfill_line_amounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_historicalasset'),
+        ('procurement', '0016_orderitem_line_amounts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkrequest',
+            name='recurring_due_date',
+            field=models.DateField(blank=True, editable=False, help_text='Due date of the recurring payment occurrence this request was generated for.', null=True, verbose_name='Recurring Payment Due Date'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringpayment',
+            index=models.Index(fields=['is_active', 'next_due_date'], name='proc_recurring_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='checkrequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurring_due_date__isnull', False), ('recurring_payment__isnull', False)), fields=('recurring_payment', 'recurring_due_date'), name='proc_cr_recurring_occurrence_uniq'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:59
+
+import django.db.models.deletion
+import procurement.attachment_models
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0017_recurring_payment_scheduler'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(editable=False, max_length=64, unique=True, verbose_name='SHA-256')),
+                ('file', models.FileField(max_length=255, upload_to=procurement.attachment_models.attachment_blob_path, verbose_name='File')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Size (bytes)')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Content Type')),
+                ('original_filename', models.CharField(blank=True, help_text='Name the file was first uploaded under; used for downloads.', max_length=255, verbose_name='Original Filename')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Attachment Blob',
+                'verbose_name_plural': 'Attachment Blobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='checkrequest',
+            name='attachment_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='procurement.attachmentblob', verbose_name='Attachment (Chunked Upload)'),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='attachment_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='procurement.attachmentblob', verbose_name='Attachment (Chunked Upload)'),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='attachment_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='procurement.attachmentblob', verbose_name='Attachment (Chunked Upload)'),
+        ),
+        migrations.AddField(
+            model_name='purchaserequestmemo',
+            name='attachment_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='procurement.attachmentblob', verbose_name='Attachment (Chunked Upload)'),
+        ),
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Filename')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Content Type')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Size (bytes)')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Bytes Received')),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete')], default='uploading', max_length=20, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('blob', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads', to='procurement.attachmentblob', verbose_name='Stored File')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Uploaded By')),
+            ],
+            options={
+                'verbose_name': 'Chunked Upload',
+                'verbose_name_plural': 'Chunked Uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
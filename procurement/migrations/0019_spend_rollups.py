@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_historicalasset'),
+        ('procurement', '0018_chunked_attachment_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendRollupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='Day')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Refreshed At')),
+            ],
+            options={
+                'verbose_name': 'Spend Rollup Day',
+                'verbose_name_plural': 'Spend Rollup Days',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SpendRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('currency', models.CharField(max_length=3, verbose_name='Currency')),
+                ('committed_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Committed Amount')),
+                ('committed_count', models.PositiveIntegerField(default=0, verbose_name='Purchase Orders')),
+                ('spend_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Spend Amount')),
+                ('spend_count', models.PositiveIntegerField(default=0, verbose_name='Check Requests')),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Paid Amount')),
+                ('paid_count', models.PositiveIntegerField(default=0, verbose_name='Paid Check Requests')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='procurement.department')),
+                ('gl_account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='procurement.glaccount')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='procurement.project')),
+                ('vendor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assets.vendor')),
+            ],
+            options={
+                'verbose_name': 'Spend Rollup',
+                'verbose_name_plural': 'Spend Rollups',
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['day'], name='proc_spend_day_idx'), models.Index(fields=['department', 'day'], name='proc_spend_dept_day_idx'), models.Index(fields=['vendor', 'day'], name='proc_spend_vendor_day_idx'), models.Index(fields=['gl_account', 'day'], name='proc_spend_gl_day_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_historicalasset'),
+        ('procurement', '0019_spend_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='received_date',
+            field=models.DateField(blank=True, editable=False, help_text='Set when received_quantity first reaches quantity; cleared if it drops below again.', null=True, verbose_name='Fully Received On'),
+        ),
+        migrations.CreateModel(
+            name='VendorScorecard',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='scorecard', serialize=False, to='assets.vendor', verbose_name='Vendor')),
+                ('purchase_order_count', models.PositiveIntegerField(default=0, verbose_name='Purchase Orders')),
+                ('spend_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Committed Spend')),
+                ('ordered_quantity', models.PositiveIntegerField(default=0, verbose_name='Ordered Quantity (Receiving POs)')),
+                ('received_quantity', models.PositiveIntegerField(default=0, verbose_name='Received Quantity (Receiving POs)')),
+                ('fill_rate', models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True, verbose_name='Fill Rate')),
+                ('delivered_line_count', models.PositiveIntegerField(default=0, verbose_name='Fully Received Lines')),
+                ('on_time_line_count', models.PositiveIntegerField(default=0, verbose_name='Lines Received On Time')),
+                ('on_time_rate', models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True, verbose_name='On-Time Delivery Rate')),
+                ('average_lead_time_days', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Average Lead Time (Days)')),
+                ('invoiced_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Invoiced Amount')),
+                ('invoiced_order_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Ordered Amount (Invoiced POs)')),
+                ('price_variance_rate', models.DecimalField(blank=True, decimal_places=4, max_digits=9, null=True, verbose_name='Price Variance Rate')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Refreshed At')),
+            ],
+            options={
+                'verbose_name': 'Vendor Scorecard',
+                'verbose_name_plural': 'Vendor Scorecards',
+                'ordering': ['-spend_amount'],
+                'indexes': [models.Index(fields=['spend_amount'], name='proc_scorecard_spend_idx'), models.Index(fields=['on_time_rate'], name='proc_scorecard_ontime_idx'), models.Index(fields=['fill_rate'], name='proc_scorecard_fill_idx'), models.Index(fields=['average_lead_time_days'], name='proc_scorecard_lead_idx'), models.Index(fields=['price_variance_rate'], name='proc_scorecard_price_var_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_check_request_vendors(apps, schema_editor):
+    """Copies the vendor of each check request's PO, else of its recurring payment (two UPDATEs)."""
+    CheckRequest = apps.get_model('procurement', 'CheckRequest')
+    PurchaseOrder = apps.get_model('procurement', 'PurchaseOrder')
+    RecurringPayment = apps.get_model('procurement', 'RecurringPayment')
+    CheckRequest.objects.filter(purchase_order__isnull=False).update(vendor=models.Subquery(
+        PurchaseOrder.objects.filter(pk=models.OuterRef('purchase_order')).values('vendor')[:1]
+    ))
+    CheckRequest.objects.filter(purchase_order__isnull=True, recurring_payment__isnull=False).update(vendor=models.Subquery(
+        RecurringPayment.objects.filter(pk=models.OuterRef('recurring_payment')).values('vendor')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_historicalasset'),
+        ('procurement', '0020_vendor_scorecards'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceMatch',
+            fields=[
+                ('check_request', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='invoice_match', serialize=False, to='procurement.checkrequest', verbose_name='Check Request')),
+                ('status', models.CharField(choices=[('matched', 'Matched'), ('exception', 'Exception')], max_length=20, verbose_name='Status')),
+                ('issues', models.JSONField(blank=True, default=list, help_text='Codes of the checks that failed, e.g. over_received.', verbose_name='Issues')),
+                ('ordered_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ordered Amount')),
+                ('received_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Received Amount')),
+                ('invoiced_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Invoiced Amount')),
+                ('matched_at', models.DateTimeField(auto_now=True, verbose_name='Matched At')),
+            ],
+            options={
+                'verbose_name': 'Invoice Match',
+                'verbose_name_plural': 'Invoice Matches',
+                'ordering': ['-matched_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='checkrequest',
+            name='vendor',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Vendor of the purchase order (or recurring payment), copied on save to look up invoices by vendor.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='check_requests', to='assets.vendor', verbose_name='Vendor'),
+        ),
+        migrations.RunPython(backfill_check_request_vendors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='checkrequest',
+            index=models.Index(fields=['vendor', 'invoice_number'], name='proc_cr_vendor_invoice_idx'),
+        ),
+        migrations.AddField(
+            model_name='invoicematch',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='procurement.checkrequest', verbose_name='Duplicate Of'),
+        ),
+        migrations.AddField(
+            model_name='invoicematch',
+            name='purchase_order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_matches', to='procurement.purchaseorder', verbose_name='Purchase Order'),
+        ),
+        migrations.AddIndex(
+            model_name='invoicematch',
+            index=models.Index(fields=['status', 'purchase_order'], name='proc_invoice_match_status_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0021_three_way_match'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='source_memo',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Memo this line was generated from by PO consolidation.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', to='procurement.purchaserequestmemo', verbose_name='Source Purchase Request Memo'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:36
+
+import core_api.approval_timers
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('procurement', '0022_order_item_source_memo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalEscalation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('step_id', models.PositiveBigIntegerField(verbose_name='Step ID')),
+                ('action', models.CharField(choices=[('reassigned', 'Reassigned'), ('reminded', 'Reminded')], max_length=20, verbose_name='Action')),
+                ('level', models.PositiveIntegerField(help_text='1 for the first escalation of the step, 2 for the next, ...', verbose_name='Escalation Level')),
+                ('due_at', models.DateTimeField(verbose_name='Was Due At')),
+                ('escalated_at', models.DateTimeField(verbose_name='Escalated At')),
+            ],
+            options={
+                'verbose_name': 'Approval Escalation',
+                'verbose_name_plural': 'Approval Escalations',
+                'ordering': ['-escalated_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='approvalstep',
+            name='due_at',
+            field=models.DateTimeField(blank=True, default=core_api.approval_timers.approval_step_due_at, help_text='When the step is escalated if still pending; cleared once its escalations run out.', null=True, verbose_name='Due At'),
+        ),
+        migrations.AddField(
+            model_name='approvalstep',
+            name='escalation_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Escalations'),
+        ),
+        migrations.AddIndex(
+            model_name='approvalstep',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'delegated'])), fields=['due_at'], name='proc_step_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='approvalescalation',
+            name='approver_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Approver (when escalated)'),
+        ),
+        migrations.AddField(
+            model_name='approvalescalation',
+            name='reassigned_to_group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='auth.group', verbose_name='Reassigned To Group'),
+        ),
+        migrations.AddField(
+            model_name='approvalescalation',
+            name='step_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype', verbose_name='Step Type'),
+        ),
+        migrations.AddIndex(
+            model_name='approvalescalation',
+            index=models.Index(fields=['step_type', 'step_id'], name='proc_escalation_step_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-17 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0023_approval_escalation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Name')),
+                ('version', models.PositiveBigIntegerField(default=1, verbose_name='Version')),
+            ],
+            options={
+                'verbose_name': 'Cache Version',
+                'verbose_name_plural': 'Cache Versions',
+            },
+        ),
+    ]
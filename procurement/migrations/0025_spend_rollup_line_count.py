@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:10
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+# Rows stored before this migration counted distinct POs per key; they now count PO lines.
+COMMITTED_PO_STATUSES = ('approved', 'partially_received', 'fully_received', 'invoiced', 'paid')
+
+
+def count_committed_lines(apps, schema_editor):
+    OrderItem = apps.get_model('procurement', 'OrderItem')
+    SpendRollup = apps.get_model('procurement', 'SpendRollup')
+    db_alias = schema_editor.connection.alias
+    rows = OrderItem.objects.using(db_alias).filter(
+        purchase_order__status__in=COMMITTED_PO_STATUSES,
+        purchase_order__order_date__in=SpendRollup.objects.using(db_alias).values('day'),
+    ).order_by().values(
+        key_day=F('purchase_order__order_date'),
+        key_department=F('purchase_order__internal_office_memo__department'),
+        key_project=F('purchase_order__internal_office_memo__project'),
+        key_gl_account=F('gl_account'),
+        key_vendor=F('purchase_order__vendor'),
+        key_currency=F('purchase_order__currency'),
+    ).annotate(count=Count('pk'))
+    for row in rows:
+        SpendRollup.objects.using(db_alias).filter(
+            day=row['key_day'], department=row['key_department'], project=row['key_project'],
+            gl_account=row['key_gl_account'], vendor=row['key_vendor'], currency=row['key_currency'],
+        ).update(committed_line_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0024_cache_version'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='spendrollup',
+            old_name='committed_count',
+            new_name='committed_line_count',
+        ),
+        migrations.AlterField(
+            model_name='spendrollup',
+            name='committed_line_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Purchase Order Lines'),
+        ),
+        migrations.RunPython(count_committed_lines, migrations.RunPython.noop),
+    ]
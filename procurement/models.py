@@ -1,10 +1,23 @@
-from django.db import models
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from assets.models import Vendor # Assuming Vendor model is in assets app
+from core_api.approval_timers import approval_step_due_at
+from core_api.field_tracking import FieldTrackerMixin
 from .common_models import Department, Project, Contract, GLAccount, ExpenseCategory, RecurringPayment
 from .sequence_models import ProcurementIDSequence
+from .attachment_models import AttachmentBlob
+# Imported only to register these models, which live in their own modules, with the app
+from .attachment_models import ChunkedUpload  # noqa: F401
+from .spend_models import SpendRollup, SpendRollupDay  # noqa: F401
+from .scorecard_models import VendorScorecard  # noqa: F401
+from .matching_models import InvoiceMatch  # noqa: F401
+from .escalation_models import ApprovalEscalation  # noqa: F401
+from .cache_version_models import CacheVersion  # noqa: F401
 
 # For GFK support in ApprovalStep and M2M in ApprovalRule
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
@@ -18,7 +31,9 @@ from django.contrib.contenttypes.models import ContentType
 User = get_user_model()
 
 
-class PurchaseRequestMemo(models.Model):
+class PurchaseRequestMemo(FieldTrackerMixin, models.Model):
+    tracked_fields = ('status',)
+
     PRIORITY_CHOICES = [
         ('low', _('Low')),
         ('medium', _('Medium')),
@@ -98,6 +113,10 @@ class PurchaseRequestMemo(models.Model):
         verbose_name=_("Suggested Vendor")
     )
     attachments = models.FileField(_("Attachments"), upload_to='procurement/iom_attachments/', null=True, blank=True)
+    attachment_blob = models.ForeignKey(
+        AttachmentBlob, on_delete=models.PROTECT, null=True, blank=True,
+        related_name='+', verbose_name=_("Attachment (Chunked Upload)")
+    )
 
     # Generic relation to ApprovalSteps
     approval_steps = GenericRelation('procurement.ApprovalStep', content_type_field='content_type', object_id_field='object_id')
@@ -113,21 +132,16 @@ class PurchaseRequestMemo(models.Model):
 
     def save(self, *args, **kwargs):
         is_new = self._state.adding
-        old_status = None
-        if not is_new and self.pk:
-            try:
-                old_status_instance = PurchaseRequestMemo.objects.get(pk=self.pk)
-                old_status = old_status_instance.status
-            except PurchaseRequestMemo.DoesNotExist:
-                pass
-
-        if not self.iom_id:
-            self.iom_id = ProcurementIDSequence.get_next_id("IM")
+        old_status = self.previous('status') # As loaded; no re-fetch of the row
 
         if is_new and not self.status:
             self.status = 'draft'
 
-        super().save(*args, **kwargs)
+        # Allocate the ID in the same transaction as the insert (keeps gapless prefixes gapless).
+        with transaction.atomic():
+            if not self.iom_id:
+                self.iom_id = ProcurementIDSequence.get_next_id("IM")
+            super().save(*args, **kwargs)
 
         # Workflow trigger logic
         should_trigger = False
@@ -152,41 +166,32 @@ class PurchaseRequestMemo(models.Model):
             return
 
         # Delete existing 'pending' or 'delegated' approval steps for this PRM
-        prm_content_type = ContentType.objects.get_for_model(self)
-        ApprovalStep.objects.filter(content_type=prm_content_type, object_id=self.pk, status__in=['pending', 'delegated']).delete()
+        ApprovalStep.delete_pending_for(self)
 
-        # Filter for rules specific to PurchaseRequestMemo
-        applicable_rules = ApprovalRule.objects.filter(
-            rule_type='procurement_memo', # Ensure rule is for PRMs
-            is_active=True
-        ).order_by('order')
+        # Active 'procurement_memo' rules matching amount, department and project (no per-rule queries)
+        from .approval_rule_index import get_approval_rule_index
+        applicable_rules = get_approval_rule_index().match_procurement_memo(
+            self.estimated_cost, self.department_id, self.project_id
+        )
 
-        created_steps_count = 0
-        for rule in applicable_rules:
-            # Conditions specific to PurchaseRequestMemo
-            if rule.min_amount is not None and (self.estimated_cost is None or self.estimated_cost < rule.min_amount):
-                continue
-            if rule.max_amount is not None and (self.estimated_cost is None or self.estimated_cost > rule.max_amount):
-                continue
-            if not rule.applies_to_all_departments:
-                if not self.department or not rule.departments.filter(pk=self.department.pk).exists():
-                    continue
-            if not rule.applies_to_all_projects:
-                if not self.project or not rule.projects.filter(pk=self.project.pk).exists():
-                    continue
+        # Active delegates (followed through chains) for all rule approvers in one lookup
+        from .delegation_resolver import resolve_active_delegates
+        delegates = resolve_active_delegates([rule.approver_user for rule in applicable_rules if rule.approver_user])
 
+        new_steps = []
+        for rule in applicable_rules:
             assigned_user = rule.approver_user
             original_user_for_step = None
             current_status = 'pending'
 
             if rule.approver_user:
-                active_delegate = ApprovalDelegation.get_active_delegate(rule.approver_user)
+                active_delegate = delegates.get(rule.approver_user.pk)
                 if active_delegate:
                     original_user_for_step = rule.approver_user
                     assigned_user = active_delegate
                     # current_status = 'delegated' # Or keep 'pending' but assign to delegatee
 
-            ApprovalStep.objects.create(
+            new_steps.append(ApprovalStep(
                 content_object=self, # Use GFK
                 approval_rule=rule,
                 step_order=rule.order,
@@ -194,16 +199,38 @@ class PurchaseRequestMemo(models.Model):
                 original_assigned_approver_user=original_user_for_step,
                 assigned_approver_group=rule.approver_group,
                 status=current_status
-            )
-            created_steps_count += 1
+            ))
+
+        # One insert for all steps; approvers are notified in one batch after commit.
+        created_steps = ApprovalStep.bulk_create_for_workflow(self, new_steps)
 
-        if created_steps_count > 0:
+        if created_steps:
             if self.status == 'draft':
                 self.status = 'pending_approval'
                 self.save(update_fields=['status'])
 
 
-class PurchaseOrder(models.Model):
+class PurchaseOrderQuerySet(models.QuerySet):
+    def with_line_totals(self):
+        """
+        Annotates line_net_total, line_discount_total, line_tax_total and line_gross_total:
+        the sums of the stored OrderItem amounts, computed in SQL (one subquery each).
+        """
+        annotations = {}
+        for field_name in OrderItem.AMOUNT_FIELDS:
+            lines = OrderItem.objects.filter(purchase_order=models.OuterRef('pk')).order_by().values(
+                'purchase_order'
+            ).annotate(total=models.Sum(field_name)).values('total')
+            annotations[f"line_{field_name.removesuffix('_amount')}_total"] = Coalesce(
+                models.Subquery(lines), models.Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            )
+        return self.annotate(**annotations)
+
+
+class PurchaseOrder(FieldTrackerMixin, models.Model):
+    tracked_fields = ('status', 'order_date', 'vendor', 'currency', 'internal_office_memo') # Spend rollup keys
+
     # ... (No changes to PurchaseOrder model itself) ...
     PO_STATUS_CHOICES = [
         ('draft', _('Draft')),
@@ -278,9 +305,15 @@ class PurchaseOrder(models.Model):
         related_name='purchase_orders'
     )
     attachments = models.FileField(_("Attachments"), upload_to='procurement/po_attachments/', null=True, blank=True)
+    attachment_blob = models.ForeignKey(
+        AttachmentBlob, on_delete=models.PROTECT, null=True, blank=True,
+        related_name='+', verbose_name=_("Attachment (Chunked Upload)")
+    )
     revision_number = models.PositiveIntegerField(_("Revision Number"), default=0)
     currency = models.CharField(_("Currency"), max_length=3, default='USD', help_text="e.g., USD, EUR, KES")
 
+    objects = PurchaseOrderQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Purchase Order (PO)")
         verbose_name_plural = _("Purchase Orders (POs)")
@@ -290,13 +323,15 @@ class PurchaseOrder(models.Model):
         return f"PO {self.po_number or '(Unsaved PO)'} to {self.vendor.name}"
 
     def calculate_total_amount(self):
-        total = sum(item.total_price for item in self.order_items.all() if item.total_price is not None)
-        return total
+        """Sum of the stored line totals (OrderItem.gross_amount), computed with a single aggregate query."""
+        total = self.order_items.aggregate(total=models.Sum('gross_amount'))['total']
+        return (total or Decimal('0')).quantize(Decimal('0.01'))
 
     def save(self, *args, **kwargs):
-        if not self.po_number:
-            self.po_number = ProcurementIDSequence.get_next_id("PO")
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self.po_number:
+                self.po_number = ProcurementIDSequence.get_next_id("PO")
+            super().save(*args, **kwargs)
 
 class OrderItem(models.Model):
     # ... (No changes to OrderItem model itself) ...
@@ -313,6 +348,14 @@ class OrderItem(models.Model):
         related_name='order_items',
         verbose_name=_("Purchase Order")
     )
+    source_memo = models.ForeignKey(
+        PurchaseRequestMemo,
+        on_delete=models.SET_NULL,
+        null=True, blank=True, editable=False,
+        related_name='order_items',
+        verbose_name=_("Source Purchase Request Memo"),
+        help_text="Memo this line was generated from by PO consolidation."
+    )
     item_description = models.CharField(_("Item Description"), max_length=255)
     quantity = models.PositiveIntegerField(_("Quantity"))
     unit_price = models.DecimalField(_("Unit Price"), max_digits=10, decimal_places=2, null=True, blank=True)
@@ -325,6 +368,10 @@ class OrderItem(models.Model):
         related_name='order_items'
     )
     received_quantity = models.PositiveIntegerField(_("Received Quantity"), default=0)
+    received_date = models.DateField(
+        _("Fully Received On"), null=True, blank=True, editable=False,
+        help_text="Set when received_quantity first reaches quantity; cleared if it drops below again."
+    )
     line_item_status = models.CharField(
         _("Line Item Status"),
         max_length=20,
@@ -349,6 +396,16 @@ class OrderItem(models.Model):
         null=True, blank=True,
         help_text="Value of the discount, either fixed amount or percentage (e.g., 10 for 10%)"
     )
+    # Line amounts derived from the fields above, stored so that totals can be aggregated in SQL.
+    # Kept up to date by save(); code writing lines in bulk must call set_amounts() first.
+    net_amount = models.DecimalField(_("Net Amount"), max_digits=12, decimal_places=2, default=0, editable=False)
+    discount_amount = models.DecimalField(_("Discount Amount"), max_digits=12, decimal_places=2, default=0, editable=False)
+    tax_amount = models.DecimalField(_("Tax Amount"), max_digits=12, decimal_places=2, default=0, editable=False)
+    gross_amount = models.DecimalField(_("Gross Amount"), max_digits=12, decimal_places=2, default=0, editable=False)
+
+    AMOUNT_FIELDS = ('net_amount', 'discount_amount', 'tax_amount', 'gross_amount')
+    AMOUNT_SOURCE_FIELDS = ('quantity', 'unit_price', 'discount_type', 'discount_value', 'tax_rate')
+
     class Meta:
         verbose_name = _("Order Item")
         verbose_name_plural = _("Order Items")
@@ -374,7 +431,59 @@ class OrderItem(models.Model):
             price += (price * self.tax_rate / 100)
         return max(price, 0)
 
-class CheckRequest(models.Model):
+    def compute_amounts(self):
+        """
+        Returns the line amounts as stored: net (quantity x unit price), discount (fixed or percentage
+        of net), tax (tax rate applied to net less discount) and gross (total_price, rounded to cents).
+        """
+        cent = Decimal('0.01')
+        net = Decimal(self.quantity or 0) * Decimal(str(self.unit_price if self.unit_price is not None else 0))
+        discount = Decimal('0')
+        if self.discount_value is not None and self.discount_type:
+            discount_value = Decimal(str(self.discount_value))
+            if self.discount_type == 'fixed':
+                discount = discount_value
+            elif self.discount_type == 'percentage':
+                discount = net * discount_value / 100
+        tax = Decimal('0')
+        if self.tax_rate is not None:
+            tax = (net - discount) * Decimal(str(self.tax_rate)) / 100
+        net, discount, tax = (amount.quantize(cent, rounding=ROUND_HALF_UP) for amount in (net, discount, tax))
+        return {
+            'net_amount': net,
+            'discount_amount': discount,
+            'tax_amount': tax,
+            'gross_amount': max(net - discount + tax, Decimal('0.00')),
+        }
+
+    def set_amounts(self):
+        for field_name, value in self.compute_amounts().items():
+            setattr(self, field_name, value)
+
+    def set_received_date(self):
+        """Stamps (or clears) received_date from the received quantity. Returns True if it changed."""
+        fully_received = self.quantity and self.received_quantity >= self.quantity
+        if fully_received and self.received_date is None:
+            self.received_date = timezone.localdate()
+            return True
+        if not fully_received and self.received_date is not None:
+            self.received_date = None
+            return True
+        return False
+
+    def save(self, *args, **kwargs):
+        self.set_amounts()
+        self.set_received_date()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.AMOUNT_SOURCE_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | set(self.AMOUNT_FIELDS)
+        if update_fields is not None and set(update_fields) & {'quantity', 'received_quantity'}:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'received_date'}
+        super().save(*args, **kwargs)
+
+class CheckRequest(FieldTrackerMixin, models.Model):
+    tracked_fields = ('status', 'payment_date', 'purchase_order', 'recurring_payment') # Spend rollup days; vendor source
+
     # ... (No changes to CheckRequest model itself) ...
     CHECK_REQUEST_STATUS_CHOICES = [
         ('pending_submission', _('Pending Submission')),
@@ -449,21 +558,65 @@ class CheckRequest(models.Model):
         related_name='check_requests'
     )
     attachments = models.FileField(_("Attachments"), upload_to='procurement/cr_attachments/', null=True, blank=True)
+    attachment_blob = models.ForeignKey(
+        AttachmentBlob, on_delete=models.PROTECT, null=True, blank=True,
+        related_name='+', verbose_name=_("Attachment (Chunked Upload)")
+    )
     currency = models.CharField(_("Currency"), max_length=3, default='USD', help_text="e.g., USD, EUR, KES")
+    vendor = models.ForeignKey(
+        Vendor,
+        on_delete=models.SET_NULL,
+        null=True, blank=True, editable=False,
+        related_name='check_requests',
+        verbose_name=_("Vendor"),
+        help_text="Vendor of the purchase order (or recurring payment), copied on save to look up invoices by vendor."
+    )
+    recurring_due_date = models.DateField(
+        _("Recurring Payment Due Date"), null=True, blank=True, editable=False,
+        help_text="Due date of the recurring payment occurrence this request was generated for."
+    )
     class Meta:
         verbose_name = _("Check Request (CR)")
         verbose_name_plural = _("Check Requests (CRs)")
         ordering = ['-request_date']
+        constraints = [
+            # A recurring payment occurrence is paid at most once, even if the scheduler re-runs.
+            models.UniqueConstraint(
+                fields=['recurring_payment', 'recurring_due_date'],
+                condition=models.Q(recurring_payment__isnull=False, recurring_due_date__isnull=False),
+                name='proc_cr_recurring_occurrence_uniq',
+            ),
+        ]
+        indexes = [
+            # Duplicate invoice detection (procurement.three_way_match)
+            models.Index(fields=['vendor', 'invoice_number'], name='proc_cr_vendor_invoice_idx'),
+        ]
 
     def __str__(self):
         cr_id_str = self.cr_id if self.cr_id else '(Unsaved)'
         po_number_str = self.purchase_order.po_number if self.purchase_order else 'N/A'
         return f"CR {cr_id_str} for {self.amount} {self.currency} to {self.payee_name} (PO: {po_number_str})"
 
+    def set_vendor(self):
+        """Copies the vendor of the purchase order, else of the recurring payment, when either link changed."""
+        if self.vendor_id is not None and not self.has_changed('purchase_order') and not self.has_changed('recurring_payment'):
+            return
+        if self.purchase_order_id:
+            self.vendor_id = self.purchase_order.vendor_id
+        elif self.recurring_payment_id:
+            self.vendor_id = self.recurring_payment.vendor_id
+        else:
+            self.vendor_id = None
+
     def save(self, *args, **kwargs):
-        if not self.cr_id:
-            self.cr_id = ProcurementIDSequence.get_next_id("CR")
-        super().save(*args, **kwargs)
+        self.set_vendor()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & {'purchase_order', 'recurring_payment'}:
+            kwargs['update_fields'] = set(update_fields) | {'vendor'}
+        with transaction.atomic():
+            if not self.cr_id:
+                self.cr_id = ProcurementIDSequence.get_next_id("CR")
+            super().save(*args, **kwargs)
 
 class ApprovalRule(models.Model):
     name = models.CharField(_("Rule Name"), max_length=255, help_text="Descriptive name for the rule, e.g., 'Dept Head Approval for > $1000'.")
@@ -588,6 +741,11 @@ class ApprovalStep(models.Model):
         # null=True, blank=True removed, should be non-nullable
     )
     content_object = GenericForeignKey('content_type', 'object_id')
+    # Relations rendered with the content object (its __str__); see core_api.generic_prefetch.
+    CONTENT_OBJECT_RELATED = {
+        'procurement.PurchaseRequestMemo': ('requested_by',),
+        'generic_iom.GenericIOM': (),
+    }
 
     approval_rule = models.ForeignKey(
         ApprovalRule,
@@ -635,10 +793,20 @@ class ApprovalStep(models.Model):
     comments = models.TextField(_("Comments"), blank=True)
     created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+    # Escalation timer (see procurement.approval_escalation)
+    due_at = models.DateTimeField(
+        _("Due At"), null=True, blank=True, default=approval_step_due_at,
+        help_text="When the step is escalated if still pending; cleared once its escalations run out."
+    )
+    escalation_count = models.PositiveIntegerField(_("Escalations"), default=0)
 
     class Meta:
         verbose_name = _("Approval Step")
         verbose_name_plural = _("Approval Steps")
+        indexes = [
+            # Due-time scan of the escalation timer; only steps awaiting a decision are indexed.
+            models.Index(fields=['due_at'], name='proc_step_due_idx', condition=models.Q(status__in=['pending', 'delegated'])),
+        ]
         # Original ordering: ['purchase_request_memo', 'step_order', 'created_at']
         # Need to order by GFK components if possible, or just step_order and created_at within an object.
         # Django doesn't directly support ordering by GenericForeignKey.
@@ -664,6 +832,174 @@ class ApprovalStep(models.Model):
             self.rule_name_snapshot = self.approval_rule.name
         super().save(*args, **kwargs)
 
+    @classmethod
+    def delete_pending_for(cls, content_object):
+        """Deletes the object's 'pending'/'delegated' steps (before a workflow is re-triggered)."""
+        from .approval_inbox import delete_steps
+        pending_steps = cls.objects.filter(
+            content_type=ContentType.objects.get_for_model(content_object),
+            object_id=content_object.pk,
+            status__in=['pending', 'delegated'],
+        )
+        delete_steps(pending_steps)
+
+    @classmethod
+    def bulk_create_for_workflow(cls, content_object, steps):
+        """
+        Inserts the steps of one workflow trigger with a single bulk insert (no per-step post_save),
+        then sends one approval_steps_created signal for the whole batch once the transaction commits.
+        """
+        from .approval_inbox import refresh_approval_inbox
+        from .signals import approval_steps_created
+
+        for step in steps:
+            if step.approval_rule and not step.rule_name_snapshot: # bulk_create bypasses save()
+                step.rule_name_snapshot = step.approval_rule.name
+        with transaction.atomic():
+            steps = cls.objects.bulk_create(steps)
+            # Triggers delete the previous pending steps first, so recount rather than increment.
+            ApprovalProgress.recount(ContentType.objects.get_for_model(content_object).pk, content_object.pk)
+            refresh_approval_inbox([step.pk for step in steps])
+        if steps:
+            transaction.on_commit(
+                lambda: approval_steps_created.send(sender=cls, content_object=content_object, steps=steps)
+            )
+        return steps
+
+
+class ApprovalProgress(models.Model):
+    """
+    Per-object tally of ApprovalStep statuses, so completion checks are a single row read.
+
+    Step transitions lock this row (ApprovalProgress.for_update) and move the counts in the same
+    transaction as the step update, which also serializes concurrent decisions on one object.
+    """
+    STATUS_COUNT_FIELDS = {
+        'pending': 'pending_count',
+        'delegated': 'pending_count', # Still awaiting a decision
+        'approved': 'approved_count',
+        'rejected': 'rejected_count',
+        'skipped': 'skipped_count',
+    }
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    pending_count = models.PositiveIntegerField(_("Pending Steps"), default=0)
+    approved_count = models.PositiveIntegerField(_("Approved Steps"), default=0)
+    rejected_count = models.PositiveIntegerField(_("Rejected Steps"), default=0)
+    skipped_count = models.PositiveIntegerField(_("Skipped Steps"), default=0)
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Approval Progress")
+        verbose_name_plural = _("Approval Progress")
+        unique_together = ('content_type', 'object_id')
+
+    def __str__(self):
+        return (
+            f"{self.content_type.model.capitalize()} ID {self.object_id}: {self.pending_count} pending, "
+            f"{self.approved_count} approved, {self.rejected_count} rejected, {self.skipped_count} skipped"
+        )
+
+    @property
+    def is_fully_approved(self):
+        return self.pending_count == 0 and self.rejected_count == 0 and self.approved_count > 0
+
+    @classmethod
+    def recount(cls, content_type_id, object_id):
+        """Rebuilds the counts from the object's steps (one aggregate query) and returns the locked row."""
+        with transaction.atomic():
+            # Lock first: a step transition committing before the aggregate can't be overwritten.
+            progress, _ = cls.objects.select_for_update().get_or_create(
+                content_type_id=content_type_id, object_id=object_id
+            )
+            counted = ApprovalStep.objects.filter(content_type_id=content_type_id, object_id=object_id).aggregate(
+                pending_count=models.Count('pk', filter=models.Q(status__in=['pending', 'delegated'])),
+                approved_count=models.Count('pk', filter=models.Q(status='approved')),
+                rejected_count=models.Count('pk', filter=models.Q(status='rejected')),
+                skipped_count=models.Count('pk', filter=models.Q(status='skipped')),
+            )
+            for field, value in counted.items():
+                setattr(progress, field, value)
+            progress.save()
+        return progress
+
+    @classmethod
+    def for_update(cls, content_type_id, object_id):
+        """
+        Locks and returns the progress row of an object (building it from the steps if missing).
+        Must be called inside transaction.atomic(); lock it before the steps being actioned.
+        """
+        progress = cls.objects.select_for_update().filter(content_type_id=content_type_id, object_id=object_id).first()
+        if progress is None:
+            progress = cls.recount(content_type_id, object_id)
+        return progress
+
+    @classmethod
+    def for_update_many(cls, keys):
+        """
+        Locks the progress rows of several objects at once; keys are (content_type_id, object_id).
+        Returns {key: progress}. Must be called inside transaction.atomic().
+        """
+        keys = set(keys)
+        if not keys:
+            return {}
+        lookup = models.Q()
+        for content_type_id, object_id in keys:
+            lookup |= models.Q(content_type_id=content_type_id, object_id=object_id)
+        # Lock in primary key order so concurrent batches over the same objects can't deadlock.
+        locked = {
+            (progress.content_type_id, progress.object_id): progress
+            for progress in cls.objects.select_for_update().filter(lookup).order_by('pk')
+        }
+        for key in sorted(keys - locked.keys()):
+            locked[key] = cls.recount(*key)
+        return locked
+
+    def move(self, from_status, to_status, count=1):
+        """Moves `count` steps from one status to another and saves the changed counts."""
+        from_field = self.STATUS_COUNT_FIELDS[from_status]
+        to_field = self.STATUS_COUNT_FIELDS[to_status]
+        if not count or from_field == to_field:
+            return
+        setattr(self, from_field, max(getattr(self, from_field) - count, 0))
+        setattr(self, to_field, getattr(self, to_field) + count)
+        self.save(update_fields=[from_field, to_field, 'updated_at'])
+
+class ApprovalInboxEntry(models.Model):
+    """
+    One row per (user, pending ApprovalStep) the user may action: directly assigned, via the
+    assigned group, or as the original assignee of a delegated step. Maintained by
+    procurement.approval_inbox; backs the "my pending approvals" list.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='approval_inbox_entries')
+    step = models.ForeignKey(ApprovalStep, on_delete=models.CASCADE, related_name='inbox_entries')
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Approval Inbox Entry")
+        verbose_name_plural = _("Approval Inbox Entries")
+        # Also the (user, step) index used for keyset pagination of a user's inbox
+        unique_together = ('user', 'step')
+
+    def __str__(self):
+        return f"Inbox of {self.user.username}: step {self.step_id}"
+
+
+class ApprovalInboxCounter(models.Model):
+    """Number of inbox entries per user, read for badge polling without counting rows."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='approval_inbox_counter')
+    pending_count = models.IntegerField(_("Pending Approvals"), default=0)
+
+    class Meta:
+        verbose_name = _("Approval Inbox Counter")
+        verbose_name_plural = _("Approval Inbox Counters")
+
+    def __str__(self):
+        return f"{self.user.username}: {self.pending_count} pending"
+
+
 class ApprovalDelegation(models.Model):
     # ... (No changes to ApprovalDelegation model itself) ...
     delegator = models.ForeignKey(
@@ -693,6 +1029,10 @@ class ApprovalDelegation(models.Model):
         verbose_name = _("Approval Delegation")
         verbose_name_plural = _("Approval Delegations")
         ordering = ['-start_date']
+        indexes = [
+            # Active-delegate lookups: delegator(s), is_active, then the date window
+            models.Index(fields=['delegator', 'is_active', 'start_date', 'end_date'], name='proc_delegation_active_idx'),
+        ]
 
     def __str__(self):
         return f"Delegation from {self.delegator.username} to {self.delegatee.username} ({self.start_date} - {self.end_date})"
@@ -706,12 +1046,7 @@ class ApprovalDelegation(models.Model):
 
     @staticmethod
     def get_active_delegate(user, date_check=None):
-        if date_check is None:
-            date_check = timezone.now()
-        delegation = ApprovalDelegation.objects.filter(
-            delegator=user,
-            start_date__lte=date_check,
-            end_date__gte=date_check,
-            is_active=True
-        ).order_by('-start_date').first()
-        return delegation.delegatee if delegation else None
+        # Follows delegation chains (A -> B -> C returns C). To resolve several users at once,
+        # use procurement.delegation_resolver.resolve_active_delegates.
+        from .delegation_resolver import resolve_active_delegates
+        return resolve_active_delegates([user], date_check).get(user.pk)
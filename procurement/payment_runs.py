@@ -0,0 +1,145 @@
+"""
+Payment runs: applying a bank/payment file to many CheckRequests at once.
+
+The file is a CSV with a header row and the columns
+
+    cr_id, transaction_id, payment_method, payment_date[, status][, payment_notes]
+
+`status` is the transition to apply: 'paid' (default, like confirm_payment) or
+'payment_processing' (like mark_payment_processing). payment_date is YYYY-MM-DD and
+defaults to today, payment_method is one of CheckRequest.PAYMENT_METHOD_CHOICES.
+
+The file is read as a stream, PAYMENT_RUN_CHUNK_SIZE rows at a time: the check
+requests of a chunk are locked with one query, each row is validated against them,
+and the valid transitions are written with one bulk_update. All chunks run in one
+transaction. Invalid rows are reported and skipped; they don't stop the run.
+"""
+import csv
+import datetime
+import io
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .spend_rollups import check_request_days, schedule_spend_rollup_refresh
+
+PAYMENT_RUN_CHUNK_SIZE = 500
+
+PAYMENT_RUN_REQUIRED_COLUMNS = ('cr_id', 'transaction_id', 'payment_method', 'payment_date')
+
+# Target status -> statuses it can be reached from (same rules as the single-request actions)
+PAYMENT_RUN_TRANSITIONS = {
+    'paid': ('approved', 'payment_processing'),
+    'payment_processing': ('approved',),
+}
+
+PAYMENT_RUN_UPDATE_FIELDS = ['status', 'payment_method', 'payment_date', 'transaction_id', 'payment_notes']
+
+
+class PaymentFileError(ValueError):
+    """The payment file as a whole can't be read (encoding, missing columns)."""
+
+
+def read_payment_file(uploaded_file):
+    """Yields the rows of an uploaded payment CSV as dicts with stripped values, without reading it all in."""
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    try:
+        columns = [column.strip() for column in reader.fieldnames or []]
+    except UnicodeDecodeError:
+        raise PaymentFileError('The payment file must be UTF-8 encoded CSV.')
+    missing = [column for column in PAYMENT_RUN_REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise PaymentFileError(f"The payment file is missing the columns: {', '.join(missing)}.")
+    reader.fieldnames = columns
+    try:
+        for row in reader:
+            yield {key: (value or '').strip() for key, value in row.items() if key is not None}
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise PaymentFileError(f"The payment file could not be read: {exc}")
+
+
+def _validate_row(row, check_request, payment_methods, today):
+    """Returns (status, payment_date) for a valid row or raises ValueError with the reason."""
+    status = row.get('status') or 'paid'
+    if status not in PAYMENT_RUN_TRANSITIONS:
+        raise ValueError(f"status must be one of {sorted(PAYMENT_RUN_TRANSITIONS)}.")
+    if check_request is None:
+        raise ValueError('Check request not found.')
+    if check_request.status not in PAYMENT_RUN_TRANSITIONS[status]:
+        raise ValueError(f"Cannot move from '{check_request.status}' to '{status}'.")
+
+    payment_date = None
+    if status == 'paid':
+        if row['payment_method'] not in payment_methods:
+            raise ValueError(f"payment_method must be one of {sorted(payment_methods)}.")
+        if not row['transaction_id']:
+            raise ValueError('transaction_id is required for payment confirmation.')
+        payment_date = today
+        if row['payment_date']:
+            try:
+                payment_date = datetime.date.fromisoformat(row['payment_date'])
+            except ValueError:
+                raise ValueError('payment_date must be a YYYY-MM-DD date.')
+    return status, payment_date
+
+
+def apply_payment_run(rows, queryset, dry_run=False):
+    """
+    Applies payment file `rows` (dicts, see read_payment_file) to the check requests in `queryset`.
+    Returns {'results': [{'row', 'cr_id', 'status'[, 'error']}], 'processed', 'failed', 'dry_run'};
+    with dry_run=True the rows are validated but nothing is written.
+    """
+    from .models import CheckRequest
+    payment_methods = {value for value, _ in CheckRequest.PAYMENT_METHOD_CHOICES}
+    today = timezone.localdate()
+    results = []
+    seen_cr_ids = set()
+    rows = enumerate(rows, start=2) # Row numbers as in the file (row 1 is the header)
+
+    with transaction.atomic():
+        while True:
+            chunk = list(islice(rows, PAYMENT_RUN_CHUNK_SIZE))
+            if not chunk:
+                break
+            cr_ids = {row.get('cr_id') for _, row in chunk if row.get('cr_id')}
+            check_requests = {
+                check_request.cr_id: check_request
+                for check_request in queryset.select_related(None).select_for_update().filter(cr_id__in=cr_ids).order_by('pk')
+            }
+
+            to_update = []
+            for row_number, row in chunk:
+                cr_id = row.get('cr_id', '')
+                result = {'row': row_number, 'cr_id': cr_id}
+                try:
+                    if not cr_id:
+                        raise ValueError('cr_id is required.')
+                    if cr_id in seen_cr_ids:
+                        raise ValueError('Check request appears more than once in the file.')
+                    seen_cr_ids.add(cr_id)
+                    check_request = check_requests.get(cr_id)
+                    status, payment_date = _validate_row(row, check_request, payment_methods, today)
+                except ValueError as exc:
+                    result.update(status='error', error=str(exc))
+                    results.append(result)
+                    continue
+
+                check_request.status = status
+                if status == 'paid':
+                    check_request.payment_method = row['payment_method']
+                    check_request.payment_date = payment_date
+                    check_request.transaction_id = row['transaction_id']
+                    check_request.payment_notes = row.get('payment_notes', '') or check_request.payment_notes
+                to_update.append(check_request)
+                result['status'] = status
+                results.append(result)
+
+            if to_update and not dry_run:
+                CheckRequest.objects.bulk_update(to_update, PAYMENT_RUN_UPDATE_FIELDS)
+                # bulk_update sends no signals: refresh the spend rollups of these requests directly.
+                schedule_spend_rollup_refresh(set().union(*(check_request_days(cr) for cr in to_update)))
+
+    failed = sum(1 for result in results if result['status'] == 'error')
+    return {'results': results, 'processed': len(results) - failed, 'failed': failed, 'dry_run': dry_run}
@@ -0,0 +1,108 @@
+"""
+Consolidation of approved purchase request memos into draft purchase orders.
+
+consolidate_purchase_memos() takes the approved memos that name a suggested vendor and are
+not linked to a PO yet, groups them by (vendor, department) and turns every group into one
+draft PO with a line per memo. The whole conversion is one transaction: the memos are
+locked (skipping rows a concurrent run holds), the PO numbers for all groups are reserved
+with one sequence update, the POs and their lines are written with one bulk_create each and
+the memos are moved to 'po_created' with one UPDATE. The number of queries does not depend
+on the number of memos or groups.
+
+Memos carry no currency, so all POs of one run are raised in the currency passed in (the PO
+default unless given); run it once per currency for vendors invoiced in another one.
+Each line points back to its memo (OrderItem.source_memo). A PO made from a single memo is
+also linked to it through PurchaseOrder.internal_office_memo.
+"""
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from core_api.sequences import reserve
+
+CONSOLIDATION_MAX_MEMOS = 5000  # Upper bound on memos converted per call
+
+CENT = Decimal('0.01')
+
+
+def _build_line(memo):
+    from .models import OrderItem
+    unit_price = None
+    if memo.estimated_cost is not None and memo.quantity:
+        unit_price = (memo.estimated_cost / memo.quantity).quantize(CENT, rounding=ROUND_HALF_UP)
+    line = OrderItem(
+        source_memo=memo,
+        item_description=memo.item_description[:255],
+        quantity=memo.quantity,
+        unit_price=unit_price,
+    )
+    line.set_amounts() # bulk_create bypasses OrderItem.save()
+    line.set_received_date()
+    return line
+
+
+def consolidate_purchase_memos(user, memo_ids=None, currency=None, limit=CONSOLIDATION_MAX_MEMOS):
+    """
+    Converts approved memos (all of them, or those in memo_ids) into draft POs created by `user`.
+    Returns a list with one dict per PO created: id, po_number, vendor, department, memo_ids and
+    total_amount.
+    """
+    from .models import OrderItem, PurchaseOrder, PurchaseRequestMemo
+    if currency is None:
+        currency = PurchaseOrder._meta.get_field('currency').default
+    order_date = timezone.localdate()
+
+    with transaction.atomic():
+        memos = PurchaseRequestMemo.objects.filter(status='approved', suggested_vendor__isnull=False).exclude(
+            pk__in=PurchaseOrder.objects.filter(internal_office_memo__isnull=False).values('internal_office_memo')
+        )
+        if memo_ids is not None:
+            memos = memos.filter(pk__in=memo_ids)
+        memos = list(memos.select_for_update(skip_locked=True).order_by('pk')[:limit])
+        if not memos:
+            return []
+
+        groups = defaultdict(list)
+        for memo in memos:
+            groups[(memo.suggested_vendor_id, memo.department_id)].append(memo)
+        group_keys = sorted(groups, key=lambda key: (key[0], key[1] or 0))
+
+        orders, lines = [], []
+        for key, po_number in zip(group_keys, reserve('PO', len(group_keys))):
+            group = groups[key]
+            group_lines = [_build_line(memo) for memo in group]
+            delivery_dates = [memo.required_delivery_date for memo in group if memo.required_delivery_date]
+            orders.append(PurchaseOrder(
+                po_number=po_number,
+                vendor_id=key[0],
+                internal_office_memo=group[0] if len(group) == 1 else None,
+                order_date=order_date,
+                expected_delivery_date=min(delivery_dates) if delivery_dates else None,
+                total_amount=sum((line.gross_amount for line in group_lines), Decimal('0.00')),
+                currency=currency,
+                status='draft',
+                created_by=user,
+                notes="Consolidated from purchase request memos " + ", ".join(memo.iom_id for memo in group),
+            ))
+            lines.append(group_lines)
+
+        PurchaseOrder.objects.bulk_create(orders)
+        for order, group_lines in zip(orders, lines):
+            for line in group_lines:
+                line.purchase_order = order
+        OrderItem.objects.bulk_create([line for group_lines in lines for line in group_lines])
+        PurchaseRequestMemo.objects.filter(pk__in=[memo.pk for memo in memos]).update(status='po_created')
+
+    return [
+        {
+            'id': order.pk,
+            'po_number': order.po_number,
+            'vendor': order.vendor_id,
+            'department': key[1],
+            'memo_ids': [memo.pk for memo in groups[key]],
+            'total_amount': order.total_amount,
+        }
+        for order, key in zip(orders, group_keys)
+    ]
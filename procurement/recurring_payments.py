@@ -0,0 +1,169 @@
+"""
+Scheduler turning due RecurringPayments into CheckRequests.
+
+generate_due_check_requests() scans the active payments whose next_due_date has come
+(an indexed range on (is_active, next_due_date)), RECURRING_PAYMENT_BATCH_SIZE payments
+at a time. Each batch runs in its own transaction: the payments are locked (skipping rows
+another worker holds), every occurrence due up to `as_of` gets a CheckRequest, the CR IDs
+for the whole batch are reserved with one sequence update, the requests are written with
+one bulk_create and the payments' next_due_date is moved past `as_of` with one bulk_update.
+A payment that fell months behind is caught up in the same pass, one request per missed
+occurrence.
+
+Re-running is safe. A processed payment no longer matches the due scan, occurrences that
+already have a request (recurring_payment, recurring_due_date) are skipped, and a unique
+constraint on that pair backs this up if two runs race. Monthly/quarterly/annual payments
+keep the day of month of their start_date (the 31st falls back to the last day of shorter
+months). Payments past their end_date are deactivated.
+
+Run it from cron or as a worker with the process_recurring_payments management command.
+"""
+import calendar
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from core_api.sequences import reserve
+
+RECURRING_PAYMENT_BATCH_SIZE = 200  # Payments locked and processed per transaction
+
+RECURRING_PAYMENT_STATUS = 'pending_approval'  # Pending Accounts Approval: generated requests skip submission, not approval
+
+# Frequency -> (days, months) between two occurrences
+FREQUENCY_STEPS = {
+    'daily': (1, 0),
+    'weekly': (7, 0),
+    'monthly': (0, 1),
+    'quarterly': (0, 3),
+    'annually': (0, 12),
+}
+
+
+def advance_due_date(due_date, frequency, anchor_day=None):
+    """Returns the occurrence after `due_date`; month-based frequencies land on `anchor_day` where the month has it."""
+    try:
+        days, months = FREQUENCY_STEPS[frequency]
+    except KeyError:
+        raise ValueError(f"Unknown recurring payment frequency '{frequency}'.")
+    if days:
+        return due_date + datetime.timedelta(days=days)
+    month_index = due_date.year * 12 + due_date.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    day = min(anchor_day or due_date.day, calendar.monthrange(year, month)[1])
+    return datetime.date(year, month, day)
+
+
+def due_occurrences(payment, as_of):
+    """Returns (due dates up to `as_of`, next_due_date after them) for a RecurringPayment."""
+    dates = []
+    due_date = payment.next_due_date
+    while due_date <= as_of and (payment.end_date is None or due_date <= payment.end_date):
+        dates.append(due_date)
+        due_date = advance_due_date(due_date, payment.frequency, payment.start_date.day)
+    return dates, due_date
+
+
+def _build_check_request(payment, due_date, payee_name):
+    from .models import CheckRequest
+    return CheckRequest(
+        recurring_payment=payment,
+        recurring_due_date=due_date,
+        vendor_id=payment.vendor_id, # bulk_create bypasses CheckRequest.save()
+        amount=payment.amount,
+        currency=payment.currency,
+        payee_name=payee_name,
+        reason_for_payment=f"{payment.payment_name} (recurring payment due {due_date.isoformat()})",
+        expense_category_id=payment.expense_category_id,
+        status=RECURRING_PAYMENT_STATUS,
+    )
+
+
+def _process_batch(as_of, batch_size, failed_ids):
+    """Handles one batch of due payments in one transaction. Returns its counts, or None when nothing is due."""
+    from .models import CheckRequest
+    from .common_models import RecurringPayment
+    from assets.models import Vendor
+
+    with transaction.atomic():
+        payments = list(
+            RecurringPayment.objects
+            .filter(is_active=True, next_due_date__lte=as_of)
+            .exclude(pk__in=failed_ids)
+            .select_for_update(skip_locked=True)
+            .order_by('next_due_date', 'pk')[:batch_size]
+        )
+        if not payments:
+            return None
+
+        occurrences = {}
+        for payment in payments:
+            try:
+                occurrences[payment.pk] = due_occurrences(payment, as_of)
+            except ValueError:
+                failed_ids.add(payment.pk)
+
+        due_dates = [date for dates, _ in occurrences.values() for date in dates]
+        existing = set()
+        if due_dates:
+            existing = set(CheckRequest.objects.filter(
+                recurring_payment_id__in=occurrences,
+                recurring_due_date__range=(min(due_dates), max(due_dates)),
+            ).values_list('recurring_payment_id', 'recurring_due_date'))
+        vendor_names = dict(Vendor.objects.filter(
+            pk__in={payment.vendor_id for payment in payments if payment.vendor_id}
+        ).values_list('pk', 'name'))
+
+        to_create = []
+        to_update = []
+        deactivated = 0
+        for payment in payments:
+            if payment.pk not in occurrences:
+                continue
+            dates, next_due_date = occurrences[payment.pk]
+            payee_name = vendor_names.get(payment.vendor_id) or payment.payment_name
+            to_create.extend(
+                _build_check_request(payment, due_date, payee_name)
+                for due_date in dates if (payment.pk, due_date) not in existing
+            )
+            payment.next_due_date = next_due_date
+            if payment.end_date is not None and next_due_date > payment.end_date:
+                payment.is_active = False
+                deactivated += 1
+            to_update.append(payment)
+
+        if to_create:
+            for check_request, cr_id in zip(to_create, reserve('CR', len(to_create))):
+                check_request.cr_id = cr_id
+            CheckRequest.objects.bulk_create(to_create)
+        if to_update:
+            RecurringPayment.objects.bulk_update(to_update, ['next_due_date', 'is_active'])
+
+        return {
+            'payments': len(to_update),
+            'created': len(to_create),
+            'skipped': len(due_dates) - len(to_create),
+            'deactivated': deactivated,
+        }
+
+
+def generate_due_check_requests(as_of=None, batch_size=RECURRING_PAYMENT_BATCH_SIZE):
+    """
+    Creates the CheckRequests of every recurring payment occurrence due on or before `as_of`
+    (default today) and advances the payments. Returns the counts
+    {'payments', 'created', 'skipped', 'deactivated', 'failed'}; 'skipped' are occurrences that
+    already had a request, 'failed' lists the pks of payments with an unknown frequency.
+    """
+    if as_of is None:
+        as_of = timezone.localdate()
+    totals = {'payments': 0, 'created': 0, 'skipped': 0, 'deactivated': 0}
+    failed_ids = set()
+    while True:
+        counts = _process_batch(as_of, batch_size, failed_ids)
+        if counts is None:
+            break
+        for key, value in counts.items():
+            totals[key] += value
+    totals['failed'] = sorted(failed_ids)
+    return totals
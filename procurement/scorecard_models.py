@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class VendorScorecard(models.Model):
+    """
+    Delivery and pricing metrics of one vendor, derived from its purchase order history and kept
+    up to date by procurement.vendor_scorecards. Rates are null until there is history to rate.
+    """
+    vendor = models.OneToOneField(
+        'assets.Vendor', on_delete=models.CASCADE, primary_key=True, related_name='scorecard', verbose_name=_("Vendor")
+    )
+    purchase_order_count = models.PositiveIntegerField(_("Purchase Orders"), default=0)
+    spend_amount = models.DecimalField(_("Committed Spend"), max_digits=16, decimal_places=2, default=0)
+    ordered_quantity = models.PositiveIntegerField(_("Ordered Quantity (Receiving POs)"), default=0)
+    received_quantity = models.PositiveIntegerField(_("Received Quantity (Receiving POs)"), default=0)
+    fill_rate = models.DecimalField(_("Fill Rate"), max_digits=5, decimal_places=4, null=True, blank=True)
+    delivered_line_count = models.PositiveIntegerField(_("Fully Received Lines"), default=0)
+    on_time_line_count = models.PositiveIntegerField(_("Lines Received On Time"), default=0)
+    on_time_rate = models.DecimalField(_("On-Time Delivery Rate"), max_digits=5, decimal_places=4, null=True, blank=True)
+    average_lead_time_days = models.DecimalField(_("Average Lead Time (Days)"), max_digits=8, decimal_places=2, null=True, blank=True)
+    invoiced_amount = models.DecimalField(_("Invoiced Amount"), max_digits=16, decimal_places=2, default=0)
+    invoiced_order_amount = models.DecimalField(_("Ordered Amount (Invoiced POs)"), max_digits=16, decimal_places=2, default=0)
+    price_variance_rate = models.DecimalField(_("Price Variance Rate"), max_digits=9, decimal_places=4, null=True, blank=True)
+    refreshed_at = models.DateTimeField(_("Refreshed At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Vendor Scorecard")
+        verbose_name_plural = _("Vendor Scorecards")
+        ordering = ['-spend_amount']
+        indexes = [
+            models.Index(fields=['spend_amount'], name='proc_scorecard_spend_idx'),
+            models.Index(fields=['on_time_rate'], name='proc_scorecard_ontime_idx'),
+            models.Index(fields=['fill_rate'], name='proc_scorecard_fill_idx'),
+            models.Index(fields=['average_lead_time_days'], name='proc_scorecard_lead_idx'),
+            models.Index(fields=['price_variance_rate'], name='proc_scorecard_price_var_idx'),
+        ]
+
+    def __str__(self):
+        return f"Scorecard for vendor {self.vendor_id}"
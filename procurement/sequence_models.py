@@ -1,11 +1,17 @@
-from django.db import models, transaction
+from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-class ProcurementIDSequence(models.Model):
+from core_api.sequences import AlphaNumericSequenceMixin, format_id as format_sequence_id
+
+
+class ProcurementIDSequence(AlphaNumericSequenceMixin, models.Model):
     """
     Model to store the current state of ID sequences for procurement models (IOM, PO, CR).
     A separate instance will be used for each prefix.
     """
+    # Serves every prefix not owned by another sequence model (see core_api.sequences.reserve).
+    sequence_prefixes = None
+
     prefix = models.CharField(
         _("Prefix"),
         max_length=3,
@@ -25,6 +31,9 @@ class ProcurementIDSequence(models.Model):
     current_numeric_part = models.PositiveIntegerField(
         default=0, help_text="Current numeric value (0-9999)"
     )
+    current_alpha_overflow = models.PositiveIntegerField(
+        default=0, help_text="Times the two-letter alpha part has wrapped past ZZ (widened format only, e.g. 1 for IM-AAA-0001)"
+    )
 
     class Meta:
         verbose_name = _("Procurement ID Sequence")
@@ -32,57 +41,46 @@ class ProcurementIDSequence(models.Model):
         ordering = ['prefix']
 
     def __str__(self):
+        if self.current_alpha_overflow:
+            return f"Current {self.prefix} ID: {format_sequence_id(self.prefix, self.current_position, widened=True)}"
         return f"Current {self.prefix} ID: {self.prefix}-{self.current_alpha_part_char1}{self.current_alpha_part_char2}-{self.current_numeric_part:04d}"
 
     @classmethod
-    def get_next_id(cls, prefix: str):
-        """
-        Atomically increments and retrieves the next sequence for the given prefix.
-        Handles both numeric and alphanumeric parts.
-        Format: PREFIX-AA-0001
-        """
+    def sequence_row_lookup(cls, prefix):
         if not prefix or len(prefix) > 3:
             raise ValueError("Prefix must be 1 to 3 characters long.")
+        return {"prefix": prefix}
 
-        with transaction.atomic():
-            seq_instance, created = cls.objects.select_for_update().get_or_create(
-                prefix=prefix,
-                defaults={
-                    "current_alpha_part_char1": "A",
-                    "current_alpha_part_char2": "A",
-                    "current_numeric_part": 0, # Start at 0, so first ID is 0001
-                },
-            )
-
-            current_numeric = seq_instance.current_numeric_part
-            current_char1_val = ord(seq_instance.current_alpha_part_char1) - ord("A")
-            current_char2_val = ord(seq_instance.current_alpha_part_char2) - ord("A")
+    @staticmethod
+    def format_id(prefix: str, position: int):
+        """Formats a sequence position (1-based) as PREFIX-AA-0001."""
+        return format_sequence_id(prefix, position)
 
-            next_numeric = current_numeric + 1
-            next_char1_val = current_char1_val
-            next_char2_val = current_char2_val
-
-            if next_numeric > 9999:
-                next_numeric = 1
-                next_char2_val += 1
-                if next_char2_val >= 26:
-                    next_char2_val = 0
-                    next_char1_val += 1
-                    if next_char1_val >= 26:
-                        raise ValueError(
-                            f"{prefix} ID sequence exhausted (ZZ-9999 reached). Please implement a larger sequence or reset."
-                        )
+    @classmethod
+    def reserve_block(cls, prefix: str, size: int = 1):
+        """
+        Atomically advances the sequence for `prefix` by `size` positions and returns
+        the (first, last) positions of the reserved range. The row lock is held only
+        for the duration of this call (or of the caller's transaction, if any).
+        """
+        return cls.reserve_positions(prefix, size)
 
-            seq_instance.current_numeric_part = next_numeric
-            seq_instance.current_alpha_part_char1 = chr(ord("A") + next_char1_val)
-            seq_instance.current_alpha_part_char2 = chr(ord("A") + next_char2_val)
-            seq_instance.save()
+    @classmethod
+    def get_next_id(cls, prefix: str):
+        """
+        Returns the next ID for the given prefix. Format: PREFIX-AA-0001
 
-            alpha_part = f"{seq_instance.current_alpha_part_char1}{seq_instance.current_alpha_part_char2}"
-            numeric_part = f"{seq_instance.current_numeric_part:04d}"
-            return f"{prefix}-{alpha_part}-{numeric_part}"
+        Prefixes configured in settings.PROCUREMENT_ID_BLOCK_SIZES are served from a
+        per-process block of pre-reserved IDs; all other prefixes (and those listed in
+        settings.PROCUREMENT_ID_GAPLESS_PREFIXES) lock the sequence row for every ID.
+        See procurement.id_allocator for details. For bulk creates, use
+        core_api.sequences.reserve(prefix, n) instead.
+        """
+        from .id_allocator import id_allocator
+        return id_allocator.next_id(prefix)
 
 # Example Usage (not part of the model itself, just for illustration):
 # next_iom_id = ProcurementIDSequence.get_next_id("IM")
 # next_po_id = ProcurementIDSequence.get_next_id("PO")
 # next_cr_id = ProcurementIDSequence.get_next_id("CR")
+# po_numbers = core_api.sequences.reserve("PO", 500)  # bulk import
@@ -1,9 +1,14 @@
 import json # For parsing order_items_json
+from decimal import Decimal, InvalidOperation
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
 from .models import (
     PurchaseRequestMemo, PurchaseOrder, OrderItem, CheckRequest,
-    ApprovalRule, ApprovalStep, ApprovalDelegation # Import main models
+    ApprovalRule, ApprovalStep, ApprovalDelegation, # Import main models
+    AttachmentBlob, ChunkedUpload, VendorScorecard, InvoiceMatch
 )
 # Import common models directly from their source
 from .common_models import Department, Project, Contract, GLAccount, ExpenseCategory, RecurringPayment # Ensure this is correct if models moved
@@ -11,6 +16,7 @@ from assets.models import Vendor
 from assets.serializers import VendorSerializer
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType # For GFK representation in ApprovalStepSerializer
+from core_api.serializers import GenericPrefetchListSerializer
 
 # Import generic_iom models for M2M fields in ApprovalRuleSerializer
 # This might require careful handling of Django's app loading sequence.
@@ -30,6 +36,63 @@ class SimpleGenericIOMSerializer(serializers.ModelSerializer):
         fields = ['id', 'gim_id', 'subject', 'status'] # Basic info
 
 # Serializers for Common Models (basic, can be expanded)
+class AttachmentBlobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AttachmentBlob
+        fields = ['id', 'sha256', 'size', 'content_type', 'original_filename', 'created_at']
+        read_only_fields = fields
+
+
+class UploadedAttachmentBlobField(serializers.PrimaryKeyRelatedField):
+    """
+    A writable attachment_blob: accepts blobs the requesting user uploaded, and the record's
+    current blob, so ids of other users' files can't be attached.
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('allow_null', True)
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return AttachmentBlob.objects.none()
+        allowed = Q(pk__in=ChunkedUpload.objects.filter(created_by=request.user).values('blob'))
+        current_id = getattr(getattr(self.parent, 'instance', None), 'attachment_blob_id', None)
+        if current_id is not None:
+            allowed |= Q(pk=current_id)
+        return AttachmentBlob.objects.filter(allowed)
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    blob_details = AttachmentBlobSerializer(source='blob', read_only=True)
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'filename', 'content_type', 'size', 'offset', 'status', 'blob', 'blob_details', 'created_at']
+        read_only_fields = ['offset', 'status', 'blob', 'blob_details', 'created_at']
+
+    def validate_size(self, value):
+        max_size = settings.ATTACHMENT_MAX_UPLOAD_SIZE
+        if value > max_size:
+            raise serializers.ValidationError(f"Attachments can be at most {max_size} bytes.")
+        return value
+
+
+class VendorScorecardSerializer(serializers.ModelSerializer):
+    vendor_name = serializers.CharField(source='vendor.name', read_only=True)
+
+    class Meta:
+        model = VendorScorecard
+        fields = [
+            'vendor', 'vendor_name', 'purchase_order_count', 'spend_amount',
+            'ordered_quantity', 'received_quantity', 'fill_rate',
+            'delivered_line_count', 'on_time_line_count', 'on_time_rate', 'average_lead_time_days',
+            'invoiced_amount', 'invoiced_order_amount', 'price_variance_rate', 'refreshed_at',
+        ]
+        read_only_fields = fields
+
+
 class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Department
@@ -88,6 +151,7 @@ class PurchaseRequestMemoSerializer(serializers.ModelSerializer):
     department_name = serializers.StringRelatedField(source='department', read_only=True)
     project_name = serializers.StringRelatedField(source='project', read_only=True)
     suggested_vendor_name = serializers.StringRelatedField(source='suggested_vendor', read_only=True)
+    attachment_blob = UploadedAttachmentBlobField()
 
     class Meta:
         model = PurchaseRequestMemo
@@ -96,7 +160,8 @@ class PurchaseRequestMemoSerializer(serializers.ModelSerializer):
             'requested_by', 'requested_by_username', 'request_date', 'status',
             'approver', 'approver_username', 'decision_date', 'approver_comments',
             'department', 'department_name', 'project', 'project_name', 'priority',
-            'required_delivery_date', 'suggested_vendor', 'suggested_vendor_name', 'attachments'
+            'required_delivery_date', 'suggested_vendor', 'suggested_vendor_name', 'attachments',
+            'attachment_blob'
         ]
         read_only_fields = [
             'iom_id', # Assuming this is system-generated or handled by model logic
@@ -116,13 +181,30 @@ class OrderItemSerializer(serializers.ModelSerializer):
             'id', 'item_description', 'quantity', 'unit_price', 'total_price',
             'product_code', 'gl_account', 'gl_account_code', 'received_quantity',
             'line_item_status', 'tax_rate',
-            'discount_type', 'discount_value' # Replaced discount_percentage_or_amount
+            'discount_type', 'discount_value', # Replaced discount_percentage_or_amount
+            'net_amount', 'discount_amount', 'tax_amount', 'gross_amount', 'received_date', 'source_memo',
         ]
-        read_only_fields = ['total_price', 'gl_account_code'] # total_price is a @property
+        read_only_fields = [
+            'total_price', 'gl_account_code', # total_price is a @property
+            'net_amount', 'discount_amount', 'tax_amount', 'gross_amount', # Derived, stored on save
+            'received_date', # Stamped when the line is fully received
+            'source_memo', # Set by PO consolidation
+        ]
+
+
+ORDER_ITEM_WRITABLE_FIELDS = {
+    field.attname for field in OrderItem._meta.concrete_fields
+    if field.attname not in ('purchase_order_id', 'received_date', 'source_memo_id') and field.attname not in OrderItem.AMOUNT_FIELDS
+}
+
+
+class PurchaseOrderItemSerializer(OrderItemSerializer):
+    # Writable here so that line-item updates can be applied as a diff keyed by id.
+    id = serializers.IntegerField(required=False)
 
 
 class PurchaseOrderSerializer(serializers.ModelSerializer):
-    order_items = OrderItemSerializer(many=True, required=False) # Not required if order_items_json is used
+    order_items = PurchaseOrderItemSerializer(many=True, required=False) # Not required if order_items_json is used
     vendor_details = VendorSerializer(source='vendor', read_only=True) # Assuming VendorSerializer exists and is suitable
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     internal_office_memo_details = PurchaseRequestMemoSerializer(source='internal_office_memo', read_only=True, allow_null=True)
@@ -130,6 +212,7 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     related_contract_details = serializers.StringRelatedField(source='related_contract', read_only=True)
     # For handling JSON string input for order items, e.g. from multipart forms
     order_items_json = serializers.CharField(write_only=True, required=False, allow_blank=True, help_text="JSON string of order items.")
+    attachment_blob = UploadedAttachmentBlobField()
 
 
     class Meta:
@@ -145,7 +228,7 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at',
             'shipping_address', 'notes',
             'payment_terms', 'shipping_method', 'billing_address', 'po_type',
-            'related_contract', 'related_contract_details', 'attachments', 'revision_number', 'currency',
+            'related_contract', 'related_contract_details', 'attachments', 'attachment_blob', 'revision_number', 'currency',
             'order_items', 'order_items_json' # Added order_items_json
         ]
         read_only_fields = [
@@ -169,45 +252,76 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Invalid JSON format for order items.")
         return value
 
+    def _normalize_order_item(self, item_data_original):
+        item_data = dict(item_data_original) # Avoid modifying original dict from validated_data
+        # Adjust FKs for direct model assignment: 'field_name': pk -> 'field_name_id': pk
+        if 'gl_account' in item_data:
+            gl_account = item_data.pop('gl_account')
+            item_data['gl_account_id'] = gl_account.pk if isinstance(gl_account, GLAccount) else gl_account
+        # Add similar adjustments for other FKs in OrderItem if any (e.g., 'asset')
+        # Drop read-only values echoed back from a previous response (total_price, gl_account_code, ...)
+        item_data = {field_name: value for field_name, value in item_data.items() if field_name in ORDER_ITEM_WRITABLE_FIELDS}
+
+        # Ensure numeric types are correct before direct model assignment
+        for field_name in ('unit_price', 'tax_rate', 'discount_value'):
+            if item_data.get(field_name) is not None:
+                try:
+                    item_data[field_name] = Decimal(str(item_data[field_name]))
+                except InvalidOperation:
+                    raise serializers.ValidationError({f'order_items.{field_name}': 'Invalid decimal value.'})
+
+        for field_name in ('id', 'quantity', 'received_quantity'):
+            if item_data.get(field_name) is not None:
+                try:
+                    item_data[field_name] = int(item_data[field_name])
+                except ValueError:
+                    raise serializers.ValidationError({f'order_items.{field_name}': 'Invalid integer value.'})
+        if 'received_quantity' in item_data and item_data['received_quantity'] is None:
+            item_data['received_quantity'] = 0 # Respect model default
+        return item_data
+
     def _process_order_items(self, po_instance, order_items_data):
-        po_instance.order_items.all().delete() # Simple: delete existing, then create new
-        current_total_amount = 0
+        """
+        Applies order_items_data to the PO's line items as a diff keyed by item id: lines with a
+        known id are updated (only if a value changed), lines without one are created and lines
+        missing from the payload are deleted. Sets po_instance.total_amount (caller saves it).
+        """
+        existing = {item.pk: item for item in po_instance.order_items.all()}
+        to_create, to_update, changed_fields, kept_ids = [], [], set(), set()
         for item_data_original in order_items_data:
-            item_data = item_data_original.copy() # Avoid modifying original dict from validated_data
-            # Adjust FKs for direct model creation: 'field_name': pk -> 'field_name_id': pk
-            if 'gl_account' in item_data and not isinstance(item_data['gl_account'], GLAccount):
-                item_data['gl_account_id'] = item_data.pop('gl_account')
-            # Add similar adjustments for other FKs in OrderItem if any (e.g., 'asset')
-
-            # Ensure numeric types are correct before direct model creation
-            from decimal import Decimal, InvalidOperation
-            decimal_fields = ['unit_price', 'tax_rate', 'discount_value']
-            for field_name in decimal_fields:
-                if field_name in item_data and item_data[field_name] is not None:
-                    try:
-                        item_data[field_name] = Decimal(str(item_data[field_name]))
-                    except InvalidOperation:
-                        # Handle error or raise validation error earlier if possible
-                        raise serializers.ValidationError({f'order_items.{field_name}': 'Invalid decimal value.'})
-
-            integer_fields = ['quantity', 'received_quantity']
-            for field_name in integer_fields:
-                if field_name in item_data and item_data[field_name] is not None:
-                    try:
-                        item_data[field_name] = int(item_data[field_name])
-                    except ValueError:
-                        raise serializers.ValidationError({f'order_items.{field_name}': 'Invalid integer value.'})
-                elif field_name == 'received_quantity': # Explicitly default received_quantity if None or not present
-                    item_data[field_name] = 0
-
-
-            # Ensure received_quantity defaults to 0 if not provided or None, to respect model default
-            if item_data.get('received_quantity') is None:
-                item_data['received_quantity'] = 0
-
-            item = OrderItem.objects.create(purchase_order=po_instance, **item_data)
-            current_total_amount += item.total_price
-        po_instance.total_amount = current_total_amount
+            item_data = self._normalize_order_item(item_data_original)
+            item_id = item_data.pop('id', None)
+            if item_id is None:
+                item = OrderItem(purchase_order=po_instance, **item_data)
+                item.set_amounts() # bulk_create bypasses OrderItem.save()
+                item.set_received_date()
+                to_create.append(item)
+                continue
+            item = existing.get(item_id)
+            if item is None or item_id in kept_ids:
+                raise serializers.ValidationError({'order_items': f'Order item {item_id} is not a line of this purchase order.'})
+            kept_ids.add(item_id)
+            fields = [field_name for field_name, value in item_data.items() if getattr(item, field_name) != value]
+            if fields:
+                for field_name in fields:
+                    setattr(item, field_name, item_data[field_name])
+                if set(fields) & set(OrderItem.AMOUNT_SOURCE_FIELDS):
+                    item.set_amounts() # bulk_update bypasses OrderItem.save()
+                    fields.extend(OrderItem.AMOUNT_FIELDS)
+                if item.set_received_date():
+                    fields.append('received_date')
+                to_update.append(item)
+                changed_fields.update(fields)
+
+        removed_ids = existing.keys() - kept_ids
+        with transaction.atomic():
+            if removed_ids:
+                OrderItem.objects.filter(pk__in=removed_ids).delete()
+            if to_update:
+                OrderItem.objects.bulk_update(to_update, sorted(changed_fields))
+            if to_create:
+                OrderItem.objects.bulk_create(to_create)
+        po_instance.total_amount = po_instance.calculate_total_amount()
         # The caller of _process_order_items should save po_instance
 
     def create(self, validated_data):
@@ -227,7 +341,8 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
         po = PurchaseOrder.objects.create(**validated_data)
 
         if order_items_list: # If there are items from either source
-            self._process_order_items(po, order_items_list)
+            # A new PO has no lines to diff against; ids (e.g. copied from another PO) are ignored.
+            self._process_order_items(po, [{k: v for k, v in item.items() if k != 'id'} for item in order_items_list])
             po.save(update_fields=['total_amount']) # Save again to store calculated total
 
         return po
@@ -261,8 +376,8 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
             # It's better if total_amount is always derived from items.
             # If items are not touched, total_amount should not change unless other PO-level factors change it.
             # Let's ensure it's recalculated if items exist, regardless of payload, to be safe.
-            if instance.order_items.exists() and actual_order_items_data is None:
-                 current_total_amount = sum(item.total_price for item in instance.order_items.all())
+            if actual_order_items_data is None:
+                 current_total_amount = instance.calculate_total_amount()
                  if instance.total_amount != current_total_amount:
                     instance.total_amount = current_total_amount
                     instance.save(update_fields=['total_amount'])
@@ -275,6 +390,7 @@ class CheckRequestSerializer(serializers.ModelSerializer):
     purchase_order_details = PurchaseOrderSerializer(source='purchase_order', read_only=True) # Nested PO details
     expense_category_name = serializers.StringRelatedField(source='expense_category', read_only=True)
     recurring_payment_details = serializers.StringRelatedField(source='recurring_payment', read_only=True)
+    attachment_blob = UploadedAttachmentBlobField()
 
 
     class Meta:
@@ -287,7 +403,7 @@ class CheckRequestSerializer(serializers.ModelSerializer):
             'accounts_approval_date', 'accounts_comments',
             'payment_method', 'payment_date', 'transaction_id', 'payment_notes',
             'expense_category', 'expense_category_name', 'is_urgent',
-            'recurring_payment', 'recurring_payment_details', 'attachments', 'currency'
+            'recurring_payment', 'recurring_payment_details', 'attachments', 'attachment_blob', 'currency', 'vendor'
         ]
         read_only_fields = [
             'cr_id', # Assuming system-generated
@@ -297,12 +413,27 @@ class CheckRequestSerializer(serializers.ModelSerializer):
             'accounts_approval_date', 'accounts_comments',
             'purchase_order_details', 'expense_category_name', 'recurring_payment_details',
             # Payment fields are typically set by specific actions/roles
-            'payment_method', 'payment_date', 'transaction_id', 'payment_notes'
+            'payment_method', 'payment_date', 'transaction_id', 'payment_notes',
+            'vendor', # Copied from the PO / recurring payment
         ]
         # `requested_by` set by view. `status` defaults.
         # `purchase_order`, `expense_category`, `recurring_payment` are writable by ID.
 
 
+class InvoiceMatchSerializer(serializers.ModelSerializer):
+    cr_id = serializers.CharField(source='check_request.cr_id', read_only=True)
+    invoice_number = serializers.CharField(source='check_request.invoice_number', read_only=True, allow_null=True)
+    po_number = serializers.CharField(source='purchase_order.po_number', read_only=True)
+
+    class Meta:
+        model = InvoiceMatch
+        fields = [
+            'check_request', 'cr_id', 'invoice_number', 'purchase_order', 'po_number', 'status', 'issues',
+            'ordered_amount', 'received_amount', 'invoiced_amount', 'duplicate_of', 'matched_at',
+        ]
+        read_only_fields = fields
+
+
 # Serializers for Approval Workflow
 
 class GroupSerializer(serializers.ModelSerializer):
@@ -331,6 +462,49 @@ class ApprovalRuleSerializer(serializers.ModelSerializer):
         # `applicable_iom_templates` and `applicable_iom_categories` are also writable M2M by ID.
         # Consider adding their details for read if needed, similar to departments_details.
 
+class ProposedApprovalRuleSerializer(serializers.Serializer):
+    """
+    One change of an approval rule simulation: with an id it overrides the given fields of that
+    rule (is_active=false drops it), without one it is a new rule. Ids are not checked against
+    departments/projects/templates; unknown ones simply match nothing.
+    """
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(required=False, allow_blank=True)
+    order = serializers.IntegerField(required=False, min_value=0)
+    is_active = serializers.BooleanField(required=False)
+    min_amount = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, allow_null=True)
+    max_amount = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, allow_null=True)
+    applies_to_all_departments = serializers.BooleanField(required=False)
+    departments = serializers.ListField(child=serializers.IntegerField(), required=False)
+    applies_to_all_projects = serializers.BooleanField(required=False)
+    projects = serializers.ListField(child=serializers.IntegerField(), required=False)
+    applicable_iom_templates = serializers.ListField(child=serializers.IntegerField(), required=False)
+    applicable_iom_categories = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class SimulatedObjectSerializer(serializers.Serializer):
+    """A hypothetical memo (estimated_cost, department, project) or generic IOM (iom_template)."""
+    estimated_cost = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, allow_null=True)
+    department = serializers.IntegerField(required=False, allow_null=True)
+    project = serializers.IntegerField(required=False, allow_null=True)
+    iom_template = serializers.IntegerField(required=False)
+
+
+class ApprovalRuleSimulationSerializer(serializers.Serializer):
+    rule_type = serializers.ChoiceField(choices=ApprovalRule.RULE_TYPE_CHOICES, default='procurement_memo')
+    rules = ProposedApprovalRuleSerializer(many=True)
+    replace = serializers.BooleanField(default=False, help_text="Simulate only the given rules instead of changes to the active ones.")
+    objects = SimulatedObjectSerializer(many=True, required=False, help_text="Hypothetical objects; historical ones are used if omitted.")
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    statuses = serializers.ListField(child=serializers.CharField(), required=False)
+
+    def validate(self, attrs):
+        if attrs['rule_type'] == 'generic_iom' and any('iom_template' not in obj for obj in attrs.get('objects', ())):
+            raise serializers.ValidationError({'objects': 'Each generic IOM needs an iom_template.'})
+        return attrs
+
+
 class ContentObjectRelatedField(serializers.RelatedField):
     """
     A custom field to represent the GFK 'content_object'.
@@ -374,15 +548,18 @@ class ApprovalStepSerializer(serializers.ModelSerializer):
             'original_assigned_approver_user', 'original_assigned_approver_user_name',
             'assigned_approver_group', 'assigned_approver_group_name',
             'status', 'status_display', 'approved_by', 'actioned_by_user_name',
-            'decision_date', 'comments', 'created_at', 'updated_at'
+            'decision_date', 'comments', 'created_at', 'updated_at', 'due_at', 'escalation_count',
         ]
+        # Load the content objects of a page with one query per content type
+        list_serializer_class = GenericPrefetchListSerializer
+        generic_prefetch = {'content_object': ApprovalStep.CONTENT_OBJECT_RELATED}
         read_only_fields = [
             'content_object_display', 'content_object_url',
             'approval_rule_name', 'rule_name_snapshot',
             'assigned_approver_user_name', 'original_assigned_approver_user_name',
             'assigned_approver_group_name',
             'actioned_by_user_name', 'status_display',
-            'created_at', 'updated_at',
+            'created_at', 'updated_at', 'due_at', 'escalation_count', # Escalation timer
         ]
 
     def get_content_object_display(self, obj: ApprovalStep):
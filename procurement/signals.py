@@ -0,0 +1,160 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import Signal, receiver
+
+from .approval_inbox import refresh_approval_inbox, refresh_user_inboxes, release_inbox_entries
+from .approval_rule_index import invalidate_approval_rule_index
+from .delegation_resolver import invalidate_delegation_cache
+from .models import (
+    ApprovalDelegation, ApprovalProgress, ApprovalRule, ApprovalStep, CheckRequest, OrderItem, PurchaseOrder,
+)
+from .spend_rollups import (
+    COMMITTED_PO_STATUSES, SPEND_CHECK_REQUEST_STATUSES, check_request_days, schedule_spend_rollup_refresh,
+)
+from .vendor_scorecards import schedule_vendor_scorecard_refresh
+
+# Sent once per workflow trigger, after the transaction that created the steps commits.
+# Arguments: content_object (the memo/IOM) and steps (the ApprovalSteps created for it).
+approval_steps_created = Signal()
+
+
+def _invalidate_approval_rule_index():
+    # The version bump is part of the transaction, so other processes rebuild once it commits.
+    invalidate_approval_rule_index()
+
+
+@receiver(post_save, sender=ApprovalRule)
+@receiver(post_delete, sender=ApprovalRule)
+def approval_rule_changed(sender, instance, **kwargs):
+    _invalidate_approval_rule_index()
+
+
+@receiver(post_delete, sender=get_user_model())
+@receiver(post_delete, sender=Group)
+def approver_deleted(sender, instance, **kwargs):
+    # Deleting an approver nulls ApprovalRule.approver_user/group without saving the rule.
+    _invalidate_approval_rule_index()
+
+
+@receiver(m2m_changed, sender=ApprovalRule.departments.through)
+@receiver(m2m_changed, sender=ApprovalRule.projects.through)
+@receiver(m2m_changed, sender=ApprovalRule.applicable_iom_templates.through)
+@receiver(m2m_changed, sender=ApprovalRule.applicable_iom_categories.through)
+def approval_rule_m2m_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate_approval_rule_index()
+
+
+@receiver(post_save, sender=ApprovalDelegation)
+@receiver(post_delete, sender=ApprovalDelegation)
+def approval_delegation_changed(sender, instance, **kwargs):
+    invalidate_delegation_cache()
+
+
+@receiver(pre_delete, sender=ApprovalStep)
+def approval_step_deleting(sender, instance, **kwargs):
+    # Cascades (a deleted memo or IOM), the API and the admin bypass approval_inbox.delete_steps().
+    release_inbox_entries([instance.pk])
+
+
+@receiver(post_save, sender=ApprovalStep)
+def approval_step_saved(sender, instance, **kwargs):
+    # Steps saved outside the tracked transitions (admin, API updates): rebuild the object's tally.
+    if getattr(instance, '_approval_progress_tracked', False):
+        return
+    ApprovalProgress.recount(instance.content_type_id, instance.object_id)
+    refresh_approval_inbox([instance.pk])
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Group members see the group's pending steps in their approval inbox.
+    if action == 'pre_clear' and isinstance(instance, Group):
+        instance._inbox_cleared_member_ids = list(instance.user_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, Group): # group.user_set changed
+        user_ids = pk_set if action != 'post_clear' else getattr(instance, '_inbox_cleared_member_ids', [])
+    else: # user.groups changed
+        user_ids = [instance.pk]
+    refresh_user_inboxes(user_ids)
+
+
+# Spend rollups: refresh the days a change touches once it commits (see procurement.spend_rollups).
+
+@receiver(post_save, sender=PurchaseOrder)
+def purchase_order_saved_spend(sender, instance, created, **kwargs):
+    previous_status = None if created else instance.previous('status')
+    if instance.status not in COMMITTED_PO_STATUSES and previous_status not in COMMITTED_PO_STATUSES:
+        return # Neither counted before nor now
+    days = {instance.order_date, None if created else instance.previous('order_date')}
+    if not created and any(instance.has_changed(name) for name in ('vendor', 'currency', 'internal_office_memo')):
+        # Check requests of this PO are keyed by its vendor/department/project too.
+        for check_request in CheckRequest.objects.filter(purchase_order=instance).only('request_date', 'payment_date'):
+            days |= check_request_days(check_request)
+    schedule_spend_rollup_refresh(days)
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+def purchase_order_deleted_spend(sender, instance, **kwargs):
+    if instance.status in COMMITTED_PO_STATUSES:
+        schedule_spend_rollup_refresh({instance.order_date})
+
+
+# No post_delete receiver for lines: it would stop line deletes from being fast (bulk) deletes.
+# PurchaseOrderSerializer re-saves the PO after replacing lines, which refreshes its day.
+@receiver(post_save, sender=OrderItem)
+def order_item_saved_spend(sender, instance, **kwargs):
+    order = PurchaseOrder.objects.filter(pk=instance.purchase_order_id).values('order_date', 'status').first()
+    if order and order['status'] in COMMITTED_PO_STATUSES:
+        schedule_spend_rollup_refresh({order['order_date']})
+
+
+@receiver(post_save, sender=CheckRequest)
+def check_request_saved_spend(sender, instance, created, **kwargs):
+    previous_status = None if created else instance.previous('status')
+    if instance.status not in SPEND_CHECK_REQUEST_STATUSES and previous_status not in SPEND_CHECK_REQUEST_STATUSES:
+        return
+    days = check_request_days(instance)
+    if not created:
+        days.add(instance.previous('payment_date'))
+    schedule_spend_rollup_refresh(days)
+
+
+@receiver(post_delete, sender=CheckRequest)
+def check_request_deleted_spend(sender, instance, **kwargs):
+    if instance.status in SPEND_CHECK_REQUEST_STATUSES:
+        schedule_spend_rollup_refresh(check_request_days(instance))
+
+
+# Vendor scorecards: recompute the vendors a change touches once it commits (see procurement.vendor_scorecards).
+# Lines and check requests pass their PO, resolved to its vendor by the refresh itself.
+
+@receiver(post_save, sender=PurchaseOrder)
+def purchase_order_saved_scorecard(sender, instance, created, **kwargs):
+    previous_status = None if created else instance.previous('status')
+    if instance.status not in COMMITTED_PO_STATUSES and previous_status not in COMMITTED_PO_STATUSES:
+        return
+    schedule_vendor_scorecard_refresh(vendor_ids={instance.vendor_id, None if created else instance.previous('vendor')})
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+def purchase_order_deleted_scorecard(sender, instance, **kwargs):
+    if instance.status in COMMITTED_PO_STATUSES:
+        schedule_vendor_scorecard_refresh(vendor_ids={instance.vendor_id})
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_save, sender=CheckRequest)
+@receiver(post_delete, sender=CheckRequest)
+def purchase_order_detail_changed_scorecard(sender, instance, **kwargs):
+    schedule_vendor_scorecard_refresh(purchase_order_ids={instance.purchase_order_id})
+
+
+@receiver(post_save, sender=PurchaseOrder)
+def purchase_order_vendor_changed(sender, instance, created, **kwargs):
+    # CheckRequest.vendor is a copy of its PO's vendor (duplicate invoice lookups).
+    if not created and instance.has_changed('vendor'):
+        CheckRequest.objects.filter(purchase_order=instance).update(vendor=instance.vendor_id)
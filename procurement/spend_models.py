@@ -0,0 +1,54 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SpendRollup(models.Model):
+    """
+    Daily spend totals per (department, project, GL account, vendor, currency), maintained by
+    procurement.spend_rollups. Any key part may be null when the source record doesn't carry it.
+
+    committed: gross amount and number of PO lines on issued POs, by order date. Lines, not POs:
+               a PO whose lines use several GL accounts appears in several rows.
+    spend: check requests approved for payment or later, by request date.
+    paid: paid check requests, by payment date.
+    """
+    day = models.DateField(_("Day"))
+    department = models.ForeignKey('procurement.Department', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    project = models.ForeignKey('procurement.Project', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    gl_account = models.ForeignKey('procurement.GLAccount', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    vendor = models.ForeignKey('assets.Vendor', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    currency = models.CharField(_("Currency"), max_length=3)
+    committed_amount = models.DecimalField(_("Committed Amount"), max_digits=16, decimal_places=2, default=0)
+    committed_line_count = models.PositiveIntegerField(_("Purchase Order Lines"), default=0)
+    spend_amount = models.DecimalField(_("Spend Amount"), max_digits=16, decimal_places=2, default=0)
+    spend_count = models.PositiveIntegerField(_("Check Requests"), default=0)
+    paid_amount = models.DecimalField(_("Paid Amount"), max_digits=16, decimal_places=2, default=0)
+    paid_count = models.PositiveIntegerField(_("Paid Check Requests"), default=0)
+
+    class Meta:
+        verbose_name = _("Spend Rollup")
+        verbose_name_plural = _("Spend Rollups")
+        ordering = ['day']
+        indexes = [
+            models.Index(fields=['day'], name='proc_spend_day_idx'),
+            models.Index(fields=['department', 'day'], name='proc_spend_dept_day_idx'),
+            models.Index(fields=['vendor', 'day'], name='proc_spend_vendor_day_idx'),
+            models.Index(fields=['gl_account', 'day'], name='proc_spend_gl_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.currency}: committed {self.committed_amount}, spend {self.spend_amount}, paid {self.paid_amount}"
+
+
+class SpendRollupDay(models.Model):
+    """One row per day that has rollups; locked while that day's rollups are recomputed."""
+    day = models.DateField(_("Day"), unique=True)
+    refreshed_at = models.DateTimeField(_("Refreshed At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Spend Rollup Day")
+        verbose_name_plural = _("Spend Rollup Days")
+        ordering = ['day']
+
+    def __str__(self):
+        return f"{self.day} (refreshed {self.refreshed_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,217 @@
+"""
+Daily spend rollups (SpendRollup) for dashboards.
+
+Rows are keyed by (day, department, project, GL account, vendor, currency) and hold three
+measures, each with a count:
+
+    committed  gross amount of PO lines on issued POs (COMMITTED_PO_STATUSES), by order date;
+               department/project come from the PO's purchase request memo, GL account from the line.
+               Its count is of lines (committed_line_count), which add up across rows; a count
+               of distinct POs would not, as one PO's lines can fall under several GL accounts
+    spend      check requests approved for payment or later (SPEND_CHECK_REQUEST_STATUSES), by request date
+    paid       paid check requests, by payment date
+
+Check requests take department/project/vendor from their PO and, for recurring payments,
+vendor and GL account from the recurring payment.
+
+Maintenance works per day: refresh_spend_rollups(days) recomputes those days from the source
+tables with three grouped queries and replaces their rows, holding the SpendRollupDay rows as
+locks so concurrent refreshes of a day don't interleave. Saves and deletes of POs and check
+requests, and saves of order lines, schedule a refresh of the days they touch (old and new date)
+after commit (procurement.signals); bulk writes call schedule_spend_rollup_refresh() themselves. The
+rebuild_spend_rollups command recomputes history a chunk of days at a time.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+COMMITTED_PO_STATUSES = ('approved', 'partially_received', 'fully_received', 'invoiced', 'paid')
+SPEND_CHECK_REQUEST_STATUSES = ('approved', 'payment_processing', 'paid')
+
+REBUILD_CHUNK_DAYS = 31  # Days recomputed per transaction by rebuild_spend_rollups()
+
+_KEY_FIELDS = ('key_day', 'key_department', 'key_project', 'key_gl_account', 'key_vendor', 'key_currency')
+
+
+def _committed_rows(days):
+    from .models import OrderItem
+    return OrderItem.objects.filter(
+        purchase_order__order_date__in=days, purchase_order__status__in=COMMITTED_PO_STATUSES,
+    ).order_by().values(
+        key_day=F('purchase_order__order_date'),
+        key_department=F('purchase_order__internal_office_memo__department'),
+        key_project=F('purchase_order__internal_office_memo__project'),
+        key_gl_account=F('gl_account'),
+        key_vendor=F('purchase_order__vendor'),
+        key_currency=F('purchase_order__currency'),
+    ).annotate(amount=Sum('gross_amount'), count=Count('pk'))
+
+
+def _check_request_rows(queryset, day_expression):
+    return queryset.order_by().values(
+        key_day=day_expression,
+        key_department=F('purchase_order__internal_office_memo__department'),
+        key_project=F('purchase_order__internal_office_memo__project'),
+        key_gl_account=F('recurring_payment__gl_account'),
+        key_vendor=Coalesce('purchase_order__vendor', 'recurring_payment__vendor'),
+        key_currency=F('currency'),
+    ).annotate(amount=Sum('amount'), count=Count('pk'))
+
+
+def build_spend_rollups(days):
+    """Computes (without saving) the SpendRollup rows of the given days from the source tables."""
+    from .models import CheckRequest, SpendRollup
+    days = list(days)
+    measures = (
+        ('committed', 'committed_line_count', _committed_rows(days)),
+        ('spend', 'spend_count', _check_request_rows(
+            CheckRequest.objects.filter(
+                request_date__date__in=days, status__in=SPEND_CHECK_REQUEST_STATUSES,
+            ),
+            TruncDate('request_date'),
+        )),
+        ('paid', 'paid_count', _check_request_rows(
+            CheckRequest.objects.filter(payment_date__in=days, status='paid'),
+            F('payment_date'),
+        )),
+    )
+    buckets = defaultdict(dict)
+    for measure, count_field, rows in measures:
+        for row in rows:
+            values = buckets[tuple(row[field] for field in _KEY_FIELDS)]
+            values[f'{measure}_amount'] = values.get(f'{measure}_amount', Decimal('0')) + (row['amount'] or 0)
+            values[count_field] = values.get(count_field, 0) + row['count']
+
+    return [
+        SpendRollup(
+            day=day, department_id=department_id, project_id=project_id, gl_account_id=gl_account_id,
+            vendor_id=vendor_id, currency=currency, **values,
+        )
+        for (day, department_id, project_id, gl_account_id, vendor_id, currency), values in buckets.items()
+    ]
+
+
+def _as_days(values):
+    # PurchaseOrder.order_date defaults to timezone.now, so an unsaved/just-created PO holds a datetime.
+    return {
+        timezone.localdate(value) if isinstance(value, datetime.datetime) else value
+        for value in values if value is not None
+    }
+
+
+def refresh_spend_rollups(days):
+    """Recomputes the rollups of the given days. Returns the number of rollup rows written."""
+    from .models import SpendRollup, SpendRollupDay
+    days = sorted(_as_days(days))
+    if not days:
+        return 0
+    with transaction.atomic():
+        SpendRollupDay.objects.bulk_create([SpendRollupDay(day=day) for day in days], ignore_conflicts=True)
+        list(SpendRollupDay.objects.select_for_update().filter(day__in=days).order_by('day'))
+        SpendRollup.objects.filter(day__in=days).delete()
+        rollups = SpendRollup.objects.bulk_create(build_spend_rollups(days), batch_size=1000)
+        SpendRollupDay.objects.filter(day__in=days).update(refreshed_at=timezone.now())
+    return len(rollups)
+
+
+def schedule_spend_rollup_refresh(days):
+    """Refreshes the rollups of `days` once the current transaction commits (right away outside one)."""
+    days = _as_days(days)
+    if days:
+        transaction.on_commit(partial(refresh_spend_rollups, days))
+
+
+def check_request_days(check_request):
+    """Rollup days a check request contributes to (request date and payment date)."""
+    return _as_days([check_request.request_date, check_request.payment_date])
+
+
+def rebuild_spend_rollups(date_from=None, date_to=None, chunk_days=REBUILD_CHUNK_DAYS):
+    """
+    Recomputes every rollup between date_from and date_to (default: the full span of POs and
+    check requests), chunk_days days per transaction. Returns (days processed, rows written).
+    """
+    from .models import CheckRequest, PurchaseOrder, SpendRollup, SpendRollupDay
+    full_span = date_from is None and date_to is None
+    if date_from is None or date_to is None:
+        bounds = [
+            PurchaseOrder.objects.order_by('order_date').values_list('order_date', flat=True).first(),
+            PurchaseOrder.objects.order_by('-order_date').values_list('order_date', flat=True).first(),
+            CheckRequest.objects.order_by('request_date').values_list('request_date', flat=True).first(),
+            CheckRequest.objects.order_by('-request_date').values_list('request_date', flat=True).first(),
+            CheckRequest.objects.exclude(payment_date=None).order_by('payment_date').values_list('payment_date', flat=True).first(),
+            CheckRequest.objects.exclude(payment_date=None).order_by('-payment_date').values_list('payment_date', flat=True).first(),
+        ]
+        bounds = [
+            timezone.localdate(bound) if isinstance(bound, datetime.datetime) else bound
+            for bound in bounds if bound is not None
+        ]
+        if not bounds:
+            if full_span:
+                SpendRollup.objects.all().delete()
+                SpendRollupDay.objects.all().delete()
+            return 0, 0
+        date_from = date_from or min(bounds)
+        date_to = date_to or max(bounds)
+
+    if full_span:
+        # Days outside the source data (all their records were deleted) have no spend left.
+        SpendRollup.objects.exclude(day__range=(date_from, date_to)).delete()
+        SpendRollupDay.objects.exclude(day__range=(date_from, date_to)).delete()
+
+    days_processed = rows_written = 0
+    start = date_from
+    while start <= date_to:
+        end = min(start + datetime.timedelta(days=chunk_days - 1), date_to)
+        days = [start + datetime.timedelta(days=offset) for offset in range((end - start).days + 1)]
+        rows_written += refresh_spend_rollups(days)
+        days_processed += len(days)
+        start = end + datetime.timedelta(days=1)
+    return days_processed, rows_written
+
+
+# group_by name -> rollup lookup (and the name column shown with it)
+SPEND_SUMMARY_GROUPS = {
+    'day': ('day', None),
+    'month': ('month', None),
+    'department': ('department', 'department__name'),
+    'project': ('project', 'project__name'),
+    'gl_account': ('gl_account', 'gl_account__account_code'),
+    'vendor': ('vendor', 'vendor__name'),
+}
+SPEND_SUMMARY_FILTERS = ('department', 'project', 'gl_account', 'vendor', 'currency')
+
+
+def summarize_spend(group_by=(), date_from=None, date_to=None, **filters):
+    """
+    Sums the rollups between date_from and date_to (inclusive), grouped by the SPEND_SUMMARY_GROUPS
+    in `group_by` and always by currency. `filters` narrow on SPEND_SUMMARY_FILTERS (ids / currency code).
+    """
+    from .models import SpendRollup
+    queryset = SpendRollup.objects.order_by()
+    if date_from:
+        queryset = queryset.filter(day__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(day__lte=date_to)
+    queryset = queryset.filter(**{name: value for name, value in filters.items() if value not in (None, '')})
+    if 'month' in group_by:
+        queryset = queryset.annotate(month=TruncMonth('day'))
+
+    columns = []
+    for name in group_by:
+        lookup, label = SPEND_SUMMARY_GROUPS[name]
+        columns.append(lookup)
+        if label:
+            columns.append(label)
+    columns.append('currency')
+    return queryset.values(*columns).annotate(
+        committed_amount=Sum('committed_amount'), committed_line_count=Sum('committed_line_count'),
+        spend_amount=Sum('spend_amount'), spend_count=Sum('spend_count'),
+        paid_amount=Sum('paid_amount'), paid_count=Sum('paid_count'),
+    ).order_by(*columns)
@@ -2,8 +2,12 @@ from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient, APITestCase # Using APITestCase for full DRF test setup
 from rest_framework import status
+import csv
 import datetime
+import io
 import json # For JSON string in multipart data
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from procurement.models import (
     PurchaseRequestMemo, PurchaseOrder, OrderItem, CheckRequest,
@@ -328,5 +332,105 @@ class ProcurementAPITestCase(APITestCase): # Inherit from APITestCase
         self.assertEqual(response_cancel.status_code, status.HTTP_200_OK, response_cancel.data)
         self.assertEqual(response_cancel.data['status'], 'cancelled')
 
+    def _export(self, export_format=None):
+        url = '/api/procurement/purchase-orders/export/'
+        response = self.client.get(url, {'export_format': export_format} if export_format else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_export_purchase_orders_streams_one_row_per_line(self):
+        po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user, currency='KES')
+        OrderItem.objects.create(purchase_order=po, item_description='Desk, oak', quantity=2, unit_price='150.00', gl_account=self.gl_account)
+        OrderItem.objects.create(purchase_order=po, item_description='Chair', quantity=4, unit_price='45.50', tax_rate='16.00')
+        empty_po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
+
+        response, content = self._export()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment;', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([(row['po_number'], row['item_description']) for row in rows], [
+            (po.po_number, 'Desk, oak'), (po.po_number, 'Chair'), (empty_po.po_number, ''),
+        ])
+        self.assertEqual(rows[0]['gl_account'], 'API6000')
+        self.assertEqual(rows[1]['gross_amount'], '211.12')
+        self.assertEqual(rows[1]['vendor'], 'API Vendor')
+
+        response, content = self._export('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[1]['unit_price'], '45.50')
+        self.assertIsNone(lines[2]['line_id'])
+
+    def test_export_purchase_orders_query_count_is_flat(self):
+        for i in range(3):
+            po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
+            for j in range(5):
+                OrderItem.objects.create(purchase_order=po, item_description=f'Line {i}.{j}', quantity=1, unit_price='1.00')
+        with CaptureQueriesContext(connection) as queries:
+            _, content = self._export()
+        self.assertEqual(len(content.splitlines()), 16)
+        self.assertEqual(len([q for q in queries.captured_queries if 'procurement_orderitem' in q['sql']]), 1)
+
+    def test_export_purchase_orders_rejects_unknown_format(self):
+        response = self.client.get('/api/procurement/purchase-orders/export/', {'export_format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def _payment_run(self, rows, **data):
+        content = "cr_id,transaction_id,payment_method,payment_date,status\n" + "".join(f"{row}\n" for row in rows)
+        payment_file = SimpleUploadedFile("payment_run.csv", content.encode(), "text/csv")
+        return self.client.post('/api/procurement/check-requests/payment-run/', {'file': payment_file, **data}, format='multipart')
+
+    def test_payment_run_applies_valid_rows_and_reports_each_row(self):
+        po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
+        approved, processing, to_process, pending = [
+            CheckRequest.objects.create(purchase_order=po, requested_by=self.user, amount=100, status=cr_status)
+            for cr_status in ('approved', 'payment_processing', 'approved', 'pending_approval')
+        ]
+        rows = [
+            f"{approved.cr_id},TRX-1,ach,2026-01-15,",
+            f"{processing.cr_id},TRX-2,wire,,paid",
+            f"{to_process.cr_id},,,,payment_processing",
+            f"{pending.cr_id},TRX-4,ach,2026-01-15,paid", # Not approved yet
+            f"{approved.cr_id},TRX-5,ach,2026-01-15,paid", # Duplicate
+            "CR-ZZ-9999,TRX-6,ach,2026-01-15,paid", # Unknown
+            f"{to_process.cr_id}X,TRX-7,bitcoin,2026-01-15,paid",
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self._payment_run(rows)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual((response.data['processed'], response.data['failed']), (3, 4))
+        self.assertEqual(
+            [(result['row'], result['status']) for result in response.data['results']],
+            [(2, 'paid'), (3, 'paid'), (4, 'payment_processing'), (5, 'error'), (6, 'error'), (7, 'error'), (8, 'error')]
+        )
+        self.assertIn('appears more than once', response.data['results'][4]['error'])
+        # One locking read and one batched UPDATE for the whole chunk
+        self.assertEqual(len([q for q in queries.captured_queries if q['sql'].startswith('UPDATE "procurement_checkrequest"')]), 1)
+
+        approved.refresh_from_db()
+        processing.refresh_from_db()
+        to_process.refresh_from_db()
+        pending.refresh_from_db()
+        self.assertEqual((approved.status, approved.transaction_id, approved.payment_method), ('paid', 'TRX-1', 'ach'))
+        self.assertEqual(str(approved.payment_date), '2026-01-15')
+        self.assertEqual(processing.payment_date, datetime.date.today())
+        self.assertEqual(to_process.status, 'payment_processing')
+        self.assertEqual(pending.status, 'pending_approval')
+
+    def test_payment_run_dry_run_and_file_errors(self):
+        po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
+        cr = CheckRequest.objects.create(purchase_order=po, requested_by=self.user, amount=100, status='approved')
+        response = self._payment_run([f"{cr.cr_id},TRX-1,ach,2026-01-15,paid"], dry_run='true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['processed'], 1)
+        cr.refresh_from_db()
+        self.assertEqual(cr.status, 'approved')
+
+        bad_file = SimpleUploadedFile("payment_run.csv", b"cr_id,amount\nCR-AA-0001,10\n", "text/csv")
+        response = self.client.post('/api/procurement/check-requests/payment-run/', {'file': bad_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('transaction_id', response.data['error'])
+
     # TODO: Add tests for ApprovalRuleViewSet and ApprovalStepViewSet (listing, creating if allowed, actions)
     # These will require more setup for rules and steps.
@@ -0,0 +1,157 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from procurement.approval_escalation import escalate_overdue_steps
+from procurement.approval_rule_index import invalidate_approval_rule_index
+from procurement.models import ApprovalEscalation, ApprovalInboxEntry, ApprovalStep, PurchaseRequestMemo
+from workflows.models import ApprovalRequest, ApprovalStep as WorkflowStep
+
+User = get_user_model()
+
+
+@override_settings(APPROVAL_ESCALATION_GROUP='', APPROVAL_ESCALATION_REMINDER_HOURS=24, APPROVAL_ESCALATION_MAX=2)
+class ApprovalEscalationTestCase(APITestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.requester = User.objects.create_user(username='esc_requester', password='password123')
+        self.approver = User.objects.create_user(username='esc_approver', password='password123', email='approver@example.com')
+        self.desk_member = User.objects.create_user(username='esc_desk', password='password123', email='desk@example.com')
+        self.desk = Group.objects.create(name='Escalation Desk')
+        self.desk_member.groups.add(self.desk)
+        self.memo = PurchaseRequestMemo.objects.create(
+            item_description='Escalated', quantity=1, reason='Escalation', requested_by=self.requester,
+        )
+        self.memo_type = ContentType.objects.get_for_model(PurchaseRequestMemo)
+
+    def tearDown(self):
+        invalidate_approval_rule_index()
+
+    def _step(self, hours_overdue, status='pending', approver=None):
+        return ApprovalStep.objects.create(
+            content_type=self.memo_type, object_id=self.memo.pk, step_order=1, status=status,
+            assigned_approver_user=approver or self.approver, due_at=self.now - datetime.timedelta(hours=hours_overdue),
+        )
+
+    def _workflow_step(self, request, order, approver, hours_overdue):
+        return WorkflowStep.objects.create(
+            approval_request=request, step_order=order, approver=approver,
+            due_at=self.now - datetime.timedelta(hours=hours_overdue),
+        )
+
+    def test_new_steps_get_a_due_time(self):
+        step = ApprovalStep.objects.create(content_type=self.memo_type, object_id=self.memo.pk, step_order=1)
+        self.assertAlmostEqual(step.due_at - step.created_at, datetime.timedelta(hours=72), delta=datetime.timedelta(minutes=1))
+
+    @override_settings(APPROVAL_ESCALATION_GROUP='Escalation Desk')
+    def test_reassigns_to_fallback_group_then_reminds_until_max(self):
+        overdue = self._step(hours_overdue=5)
+        not_due = self._step(hours_overdue=-5)
+        decided = self._step(hours_overdue=5, status='approved')
+        mail.outbox = [] # Step creation notifications
+
+        totals = escalate_overdue_steps(now=self.now)
+        self.assertEqual(totals, {'reassigned': 1, 'reminded': 0, 'notified': 1})
+        overdue.refresh_from_db()
+        self.assertEqual((overdue.assigned_approver_user, overdue.assigned_approver_group), (None, self.desk))
+        self.assertEqual(overdue.original_assigned_approver_user, self.approver) # Can still decide it
+        self.assertEqual((overdue.escalation_count, overdue.due_at), (1, self.now + datetime.timedelta(hours=24)))
+        self.assertEqual(
+            set(ApprovalInboxEntry.objects.filter(step=overdue).values_list('user', flat=True)),
+            {self.approver.pk, self.desk_member.pk},
+        )
+        self.assertEqual([message.to for message in mail.outbox], [['desk@example.com']])
+        record = ApprovalEscalation.objects.get()
+        self.assertEqual((record.step_id, record.action, record.level, record.approver_user, record.reassigned_to_group),
+                         (overdue.pk, 'reassigned', 1, self.approver, self.desk))
+
+        # The group is reminded of the first step (its last escalation with APPROVAL_ESCALATION_MAX=2)
+        # and the second step, now overdue too, is reassigned: one email for both.
+        later = self.now + datetime.timedelta(hours=25)
+        mail.outbox = []
+        self.assertEqual(escalate_overdue_steps(now=later), {'reassigned': 1, 'reminded': 1, 'notified': 1})
+        self.assertIn('2 step(s)', mail.outbox[0].subject)
+        overdue.refresh_from_db()
+        self.assertEqual((overdue.escalation_count, overdue.due_at), (2, None))
+        self.assertEqual(escalate_overdue_steps(now=later + datetime.timedelta(days=30))['reminded'], 1) # not_due's second
+        self.assertEqual(escalate_overdue_steps(now=later + datetime.timedelta(days=60))['reminded'], 0)
+        decided.refresh_from_db()
+        self.assertEqual(decided.escalation_count, 0)
+        self.assertEqual(ApprovalEscalation.objects.filter(step_id=not_due.pk).count(), 2)
+
+    @override_settings(APPROVAL_ESCALATION_GROUP='Escalation Desk')
+    def test_group_and_delegated_steps_move_to_the_fallback_group(self):
+        reviewers = Group.objects.create(name='Escalation Reviewers')
+        reviewer = User.objects.create_user(username='esc_reviewer', password='password123')
+        reviewer.groups.add(reviewers)
+        delegate = User.objects.create_user(username='esc_delegate', password='password123')
+        group_step = ApprovalStep.objects.create(
+            content_type=self.memo_type, object_id=self.memo.pk, step_order=1, assigned_approver_group=reviewers,
+            due_at=self.now - datetime.timedelta(hours=2),
+        )
+        delegated_step = ApprovalStep.objects.create(
+            content_type=self.memo_type, object_id=self.memo.pk, step_order=2, status='delegated',
+            assigned_approver_user=delegate, original_assigned_approver_user=self.approver,
+            due_at=self.now - datetime.timedelta(hours=1),
+        )
+
+        self.assertEqual(escalate_overdue_steps(now=self.now)['reassigned'], 2)
+        group_step.refresh_from_db()
+        self.assertEqual(
+            (group_step.assigned_approver_user, group_step.assigned_approver_group, group_step.original_assigned_approver_user),
+            (None, self.desk, None),
+        )
+        self.assertEqual(list(ApprovalInboxEntry.objects.filter(step=group_step).values_list('user', flat=True)), [self.desk_member.pk])
+        delegated_step.refresh_from_db()
+        self.assertEqual(delegated_step.original_assigned_approver_user, self.approver) # The delegator, not the delegate
+        self.assertEqual(
+            set(ApprovalInboxEntry.objects.filter(step=delegated_step).values_list('user', flat=True)),
+            {self.approver.pk, self.desk_member.pk},
+        )
+
+    def test_workflow_steps_are_reminded_once_per_approver(self):
+        request = ApprovalRequest.objects.create(
+            title='Change', content_type=self.memo_type, object_id=self.memo.pk, initiated_by=self.requester,
+        )
+        self._workflow_step(request, 1, self.approver, hours_overdue=3)
+        self._workflow_step(request, 2, self.approver, hours_overdue=2)
+        self._step(hours_overdue=1)
+        mail.outbox = []
+
+        out = StringIO()
+        call_command('escalate_approval_steps', '--batch-size', '1', stdout=out)
+        self.assertIn('0 steps reassigned, 3 reminded, 1 approvers notified', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('3 step(s)', mail.outbox[0].subject)
+        self.assertEqual(
+            list(WorkflowStep.objects.order_by('step_order').values_list('escalation_count', flat=True)), [1, 1]
+        )
+        workflow_type = ContentType.objects.get_for_model(WorkflowStep)
+        self.assertEqual(ApprovalEscalation.objects.filter(step_type=workflow_type, action='reminded').count(), 2)
+
+    @override_settings(APPROVAL_ESCALATION_GROUP='Escalation Desk')
+    def test_query_count_does_not_grow_with_overdue_steps(self):
+        def run(count):
+            approvers = [
+                User.objects.create_user(username=f'esc_{count}_{i}', password='password123', email=f'{count}_{i}@example.com')
+                for i in range(count)
+            ]
+            for approver in approvers:
+                self._step(hours_overdue=1, approver=approver)
+            with CaptureQueriesContext(connection) as queries:
+                totals = escalate_overdue_steps(now=self.now)
+            self.assertEqual(totals['reassigned'], count)
+            return len(queries)
+
+        run(1) # Caches the content types
+        self.assertEqual(run(2), run(20))
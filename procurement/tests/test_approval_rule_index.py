@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import TestCase
+
+from generic_iom.models import IOMCategory, IOMTemplate
+from procurement.approval_rule_index import (
+    APPROVAL_RULE_INDEX_VERSION, get_approval_rule_index, invalidate_approval_rule_index,
+)
+from procurement.models import ApprovalRule, CacheVersion, Department, Project
+
+User = get_user_model()
+
+
+class ApprovalRuleIndexTestCase(TestCase):
+    def setUp(self):
+        invalidate_approval_rule_index()
+        self.approver = User.objects.create_user(username='index_approver', password='password123')
+        self.dept1 = Department.objects.create(name='Index Dept 1', department_code='IX1')
+        self.dept2 = Department.objects.create(name='Index Dept 2', department_code='IX2')
+        self.proj1 = Project.objects.create(name='Index Project 1', project_code='IXP1')
+
+        self.any_rule = ApprovalRule.objects.create(name='Any amount', order=30, approver_user=self.approver)
+        self.small_rule = ApprovalRule.objects.create(name='Up to 1000', order=10, max_amount=Decimal('1000'), approver_user=self.approver)
+        self.large_rule = ApprovalRule.objects.create(name='Over 1000', order=20, min_amount=Decimal('1000.01'), approver_user=self.approver)
+        self.dept_rule = ApprovalRule.objects.create(name='Dept 1 only', order=5, applies_to_all_departments=False, approver_user=self.approver)
+        self.dept_rule.departments.add(self.dept1)
+        self.project_rule = ApprovalRule.objects.create(name='Project 1 only', order=40, applies_to_all_projects=False, approver_user=self.approver)
+        self.project_rule.projects.add(self.proj1)
+        ApprovalRule.objects.create(name='Inactive', order=1, is_active=False, approver_user=self.approver)
+
+    def tearDown(self):
+        # Rules created here are rolled back without signals; don't leak the index into other tests.
+        invalidate_approval_rule_index()
+
+    def _build(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return get_approval_rule_index()
+
+    def test_matches_amount_department_and_project(self):
+        index = self._build()
+        self.assertEqual(
+            index.match_procurement_memo(Decimal('500'), self.dept1.pk, None),
+            [self.dept_rule, self.small_rule, self.any_rule],
+        )
+        self.assertEqual(
+            index.match_procurement_memo(Decimal('5000'), self.dept2.pk, self.proj1.pk),
+            [self.large_rule, self.any_rule, self.project_rule],
+        )
+        # Amount-bounded rules never apply without an estimated cost.
+        self.assertEqual(index.match_procurement_memo(None, None, None), [self.any_rule])
+
+    def test_built_index_is_reused_after_a_version_check(self):
+        self._build()
+        with self.assertNumQueries(1): # The CacheVersion row
+            get_approval_rule_index().match_procurement_memo(Decimal('500'), self.dept1.pk, None)
+
+    def test_version_bumped_by_another_process_rebuilds_index(self):
+        self._build()
+        # Another process saved the rule: its row and the version change, this process' memory does not.
+        ApprovalRule.objects.filter(pk=self.small_rule.pk).update(max_amount=Decimal('100'))
+        CacheVersion.objects.filter(name=APPROVAL_RULE_INDEX_VERSION).update(version=F('version') + 1)
+        self.assertNotIn(self.small_rule, self._build().match_procurement_memo(Decimal('500'), None, None))
+
+    def test_rule_and_membership_changes_invalidate_index(self):
+        self._build()
+        self.small_rule.max_amount = Decimal('100')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.small_rule.save()
+        self.assertNotIn(self.small_rule, self._build().match_procurement_memo(Decimal('500'), None, None))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dept_rule.departments.add(self.dept2)
+        self.assertIn(self.dept_rule, self._build().match_procurement_memo(Decimal('500'), self.dept2.pk, None))
+
+    def test_generic_iom_rules_match_template_or_category_once(self):
+        category = IOMCategory.objects.create(name='Index Category')
+        template = IOMTemplate.objects.create(name='Index Template', category=category, fields_definition=[], created_by=self.approver)
+        rule = ApprovalRule.objects.create(name='Template rule', rule_type='generic_iom', order=2, approver_user=self.approver)
+        rule.applicable_iom_templates.add(template)
+        rule.applicable_iom_categories.add(category)
+        category_rule = ApprovalRule.objects.create(name='Category rule', rule_type='generic_iom', order=1, approver_user=self.approver)
+        category_rule.applicable_iom_categories.add(category)
+
+        index = self._build()
+        self.assertEqual(index.match_generic_iom(template.pk, category.pk), [category_rule, rule])
+        self.assertEqual(index.match_generic_iom(template.pk, None), [rule])
+        self.assertEqual(index.match_procurement_memo(Decimal('500'), None, None), [self.small_rule, self.any_rule])
@@ -0,0 +1,127 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from generic_iom.models import GenericIOM, IOMCategory, IOMTemplate
+from procurement.approval_rule_index import get_approval_rule_index, invalidate_approval_rule_index
+from procurement.approval_simulation import simulate_approval_rules
+from procurement.models import ApprovalRule, ApprovalStep, Department, Project, PurchaseRequestMemo
+
+User = get_user_model()
+
+URL = '/api/procurement/approval-rules/simulate/'
+
+
+class ApprovalSimulationTestCase(APITestCase):
+    def setUp(self):
+        invalidate_approval_rule_index()
+        self.user = User.objects.create_user(username='simulation_user', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.dept1 = Department.objects.create(name='Simulation Dept 1', department_code='SM1')
+        self.dept2 = Department.objects.create(name='Simulation Dept 2', department_code='SM2')
+        self.proj1 = Project.objects.create(name='Simulation Project', project_code='SMP1')
+
+        self.small_rule = ApprovalRule.objects.create(name='Up to 1000', order=10, max_amount=Decimal('1000'), approver_user=self.user)
+        self.large_rule = ApprovalRule.objects.create(name='Over 1000', order=20, min_amount=Decimal('1000.01'), approver_user=self.user)
+        self.dept_rule = ApprovalRule.objects.create(
+            name='Dept 1 over 500', order=30, min_amount=Decimal('500'), applies_to_all_departments=False, approver_user=self.user,
+        )
+        self.dept_rule.departments.add(self.dept1)
+        self.inactive_rule = ApprovalRule.objects.create(name='Inactive', order=5, is_active=False, approver_user=self.user)
+
+        for cost, department, project in [
+            (Decimal('200'), self.dept1, None), (Decimal('800'), self.dept1, self.proj1), (Decimal('800'), self.dept2, None),
+            (Decimal('1500'), self.dept1, None), (Decimal('4000'), self.dept2, self.proj1), (None, self.dept2, None),
+        ]:
+            PurchaseRequestMemo.objects.create(
+                item_description='Simulated', quantity=1, reason='Simulation', requested_by=self.user,
+                estimated_cost=cost, department=department, project=project,
+            )
+
+    def tearDown(self):
+        invalidate_approval_rule_index()
+
+    def _by_name(self, result):
+        return {rule['name']: rule for rule in result['rules']}
+
+    def test_threshold_change_counts_rerouted_memos_and_writes_nothing(self):
+        steps, rules = ApprovalStep.objects.count(), list(ApprovalRule.objects.values_list('pk', 'min_amount', 'max_amount'))
+        response = self.client.post(URL, {'rules': [
+            {'id': self.small_rule.pk, 'max_amount': '500.00'},
+            {'id': self.dept_rule.pk, 'applies_to_all_departments': True},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        result = self._by_name(response.data)
+        self.assertEqual(response.data['object_count'], 6)
+
+        small = result['Up to 1000']
+        self.assertEqual((small['change'], small['matched_before'], small['matched_after']), ('changed', 3, 1))
+        self.assertEqual((small['newly_matched'], small['newly_unmatched']), (0, 2))
+        dept = result['Dept 1 over 500']
+        self.assertEqual((dept['matched_before'], dept['matched_after'], dept['newly_matched']), (2, 4, 2))
+        self.assertEqual(result['Over 1000']['change'], 'unchanged')
+        # The memo without a cost matches no bounded rule either way.
+        self.assertEqual((response.data['unrouted_before'], response.data['unrouted_after']), (1, 1))
+
+        self.assertEqual(ApprovalStep.objects.count(), steps)
+        self.assertEqual(list(ApprovalRule.objects.values_list('pk', 'min_amount', 'max_amount')), rules)
+
+    def test_unchanged_rules_agree_with_the_rule_index(self):
+        rng = random.Random(7)
+        objects = [
+            {'estimated_cost': Decimal(rng.randrange(0, 300000)) / 100,
+             'department': rng.choice([self.dept1.pk, self.dept2.pk, None]),
+             'project': rng.choice([self.proj1.pk, None])}
+            for _ in range(300)
+        ]
+        objects += [{'estimated_cost': Decimal('1000'), 'department': None, 'project': None},
+                    {'estimated_cost': Decimal('1000.01'), 'department': None, 'project': None}]
+        result = simulate_approval_rules('procurement_memo', [], objects=objects)
+
+        index = get_approval_rule_index()
+        expected = {}
+        unrouted = 0
+        for obj in objects:
+            matched = index.match_procurement_memo(obj['estimated_cost'], obj['department'], obj['project'])
+            unrouted += not matched
+            for rule in matched:
+                expected[rule.name] = expected.get(rule.name, 0) + 1
+        self.assertEqual({rule['name']: rule['matched_before'] for rule in result['rules']}, expected)
+        self.assertEqual(result['unrouted_after'], unrouted)
+
+    def test_added_removed_and_reactivated_rules(self):
+        response = self.client.post(URL, {'rules': [
+            {'id': self.large_rule.pk, 'is_active': False},
+            {'id': self.inactive_rule.pk, 'is_active': True, 'min_amount': '3000.00'},
+            {'name': 'Project review', 'applies_to_all_projects': False, 'projects': [self.proj1.pk]},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        result = self._by_name(response.data)
+        self.assertEqual((result['Over 1000']['change'], result['Over 1000']['newly_unmatched']), ('removed', 2))
+        self.assertEqual((result['Inactive']['change'], result['Inactive']['matched_after']), ('added', 1))
+        self.assertEqual((result['Project review']['id'], result['Project review']['matched_after']), (None, 2))
+
+        response = self.client.post(URL, {'rules': [{'id': 999999, 'max_amount': '1.00'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_generic_iom_simulation(self):
+        category = IOMCategory.objects.create(name='Simulation Category')
+        other_category = IOMCategory.objects.create(name='Other Simulation Category')
+        template = IOMTemplate.objects.create(name='Simulation Template', category=category, fields_definition=[], created_by=self.user)
+        other = IOMTemplate.objects.create(name='Other Simulation Template', category=other_category, fields_definition=[], created_by=self.user)
+        rule = ApprovalRule.objects.create(name='Template rule', rule_type='generic_iom', approver_user=self.user)
+        rule.applicable_iom_templates.add(template)
+        for iom_template in (template, template, other):
+            GenericIOM.objects.create(iom_template=iom_template, subject='Simulated', created_by=self.user, data_payload={})
+        invalidate_approval_rule_index()
+
+        response = self.client.post(URL, {'rule_type': 'generic_iom', 'rules': [
+            {'id': rule.pk, 'applicable_iom_templates': [], 'applicable_iom_categories': [other_category.pk]},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        (result,) = response.data['rules']
+        self.assertEqual((result['matched_before'], result['newly_matched'], result['newly_unmatched']), (2, 1, 2))
+        self.assertEqual((response.data['unrouted_before'], response.data['unrouted_after']), (1, 2))
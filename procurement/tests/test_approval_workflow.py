@@ -1,16 +1,23 @@
 # procurement/tests/test_approval_workflow.py
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from procurement.models import (
-    PurchaseRequestMemo, ApprovalRule, ApprovalStep, ApprovalDelegation,
-    Department, Project
+    PurchaseRequestMemo, ApprovalRule, ApprovalStep, ApprovalDelegation, ApprovalProgress,
+    ApprovalInboxEntry, ApprovalInboxCounter, Department, Project
 )
+from procurement.approval_inbox import rebuild_approval_inbox
+from procurement.approval_rule_index import invalidate_approval_rule_index
+from procurement.id_allocator import id_allocator
+from procurement.signals import approval_steps_created
 # Assuming common_models Department, Project are used.
 # If not, adjust imports.
 
@@ -158,6 +165,31 @@ class ApprovalWorkflowTests(TestCase):
         self.assertEqual(steps[1].assigned_approver_group, self.approver_group1)
         self.assertEqual(steps[1].step_order, 20)
 
+    def test_iom_steps_bulk_inserted_with_one_batched_signal(self):
+        ApprovalRule.objects.all().delete()
+        for order in range(10, 60, 10):
+            ApprovalRule.objects.create(name=f'Rule Bulk {order}', order=order, approver_group=self.approver_group1)
+        iom = PurchaseRequestMemo(item_description='Bulk steps', quantity=1, reason='Bulk', estimated_cost=100, requested_by=self.requester_user)
+
+        received = []
+        handler = lambda sender, content_object, steps, **kwargs: received.append((content_object, steps))
+        approval_steps_created.connect(handler)
+        self.addCleanup(approval_steps_created.disconnect, handler)
+        # on_commit callbacks below share the rule index and an IM ID block that the test rollback discards
+        self.addCleanup(invalidate_approval_rule_index)
+        self.addCleanup(id_allocator.reset)
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            iom.save() # New draft triggers the workflow
+
+        step_inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "procurement_approvalstep"')]
+        self.assertEqual(len(step_inserts), 1)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0][0], iom)
+        self.assertEqual([step.rule_name_snapshot for step in received[0][1]], [f'Rule Bulk {order}' for order in range(10, 60, 10)])
+        self.assertEqual(iom.approval_steps.count(), 5)
+        self.assertEqual(iom.status, 'pending_approval')
+
     def test_iom_department_specific_rule(self):
         ApprovalRule.objects.all().delete()
         rule = ApprovalRule.objects.create(name='Dept Rule For Test', order=10, approver_user=self.approver_user1, applies_to_all_departments=False, min_amount=50, max_amount=150)
@@ -283,6 +315,108 @@ class ApprovalWorkflowTests(TestCase):
         iom.refresh_from_db()
         self.assertEqual(iom.status, 'approved')
 
+    def test_approval_progress_tracks_step_transitions(self):
+        ApprovalRule.objects.create(name='Rule 1', order=10, approver_user=self.approver_user1)
+        ApprovalRule.objects.create(name='Rule 2', order=20, approver_user=self.approver_user2)
+        ApprovalRule.objects.create(name='Rule 3', order=30, approver_group=self.approver_group1)
+        iom = self._create_iom(self.requester_user)
+        progress_lookup = {'content_type': ContentType.objects.get_for_model(iom), 'object_id': iom.pk}
+        steps = iom.approval_steps.order_by('step_order')
+
+        progress = ApprovalProgress.objects.get(**progress_lookup)
+        self.assertEqual((progress.pending_count, progress.approved_count), (3, 0))
+
+        self._action_step(self.approver_user1, steps[0].id, 'approve')
+        progress.refresh_from_db()
+        self.assertEqual((progress.pending_count, progress.approved_count), (2, 1))
+        self.assertFalse(progress.is_fully_approved)
+
+        self._action_step(self.approver_user2, steps[1].id, 'reject', {'comments': 'No'})
+        progress.refresh_from_db()
+        self.assertEqual(
+            (progress.pending_count, progress.approved_count, progress.rejected_count, progress.skipped_count),
+            (0, 1, 1, 1)
+        )
+
+    def test_approving_already_actioned_step_does_not_count_twice(self):
+        ApprovalRule.objects.create(name='Rule Group', order=10, approver_group=self.approver_group1)
+        ApprovalRule.objects.create(name='Rule 2', order=20, approver_user=self.approver_user2)
+        iom = self._create_iom(self.requester_user)
+        step = iom.approval_steps.get(step_order=10)
+
+        self.admin_user.groups.add(self.approver_group1) # Staff still see the step once it is approved
+
+        self.assertEqual(self._action_step(self.approver_user1, step.id, 'approve').status_code, status.HTTP_200_OK)
+        # A second decision on the same step (e.g. a racing group member) is refused after the locked re-read
+        self.assertEqual(self._action_step(self.admin_user, step.id, 'approve').status_code, status.HTTP_403_FORBIDDEN)
+
+        progress = ApprovalProgress.objects.get(content_type=ContentType.objects.get_for_model(iom), object_id=iom.pk)
+        self.assertEqual((progress.pending_count, progress.approved_count), (1, 1))
+        iom.refresh_from_db()
+        self.assertEqual(iom.status, 'pending_approval')
+
+    def _bulk_action(self, user, step_ids, decision, comments=''):
+        self.client.force_authenticate(user=user)
+        url = reverse('procurement:approval-step-bulk-action')
+        return self.client.post(url, {'step_ids': step_ids, 'decision': decision, 'comments': comments}, format='json')
+
+    def test_bulk_approve_reports_per_step_results(self):
+        ApprovalRule.objects.create(name='Rule 1', order=10, approver_user=self.approver_user1)
+        ApprovalRule.objects.create(name='Rule 2', order=20, approver_group=self.approver_group1)
+        ApprovalRule.objects.create(name='Rule 3', order=30, approver_user=self.approver_user2)
+        iom1 = self._create_iom(self.requester_user)
+        iom2 = self._create_iom(self.requester_user)
+        steps1 = list(iom1.approval_steps.order_by('step_order'))
+        steps2 = list(iom2.approval_steps.order_by('step_order'))
+
+        step_ids = [steps1[0].pk, steps1[1].pk, steps2[0].pk, steps2[2].pk, 999999]
+        response = self._bulk_action(self.approver_user1, step_ids, 'approve')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([r['status'] for r in response.data['results']], ['approved', 'approved', 'approved', 'error', 'error'])
+        self.assertEqual((response.data['processed'], response.data['failed']), (3, 2))
+
+        # approver_user2 finishes iom1 in a second batch, completing it
+        response = self._bulk_action(self.approver_user2, [steps1[2].pk], 'approve')
+        self.assertEqual(response.data['results'][0]['status'], 'approved')
+        iom1.refresh_from_db()
+        iom2.refresh_from_db()
+        self.assertEqual(iom1.status, 'approved')
+        self.assertEqual(iom2.status, 'pending_approval')
+        progress = ApprovalProgress.objects.get(content_type=ContentType.objects.get_for_model(iom2), object_id=iom2.pk)
+        self.assertEqual((progress.pending_count, progress.approved_count), (2, 1))
+
+    def test_bulk_reject_skips_remaining_steps_and_requires_comments(self):
+        ApprovalRule.objects.create(name='Rule 1', order=10, approver_user=self.approver_user1)
+        ApprovalRule.objects.create(name='Rule 2', order=20, approver_user=self.approver_user2)
+        iom = self._create_iom(self.requester_user)
+        steps = list(iom.approval_steps.order_by('step_order'))
+
+        self.assertEqual(self._bulk_action(self.approver_user1, [steps[0].pk], 'reject').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._bulk_action(self.approver_user1, [steps[0].pk], 'maybe', 'x').status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self._bulk_action(self.approver_user1, [steps[0].pk], 'reject', 'Over budget')
+        self.assertEqual(response.data['results'], [{'id': steps[0].pk, 'status': 'rejected'}])
+        iom.refresh_from_db()
+        steps[1].refresh_from_db()
+        self.assertEqual(iom.status, 'rejected')
+        self.assertEqual(steps[1].status, 'skipped')
+        self.assertFalse(ApprovalInboxEntry.objects.filter(step__in=steps).exists())
+
+    def test_bulk_action_queries_do_not_grow_with_steps(self):
+        for order in range(10, 90, 10):
+            ApprovalRule.objects.create(name=f'Rule {order}', order=order, approver_group=self.approver_group1)
+        iom = self._create_iom(self.requester_user)
+        step_ids = list(iom.approval_steps.order_by('step_order').values_list('pk', flat=True))
+
+        with CaptureQueriesContext(connection) as two_steps:
+            self._bulk_action(self.approver_user1, step_ids[:2], 'approve')
+        with CaptureQueriesContext(connection) as six_steps:
+            self._bulk_action(self.approver_user1, step_ids[2:], 'approve')
+        # Only the completing memo save is extra (savepoint, UPDATE, release)
+        self.assertEqual(len(six_steps), len(two_steps) + 3)
+        iom.refresh_from_db()
+        self.assertEqual(iom.status, 'approved')
+
     def test_reject_first_step_in_multi_step_rejects_iom(self):
         ApprovalRule.objects.create(name='Rule 1', order=10, approver_user=self.approver_user1)
         ApprovalRule.objects.create(name='Rule 2', order=20, approver_user=self.approver_user2)
@@ -404,6 +538,91 @@ class ApprovalWorkflowTests(TestCase):
         self.assertEqual(response.data['count'], 2, "Response data count should be 2 steps for admin.")
         self.assertEqual(len(response.data['results']), 2, "Response data results list should contain 2 steps for admin.")
 
+    def test_inbox_keyset_pagination_and_count(self):
+        ApprovalRule.objects.all().delete()
+        ApprovalRule.objects.create(name='Rule Inbox User', order=10, approver_user=self.approver_user1)
+        ApprovalRule.objects.create(name='Rule Inbox Group', order=20, approver_group=self.approver_group1) # approver_user1 is a member
+        for _ in range(3):
+            self._create_iom(self.requester_user, {'estimated_cost': 100})
+
+        self.client.force_authenticate(user=self.approver_user1)
+        with self.assertNumQueries(1): # The counter row
+            response = self.client.get(reverse('procurement:approval-step-inbox-count'))
+        self.assertEqual(response.data['pending_count'], 6)
+
+        url = reverse('procurement:approval-step-inbox')
+        first_page = self.client.get(url, {'page_size': 4}).data
+        self.assertEqual(len(first_page['results']), 4)
+        second_page = self.client.get(url, {'page_size': 4, 'cursor': first_page['next_cursor']}).data
+        self.assertEqual(len(second_page['results']), 2)
+        self.assertIsNone(second_page['next_cursor'])
+        step_ids = [step['id'] for step in first_page['results'] + second_page['results']]
+        self.assertEqual(step_ids, sorted(set(step_ids), reverse=True))
+
+        self._action_step(self.approver_user1, step_ids[0], 'approve')
+        self.assertEqual(self.client.get(reverse('procurement:approval-step-inbox-count')).data['pending_count'], 5)
+
+    def test_inbox_pages_do_not_repeat_group_steps(self):
+        # Group steps have an inbox entry per member; later pages must still list each step once.
+        ApprovalRule.objects.all().delete()
+        ApprovalRule.objects.create(name='Rule Inbox Shared Group', order=10, approver_group=self.approver_group1)
+        self.approver_user2.groups.add(self.approver_group1)
+        for _ in range(3):
+            self._create_iom(self.requester_user, {'estimated_cost': 100})
+
+        self.client.force_authenticate(user=self.approver_user1)
+        url = reverse('procurement:approval-step-inbox')
+        step_ids, cursor = [], None
+        while True:
+            page = self.client.get(url, {'page_size': 2, **({'cursor': cursor} if cursor else {})}).data
+            self.assertTrue(page['results'])
+            step_ids += [step['id'] for step in page['results']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(step_ids, sorted(ApprovalStep.objects.values_list('pk', flat=True), reverse=True))
+
+    def test_deleting_a_memo_takes_its_steps_off_the_inbox_counters(self):
+        ApprovalRule.objects.all().delete()
+        ApprovalRule.objects.create(name='Rule Inbox Delete', order=10, approver_group=self.approver_group1)
+        kept = self._create_iom(self.requester_user, {'estimated_cost': 100})
+        deleted = self._create_iom(self.requester_user, {'estimated_cost': 100})
+        delegated = kept.approval_steps.get()
+        delegated.status = 'delegated'
+        delegated.save()
+        self.assertEqual(ApprovalInboxCounter.objects.get(user=self.approver_user1).pending_count, 2)
+
+        deleted.delete() # Cascades to its approval steps
+        self.assertEqual(ApprovalInboxCounter.objects.get(user=self.approver_user1).pending_count, 1)
+        self.assertEqual(rebuild_approval_inbox(), 1)
+        self.assertEqual(ApprovalInboxCounter.objects.get(user=self.approver_user1).pending_count, 1)
+
+        # The inbox and the step list show what the counter counts, delegated steps included.
+        self.client.force_authenticate(user=self.approver_user1)
+        self.assertEqual([step['id'] for step in self.client.get(reverse('procurement:approval-step-inbox')).data['results']], [delegated.pk])
+        self.assertEqual(self.client.get(reverse('procurement:approval-step-list')).data['count'], 1)
+
+    def test_inbox_follows_group_membership(self):
+        ApprovalRule.objects.all().delete()
+        ApprovalRule.objects.create(name='Rule Inbox Group Only', order=10, approver_group=self.approver_group1)
+        iom = self._create_iom(self.requester_user, {'estimated_cost': 100})
+        step = iom.approval_steps.get()
+
+        self.approver_user2.groups.add(self.approver_group1)
+        self.assertTrue(ApprovalInboxEntry.objects.filter(user=self.approver_user2, step=step).exists())
+        self.assertEqual(self.approver_user2.approval_inbox_counter.pending_count, 1)
+
+        self.approver_group1.user_set.clear()
+        self.assertFalse(ApprovalInboxEntry.objects.filter(step=step).exists())
+        self.assertEqual(ApprovalInboxCounter.objects.get(user=self.approver_user1).pending_count, 0)
+
+        # Workflow re-trigger deletes the old steps; counters follow
+        self.approver_user1.groups.add(self.approver_group1)
+        iom.trigger_approval_workflow(force_retrigger=True)
+        self.assertEqual(ApprovalInboxCounter.objects.get(user=self.approver_user1).pending_count, 1)
+        self.assertEqual(rebuild_approval_inbox(), 1)
+        self.assertEqual(ApprovalInboxCounter.objects.get(user=self.approver_user2).pending_count, 0)
+
     # TODO: Add tests for permissions on ApprovalRuleViewSet (e.g. only admin can create/edit rules)
     # TODO: Add tests for edge cases in rule conditions (e.g. null min/max amounts)
 
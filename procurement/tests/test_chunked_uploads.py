@@ -0,0 +1,184 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from procurement.approval_rule_index import invalidate_approval_rule_index
+from procurement.models import AttachmentBlob, ChunkedUpload, PurchaseRequestMemo
+
+User = get_user_model()
+
+CONTENT = b''.join(f"Quote line {i:05d}\n".encode() for i in range(1000))  # 17000 bytes
+
+
+class ChunkedUploadAPITestCase(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            ATTACHMENT_UPLOAD_TEMP_DIR=os.path.join(self.media_root, 'chunked_uploads'),
+        )
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='uploader', password='password123')
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        invalidate_approval_rule_index()
+
+    def _open(self, content=CONTENT, filename='quote.txt'):
+        response = self.client.post(
+            '/api/procurement/attachment-uploads/',
+            {'filename': filename, 'size': len(content), 'content_type': 'text/plain'}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data['id']
+
+    def _put_chunk(self, upload_id, content, start, end, body=None):
+        return self.client.generic(
+            'PUT', f'/api/procurement/attachment-uploads/{upload_id}/chunk/',
+            body if body is not None else content[start:end + 1],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(content)}',
+        )
+
+    def _upload(self, content=CONTENT, chunk_size=6000, filename='quote.txt'):
+        upload_id = self._open(content, filename)
+        for start in range(0, len(content), chunk_size):
+            response = self._put_chunk(upload_id, content, start, min(start + chunk_size, len(content)) - 1)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/procurement/attachment-uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data
+
+    def test_chunked_upload_resumes_and_stores_by_hash(self):
+        upload_id = self._open()
+        self.assertEqual(self._put_chunk(upload_id, CONTENT, 0, 4999).data['offset'], 5000)
+
+        # A chunk that skips ahead is refused with the offset to resume from.
+        response = self._put_chunk(upload_id, CONTENT, 10000, 14999)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['offset'], 5000)
+
+        # A body shorter than its Content-Range is rejected without moving the offset.
+        response = self._put_chunk(upload_id, CONTENT, 5000, 9999, body=CONTENT[5000:7000])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(f'/api/procurement/attachment-uploads/{upload_id}/').data['offset'], 5000)
+
+        response = self.client.post(f'/api/procurement/attachment-uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(self._put_chunk(upload_id, CONTENT, 5000, len(CONTENT) - 1).status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/procurement/attachment-uploads/{upload_id}/complete/')
+        self.assertEqual(response.data['status'], 'complete')
+        blob = AttachmentBlob.objects.get(pk=response.data['blob'])
+        self.assertEqual(blob.sha256, hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual(blob.size, len(CONTENT))
+        with blob.file.open('rb') as stored:
+            self.assertEqual(stored.read(), CONTENT)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'chunked_uploads')), [])
+
+    def test_same_content_is_stored_once(self):
+        first = self._upload(filename='quote.txt')
+        second = self._upload(chunk_size=4096, filename='quote-copy.txt')
+        self.assertEqual(first['blob'], second['blob'])
+        self.assertEqual(AttachmentBlob.objects.count(), 1)
+        self.assertEqual(ChunkedUpload.objects.filter(status='complete').count(), 2)
+
+        # Records reference the stored file instead of copying it.
+        response = self.client.post('/api/procurement/memos/', {
+            'item_description': 'Laptops', 'quantity': 2, 'reason': 'Refresh', 'attachment_blob': second['blob'],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(PurchaseRequestMemo.objects.get(pk=response.data['id']).attachment_blob_id, first['blob'])
+
+    def test_uploads_are_private_to_their_creator(self):
+        upload_id = self._open()
+        self.client.force_authenticate(user=User.objects.create_user(username='other_uploader', password='password123'))
+        self.assertEqual(self._put_chunk(upload_id, CONTENT, 0, 99).status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(ATTACHMENT_MAX_UPLOAD_SIZE=1000)
+    def test_size_limit(self):
+        response = self.client.post(
+            '/api/procurement/attachment-uploads/', {'filename': 'big.pdf', 'size': 1001}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_range_download(self):
+        sha256 = self._upload()['blob_details']['sha256']
+        url = f'/api/procurement/attachment-blobs/{sha256}/download/'
+
+        response = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(CONTENT)}')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-17')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-17:])
+
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertIn('quote.txt', response['Content-Disposition'])
+
+    def test_blobs_are_visible_to_their_uploader_and_record_readers(self):
+        sha256 = self._upload()['blob_details']['sha256']
+        url = f'/api/procurement/attachment-blobs/{sha256}/'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/procurement/attachment-blobs/').status_code, status.HTTP_403_FORBIDDEN)
+
+        other = User.objects.create_user(username='other_reader', password='password123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url + 'download/').status_code, status.HTTP_404_NOT_FOUND)
+
+        # Attached to a memo, the blob is visible to whoever can see the memo.
+        memo = PurchaseRequestMemo.objects.create(
+            item_description='Monitors', quantity=1, reason='Refresh', requested_by=self.user,
+            attachment_blob=AttachmentBlob.objects.get(sha256=sha256),
+        )
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        memo.requested_by = other
+        memo.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=User.objects.create_user(username='blob_staff', password='password123', is_staff=True))
+        response = self.client.get('/api/procurement/attachment-blobs/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_records_only_take_blobs_their_author_uploaded(self):
+        blob_id = self._upload()['blob']
+        self.client.force_authenticate(user=User.objects.create_user(username='blob_borrower', password='password123'))
+        response = self.client.post('/api/procurement/memos/', {
+            'item_description': 'Laptops', 'quantity': 2, 'reason': 'Refresh', 'attachment_blob': blob_id,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('attachment_blob', response.data)
+
+        # A record keeps its current blob when edited by someone who did not upload it.
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/procurement/memos/', {
+            'item_description': 'Laptops', 'quantity': 2, 'reason': 'Refresh', 'attachment_blob': blob_id,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        editor = User.objects.create_user(username='blob_editor', password='password123')
+        memo = PurchaseRequestMemo.objects.get(pk=response.data['id'])
+        memo.requested_by = editor
+        memo.save()
+        self.client.force_authenticate(user=editor)
+        response = self.client.patch(f'/api/procurement/memos/{memo.pk}/', {
+            'reason': 'Refresh cycle', 'attachment_blob': blob_id,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+
+from procurement.delegation_resolver import (
+    APPROVAL_DELEGATION_VERSION, invalidate_delegation_cache, resolve_active_delegates,
+)
+from procurement.models import ApprovalDelegation, CacheVersion
+
+User = get_user_model()
+
+
+class DelegationResolverTestCase(TestCase):
+    def setUp(self):
+        invalidate_delegation_cache()
+        self.now = timezone.now()
+        self.users = [User.objects.create_user(username=f'delegation_user{i}', password='password123') for i in range(6)]
+
+    def tearDown(self):
+        # Cached delegations may refer to rows rolled back with the test.
+        invalidate_delegation_cache()
+
+    def _delegate(self, delegator, delegatee, start_offset_days=-1, end_offset_days=1, **kwargs):
+        return ApprovalDelegation.objects.create(
+            delegator=delegator, delegatee=delegatee,
+            start_date=self.now + timezone.timedelta(days=start_offset_days),
+            end_date=self.now + timezone.timedelta(days=end_offset_days),
+            **kwargs
+        )
+
+    def test_resolves_many_users_with_one_query_per_chain_level(self):
+        a, b, c, d, e, f = self.users
+        self._delegate(a, b)
+        self._delegate(c, d)
+        self._delegate(e, f, is_active=False)
+        # The cache version, one query for all delegators, one for their delegatees (chain check)
+        with self.assertNumQueries(3):
+            delegates = resolve_active_delegates([a, c, e], self.now)
+        self.assertEqual(delegates, {a.pk: b, c.pk: d})
+
+    def test_follows_chains_and_stops_at_loops(self):
+        a, b, c, d, e, _ = self.users
+        self._delegate(a, b)
+        self._delegate(b, c)
+        self._delegate(d, e)
+        self._delegate(e, d)
+        delegates = resolve_active_delegates([a, b, d], self.now)
+        self.assertEqual(delegates, {a.pk: c, b.pk: c, d.pk: e})
+        self.assertEqual(ApprovalDelegation.get_active_delegate(a), c)
+
+    def test_respects_date_window_and_latest_start(self):
+        a, b, c, _, _, _ = self.users
+        self._delegate(a, b, start_offset_days=-10, end_offset_days=10)
+        self._delegate(a, c, start_offset_days=-1, end_offset_days=1)
+        self.assertEqual(resolve_active_delegates([a], self.now), {a.pk: c})
+        self.assertEqual(resolve_active_delegates([a], self.now - timezone.timedelta(days=5)), {a.pk: b})
+        self.assertEqual(resolve_active_delegates([a], self.now + timezone.timedelta(days=20)), {})
+
+    def test_cache_reused_after_commit_and_dropped_on_change(self):
+        a, b, c, _, _, _ = self.users
+        delegation = self._delegate(a, b)
+        with self.captureOnCommitCallbacks(execute=True):
+            resolve_active_delegates([a])
+        with self.assertNumQueries(1): # The CacheVersion row
+            self.assertEqual(resolve_active_delegates([a]), {a.pk: b})
+
+        delegation.delegatee = c
+        with self.captureOnCommitCallbacks(execute=True):
+            delegation.save()
+        self.assertEqual(resolve_active_delegates([a]), {a.pk: c})
+
+    def test_cache_dropped_when_another_process_bumps_the_version(self):
+        a, b, c, _, _, _ = self.users
+        delegation = self._delegate(a, b)
+        with self.captureOnCommitCallbacks(execute=True):
+            resolve_active_delegates([a])
+        # Another process changed the delegation: its row and the version change, this process' memory does not.
+        ApprovalDelegation.objects.filter(pk=delegation.pk).update(delegatee=c)
+        CacheVersion.objects.filter(name=APPROVAL_DELEGATION_VERSION).update(version=F('version') + 1)
+        self.assertEqual(resolve_active_delegates([a]), {a.pk: c})
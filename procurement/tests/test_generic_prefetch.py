@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core_api.generic_prefetch import prefetch_generic_objects
+from generic_iom.models import GenericIOM, IOMCategory, IOMTemplate
+from procurement.approval_rule_index import invalidate_approval_rule_index
+from procurement.models import ApprovalStep, PurchaseRequestMemo
+
+User = get_user_model()
+
+
+class GenericPrefetchTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = User.objects.create_superuser(username='prefetch_admin', password='password123', email='prefetch@example.com')
+        self.requesters = [User.objects.create_user(username=f'prefetch_requester{i}', password='password123') for i in range(3)]
+        category = IOMCategory.objects.create(name='Prefetch Category')
+        self.template = IOMTemplate.objects.create(name='Prefetch Template', category=category, created_by=self.admin_user)
+        self.memo_ct = ContentType.objects.get_for_model(PurchaseRequestMemo)
+        self.iom_ct = ContentType.objects.get_for_model(GenericIOM)
+
+    def tearDown(self):
+        # Creating memos/IOMs builds the rule index; don't leak it into other tests.
+        invalidate_approval_rule_index()
+
+    def _add_steps(self, count):
+        steps = []
+        for i in range(count):
+            memo = PurchaseRequestMemo.objects.create(
+                item_description=f'Prefetch item {i}', quantity=1, reason='Prefetch',
+                requested_by=self.requesters[i % len(self.requesters)],
+            )
+            iom = GenericIOM.objects.create(iom_template=self.template, subject=f'Prefetch IOM {i}', created_by=self.admin_user)
+            steps.append(ApprovalStep(content_type=self.memo_ct, object_id=memo.pk, step_order=1, assigned_approver_user=self.admin_user))
+            steps.append(ApprovalStep(content_type=self.iom_ct, object_id=iom.pk, step_order=1, assigned_approver_user=self.admin_user))
+        ApprovalStep.objects.bulk_create(steps)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries), response
+
+    def test_step_list_queries_do_not_grow_with_page(self):
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('procurement:approval-step-list')
+        self._add_steps(2)
+        small_page, _ = self._count_queries(url)
+        self._add_steps(6)
+        large_page, response = self._count_queries(url)
+        self.assertEqual(small_page, large_page)
+
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(len(results), 10)  # A full page
+        displays = {row['content_object_display'][:4] for row in results}
+        self.assertEqual(displays, {'PRM:', 'GIM:'})
+
+    def test_admin_changelist_queries_do_not_grow_with_page(self):
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:procurement_approvalstep_changelist')
+        self._add_steps(2)
+        small_page, _ = self._count_queries(url)
+        self._add_steps(6)
+        large_page, response = self._count_queries(url)
+        self.assertEqual(small_page, large_page)
+        self.assertContains(response, 'Prefetch item 5')
+
+    def test_prefetch_loads_each_content_type_once_with_related(self):
+        self._add_steps(3)
+        steps = list(ApprovalStep.objects.order_by('pk'))
+        # One query per content type; the memo requesters come with their memos.
+        with self.assertNumQueries(2):
+            prefetch_generic_objects(steps, 'content_object', ApprovalStep.CONTENT_OBJECT_RELATED)
+        with self.assertNumQueries(0):
+            rendered = [str(step.content_object) for step in steps]
+        self.assertIn('by prefetch_requester0', rendered[0])
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from procurement.id_allocator import ProcurementIDAllocator
+from procurement.sequence_models import ProcurementIDSequence
+
+
+class ProcurementIDAllocatorTestCase(TestCase):
+    def test_gapless_prefix_advances_sequence_by_one(self):
+        allocator = ProcurementIDAllocator(block_sizes={'GA': 50}, gapless_prefixes=['GA'])
+        self.assertEqual(allocator.next_id('GA'), 'GA-AA-0001')
+        self.assertEqual(allocator.next_id('GA'), 'GA-AA-0002')
+        self.assertEqual(ProcurementIDSequence.objects.get(prefix='GA').current_numeric_part, 2)
+
+    def test_block_mode_reserves_once_and_serves_from_memory(self):
+        allocator = ProcurementIDAllocator(block_sizes={'BK': 10}, gapless_prefixes=[])
+        with self.captureOnCommitCallbacks(execute=True):
+            first_id = allocator.next_id('BK')
+        self.assertEqual(first_id, 'BK-AA-0001')
+        self.assertEqual(ProcurementIDSequence.objects.get(prefix='BK').current_numeric_part, 10)
+
+        with self.assertNumQueries(0):
+            ids = [allocator.next_id('BK') for _ in range(9)]
+        self.assertEqual(ids, [f'BK-AA-{n:04d}' for n in range(2, 11)])
+
+        # Block exhausted: the next call reserves a fresh block.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(allocator.next_id('BK'), 'BK-AA-0011')
+        self.assertEqual(ProcurementIDSequence.objects.get(prefix='BK').current_numeric_part, 20)
+
+    def test_block_serves_its_own_transaction_before_commit(self):
+        allocator = ProcurementIDAllocator(block_sizes={'TX': 10}, gapless_prefixes=[])
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.assertEqual(allocator.next_id('TX'), 'TX-AA-0001')
+            with self.assertNumQueries(0):
+                ids = [allocator.next_id('TX') for _ in range(2)]
+        self.assertEqual(ids, ['TX-AA-0002', 'TX-AA-0003'])
+        self.assertEqual(ProcurementIDSequence.objects.get(prefix='TX').current_numeric_part, 10)
+
+        # On commit only the rest of the block is shared with the process.
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(allocator._blocks[('default', 'TX')][0].next, 4)
+        self.assertEqual(allocator.next_id('TX'), 'TX-AA-0004')
+
+    def test_block_is_dropped_if_its_savepoint_rolls_back(self):
+        allocator = ProcurementIDAllocator(block_sizes={'RB': 10}, gapless_prefixes=[])
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            try:
+                with transaction.atomic():
+                    allocator.next_id('RB')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            # The reservation was rolled back with the savepoint, so it is made again.
+            self.assertEqual(allocator.next_id('RB'), 'RB-AA-0001')
+            self.assertEqual(allocator.next_id('RB'), 'RB-AA-0002')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(ProcurementIDSequence.objects.get(prefix='RB').current_numeric_part, 10)
+
+    def test_block_reservation_rolls_over_alpha_part(self):
+        ProcurementIDSequence.objects.create(prefix='RO', current_alpha_part_char1='A', current_alpha_part_char2='A', current_numeric_part=9995)
+        allocator = ProcurementIDAllocator(block_sizes={'RO': 10}, gapless_prefixes=[])
+        with self.captureOnCommitCallbacks(execute=True):
+            allocator.next_id('RO')
+        ids = [allocator.next_id('RO') for _ in range(9)]
+        self.assertEqual(ids[2], 'RO-AA-9999')
+        self.assertEqual(ids[3], 'RO-AB-0001')
+        seq = ProcurementIDSequence.objects.get(prefix='RO')
+        self.assertEqual((seq.current_alpha_part_char2, seq.current_numeric_part), ('B', 6))
+
+    def test_block_reservation_past_end_of_sequence_raises(self):
+        ProcurementIDSequence.objects.create(prefix='EX', current_alpha_part_char1='Z', current_alpha_part_char2='Z', current_numeric_part=9995)
+        allocator = ProcurementIDAllocator(block_sizes={'EX': 10}, gapless_prefixes=[])
+        with self.assertRaises(ValueError):
+            allocator.next_id('EX')
+
+    @override_settings(PROCUREMENT_ID_BLOCK_SIZES={'ST': 5}, PROCUREMENT_ID_GAPLESS_PREFIXES=['CR'])
+    def test_defaults_come_from_settings(self):
+        allocator = ProcurementIDAllocator()
+        self.assertEqual(allocator.block_size('ST'), 5)
+        self.assertEqual(allocator.block_size('CR'), 1)
+        self.assertEqual(allocator.block_size('XX'), 1)
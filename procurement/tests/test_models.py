@@ -2,7 +2,9 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 import datetime
+from decimal import Decimal
 import os # For path manipulations
+from unittest.mock import patch
 
 from procurement.models import (
     PurchaseRequestMemo, PurchaseOrder, OrderItem, CheckRequest,
@@ -96,6 +98,21 @@ class ProcurementModelsTestCase(TestCase):
         PurchaseRequestMemo.trigger_approval_workflow = original_trigger_workflow
 
 
+    def test_purchase_request_memo_update_save_does_not_refetch_row(self):
+        memo = PurchaseRequestMemo.objects.get(pk=self.iom_for_po.pk)
+        memo.reason = 'Updated reason'
+        # Savepoint, UPDATE, release: the old status comes from the loaded values.
+        with self.assertNumQueries(3):
+            memo.save()
+
+        # Moving back to draft is still detected and re-triggers the workflow.
+        triggered = []
+        memo.status = 'draft'
+        with patch.object(PurchaseRequestMemo, 'trigger_approval_workflow', lambda self: triggered.append(self.pk)):
+            memo.save()
+        self.assertEqual(triggered, [memo.pk])
+
+
     def test_create_purchase_order(self):
         po = PurchaseOrder.objects.create(
             vendor=self.vendor,
@@ -151,6 +168,42 @@ class ProcurementModelsTestCase(TestCase):
         self.assertAlmostEqual(order_item_percent_discount.total_price, expected_mouse_price_with_tax, places=2)
 
 
+    def test_order_item_stores_line_amounts(self):
+        po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
+        item = OrderItem.objects.create(
+            purchase_order=po, item_description='Monitor', quantity=3, unit_price=33.33,
+            discount_type='percentage', discount_value=10.0, tax_rate=16.0
+        )
+        item.refresh_from_db()
+        # Net 99.99, discount 10.00 (9.999), tax 16% of 89.991 = 14.40 (14.39856), gross 104.39
+        self.assertEqual(
+            (item.net_amount, item.discount_amount, item.tax_amount, item.gross_amount),
+            (Decimal('99.99'), Decimal('10.00'), Decimal('14.40'), Decimal('104.39'))
+        )
+        self.assertAlmostEqual(item.gross_amount, item.total_price, places=1)
+
+        # Saving only a source field also rewrites the derived amounts
+        item.quantity = 1
+        item.save(update_fields=['quantity'])
+        item.refresh_from_db()
+        self.assertEqual((item.net_amount, item.gross_amount), (Decimal('33.33'), Decimal('34.80')))
+
+    def test_purchase_order_line_totals_are_aggregated_in_sql(self):
+        po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
+        empty_po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
+        OrderItem.objects.create(purchase_order=po, item_description='A', quantity=2, unit_price=50.00, discount_type='fixed', discount_value=10.0)
+        OrderItem.objects.create(purchase_order=po, item_description='B', quantity=1, unit_price=20.00, tax_rate=10.0)
+
+        with self.assertNumQueries(1):
+            totals = {
+                row.pk: (row.line_net_total, row.line_discount_total, row.line_tax_total, row.line_gross_total)
+                for row in PurchaseOrder.objects.with_line_totals().filter(pk__in=[po.pk, empty_po.pk])
+            }
+        self.assertEqual(totals[po.pk], (Decimal('120.00'), Decimal('10.00'), Decimal('2.00'), Decimal('112.00')))
+        self.assertEqual(totals[empty_po.pk], (0, 0, 0, 0))
+        with self.assertNumQueries(1):
+            self.assertEqual(po.calculate_total_amount(), Decimal('112.00'))
+
     def test_create_check_request(self):
         po_for_cr = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
         cr = CheckRequest.objects.create(
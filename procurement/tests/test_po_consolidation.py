@@ -0,0 +1,106 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from assets.models import Vendor as AssetVendor
+from procurement.approval_rule_index import invalidate_approval_rule_index
+from procurement.models import Department, OrderItem, PurchaseOrder, PurchaseRequestMemo
+from procurement.po_consolidation import consolidate_purchase_memos
+
+User = get_user_model()
+
+URL = '/api/procurement/memos/consolidate/'
+
+
+class POConsolidationTestCase(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='buyer', password='password123', is_staff=True)
+        self.requester = User.objects.create_user(username='requester', password='password123')
+        self.client.force_authenticate(user=self.staff)
+        self.vendor_a = AssetVendor.objects.create(name='Vendor A')
+        self.vendor_b = AssetVendor.objects.create(name='Vendor B')
+        self.dept1 = Department.objects.create(name='Consolidation Dept 1', department_code='CD1')
+        self.dept2 = Department.objects.create(name='Consolidation Dept 2', department_code='CD2')
+
+    def tearDown(self):
+        invalidate_approval_rule_index()
+
+    def _memo(self, vendor, department, cost='100.00', quantity=1, status='approved', **kwargs):
+        return PurchaseRequestMemo.objects.create(
+            item_description='Consolidated item', quantity=quantity, reason='Restock', requested_by=self.requester,
+            estimated_cost=Decimal(cost) if cost is not None else None, suggested_vendor=vendor, department=department,
+            status=status, **kwargs,
+        )
+
+    def test_groups_memos_by_vendor_and_department(self):
+        first = self._memo(self.vendor_a, self.dept1, '300.00', quantity=3, required_delivery_date=datetime.date(2026, 3, 10))
+        second = self._memo(self.vendor_a, self.dept1, '10.00', quantity=3, required_delivery_date=datetime.date(2026, 2, 1))
+        single = self._memo(self.vendor_a, self.dept2, None)
+        other_vendor = self._memo(self.vendor_b, self.dept1, '50.00')
+        no_vendor = self._memo(None, self.dept1)
+        pending = self._memo(self.vendor_a, self.dept1, status='pending_approval')
+
+        response = self.client.post(URL, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['memo_count'], 4)
+        by_memos = {tuple(order['memo_ids']): order for order in response.data['purchase_orders']}
+        self.assertEqual(set(by_memos), {(first.pk, second.pk), (single.pk,), (other_vendor.pk,)})
+
+        grouped = PurchaseOrder.objects.get(pk=by_memos[(first.pk, second.pk)]['id'])
+        self.assertEqual((grouped.status, grouped.vendor_id, grouped.currency), ('draft', self.vendor_a.pk, 'USD'))
+        self.assertIsNone(grouped.internal_office_memo)
+        self.assertEqual(grouped.expected_delivery_date, datetime.date(2026, 2, 1))
+        lines = list(grouped.order_items.order_by('source_memo_id'))
+        self.assertEqual([(line.source_memo_id, line.quantity, line.unit_price) for line in lines],
+                         [(first.pk, 3, Decimal('100.00')), (second.pk, 3, Decimal('3.33'))])
+        self.assertEqual(grouped.total_amount, Decimal('309.99'))
+        self.assertEqual(grouped.total_amount, grouped.calculate_total_amount())
+        self.assertTrue(grouped.po_number.startswith('PO-'))
+
+        self.assertEqual(PurchaseOrder.objects.get(pk=by_memos[(single.pk,)]['id']).internal_office_memo, single)
+        self.assertEqual(
+            set(PurchaseRequestMemo.objects.filter(status='po_created').values_list('pk', flat=True)),
+            {first.pk, second.pk, single.pk, other_vendor.pk},
+        )
+        self.assertEqual(PurchaseRequestMemo.objects.get(pk=no_vendor.pk).status, 'approved')
+        self.assertEqual(PurchaseRequestMemo.objects.get(pk=pending.pk).status, 'pending_approval')
+
+        # Nothing left to convert.
+        response = self.client.post(URL, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['purchase_orders'], [])
+
+    def test_memo_ids_currency_and_permissions(self):
+        chosen = self._memo(self.vendor_a, self.dept1)
+        left = self._memo(self.vendor_a, self.dept1)
+
+        response = self.client.post(URL, {'memo_ids': [chosen.pk], 'currency': 'eur'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        (order,) = response.data['purchase_orders']
+        self.assertEqual(PurchaseOrder.objects.get(pk=order['id']).currency, 'EUR')
+        self.assertEqual(PurchaseRequestMemo.objects.get(pk=left.pk).status, 'approved')
+
+        self.assertEqual(self.client.post(URL, {'memo_ids': 'all'}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(URL, {'currency': 'EURO'}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=self.requester)
+        self.assertEqual(self.client.post(URL, {}, format='json').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(PurchaseRequestMemo.objects.get(pk=left.pk).status, 'approved')
+
+    def test_query_count_does_not_grow_with_memos(self):
+        def run(count):
+            memos = [self._memo(vendor, department) for _ in range(count)
+                     for vendor in (self.vendor_a, self.vendor_b) for department in (self.dept1, self.dept2)]
+            with CaptureQueriesContext(connection) as queries:
+                orders = consolidate_purchase_memos(self.staff, memo_ids=[memo.pk for memo in memos])
+            self.assertEqual(len(orders), 4)
+            self.assertEqual(OrderItem.objects.filter(source_memo__in=memos).count(), len(memos))
+            return len(queries)
+
+        run(1) # Creates the PO sequence row
+        # 48 lines stay within one SQLite insert batch (other backends don't split bulk inserts).
+        self.assertEqual(run(1), run(12))
@@ -0,0 +1,112 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from assets.models import Vendor
+from core_api.sequences import reserve
+from procurement.models import CheckRequest, RecurringPayment
+from procurement.recurring_payments import advance_due_date, generate_due_check_requests
+
+
+class RecurringPaymentSchedulerTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Recurring Vendor')
+
+    def _payment(self, **kwargs):
+        defaults = {
+            'payment_name': 'Office Rent', 'vendor': self.vendor, 'amount': Decimal('1500.00'),
+            'frequency': 'monthly', 'start_date': datetime.date(2024, 1, 31),
+            'next_due_date': datetime.date(2024, 1, 31),
+        }
+        defaults.update(kwargs)
+        return RecurringPayment.objects.create(**defaults)
+
+    def test_advance_due_date_keeps_anchor_day(self):
+        self.assertEqual(advance_due_date(datetime.date(2024, 1, 31), 'monthly', 31), datetime.date(2024, 2, 29))
+        self.assertEqual(advance_due_date(datetime.date(2024, 2, 29), 'monthly', 31), datetime.date(2024, 3, 31))
+        self.assertEqual(advance_due_date(datetime.date(2024, 11, 30), 'quarterly', 30), datetime.date(2025, 2, 28))
+        self.assertEqual(advance_due_date(datetime.date(2024, 2, 29), 'annually', 29), datetime.date(2025, 2, 28))
+        self.assertEqual(advance_due_date(datetime.date(2024, 12, 30), 'weekly'), datetime.date(2025, 1, 6))
+        with self.assertRaises(ValueError):
+            advance_due_date(datetime.date(2024, 1, 1), 'fortnightly')
+
+    def test_catches_up_missed_occurrences_in_one_run(self):
+        payment = self._payment()
+        totals = generate_due_check_requests(as_of=datetime.date(2024, 12, 31), batch_size=1)
+        self.assertEqual(totals['created'], 12)
+        self.assertEqual(totals['payments'], 1)
+
+        check_requests = list(payment.check_requests.order_by('recurring_due_date'))
+        self.assertEqual(
+            [cr.recurring_due_date for cr in check_requests][:3],
+            [datetime.date(2024, 1, 31), datetime.date(2024, 2, 29), datetime.date(2024, 3, 31)],
+        )
+        self.assertEqual(len({cr.cr_id for cr in check_requests}), 12)
+        self.assertTrue(all(cr.cr_id.startswith('CR-') for cr in check_requests))
+        self.assertEqual(check_requests[0].payee_name, 'Recurring Vendor')
+        self.assertEqual(check_requests[0].status, 'pending_approval')
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.next_due_date, datetime.date(2025, 1, 31))
+
+    def test_rerun_does_not_pay_twice(self):
+        payment = self._payment(frequency='weekly', next_due_date=datetime.date(2024, 1, 1))
+        as_of = datetime.date(2024, 1, 29)
+        generate_due_check_requests(as_of=as_of)
+        self.assertEqual(payment.check_requests.count(), 5)
+
+        # Nothing is due any more.
+        totals = generate_due_check_requests(as_of=as_of)
+        self.assertEqual(totals['created'], 0)
+
+        # A payment moved back (e.g. restored from a backup) skips the occurrences it already paid.
+        RecurringPayment.objects.filter(pk=payment.pk).update(next_due_date=datetime.date(2024, 1, 15))
+        totals = generate_due_check_requests(as_of=datetime.date(2024, 2, 5))
+        self.assertEqual((totals['created'], totals['skipped']), (1, 3))
+        self.assertEqual(payment.check_requests.count(), 6)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CheckRequest.objects.create(
+                recurring_payment=payment, recurring_due_date=datetime.date(2024, 1, 1),
+                amount=1, payee_name='Duplicate', reason_for_payment='Duplicate',
+            )
+
+    def test_stops_at_end_date_and_deactivates(self):
+        payment = self._payment(
+            vendor=None, frequency='quarterly', start_date=datetime.date(2024, 1, 15),
+            next_due_date=datetime.date(2024, 1, 15), end_date=datetime.date(2024, 8, 1),
+        )
+        totals = generate_due_check_requests(as_of=datetime.date(2025, 6, 1))
+        self.assertEqual((totals['created'], totals['deactivated']), (3, 1))
+        self.assertEqual(payment.check_requests.first().payee_name, 'Office Rent')
+        payment.refresh_from_db()
+        self.assertFalse(payment.is_active)
+
+    def _count_queries(self, as_of):
+        with CaptureQueriesContext(connection) as queries:
+            totals = generate_due_check_requests(as_of=as_of)
+        return len(queries), totals
+
+    def test_batch_query_count_does_not_grow_with_occurrences(self):
+        reserve('CR')  # The sequence row exists, as it would in production
+        self._payment(payment_name='Small', next_due_date=datetime.date(2024, 12, 31), start_date=datetime.date(2024, 12, 31))
+        small_run, _ = self._count_queries(datetime.date(2024, 12, 31))
+
+        RecurringPayment.objects.all().delete()
+        # 36 requests still fit one INSERT within SQLite's 999 parameter limit.
+        for i in range(3):
+            self._payment(payment_name=f'Large {i}')
+        large_run, totals = self._count_queries(datetime.date(2024, 12, 31))
+        self.assertEqual(totals['created'], 36)
+        self.assertEqual(small_run, large_run)
+
+    def test_command_reports_counts(self):
+        self._payment(next_due_date=datetime.date(2024, 3, 31))
+        out = StringIO()
+        call_command('process_recurring_payments', '--as-of', '2024-05-31', stdout=out)
+        self.assertIn('3 check requests created', out.getvalue())
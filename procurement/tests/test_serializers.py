@@ -1,6 +1,8 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 import datetime
+from decimal import Decimal
+from rest_framework.exceptions import ValidationError
 
 from procurement.models import (
     PurchaseRequestMemo, PurchaseOrder, OrderItem, CheckRequest,
@@ -154,6 +156,49 @@ class ProcurementSerializersTestCase(TestCase):
         # Total: (2*20) + (1*30) = 40 + 30 = 70
         self.assertAlmostEqual(updated_po.total_amount, 70.00, places=2)
 
+    def test_purchase_order_serializer_update_diffs_order_items(self):
+        mock_request = type('Request', (), {'user': self.user, 'method': 'PATCH'})
+        po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user, status='draft')
+        kept, changed, removed = [
+            OrderItem.objects.create(purchase_order=po, item_description=f'Line {i}', quantity=1, unit_price=10.00, received_quantity=1)
+            for i in range(3)
+        ]
+        update_data = {'order_items': [
+            {'id': kept.id, 'item_description': 'Line 0', 'quantity': 1, 'unit_price': '10.00'},
+            {'id': changed.id, 'item_description': 'Line 1', 'quantity': 4, 'unit_price': '10.00',
+             'discount_type': 'percentage', 'discount_value': '25.00', 'tax_rate': '10.00'},
+            {'item_description': 'Line 3', 'quantity': 2, 'unit_price': '5.50'},
+        ]}
+        serializer = PurchaseOrderSerializer(po, data=update_data, partial=True, context={'request': mock_request})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        # PO save, line read, one DELETE/UPDATE/INSERT for the lines, total aggregate, total save
+        # (7 statements, plus the savepoints of the three atomic blocks) whatever the number of lines.
+        with self.assertNumQueries(13):
+            updated_po = serializer.save()
+
+        lines = list(updated_po.order_items.order_by('pk'))
+        self.assertEqual([line.item_description for line in lines], ['Line 0', 'Line 1', 'Line 3'])
+        self.assertEqual(lines[0].pk, kept.pk)
+        self.assertEqual(lines[1].pk, changed.pk)
+        self.assertFalse(OrderItem.objects.filter(pk=removed.pk).exists())
+        self.assertEqual(lines[1].received_quantity, 1) # Values not in the payload are kept
+        # 10 + (40 - 25% = 30, + 10% tax = 33) + 11 = 54
+        self.assertEqual(updated_po.total_amount, Decimal('54.00'))
+        self.assertEqual(updated_po.total_amount, sum(line.total_price for line in lines))
+
+    def test_purchase_order_serializer_update_rejects_foreign_order_item(self):
+        mock_request = type('Request', (), {'user': self.user, 'method': 'PATCH'})
+        po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user, status='draft')
+        other_po = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user, status='draft')
+        foreign = OrderItem.objects.create(purchase_order=other_po, item_description='Other', quantity=1, unit_price=10.00)
+        update_data = {'order_items_json': json.dumps([{'id': foreign.id, 'item_description': 'Hijack', 'quantity': 1}])}
+        serializer = PurchaseOrderSerializer(po, data=update_data, partial=True, context={'request': mock_request})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.item_description, 'Other')
+
     def test_order_item_serializer_valid_and_invalid(self):
         # Valid data
         valid_item_data = {'item_description': 'Test Item', 'quantity': 1, 'unit_price': '10.99'}
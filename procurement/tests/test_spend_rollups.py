@@ -0,0 +1,141 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from assets.models import Vendor as AssetVendor
+from procurement.approval_rule_index import invalidate_approval_rule_index
+from procurement.models import (
+    CheckRequest, Department, GLAccount, OrderItem, Project, PurchaseOrder, PurchaseRequestMemo, SpendRollup,
+)
+from procurement.spend_rollups import build_spend_rollups, rebuild_spend_rollups
+
+User = get_user_model()
+
+ORDER_DAY = datetime.date(2025, 3, 10)
+PAYMENT_DAY = datetime.date(2025, 4, 2)
+
+
+class SpendRollupTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='spend_user', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.vendor = AssetVendor.objects.create(name='Spend Vendor')
+        self.department = Department.objects.create(name='Finance', department_code='FIN')
+        self.project = Project.objects.create(name='ERP Rollout', project_code='ERP25')
+        self.hardware = GLAccount.objects.create(account_code='6100', name='Hardware')
+        self.software = GLAccount.objects.create(account_code='6200', name='Software')
+        self.memo = PurchaseRequestMemo.objects.create(
+            item_description='ERP hardware', quantity=1, reason='Rollout', requested_by=self.user,
+            department=self.department, project=self.project,
+        )
+
+    def tearDown(self):
+        invalidate_approval_rule_index()
+
+    def _order(self, status='approved'):
+        with self.captureOnCommitCallbacks(execute=True):
+            po = PurchaseOrder.objects.create(
+                vendor=self.vendor, created_by=self.user, internal_office_memo=self.memo,
+                order_date=ORDER_DAY, currency='USD', status=status,
+            )
+            OrderItem.objects.create(
+                purchase_order=po, item_description='Servers', quantity=2, unit_price=Decimal('500.00'),
+                gl_account=self.hardware,
+            )
+            OrderItem.objects.create(
+                purchase_order=po, item_description='Licences', quantity=1, unit_price=Decimal('300.00'),
+                gl_account=self.software,
+            )
+        return po
+
+    def _rollup(self, **lookups):
+        return SpendRollup.objects.get(department=self.department, project=self.project, vendor=self.vendor, **lookups)
+
+    def test_committed_spend_follows_purchase_order_status(self):
+        po = self._order(status='draft')
+        self.assertFalse(SpendRollup.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            po.status = 'approved'
+            po.save()
+        self.assertEqual(self._rollup(gl_account=self.hardware).committed_amount, Decimal('1000.00'))
+        self.assertEqual(self._rollup(gl_account=self.software).committed_amount, Decimal('300.00'))
+        self.assertEqual(self._rollup(gl_account=self.software).day, ORDER_DAY)
+
+        # Moving the order date moves its spend to the new day.
+        with self.captureOnCommitCallbacks(execute=True):
+            po.order_date = ORDER_DAY + datetime.timedelta(days=1)
+            po.save()
+        self.assertEqual(set(SpendRollup.objects.values_list('day', flat=True)), {ORDER_DAY + datetime.timedelta(days=1)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            po.status = 'cancelled'
+            po.save()
+        self.assertFalse(SpendRollup.objects.exists())
+
+    def test_check_request_spend_and_payment(self):
+        po = self._order()
+        with self.captureOnCommitCallbacks(execute=True):
+            check_request = CheckRequest.objects.create(
+                purchase_order=po, amount=Decimal('1300.00'), currency='USD', payee_name='Spend Vendor',
+                reason_for_payment='ERP hardware', requested_by=self.user, status='approved',
+            )
+        request_day = check_request.request_date.date()
+        spend = SpendRollup.objects.get(day=request_day, spend_count=1)
+        self.assertEqual(spend.spend_amount, Decimal('1300.00'))
+        self.assertEqual((spend.department_id, spend.vendor_id), (self.department.pk, self.vendor.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            check_request.status = 'paid'
+            check_request.payment_date = PAYMENT_DAY
+            check_request.save()
+        paid = SpendRollup.objects.get(day=PAYMENT_DAY)
+        self.assertEqual((paid.paid_amount, paid.paid_count, paid.spend_amount), (Decimal('1300.00'), 1, 0))
+
+        # Correcting the payment date clears the old day.
+        with self.captureOnCommitCallbacks(execute=True):
+            check_request.payment_date = PAYMENT_DAY + datetime.timedelta(days=3)
+            check_request.save()
+        self.assertFalse(SpendRollup.objects.filter(day=PAYMENT_DAY).exists())
+        self.assertTrue(SpendRollup.objects.filter(day=PAYMENT_DAY + datetime.timedelta(days=3), paid_count=1).exists())
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self._order()
+        incremental = sorted(SpendRollup.objects.values_list('day', 'gl_account', 'committed_amount'))
+
+        SpendRollup.objects.all().delete()
+        SpendRollup.objects.create(day=datetime.date(2020, 1, 1), currency='USD', committed_amount=5)  # stale
+        out = StringIO()
+        call_command('rebuild_spend_rollups', '--chunk-days', '7', stdout=out)
+        self.assertIn('rebuilt', out.getvalue())
+        self.assertEqual(sorted(SpendRollup.objects.values_list('day', 'gl_account', 'committed_amount')), incremental)
+
+        # Rollups are computed with one grouped query per measure, whatever the number of days.
+        with self.assertNumQueries(3):
+            build_spend_rollups([ORDER_DAY + datetime.timedelta(days=offset) for offset in range(60)])
+        self.assertEqual(rebuild_spend_rollups(ORDER_DAY, ORDER_DAY), (1, 2))
+
+    def test_spend_summary_endpoint(self):
+        self._order()
+        response = self.client.get('/api/procurement/spend-summary/', {
+            'group_by': 'month,department', 'date_from': '2025-03-01', 'date_to': '2025-03-31',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(len(response.data['results']), 1)
+        row = response.data['results'][0]
+        self.assertEqual(row['department__name'], 'Finance')
+        self.assertEqual(row['currency'], 'USD')
+        self.assertEqual((row['committed_amount'], row['committed_line_count']), (Decimal('1300.00'), 2)) # One PO, two lines
+
+        response = self.client.get('/api/procurement/spend-summary/', {'group_by': 'gl_account', 'gl_account': self.software.pk})
+        self.assertEqual([row['gl_account__account_code'] for row in response.data['results']], ['6200'])
+
+        response = self.client.get('/api/procurement/spend-summary/', {'group_by': 'colour'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/procurement/spend-summary/', {'date_from': '03/01/2025'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,122 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from assets.models import Vendor as AssetVendor
+from procurement.approval_rule_index import invalidate_approval_rule_index
+from procurement.models import CheckRequest, InvoiceMatch, OrderItem, PurchaseOrder
+from procurement.three_way_match import match_purchase_orders, run_three_way_match
+
+User = get_user_model()
+
+
+@override_settings(THREE_WAY_MATCH_TOLERANCE_AMOUNT='1.00', THREE_WAY_MATCH_TOLERANCE_PERCENT='2')
+class ThreeWayMatchTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='matcher', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.vendor = AssetVendor.objects.create(name='Match Vendor')
+
+    def tearDown(self):
+        invalidate_approval_rule_index()
+
+    def _order(self, lines, status='partially_received', vendor=None):
+        """lines: (quantity, unit_price, received_quantity) tuples."""
+        po = PurchaseOrder.objects.create(vendor=vendor or self.vendor, created_by=self.user, status=status)
+        for quantity, unit_price, received_quantity in lines:
+            OrderItem.objects.create(
+                purchase_order=po, item_description='Item', quantity=quantity, unit_price=Decimal(unit_price),
+                received_quantity=received_quantity,
+            )
+        return po
+
+    def _invoice(self, po, amount, invoice_number, **kwargs):
+        return CheckRequest.objects.create(
+            purchase_order=po, amount=Decimal(amount), invoice_number=invoice_number, payee_name='Match Vendor',
+            reason_for_payment='Invoice', requested_by=self.user, **kwargs,
+        )
+
+    def test_matches_within_tolerance_and_flags_mismatches(self):
+        partly_received = self._order([(10, '10.00', 10), (5, '20.00', 2)])  # ordered 200, received 140
+        within = self._invoice(partly_received, '142.00', 'INV-1')
+        over_invoiced = self._order([(4, '50.00', 4)])  # ordered and received 200
+        first_over = self._invoice(over_invoiced, '150.00', 'INV-2')
+        second_over = self._invoice(over_invoiced, '100.00', 'INV-3', currency='EUR')
+        draft = self._order([(1, '10.00', 0)], status='draft')
+        self._invoice(draft, '999.00', 'INV-4')
+
+        totals = run_three_way_match(batch_size=1)
+        self.assertEqual(totals, {'purchase_orders': 2, 'check_requests': 3, 'exceptions': 2})
+
+        match = InvoiceMatch.objects.get(check_request=within)
+        self.assertEqual((match.status, match.issues), ('matched', []))
+        self.assertEqual((match.ordered_amount, match.received_amount, match.invoiced_amount),
+                         (Decimal('200.00'), Decimal('140.00'), Decimal('142.00')))
+        self.assertEqual(InvoiceMatch.objects.get(check_request=first_over).issues, ['over_ordered', 'over_received'])
+        self.assertEqual(
+            InvoiceMatch.objects.get(check_request=second_over).issues,
+            ['over_ordered', 'over_received', 'currency_mismatch'],
+        )
+
+        # Cancelling the extra invoice clears the exception on the next run and drops its result.
+        second_over.status = 'cancelled'
+        second_over.save()
+        run_three_way_match()
+        self.assertEqual(InvoiceMatch.objects.get(check_request=first_over).status, 'matched')
+        self.assertFalse(InvoiceMatch.objects.filter(check_request=second_over).exists())
+
+        # Results of a PO that is no longer open are dropped at the start of the next run.
+        partly_received.status = 'paid'
+        partly_received.save()
+        self.assertEqual(run_three_way_match()['purchase_orders'], 1)
+        self.assertFalse(InvoiceMatch.objects.filter(check_request=within).exists())
+        self.assertTrue(InvoiceMatch.objects.filter(check_request=first_over).exists())
+
+    def test_duplicate_invoice_numbers_per_vendor(self):
+        other_vendor = AssetVendor.objects.create(name='Other Vendor')
+        first = self._invoice(self._order([(1, '50.00', 1)]), '50.00', 'INV-100')
+        repeat = self._invoice(self._order([(1, '50.00', 1)]), '50.00', 'INV-100')
+        other = self._invoice(self._order([(1, '50.00', 1)], vendor=other_vendor), '50.00', 'INV-100')
+        self.assertEqual((first.vendor_id, other.vendor_id), (self.vendor.pk, other_vendor.pk))
+
+        run_three_way_match()
+        match = InvoiceMatch.objects.get(check_request=repeat)
+        self.assertEqual((match.issues, match.duplicate_of_id), (['duplicate_invoice'], first.pk))
+        self.assertEqual(InvoiceMatch.objects.get(check_request=first).status, 'matched')
+        self.assertEqual(InvoiceMatch.objects.get(check_request=other).status, 'matched')
+
+        # Check requests follow their PO to another vendor.
+        other.purchase_order.vendor = self.vendor
+        other.purchase_order.save()
+        other.refresh_from_db()
+        self.assertEqual(other.vendor_id, self.vendor.pk)
+
+        response = self.client.get('/api/procurement/invoice-matches/', {'status': 'exception', 'issue': 'duplicate_invoice'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['check_request'] for row in response.data['results']], [repeat.pk])
+        self.assertEqual(response.data['results'][0]['invoice_number'], 'INV-100')
+
+        # Other users only see the results of their own check requests.
+        self.client.force_authenticate(user=User.objects.create_user(username='match_outsider', password='password123'))
+        self.assertEqual(self.client.get('/api/procurement/invoice-matches/').data['count'], 0)
+        self.client.force_authenticate(user=User.objects.create_user(username='match_staff', password='password123', is_staff=True))
+        self.assertEqual(self.client.get('/api/procurement/invoice-matches/').data['count'], 3)
+
+    def test_batch_query_count_does_not_grow_with_purchase_orders(self):
+        orders = []
+        for i in range(12):
+            po = self._order([(2, '10.00', 2), (3, '5.00', 1)])
+            self._invoice(po, '20.00', f'INV-Q{i}')
+            orders.append((po.pk, po.currency))
+        # Lines, check requests, duplicate lookup, then savepoint, stale-row delete, upsert, release.
+        with self.assertNumQueries(7):
+            self.assertEqual(match_purchase_orders(orders), (12, 0))
+
+        out = StringIO()
+        call_command('run_three_way_match', '--batch-size', '5', stdout=out)
+        self.assertIn('12 purchase orders, 12 check requests, 0 exceptions', out.getvalue())
@@ -0,0 +1,117 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from assets.models import Vendor as AssetVendor
+from procurement.approval_rule_index import invalidate_approval_rule_index
+from procurement.models import CheckRequest, OrderItem, PurchaseOrder, VendorScorecard
+from procurement.vendor_scorecards import build_vendor_scorecards
+
+User = get_user_model()
+
+ORDER_DAY = datetime.date(2025, 5, 1)
+DUE_DAY = datetime.date(2025, 5, 10)
+
+
+class VendorScorecardTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='scorecard_user', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.reliable = AssetVendor.objects.create(name='Reliable Supplies')
+        self.late = AssetVendor.objects.create(name='Late Logistics')
+
+    def tearDown(self):
+        invalidate_approval_rule_index()
+
+    def _order(self, vendor, quantities, status='approved'):
+        with self.captureOnCommitCallbacks(execute=True):
+            po = PurchaseOrder.objects.create(
+                vendor=vendor, created_by=self.user, order_date=ORDER_DAY, expected_delivery_date=DUE_DAY, status=status,
+            )
+            lines = [
+                OrderItem.objects.create(purchase_order=po, item_description=f'Item {i}', quantity=quantity, unit_price=Decimal('10.00'))
+                for i, quantity in enumerate(quantities)
+            ]
+        return po, lines
+
+    def _receive(self, po, line, quantity, on):
+        with self.captureOnCommitCallbacks(execute=True), mock.patch('django.utils.timezone.localdate', return_value=on):
+            line.received_quantity = quantity
+            line.save()
+            po.status = 'fully_received' if quantity >= line.quantity else 'partially_received'
+            po.save()
+
+    def test_scorecard_follows_receipts_and_invoices(self):
+        po, (first, second) = self._order(self.reliable, [10, 5])
+        scorecard = VendorScorecard.objects.get(vendor=self.reliable)
+        self.assertEqual((scorecard.purchase_order_count, scorecard.spend_amount), (1, Decimal('150.00')))
+        self.assertIsNone(scorecard.fill_rate)  # Nothing expected to be received yet
+
+        self._receive(po, first, 10, on=DUE_DAY - datetime.timedelta(days=2))
+        self._receive(po, second, 2, on=DUE_DAY)
+        scorecard.refresh_from_db()
+        self.assertEqual(first.received_date, DUE_DAY - datetime.timedelta(days=2))
+        self.assertIsNone(second.received_date)
+        self.assertEqual(scorecard.fill_rate, Decimal('0.8000'))  # 12 of 15
+        self.assertEqual((scorecard.delivered_line_count, scorecard.on_time_rate), (1, Decimal('1.0000')))
+        self.assertEqual(scorecard.average_lead_time_days, Decimal('7.00'))
+
+        self._receive(po, second, 5, on=DUE_DAY + datetime.timedelta(days=4))
+        scorecard.refresh_from_db()
+        self.assertEqual(scorecard.on_time_rate, Decimal('0.5000'))
+        self.assertEqual(scorecard.average_lead_time_days, Decimal('10.00'))  # (7 + 13) / 2
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CheckRequest.objects.create(
+                purchase_order=po, amount=Decimal('165.00'), payee_name='Reliable Supplies',
+                reason_for_payment='Invoice 1', requested_by=self.user,
+            )
+        scorecard.refresh_from_db()
+        self.assertEqual(scorecard.invoiced_amount, Decimal('165.00'))
+        self.assertEqual(scorecard.price_variance_rate, Decimal('0.1000'))
+
+    def test_reassigning_a_purchase_order_moves_its_metrics(self):
+        po, _ = self._order(self.reliable, [3])
+        with self.captureOnCommitCallbacks(execute=True):
+            po.vendor = self.late
+            po.save()
+        self.assertEqual(VendorScorecard.objects.get(vendor=self.reliable).purchase_order_count, 0)
+        self.assertEqual(VendorScorecard.objects.get(vendor=self.late).spend_amount, Decimal('30.00'))
+
+    def test_drafts_are_not_scored_and_rebuild_covers_all_vendors(self):
+        self._order(self.late, [4], status='draft')
+        self.assertFalse(VendorScorecard.objects.exists())
+
+        out = StringIO()
+        call_command('rebuild_vendor_scorecards', '--batch-size', '1', stdout=out)
+        self.assertIn('2 vendors', out.getvalue())
+        self.assertEqual(VendorScorecard.objects.get(vendor=self.late).purchase_order_count, 0)
+
+        # A batch of vendors is scored with a fixed number of grouped queries.
+        vendors = AssetVendor.objects.bulk_create([AssetVendor(name=f'Vendor {i}') for i in range(20)])
+        with self.assertNumQueries(4):
+            build_vendor_scorecards([vendor.pk for vendor in vendors])
+
+    def test_scorecards_endpoint_sorts_with_unrated_vendors_last(self):
+        po, (line,) = self._order(self.reliable, [4])
+        self._receive(po, line, 4, on=DUE_DAY)
+        late_po, (late_line,) = self._order(self.late, [4])
+        self._receive(late_po, late_line, 4, on=DUE_DAY + datetime.timedelta(days=3))
+        unrated = AssetVendor.objects.create(name='New Vendor')
+        call_command('rebuild_vendor_scorecards', stdout=StringIO())
+
+        for ordering in ('-on_time_rate', 'on_time_rate'):
+            response = self.client.get('/api/procurement/vendor-scorecards/', {'ordering': ordering})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names = [row['vendor_name'] for row in response.data['results']]
+            self.assertEqual(names[-1], unrated.name)
+        self.assertEqual(names[:2], ['Late Logistics', 'Reliable Supplies'])
+
+        response = self.client.get('/api/procurement/vendor-scorecards/', {'search': 'reliable'})
+        self.assertEqual([row['on_time_rate'] for row in response.data['results']], ['1.0000'])
@@ -0,0 +1,144 @@
+"""
+Nightly three-way match of invoices (check requests) against purchase orders and receipts.
+
+For every open PO (OPEN_PO_STATUSES) the job compares the total of its active check requests
+with the ordered value of its lines and with the value received so far (each line's gross
+amount times received / ordered quantity, capped at the ordered quantity). Each active check
+request of the PO gets an InvoiceMatch row holding the PO-wide amounts and these issue codes:
+
+    over_ordered       invoiced more than ordered, beyond the tolerance
+    over_received      invoiced more than received, beyond the tolerance
+    currency_mismatch  the check request is in another currency than the PO
+    duplicate_invoice  an earlier active check request of the same vendor has the same invoice
+                       number (found through the (vendor, invoice_number) index)
+
+Each run starts by deleting the InvoiceMatch rows of POs that are no longer open (paid or
+cancelled since), so the exceptions list only shows POs still being matched.
+
+The tolerance is the larger of settings.THREE_WAY_MATCH_TOLERANCE_AMOUNT and
+THREE_WAY_MATCH_TOLERANCE_PERCENT of the expected amount. POs are processed in batches of
+MATCH_BATCH_SIZE with a fixed number of queries per batch, so the run time grows with the
+number of open POs and lines, not with a query per PO.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+
+OPEN_PO_STATUSES = ('approved', 'partially_received', 'fully_received', 'invoiced')
+INACTIVE_CHECK_REQUEST_STATUSES = ('rejected', 'cancelled')
+
+MATCH_BATCH_SIZE = 500  # Purchase orders matched per transaction
+
+MATCH_FIELDS = (
+    'purchase_order', 'status', 'issues', 'ordered_amount', 'received_amount', 'invoiced_amount',
+    'duplicate_of', 'matched_at',
+)
+
+CENT = Decimal('0.01')
+
+
+def _tolerance(expected):
+    percent = Decimal(str(settings.THREE_WAY_MATCH_TOLERANCE_PERCENT))
+    amount = Decimal(str(settings.THREE_WAY_MATCH_TOLERANCE_AMOUNT))
+    return max(amount, abs(expected) * percent / 100)
+
+
+def _duplicates(check_requests):
+    """check request id -> id of the earliest active check request with the same vendor and invoice number."""
+    from .models import CheckRequest
+    keys = {(vendor_id, number) for _, _, vendor_id, number, _, _ in check_requests if vendor_id and number}
+    if not keys:
+        return {}
+    groups = CheckRequest.objects.filter(
+        vendor__in={vendor_id for vendor_id, _ in keys}, invoice_number__in={number for _, number in keys},
+    ).exclude(status__in=INACTIVE_CHECK_REQUEST_STATUSES).order_by().values('vendor', 'invoice_number').annotate(
+        count=Count('pk'), first=Min('pk'),
+    ).filter(count__gt=1)
+    first_by_key = {(group['vendor'], group['invoice_number']): group['first'] for group in groups}
+    return {
+        pk: first_by_key[(vendor_id, number)]
+        for pk, _, vendor_id, number, _, _ in check_requests
+        if (vendor_id, number) in first_by_key and first_by_key[(vendor_id, number)] != pk
+    }
+
+
+def match_purchase_orders(orders):
+    """
+    Matches the check requests of `orders` ((pk, currency) pairs) and stores the results.
+    Returns (check requests matched, exceptions found).
+    """
+    from .models import CheckRequest, InvoiceMatch, OrderItem
+    po_ids = [pk for pk, _ in orders]
+    currencies = dict(orders)
+
+    ordered, received = defaultdict(Decimal), defaultdict(Decimal)
+    lines = OrderItem.objects.filter(purchase_order__in=po_ids).exclude(line_item_status='cancelled').values_list(
+        'purchase_order', 'gross_amount', 'quantity', 'received_quantity'
+    )
+    for po_id, gross_amount, quantity, received_quantity in lines:
+        ordered[po_id] += gross_amount
+        if quantity:
+            received[po_id] += gross_amount * min(received_quantity, quantity) / quantity
+
+    check_requests = list(
+        CheckRequest.objects.filter(purchase_order__in=po_ids).exclude(status__in=INACTIVE_CHECK_REQUEST_STATUSES)
+        .order_by().values_list('pk', 'purchase_order', 'vendor', 'invoice_number', 'amount', 'currency')
+    )
+    invoiced = defaultdict(Decimal)
+    for _, po_id, _, _, amount, _ in check_requests:
+        invoiced[po_id] += amount
+    duplicates = _duplicates(check_requests)
+
+    matches = []
+    for pk, po_id, _, _, _, currency in check_requests:
+        ordered_amount = ordered[po_id].quantize(CENT)
+        received_amount = received[po_id].quantize(CENT)
+        invoiced_amount = invoiced[po_id]
+        issues = []
+        if invoiced_amount - ordered_amount > _tolerance(ordered_amount):
+            issues.append('over_ordered')
+        if invoiced_amount - received_amount > _tolerance(received_amount):
+            issues.append('over_received')
+        if currency != currencies[po_id]:
+            issues.append('currency_mismatch')
+        if pk in duplicates:
+            issues.append('duplicate_invoice')
+        matches.append(InvoiceMatch(
+            check_request_id=pk, purchase_order_id=po_id, status='exception' if issues else 'matched', issues=issues,
+            ordered_amount=ordered_amount, received_amount=received_amount, invoiced_amount=invoiced_amount,
+            duplicate_of_id=duplicates.get(pk),
+        ))
+
+    with transaction.atomic():
+        # Results of check requests that were since cancelled/rejected or moved to another PO.
+        InvoiceMatch.objects.filter(purchase_order__in=po_ids).exclude(
+            check_request__in=[match.check_request_id for match in matches]
+        ).delete()
+        if matches:
+            InvoiceMatch.objects.bulk_create(
+                matches, update_conflicts=True, unique_fields=['check_request'], update_fields=MATCH_FIELDS,
+            )
+    return len(matches), sum(1 for match in matches if match.issues)
+
+
+def run_three_way_match(batch_size=MATCH_BATCH_SIZE):
+    """Matches every open purchase order, batch_size POs at a time. Returns counts for reporting."""
+    from .models import InvoiceMatch, PurchaseOrder
+    InvoiceMatch.objects.exclude(purchase_order__status__in=OPEN_PO_STATUSES).delete()
+    totals = {'purchase_orders': 0, 'check_requests': 0, 'exceptions': 0}
+    last_pk = 0
+    while True:
+        orders = list(
+            PurchaseOrder.objects.filter(status__in=OPEN_PO_STATUSES, pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'currency')[:batch_size]
+        )
+        if not orders:
+            return totals
+        matched, exceptions = match_purchase_orders(orders)
+        totals['purchase_orders'] += len(orders)
+        totals['check_requests'] += matched
+        totals['exceptions'] += exceptions
+        last_pk = orders[-1][0]
@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 from . import common_views # Import common_views
+from . import attachment_views
 
 router = DefaultRouter()
 # Main procurement views
@@ -18,14 +19,21 @@ router.register(r'contracts', common_views.ContractViewSet, basename='contract')
 router.register(r'gl-accounts', common_views.GLAccountViewSet, basename='glaccount')
 router.register(r'expense-categories', common_views.ExpenseCategoryViewSet, basename='expensecategory')
 router.register(r'recurring-payments', common_views.RecurringPaymentViewSet, basename='recurringpayment')
+router.register(r'vendor-scorecards', views.VendorScorecardViewSet, basename='vendor-scorecard')
+router.register(r'invoice-matches', views.InvoiceMatchViewSet, basename='invoice-match')
 
 # Approval workflow views
 router.register(r'approval-rules', views.ApprovalRuleViewSet, basename='approval-rule')
 router.register(r'approval-steps', views.ApprovalStepViewSet, basename='approval-step')
 
+# Chunked, content-addressed attachment uploads
+router.register(r'attachment-uploads', attachment_views.ChunkedUploadViewSet, basename='attachment-upload')
+router.register(r'attachment-blobs', attachment_views.AttachmentBlobViewSet, basename='attachment-blob')
+
 
 app_name = 'procurement'
 
 urlpatterns = [
+    path('spend-summary/', views.SpendSummaryView.as_view(), name='spend-summary'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,164 @@
+"""
+Vendor scorecards (VendorScorecard): per-vendor delivery and pricing metrics, precomputed so
+vendors can be ranked without reading their order history on each request.
+
+Computed over the vendor's issued POs (COMMITTED_PO_STATUSES) and their non-cancelled lines:
+
+    spend           gross amount of the lines
+    fill rate       received / ordered quantity (received capped at ordered) on POs that have
+                    reached receiving (RECEIVING_PO_STATUSES)
+    on-time rate    share of fully received lines received by the PO's expected delivery date
+                    (lines of POs without an expected date are not rated)
+    lead time       average days from order date to a line being fully received
+    price variance  (invoiced - ordered) / ordered for POs with active check requests, where
+                    invoiced is the check request amount and ordered the POs' line gross amount
+
+"Fully received" is OrderItem.received_date, stamped when received_quantity reaches quantity
+(lines received before the field existed have no date and are left out of on-time and lead time).
+Amounts are summed as recorded, across currencies.
+
+refresh_vendor_scorecards() recomputes a set of vendors with a handful of grouped queries and
+upserts their rows. Saves of POs, lines and check requests schedule a refresh of the affected
+vendor after commit (procurement.signals); the rebuild_vendor_scorecards command recomputes all
+vendors in batches.
+"""
+from decimal import Decimal
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Least
+
+from .spend_rollups import COMMITTED_PO_STATUSES
+
+RECEIVING_PO_STATUSES = ('partially_received', 'fully_received', 'invoiced', 'paid')
+INACTIVE_CHECK_REQUEST_STATUSES = ('rejected', 'cancelled')
+
+REBUILD_BATCH_SIZE = 500  # Vendors recomputed per transaction by rebuild_vendor_scorecards()
+
+RATE_PLACES = Decimal('0.0001')
+
+SCORECARD_METRIC_FIELDS = (
+    'purchase_order_count', 'spend_amount', 'ordered_quantity', 'received_quantity', 'fill_rate',
+    'delivered_line_count', 'on_time_line_count', 'on_time_rate', 'average_lead_time_days',
+    'invoiced_amount', 'invoiced_order_amount', 'price_variance_rate', 'refreshed_at',
+)
+
+
+def _rate(numerator, denominator):
+    if not denominator:
+        return None
+    return (Decimal(numerator) / Decimal(denominator)).quantize(RATE_PLACES)
+
+
+def build_vendor_scorecards(vendor_ids):
+    """Computes (without saving) the VendorScorecards of the given vendors."""
+    from .models import CheckRequest, OrderItem, PurchaseOrder, VendorScorecard
+    vendor_ids = list(vendor_ids)
+    orders = PurchaseOrder.objects.filter(vendor__in=vendor_ids, status__in=COMMITTED_PO_STATUSES)
+    lines = OrderItem.objects.filter(
+        purchase_order__vendor__in=vendor_ids, purchase_order__status__in=COMMITTED_PO_STATUSES,
+    ).exclude(line_item_status='cancelled').order_by()
+    active_check_requests = CheckRequest.objects.filter(
+        purchase_order__vendor__in=vendor_ids,
+    ).exclude(status__in=INACTIVE_CHECK_REQUEST_STATUSES).order_by()
+
+    receiving = Q(purchase_order__status__in=RECEIVING_PO_STATUSES)
+    delivered = Q(received_date__isnull=False)
+    rated = delivered & Q(purchase_order__expected_delivery_date__isnull=False)
+    line_totals = {
+        row['vendor']: row for row in lines.values(vendor=F('purchase_order__vendor')).annotate(
+            spend=Sum('gross_amount'),
+            ordered=Sum('quantity', filter=receiving),
+            received=Sum(Least('received_quantity', 'quantity'), filter=receiving),
+            delivered=Count('pk', filter=delivered),
+            rated=Count('pk', filter=rated),
+            on_time=Count('pk', filter=rated & Q(received_date__lte=F('purchase_order__expected_delivery_date'))),
+            lead_time=Sum(
+                ExpressionWrapper(F('received_date') - F('purchase_order__order_date'), output_field=DurationField()),
+                filter=delivered,
+            ),
+        )
+    }
+    order_counts = dict(orders.order_by().values('vendor').annotate(count=Count('pk')).values_list('vendor', 'count'))
+    invoiced = dict(
+        active_check_requests.values('purchase_order__vendor').annotate(total=Sum('amount'))
+        .values_list('purchase_order__vendor', 'total')
+    )
+    invoiced_ordered = dict(
+        lines.filter(purchase_order__in=active_check_requests.values('purchase_order'))
+        .values('purchase_order__vendor').annotate(total=Sum('gross_amount'))
+        .values_list('purchase_order__vendor', 'total')
+    )
+
+    scorecards = []
+    for vendor_id in vendor_ids:
+        totals = line_totals.get(vendor_id, {})
+        ordered_quantity, received_quantity = totals.get('ordered') or 0, totals.get('received') or 0
+        delivered_lines, lead_time = totals.get('delivered') or 0, totals.get('lead_time')
+        invoiced_amount = invoiced.get(vendor_id) or Decimal('0')
+        invoiced_order_amount = invoiced_ordered.get(vendor_id) or Decimal('0')
+        scorecards.append(VendorScorecard(
+            vendor_id=vendor_id,
+            purchase_order_count=order_counts.get(vendor_id, 0),
+            spend_amount=totals.get('spend') or Decimal('0'),
+            ordered_quantity=ordered_quantity,
+            received_quantity=received_quantity,
+            fill_rate=_rate(received_quantity, ordered_quantity),
+            delivered_line_count=delivered_lines,
+            on_time_line_count=totals.get('on_time') or 0,
+            on_time_rate=_rate(totals.get('on_time') or 0, totals.get('rated')),
+            average_lead_time_days=(
+                (Decimal(lead_time.total_seconds()) / 86400 / delivered_lines).quantize(Decimal('0.01'))
+                if delivered_lines and lead_time is not None else None
+            ),
+            invoiced_amount=invoiced_amount,
+            invoiced_order_amount=invoiced_order_amount,
+            price_variance_rate=_rate(invoiced_amount - invoiced_order_amount, invoiced_order_amount),
+        ))
+    return scorecards
+
+
+def refresh_vendor_scorecards(vendor_ids=(), purchase_order_ids=()):
+    """
+    Recomputes and stores the scorecards of the given vendors and of the vendors of the given
+    purchase orders. Returns the number of scorecards written.
+    """
+    from assets.models import Vendor
+    from .models import PurchaseOrder, VendorScorecard
+    vendor_ids = set(vendor_ids)
+    if purchase_order_ids:
+        # Lines and check requests only count on issued POs; status changes pass the vendor itself.
+        vendor_ids.update(PurchaseOrder.objects.filter(
+            pk__in=purchase_order_ids, status__in=COMMITTED_PO_STATUSES,
+        ).values_list('vendor', flat=True))
+    vendor_ids.discard(None)
+    if not vendor_ids:
+        return 0
+    vendor_ids = sorted(Vendor.objects.filter(pk__in=vendor_ids).values_list('pk', flat=True)) # Skip deleted vendors
+    with transaction.atomic():
+        scorecards = VendorScorecard.objects.bulk_create(
+            build_vendor_scorecards(vendor_ids),
+            update_conflicts=True, unique_fields=['vendor'], update_fields=SCORECARD_METRIC_FIELDS,
+        )
+    return len(scorecards)
+
+
+def schedule_vendor_scorecard_refresh(vendor_ids=(), purchase_order_ids=()):
+    """Refreshes the given vendors' scorecards once the current transaction commits."""
+    vendor_ids = {vendor_id for vendor_id in vendor_ids if vendor_id is not None}
+    purchase_order_ids = {po_id for po_id in purchase_order_ids if po_id is not None}
+    if vendor_ids or purchase_order_ids:
+        transaction.on_commit(partial(refresh_vendor_scorecards, vendor_ids, purchase_order_ids))
+
+
+def rebuild_vendor_scorecards(batch_size=REBUILD_BATCH_SIZE):
+    """Recomputes every vendor's scorecard, batch_size vendors per transaction. Returns the number written."""
+    from assets.models import Vendor
+    written, last_pk = 0, 0
+    while True:
+        batch = list(Vendor.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return written
+        written += refresh_vendor_scorecards(batch)
+        last_pk = batch[-1]
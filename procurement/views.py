@@ -1,28 +1,47 @@
+import datetime
+
 from rest_framework import viewsets, status as http_status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser # Added
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.settings import api_settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.http import StreamingHttpResponse
 
-from .models import PurchaseRequestMemo, PurchaseOrder, OrderItem, CheckRequest  # Added CheckRequest
+from .models import PurchaseRequestMemo, PurchaseOrder, OrderItem, CheckRequest, VendorScorecard, InvoiceMatch  # Added CheckRequest
 from .serializers import (
     PurchaseRequestMemoSerializer,
     PurchaseOrderSerializer,
     OrderItemSerializer,
     CheckRequestSerializer,
+    VendorScorecardSerializer,
+    InvoiceMatchSerializer,
     ApprovalRuleSerializer, # New
+    ApprovalRuleSimulationSerializer,
     ApprovalStepSerializer  # New
 )
-from .models import ApprovalRule, ApprovalStep # New
+from .models import ApprovalRule, ApprovalStep, ApprovalProgress, ApprovalInboxCounter # New
+from .approval_inbox import INBOX_STATUSES, refresh_approval_inbox
+from .approval_simulation import SimulationError, simulate_approval_rules
+from .exports import EXPORT_FORMATS, stream_purchase_orders_csv, stream_purchase_orders_ndjson
+from .payment_runs import PaymentFileError, apply_payment_run, read_payment_file
+from .po_consolidation import consolidate_purchase_memos
+from .spend_rollups import SPEND_SUMMARY_FILTERS, SPEND_SUMMARY_GROUPS, summarize_spend
 from .permissions import IsOwnerOrReadOnly, CanApproveRejectIOM # Added
-from django.db.models import Q # For complex queries
+from django.db.models import F
 from django.contrib.auth.models import Group # For group checks
 
 
 User = get_user_model()
 
+BULK_ACTION_MAX_STEPS = 200 # Upper bound on steps per /approval-steps/bulk-action/ request
+
 
 class PurchaseRequestMemoViewSet(viewsets.ModelViewSet):
     """
@@ -111,14 +130,43 @@ class PurchaseRequestMemoViewSet(viewsets.ModelViewSet):
         if memo.status not in cancellable_statuses:
             return Response({'error': f"Only requests with status {cancellable_statuses} can be cancelled. Current status: {memo.get_status_display()}"}, status=http_status.HTTP_400_BAD_REQUEST)
 
-        # Also cancel any pending approval steps
-        if memo.status == 'pending_approval':
-            memo.approval_steps.filter(status='pending').update(status='skipped', comments='IOM Cancelled by user.')
-
-        memo.status = 'cancelled' # This maps to PurchaseRequestMemo.STATUS_CHOICES[x][0] where x is the index for 'cancelled'
-        memo.save(update_fields=['status'])
+        with transaction.atomic():
+            # Also cancel any pending approval steps
+            if memo.status == 'pending_approval':
+                progress = ApprovalProgress.for_update(ContentType.objects.get_for_model(memo).pk, memo.pk)
+                skipped_ids = list(memo.approval_steps.filter(status='pending').values_list('pk', flat=True))
+                skipped = ApprovalStep.objects.filter(pk__in=skipped_ids).update(status='skipped', comments='IOM Cancelled by user.')
+                progress.move('pending', 'skipped', skipped)
+                refresh_approval_inbox(skipped_ids)
+
+            memo.status = 'cancelled' # This maps to PurchaseRequestMemo.STATUS_CHOICES[x][0] where x is the index for 'cancelled'
+            memo.save(update_fields=['status'])
         return Response(self.get_serializer(memo).data)
 
+    @action(detail=False, methods=['post'])  # TODO: Procurement Officer Role
+    def consolidate(self, request):
+        """
+        Turns approved memos into draft POs, one per (suggested vendor, department), see
+        procurement.po_consolidation. Optional body: memo_ids (default: every approved memo
+        with a suggested vendor) and currency (default: the PO default).
+        """
+        if not request.user.is_staff:
+            return Response({'error': 'Only procurement staff can consolidate memos into purchase orders.'}, status=http_status.HTTP_403_FORBIDDEN)
+        memo_ids = request.data.get('memo_ids')
+        if memo_ids is not None and not (
+            isinstance(memo_ids, list) and all(isinstance(memo_id, int) and not isinstance(memo_id, bool) for memo_id in memo_ids)
+        ):
+            return Response({'error': 'memo_ids must be a list of memo ids.'}, status=http_status.HTTP_400_BAD_REQUEST)
+        currency = request.data.get('currency')
+        if currency is not None and not (isinstance(currency, str) and len(currency) == 3):
+            return Response({'error': 'currency must be a three-letter currency code.'}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        orders = consolidate_purchase_memos(request.user, memo_ids=memo_ids, currency=currency and currency.upper())
+        return Response({
+            'purchase_orders': orders,
+            'memo_count': sum(len(order['memo_ids']) for order in orders),
+        }, status=http_status.HTTP_201_CREATED if orders else http_status.HTTP_200_OK)
+
 
 class ApprovalRuleViewSet(viewsets.ModelViewSet):
     """
@@ -133,7 +181,24 @@ class ApprovalRuleViewSet(viewsets.ModelViewSet):
     serializer_class = ApprovalRuleSerializer
     permission_classes = [IsAuthenticated] # TODO: Replace with IsAdminUser or a custom permission for managing workflow rules.
 
-    # Add any custom logic or override methods if needed, e.g., for validation.
+    @action(detail=False, methods=['post'])
+    def simulate(self, request):
+        """
+        Dry run of rule changes (see procurement.approval_simulation); nothing is saved. E.g.
+        {"rules": [{"id": 3, "min_amount": "5000.00"}], "date_from": "2025-01-01"}
+        returns per rule how many memos it matched before/after and would newly match or drop.
+        """
+        serializer = ApprovalRuleSimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            result = simulate_approval_rules(
+                data['rule_type'], data['rules'], replace=data['replace'], objects=data.get('objects'),
+                date_from=data.get('date_from'), date_to=data.get('date_to'), statuses=data.get('statuses'),
+            )
+        except SimulationError as exc:
+            return Response({'error': str(exc)}, status=http_status.HTTP_400_BAD_REQUEST)
+        return Response(result)
 
 
 class ApprovalStepViewSet(viewsets.ModelViewSet):
@@ -163,38 +228,42 @@ class ApprovalStepViewSet(viewsets.ModelViewSet):
                 'assigned_approver_user', 'assigned_approver_group', 'approved_by'
             ).order_by('-created_at')
 
-        user_groups = user.groups.all()
         # User can see steps if:
         # 1. Directly assigned to them (could be as a delegatee)
         # 2. Assigned to a group they are part of
         # 3. They were the original assigner of a step that was then delegated
+        # These are materialized in the user's approval inbox (one entry per step, see procurement.approval_inbox).
         return ApprovalStep.objects.filter(
-            (Q(assigned_approver_user=user) |
-             Q(assigned_approver_group__in=user_groups) |
-             Q(original_assigned_approver_user=user)),
-            status='pending' # Typically users only care about pending steps for action
-        ).distinct().select_related( # Added distinct() in case a user is both original and in group (less likely but safe)
+            inbox_entries__user=user,
+            status__in=INBOX_STATUSES # The steps awaiting a decision, as counted by the inbox counter
+        ).select_related(
             # 'purchase_request_memo', # Removed: content_object is GFK
             'content_type', 'approval_rule',
             'assigned_approver_user', 'assigned_approver_group', 'approved_by'
         ).order_by('content_type', 'object_id', 'step_order') # Changed ordering
 
-    def _can_action_step(self, user, step):
-        """ Helper to check if a user can action a step. """
+    def _can_action_step(self, user, step, user_group_ids=None):
+        """
+        Helper to check if a user can action a step.
+        Pass user_group_ids (the user's group pks) when checking many steps, to avoid a query per step.
+        """
         if step.status != 'pending': # and step.status != 'delegated' if that was used
             return False, "This step is not pending action."
 
         # Check if the user is the directly assigned user (could be a delegatee)
-        is_directly_assigned_user = step.assigned_approver_user == user
+        is_directly_assigned_user = step.assigned_approver_user_id == user.pk
 
         # Check if the user is a member of the assigned group
         is_in_assigned_group = False
-        if step.assigned_approver_group and user.groups.filter(pk=step.assigned_approver_group.pk).exists():
-            is_in_assigned_group = True
+        if step.assigned_approver_group_id:
+            if user_group_ids is not None:
+                is_in_assigned_group = step.assigned_approver_group_id in user_group_ids
+            else:
+                is_in_assigned_group = user.groups.filter(pk=step.assigned_approver_group_id).exists()
 
         # Check if the user is the original assigner of a delegated step
         is_original_assigner = False
-        if step.original_assigned_approver_user and step.original_assigned_approver_user == user:
+        if step.original_assigned_approver_user_id and step.original_assigned_approver_user_id == user.pk:
             # This means the step was delegated, and the current user is the one who delegated it.
             # Typically, the original assigner might still want to action it.
             is_original_assigner = True
@@ -208,6 +277,46 @@ class ApprovalStepViewSet(viewsets.ModelViewSet):
 
         return True, ""
 
+    @action(detail=False, methods=['get'])
+    def inbox(self, request):
+        """
+        The requesting user's pending approvals, newest first, read from their approval inbox.
+        Keyset-paginated: pass the returned 'next_cursor' back as ?cursor= for the next page.
+        ?page_size= defaults to the API page size (max 100).
+        """
+        try:
+            page_size = min(int(request.query_params.get('page_size', api_settings.PAGE_SIZE or 10)), 100)
+            cursor = request.query_params.get('cursor')
+            cursor = int(cursor) if cursor else None
+        except ValueError:
+            return Response({'error': 'cursor and page_size must be integers.'}, status=http_status.HTTP_400_BAD_REQUEST)
+        if page_size < 1:
+            return Response({'error': 'page_size must be at least 1.'}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        steps = ApprovalStep.objects.filter(inbox_entries__user=request.user, status__in=INBOX_STATUSES)
+        if cursor is not None:
+            # pk, not inbox_entries__step_id: a second filter() on the relation would join it again
+            steps = steps.filter(pk__lt=cursor)
+        steps = list(steps.select_related(
+            'content_type', 'approval_rule',
+            'assigned_approver_user', 'assigned_approver_group', 'approved_by'
+        ).order_by('-pk')[:page_size + 1])
+
+        next_cursor = None
+        if len(steps) > page_size:
+            steps = steps[:page_size]
+            next_cursor = str(steps[-1].pk)
+        return Response({
+            'results': self.get_serializer(steps, many=True).data,
+            'next_cursor': next_cursor,
+        })
+
+    @action(detail=False, methods=['get'], url_path='inbox-count')
+    def inbox_count(self, request):
+        """Number of pending approvals in the requesting user's inbox (one row read; for badge polling)."""
+        pending_count = ApprovalInboxCounter.objects.filter(user=request.user).values_list('pending_count', flat=True).first()
+        return Response({'pending_count': pending_count or 0})
+
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """
@@ -220,56 +329,29 @@ class ApprovalStepViewSet(viewsets.ModelViewSet):
         user = request.user
         comments = request.data.get('comments', '')
 
-        can_action, message = self._can_action_step(user, step)
-        if not can_action:
-            return Response({'error': message}, status=http_status.HTTP_403_FORBIDDEN)
-
-        step.status = 'approved'
-        step.approved_by = user
-        step.decision_date = timezone.now()
-        step.comments = comments
-        step.save()
-
-        # Check if this approval completes the IOM (now generic)
-        parent_iom = step.content_object
-
-        # Need to get the related manager for approval_steps based on the GFK
-        # This assumes 'approval_steps_gfk' is how you'd query from the parent_iom side.
-        # This related name needs to be set up on the ApprovalStep's GFK or handled via ContentType.
-        # For now, let's query ApprovalStep directly.
-        from django.contrib.contenttypes.models import ContentType
-        parent_content_type = ContentType.objects.get_for_model(parent_iom)
-
-        pending_steps = ApprovalStep.objects.filter(
-            content_type=parent_content_type,
-            object_id=parent_iom.pk,
-            status='pending'
-        ).exists()
-        rejected_steps = ApprovalStep.objects.filter(
-            content_type=parent_content_type,
-            object_id=parent_iom.pk,
-            status='rejected'
-        ).exists()
-
-        if not pending_steps and not rejected_steps:
-            # All steps are now actioned (approved or skipped), and none are rejected.
-            # Check if all required steps (non-skipped) are approved.
-            # Use parent_iom consistently
-            all_required_approved = not parent_iom.approval_steps.filter(status__in=['pending', 'rejected']).exclude(status='skipped').exists()
-
-            if all_required_approved:
-                 # Double check if all non-skipped steps are indeed 'approved'
-                are_all_actually_approved = True
-                for s in parent_iom.approval_steps.exclude(status='skipped'): # Use parent_iom
-                    if s.status != 'approved':
-                        are_all_actually_approved = False
-                        break
-                if are_all_actually_approved:
-                    parent_iom.status = 'approved' # Use parent_iom
-                    parent_iom.approver = user # Who took the final approving action for the IOM
-                    parent_iom.decision_date = timezone.now()
-                    parent_iom.approver_comments = f"Final approval step by {user.username}. Step comments: {comments}"
-                    parent_iom.save(update_fields=['status', 'approver', 'decision_date', 'approver_comments']) # Use parent_iom
+        with transaction.atomic():
+            # Lock the object's progress row, then re-read the step: concurrent decisions on the
+            # same IOM queue here, and a step actioned meanwhile is no longer pending.
+            progress = ApprovalProgress.for_update(step.content_type_id, step.object_id)
+            step = ApprovalStep.objects.select_for_update().get(pk=step.pk)
+
+            can_action, message = self._can_action_step(user, step)
+            if not can_action:
+                return Response({'error': message}, status=http_status.HTTP_403_FORBIDDEN)
+
+            previous_status = step.status
+            step.status = 'approved'
+            step.approved_by = user
+            step.decision_date = timezone.now()
+            step.comments = comments
+            step._approval_progress_tracked = True # Counts moved below
+            step.save()
+            progress.move(previous_status, 'approved')
+            refresh_approval_inbox([step.pk])
+
+            # All non-skipped steps approved and none rejected: this approval completes the IOM (now generic)
+            if progress.is_fully_approved:
+                self._mark_parent_approved(step.content_object, user, comments)
 
         return Response(self.get_serializer(step).data)
 
@@ -290,18 +372,37 @@ class ApprovalStepViewSet(viewsets.ModelViewSet):
         if not comments:
             return Response({'error': 'Comments are required for rejection.'}, status=http_status.HTTP_400_BAD_REQUEST)
 
-        can_action, message = self._can_action_step(user, step)
-        if not can_action:
-            return Response({'error': message}, status=http_status.HTTP_403_FORBIDDEN)
+        with transaction.atomic():
+            progress = ApprovalProgress.for_update(step.content_type_id, step.object_id)
+            step = ApprovalStep.objects.select_for_update().get(pk=step.pk)
+
+            can_action, message = self._can_action_step(user, step)
+            if not can_action:
+                return Response({'error': message}, status=http_status.HTTP_403_FORBIDDEN)
+
+            previous_status = step.status
+            step.status = 'rejected'
+            step.approved_by = user # User who actioned
+            step.decision_date = timezone.now()
+            step.comments = comments
+            step._approval_progress_tracked = True # Counts moved below
+            step.save()
+            progress.move(previous_status, 'rejected')
+
+            skipped_ids = self._mark_parent_rejected(step.content_object, step, progress, user, comments) # Changed from purchase_request_memo
+            refresh_approval_inbox([step.pk, *skipped_ids])
+
+        return Response(self.get_serializer(step).data)
 
-        step.status = 'rejected'
-        step.approved_by = user # User who actioned
-        step.decision_date = timezone.now()
-        step.comments = comments
-        step.save()
+    def _mark_parent_approved(self, parent_iom, user, comments):
+        parent_iom.status = 'approved'
+        parent_iom.approver = user # Who took the final approving action for the IOM
+        parent_iom.decision_date = timezone.now()
+        parent_iom.approver_comments = f"Final approval step by {user.username}. Step comments: {comments}"
+        parent_iom.save(update_fields=['status', 'approver', 'decision_date', 'approver_comments'])
 
-        # Update IOM status to rejected
-        iom = step.content_object # Changed from purchase_request_memo
+    def _mark_parent_rejected(self, iom, step, progress, user, comments):
+        """Rejects the IOM at `step` and skips its other pending steps. Returns the skipped step ids."""
         iom.status = 'rejected'
         iom.approver = user # User who rejected
         iom.decision_date = timezone.now()
@@ -309,10 +410,107 @@ class ApprovalStepViewSet(viewsets.ModelViewSet):
         iom.save(update_fields=['status', 'approver', 'decision_date', 'approver_comments'])
 
         # Optionally, mark other pending steps for this IOM as 'skipped' or 'cancelled_due_to_rejection'
-        iom.approval_steps.filter(status='pending').update(status='skipped', comments=f"IOM rejected at step {step.step_order}.")
+        skipped_ids = list(ApprovalStep.objects.filter(
+            content_type_id=step.content_type_id, object_id=step.object_id, status='pending'
+        ).values_list('pk', flat=True))
+        skipped = ApprovalStep.objects.filter(pk__in=skipped_ids).update(
+            status='skipped', comments=f"IOM rejected at step {step.step_order}."
+        )
+        progress.move('pending', 'skipped', skipped)
+        return skipped_ids
 
+    @action(detail=False, methods=['post'], url_path='bulk-action')
+    def bulk_action(self, request):
+        """
+        Approves or rejects many steps in one transaction.
+        Body: {"step_ids": [...], "decision": "approve" | "reject", "comments": "..."} (comments required to reject).
+        Each step is checked as in approve/reject; steps that can't be actioned are reported
+        without blocking the others. Parents are loaded once per content type and their
+        status is recomputed once each.
+        Returns {"results": [{"id", "status"[, "error"]}, ...], "processed": n, "failed": n}.
+        """
+        step_ids = request.data.get('step_ids')
+        decision = request.data.get('decision')
+        comments = request.data.get('comments', '')
+        user = request.user
 
-        return Response(self.get_serializer(step).data)
+        if decision not in ('approve', 'reject'):
+            return Response({'error': "decision must be 'approve' or 'reject'."}, status=http_status.HTTP_400_BAD_REQUEST)
+        if not isinstance(step_ids, list) or not step_ids or not all(isinstance(step_id, int) for step_id in step_ids):
+            return Response({'error': 'step_ids must be a non-empty list of step IDs.'}, status=http_status.HTTP_400_BAD_REQUEST)
+        if len(step_ids) > BULK_ACTION_MAX_STEPS:
+            return Response({'error': f'At most {BULK_ACTION_MAX_STEPS} steps can be actioned at once.'}, status=http_status.HTTP_400_BAD_REQUEST)
+        if decision == 'reject' and not comments:
+            return Response({'error': 'Comments are required for rejection.'}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        new_status = 'approved' if decision == 'approve' else 'rejected'
+        step_ids = list(dict.fromkeys(step_ids)) # Dedupe, keep request order
+        results = {}
+
+        with transaction.atomic():
+            visible = self.get_queryset().filter(pk__in=step_ids)
+            keys = set(visible.values_list('content_type_id', 'object_id'))
+            # Lock every parent's progress row, then re-read the steps (as in approve/reject).
+            progress_by_parent = ApprovalProgress.for_update_many(keys)
+            steps = {
+                step.pk: step
+                for step in ApprovalStep.objects.select_for_update().filter(pk__in=visible.values('pk'))
+            }
+            user_group_ids = set(user.groups.values_list('pk', flat=True))
+
+            decided = []
+            now = timezone.now()
+            for step_id in step_ids:
+                step = steps.get(step_id)
+                if step is None:
+                    results[step_id] = {'id': step_id, 'status': 'error', 'error': 'Not found.'}
+                    continue
+                can_action, message = self._can_action_step(user, step, user_group_ids)
+                if not can_action:
+                    results[step_id] = {'id': step_id, 'status': 'error', 'error': message}
+                    continue
+                step.status = new_status
+                step.approved_by = user # User who actioned
+                step.decision_date = now
+                step.comments = comments
+                step.updated_at = now # bulk_update skips auto_now
+                decided.append(step)
+                results[step_id] = {'id': step_id, 'status': new_status}
+
+            ApprovalStep.objects.bulk_update(decided, ['status', 'approved_by', 'decision_date', 'comments', 'updated_at'])
+
+            # Load the affected parents with one query per content type
+            decided_by_parent = {}
+            for step in decided:
+                decided_by_parent.setdefault((step.content_type_id, step.object_id), []).append(step)
+            parents = {}
+            object_ids_by_type = {}
+            for content_type_id, object_id in decided_by_parent:
+                object_ids_by_type.setdefault(content_type_id, []).append(object_id)
+            for content_type_id, object_ids in object_ids_by_type.items():
+                model = ContentType.objects.get_for_id(content_type_id).model_class()
+                for parent in model.objects.filter(pk__in=object_ids):
+                    parents[(content_type_id, parent.pk)] = parent
+
+            touched_step_ids = [step.pk for step in decided]
+            for key, parent_steps in decided_by_parent.items():
+                progress = progress_by_parent[key]
+                progress.move('pending', new_status, len(parent_steps))
+                if new_status == 'approved':
+                    if progress.is_fully_approved:
+                        self._mark_parent_approved(parents[key], user, comments)
+                else:
+                    first_step = min(parent_steps, key=lambda s: s.step_order)
+                    touched_step_ids.extend(self._mark_parent_rejected(parents[key], first_step, progress, user, comments))
+            refresh_approval_inbox(touched_step_ids)
+
+        ordered_results = [results[step_id] for step_id in step_ids]
+        failed = sum(1 for result in ordered_results if result['status'] == 'error')
+        return Response({
+            'results': ordered_results,
+            'processed': len(ordered_results) - failed,
+            'failed': failed,
+        })
 
 
 class PurchaseOrderViewSet(viewsets.ModelViewSet):
@@ -360,6 +558,23 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save()
 
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Streams every PO matching the list filters with its line items, one row per line.
+        ?export_format=csv (default) or ndjson. Not paginated.
+        """
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': f"export_format must be one of {sorted(EXPORT_FORMATS)}."}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        stream = stream_purchase_orders_csv if export_format == 'csv' else stream_purchase_orders_ndjson
+        content_type, extension = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(stream(queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="purchase_orders_{timezone.now():%Y%m%d_%H%M%S}.{extension}"'
+        return response
+
 
 class OrderItemViewSet(viewsets.ModelViewSet):
     serializer_class = OrderItemSerializer
@@ -480,6 +695,26 @@ class CheckRequestViewSet(viewsets.ModelViewSet):
         instance.save()
         return Response(self.get_serializer(instance).data)
 
+    @action(detail=False, methods=['post'], url_path='payment-run', parser_classes=[MultiPartParser, FormParser])  # TODO: Accounts Payable Role
+    def payment_run(self, request):
+        """
+        Applies a payment file (multipart 'file', CSV: cr_id, transaction_id, payment_method, payment_date[, status])
+        to many check requests in one transaction, see procurement.payment_runs. Pass dry_run=true to only validate.
+        Returns a per-row report.
+        """
+        if not request.user.is_staff:
+            return Response({'error': 'Only accounts staff can process payment runs.'}, status=http_status.HTTP_403_FORBIDDEN)
+        payment_file = request.FILES.get('file')
+        if payment_file is None:
+            return Response({'error': "A payment file is required in the 'file' field."}, status=http_status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+        try:
+            report = apply_payment_run(read_payment_file(payment_file.file), self.get_queryset(), dry_run=dry_run)
+        except PaymentFileError as exc:
+            return Response({'error': str(exc)}, status=http_status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])  # TODO: Requester or Admin
     def cancel(self, request, pk=None):
         instance = self.get_object()
@@ -495,3 +730,92 @@ class CheckRequestViewSet(viewsets.ModelViewSet):
         instance.status = CheckRequest.CHECK_REQUEST_STATUS_CHOICES[6][0]  # 'cancelled'
         instance.save()
         return Response(self.get_serializer(instance).data)
+
+
+class SpendSummaryView(APIView):
+    """
+    Spend totals from the daily rollups (see procurement.spend_rollups).
+
+    GET spend-summary/?date_from=2025-01-01&date_to=2025-03-31&group_by=month,department
+    Optional filters: department, project, gl_account, vendor (ids) and currency.
+    Rows are always split by currency.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        group_by = [name.strip() for name in params.get('group_by', '').split(',') if name.strip()]
+        unknown = [name for name in group_by if name not in SPEND_SUMMARY_GROUPS]
+        if unknown:
+            return Response(
+                {'error': f"Unknown group_by {unknown}; use any of {sorted(SPEND_SUMMARY_GROUPS)}."},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            if params.get(name):
+                try:
+                    dates[name] = datetime.date.fromisoformat(params[name])
+                except ValueError:
+                    return Response({'error': f"{name} must be a YYYY-MM-DD date."}, status=http_status.HTTP_400_BAD_REQUEST)
+        filters = {name: params.get(name) for name in SPEND_SUMMARY_FILTERS}
+        for name in SPEND_SUMMARY_FILTERS:
+            if name != 'currency' and filters[name] and not filters[name].isdigit():
+                return Response({'error': f"{name} must be an id."}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        rows = list(summarize_spend(group_by, **dates, **filters))
+        return Response({'group_by': group_by, 'results': rows})
+
+
+class NullsLastOrderingFilter(OrderingFilter):
+    """OrderingFilter that sorts null values last in both directions (vendors with no rating yet)."""
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        return queryset.order_by(*(
+            F(name[1:]).desc(nulls_last=True) if name.startswith('-') else F(name).asc(nulls_last=True)
+            for name in ordering
+        ))
+
+
+class VendorScorecardViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Precomputed vendor scorecards (see procurement.vendor_scorecards), e.g.
+    GET vendor-scorecards/?ordering=-on_time_rate,average_lead_time_days&search=acme
+    """
+    queryset = VendorScorecard.objects.select_related('vendor')
+    serializer_class = VendorScorecardSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [SearchFilter, NullsLastOrderingFilter]
+    search_fields = ['vendor__name']
+    ordering_fields = [
+        'spend_amount', 'purchase_order_count', 'fill_rate', 'on_time_rate', 'average_lead_time_days',
+        'price_variance_rate', 'vendor__name',
+    ]
+    ordering = ['-spend_amount', 'vendor']
+
+
+class InvoiceMatchViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Three-way match results (see procurement.three_way_match), refreshed by the nightly
+    run_three_way_match command. Filters: status (matched/exception), purchase_order, issue.
+    Like check requests, non-staff users only see the results of their own.
+    """
+    serializer_class = InvoiceMatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = InvoiceMatch.objects.select_related('check_request', 'purchase_order')
+        if not (user.is_staff or user.is_superuser):
+            queryset = queryset.filter(check_request__requested_by=user)
+        params = self.request.query_params
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('purchase_order', '').isdigit():
+            queryset = queryset.filter(purchase_order=params['purchase_order'])
+        if params.get('issue'):
+            queryset = queryset.filter(issues__icontains=f'"{params["issue"]}"') # JSON list as text; works on every backend
+        return queryset
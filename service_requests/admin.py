@@ -31,6 +31,7 @@ class ServiceRequestSequenceAdmin(admin.ModelAdmin):
         "current_alpha_part_char1",
         "current_alpha_part_char2",
         "current_numeric_part",
+        "current_alpha_overflow",
     )
 
     # Make sure this model can only have one instance edited
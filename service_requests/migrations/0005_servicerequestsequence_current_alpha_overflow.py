@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_requests', '0004_servicerequest_catalog_item_historicalservicerequest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicerequestsequence',
+            name='current_alpha_overflow',
+            field=models.PositiveIntegerField(default=0, help_text='Times the two-letter alpha part has wrapped past ZZ (widened format only, e.g. 1 for SR-AAA-0001)'),
+        ),
+    ]
@@ -1,18 +1,21 @@
 # itsm_project/service_requests/models.py
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.db import transaction  # Import transaction for atomic operations
 from simple_history.models import HistoricalRecords # Added for model history
+from core_api.field_tracking import FieldTrackerMixin
+from core_api.sequences import AlphaNumericSequenceMixin, format_id as format_sequence_id, reserve as reserve_sequence_ids
 
 User = get_user_model()
 
 
 # --- New Model for Sequence Generation ---
-class ServiceRequestSequence(models.Model):
+class ServiceRequestSequence(AlphaNumericSequenceMixin, models.Model):
     """
     Model to store the current state of the ServiceRequest ID sequence.
     There should only ever be one instance of this model (pk=1).
+    The rollover logic is shared with ProcurementIDSequence (see core_api.sequences).
     """
+    sequence_prefixes = ("SR",)
 
     current_alpha_part_char1 = models.CharField(
         max_length=1,
@@ -27,12 +30,17 @@ class ServiceRequestSequence(models.Model):
     current_numeric_part = models.IntegerField(
         default=0, help_text="Current numeric value (0-9999)"
     )
+    current_alpha_overflow = models.PositiveIntegerField(
+        default=0, help_text="Times the two-letter alpha part has wrapped past ZZ (widened format only, e.g. 1 for SR-AAA-0001)"
+    )
 
     class Meta:
         verbose_name = "Service Request ID Sequence"
         verbose_name_plural = "Service Request ID Sequences"
 
     def __str__(self):
+        if self.current_alpha_overflow:
+            return f"Current SR ID: {format_sequence_id('SR', self.current_position, widened=True)[3:]}"
         return f"Current SR ID: {self.current_alpha_part_char1}{self.current_alpha_part_char2}-{self.current_numeric_part:04d}"
 
     @classmethod
@@ -41,64 +49,13 @@ class ServiceRequestSequence(models.Model):
         Atomically increments and retrieves the next sequence for ServiceRequest IDs.
         Handles both numeric and alphanumeric parts.
         """
-        with transaction.atomic():
-            # Get or create the single instance, and then lock it for update
-            seq_instance, created = cls.objects.select_for_update().get_or_create(
-                pk=1,
-                defaults={
-                    "current_alpha_part_char1": "A",
-                    "current_alpha_part_char2": "A",
-                    "current_numeric_part": 0,
-                },
-            )
-
-            # --- Retrieve current integer values first ---
-            current_numeric = seq_instance.current_numeric_part
-            current_char1_val = ord(seq_instance.current_alpha_part_char1) - ord("A")
-            current_char2_val = ord(seq_instance.current_alpha_part_char2) - ord("A")
-
-            # --- Perform logic on these integer values ---
-            next_numeric = current_numeric + 1
-            next_char1_val = current_char1_val
-            next_char2_val = current_char2_val
-
-            # Check if numeric part overflows (e.g., 9999 -> 10000)
-            if next_numeric > 9999:  # If it's 10000 or more, reset and carry over
-                next_numeric = 1  # Reset numeric part to 1
-
-                # Increment alphanumeric part
-                next_char2_val += 1
-                if next_char2_val >= 26:  # 'Z' + 1
-                    next_char2_val = 0  # Reset second char to 'A'
-                    next_char1_val += 1  # Increment first char
-
-                    if (
-                        next_char1_val >= 26
-                    ):  # 'Z' + 1 for first char (exhausted ZZ-9999)
-                        # This means we've exhausted ZZ-9999. You need a strategy for this.
-                        # For now, we'll raise an error. In a real system, you might log, alert, or
-                        # implement a third character (AAA).
-                        raise ValueError(
-                            "Service Request ID sequence exhausted (ZZ-9999 reached). Please implement a larger sequence or reset."
-                        )
-
-            # --- Update the seq_instance fields with the calculated next values ---
-            seq_instance.current_numeric_part = next_numeric
-            seq_instance.current_alpha_part_char1 = chr(ord("A") + next_char1_val)
-            seq_instance.current_alpha_part_char2 = chr(ord("A") + next_char2_val)
-
-            seq_instance.save()  # Persist the updated sequence state to the database
-
-            # Format the next ID based on the now-saved values
-            alpha_part = f"{seq_instance.current_alpha_part_char1}{seq_instance.current_alpha_part_char2}"
-            numeric_part = (
-                f"{seq_instance.current_numeric_part:04d}"  # Pad with leading zeros
-            )
-            return f"SR-{alpha_part}-{numeric_part}"
+        return reserve_sequence_ids("SR", 1)[0]
 
 
 # --- Update ServiceRequest Model ---
-class ServiceRequest(models.Model):
+class ServiceRequest(FieldTrackerMixin, models.Model):
+    tracked_fields = ('status', 'assigned_to')
+
     REQUEST_STATUS_CHOICES = [
         ("new", "New"),
         ("in_progress", "In Progress"),
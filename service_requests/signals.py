@@ -12,12 +12,14 @@ def send_service_request_assignment_notification(sender, instance, created, **kw
     """
     Send a notification when a service request is assigned or re-assigned.
     """
-    if instance.assigned_to and instance.assigned_to.email:
-        subject = ""
+    # Only a new assignment or a change of assignee is notified (see FieldTrackerMixin).
+    if not instance.assigned_to_id or not (created or instance.has_changed('assigned_to')):
+        return
+
+    if instance.assigned_to.email:
         if created:
             subject = f"New Service Request Assigned to You: {instance.request_id} - {instance.title}"
         else:
-            # Similar to incidents, this doesn't track if assigned_to specifically changed.
             subject = f"Service Request Updated & Assigned to You: {instance.request_id} - {instance.title}"
 
         message = (
@@ -51,6 +53,3 @@ def send_service_request_assignment_notification(sender, instance, created, **kw
         recipient_list = [instance.assigned_to.email]
 
         send_notification_email(subject, message, recipient_list, html_message=html_message)
-    elif not instance.assigned_to:
-        # Optional: Handle de-assignment notification
-        pass
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:36
+
+import core_api.approval_timers
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='approvalstep',
+            name='due_at',
+            field=models.DateTimeField(blank=True, default=core_api.approval_timers.approval_step_due_at, help_text='When the approver is reminded if the step is still pending', null=True),
+        ),
+        migrations.AddField(
+            model_name='approvalstep',
+            name='escalation_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='approvalstep',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['due_at'], name='workflows_step_due_idx'),
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
+from core_api.approval_timers import approval_step_due_at
+
 User = get_user_model()
 
 
@@ -70,6 +72,14 @@ class ApprovalStep(models.Model):
     )
     comments = models.TextField(blank=True, null=True)
     approved_at = models.DateTimeField(null=True, blank=True)
+    # Escalation timer (see procurement.approval_escalation)
+    due_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        default=approval_step_due_at,
+        help_text="When the approver is reminded if the step is still pending",
+    )
+    escalation_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         verbose_name = "Approval Step"
@@ -77,6 +87,13 @@ class ApprovalStep(models.Model):
         # Ensure a request only has one step at a given order for a given approver
         unique_together = ("approval_request", "step_order", "approver")
         ordering = ["step_order"]
+        indexes = [
+            models.Index(
+                fields=["due_at"],
+                name="workflows_step_due_idx",
+                condition=models.Q(status="pending"),
+            ),
+        ]
 
     def __str__(self):
         return f"Step {self.step_order} for APR-{self.approval_request.id} by {self.approver.username}"
@@ -1,6 +1,7 @@
 # workflows/serializers.py
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
+from core_api.serializers import GenericPrefetchListSerializer
 from .models import ApprovalRequest, ApprovalStep, User # Assuming User is imported from models
 
 class ContentObjectRelatedField(serializers.RelatedField):
@@ -56,6 +57,9 @@ class ApprovalRequestSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['content_type', 'object_id', 'initiated_by', 'created_at', 'updated_at'] # System-set fields
+        # Load the content objects of a page with one query per content type
+        list_serializer_class = GenericPrefetchListSerializer
+        generic_prefetch = {'content_object': None}
         extra_kwargs = {
             'initiated_by': {'queryset': User.objects.all(), 'allow_null': True, 'required': False}
         }